@@ -2,9 +2,186 @@ from __future__ import annotations
 
 import argparse
 import asyncio
+import json
+from pathlib import Path
+from typing import Optional
 
 from .config import Config
-from .orchestrator import SkillFactoryOrchestrator
+from .models import SkillSpec
+from .orchestrator import (
+    SkillFactoryOrchestrator,
+    duration_history,
+    iter_skills_todo,
+    open_job_store,
+    results_stream_path,
+    schedule,
+)
+from .results_stream import (
+    EVENT_RESULT,
+    EVENT_RUN_END,
+    EVENT_RUN_START,
+    follow_records,
+    last_run,
+    read_records,
+    summarize,
+)
+from .utils.docker_multilang import MultiLangDockerRunner
+from .utils.docker_snapshots import normalize_dependencies
+
+
+def _build_images(args: argparse.Namespace) -> int:
+    runner = MultiLangDockerRunner()
+    results = asyncio.run(runner.build_toolchain_images(force=args.force))
+    failed = 0
+    for language, image in results.items():
+        if image is None:
+            failed += 1
+            print(f"{language}: build failed")
+        else:
+            print(f"{language}: {image}")
+    return 1 if failed else 0
+
+
+def _todo_dependencies(skill: SkillSpec, config: dict) -> Optional[str]:
+    """
+    技能要预取的依赖文件内容，没有可预取的内容时返回 None
+
+    已生成的技能使用 scripts/ 下的依赖文件；尚未生成的技能使用任务清单中声明的 dependencies。
+    未声明依赖时，需要额外工具链的语言（TypeScript 的 ts-node）仍预取一个空依赖文件，
+    把工具链写入缓存。
+    """
+    deps_file = config["deps_file"]
+    deps_path = Config.SKILLS_DIR / skill.name / "scripts" / deps_file
+    if deps_path.exists():
+        return deps_path.read_text(encoding="utf-8")
+    if not skill.dependencies and not config.get("toolchain_cmd"):
+        return None
+    if deps_file == "requirements.txt":
+        return "".join(f"{dep}\n" for dep in skill.dependencies)
+    packages = {}
+    for dep in skill.dependencies:
+        # npm 形式的 name@version，scope 包（@types/node）的 @ 前缀不是版本分隔符
+        name, _, version = dep[1:].partition("@")
+        packages[dep[0] + name] = version or "*"
+    return json.dumps({"name": "prefetch", "version": "1.0.0", "dependencies": packages}, indent=2)
+
+
+async def _prefetch_todos() -> int:
+    """把任务清单中技能的依赖预取到共享缓存（已生成的技能按依赖文件，其余按清单声明）"""
+    runner = MultiLangDockerRunner()
+    semaphore = asyncio.Semaphore(Config.MAX_CONCURRENT_WORKERS)
+    seen: set[tuple[str, str]] = set()
+    jobs = []
+
+    for skill in iter_skills_todo():
+        config = runner.LANGUAGE_CONFIG.get(skill.language)
+        if config is None:
+            print(f"{skill.name}: unsupported language {skill.language}")
+            continue
+        dependencies = _todo_dependencies(skill, config)
+        if dependencies is None:
+            print(f"{skill.name}: no {config['deps_file']} or declared dependencies, skipped")
+            continue
+        key = (skill.language, normalize_dependencies(dependencies, config["deps_file"]))
+        if key in seen:
+            continue
+        seen.add(key)
+        jobs.append((skill, dependencies))
+
+    async def _prefetch(skill, dependencies) -> bool:
+        async with semaphore:
+            ok, log = await runner.prefetch_dependencies(dependencies, skill.language)
+        print(f"{skill.name}: {'ok' if ok else 'failed'}")
+        if not ok:
+            print(log.strip()[-2000:])
+        return ok
+
+    results = await asyncio.gather(*[_prefetch(skill, deps) for skill, deps in jobs])
+    return 0 if all(results) else 1
+
+
+def _format_progress(summary: dict) -> str:
+    counts = " ".join(f"{status}={count}" for status, count in sorted(summary["counts"].items()))
+    state = "finished" if summary["finished"] else "running"
+    total = summary["total"] if summary["total"] is not None else "?"
+    return (
+        f"run {summary['run_id']} ({state}, started {summary['started_at']}): "
+        f"{summary['done']}/{total} done {counts}".rstrip()
+    )
+
+
+def _format_result(record: dict) -> str:
+    line = f"{record.get('ts', '')}  {record.get('status', ''):<16} {record.get('skill_name', '')}"
+    error = (record.get("error_log") or "").strip().splitlines()
+    if record.get("status") not in ("success", "skipped") and error:
+        line += f"  | {error[-1][:120]}"
+    return line
+
+
+def _show_status(args: argparse.Namespace) -> int:
+    """显示最近一次运行的进度；--follow 时持续输出新完成的技能直到运行结束"""
+    path = results_stream_path()
+    run = last_run(read_records(path))
+    if not run and not args.follow:
+        print(f"No runs recorded in {path}")
+        return 1
+
+    for record in run:
+        if record.get("event") == EVENT_RESULT:
+            print(_format_result(record))
+    if run:
+        print(_format_progress(summarize(run)))
+    if not args.follow or (run and summarize(run)["finished"]):
+        return 0
+
+    try:
+        for record in follow_records(path, poll_interval=args.interval, from_start=False):
+            event = record.get("event")
+            if event == EVENT_RUN_START:
+                run = [record]
+                print(f"run {record.get('run_id')} started")
+                continue
+            if not run or record.get("run_id") != run[0].get("run_id"):
+                continue
+            run.append(record)
+            if event == EVENT_RESULT:
+                print(_format_result(record))
+                print(_format_progress(summarize(run)))
+            elif event == EVENT_RUN_END:
+                print(_format_progress(summarize(run)))
+                return 0
+    except KeyboardInterrupt:
+        return 0
+    return 0
+
+
+def _format_counts(counts: dict) -> str:
+    total = sum(counts.values())
+    parts = ", ".join(f"{status} {n}" for status, n in sorted(counts.items()))
+    return f"{total} jobs" + (f" ({parts})" if parts else "")
+
+
+def _enqueue(args: argparse.Namespace) -> int:
+    store = open_job_store()
+    # 任务库按入队顺序领取，入队前按预测耗时最长优先排序
+    predictor = duration_history().load_predictor(Config.DURATION_MIN_SAMPLES)
+    count = store.enqueue(
+        schedule(iter_skills_todo(Path(args.file) if args.file else None), predictor)
+    )
+    print(f"Enqueued {count} skills into {store.path}")
+    print(_format_counts(store.counts_sync()))
+    return 0
+
+
+def _show_jobs(args: argparse.Namespace) -> int:
+    store = open_job_store()
+    if args.retry_failed:
+        print(f"Re-queued {store.retry_failed()} failed jobs")
+    print(_format_counts(store.counts_sync()))
+    for skill_name, attempts, error in store.failed_jobs():
+        first_line = error.strip().splitlines()[0] if error.strip() else ""
+        print(f"  ✗ {skill_name} (attempts {attempts}) {first_line[:120]}")
+    return 0
 
 
 def main() -> None:
@@ -15,10 +192,84 @@ def main() -> None:
         default=None,
         help="最大并发 Worker 数量（覆盖配置）",
     )
+    parser.add_argument(
+        "--processes",
+        type=int,
+        default=None,
+        help="分片进程数，每个进程独立事件循环并发 --max-concurrent 个技能（覆盖配置）",
+    )
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="从各技能的断点（.checkpoint.json）继续，跳过已完成的轮次",
+    )
+    rerun_group = parser.add_mutually_exclusive_group()
+    rerun_group.add_argument(
+        "--force",
+        action="store_true",
+        help="忽略规范指纹，重新孵化所有技能",
+    )
+    rerun_group.add_argument(
+        "--only-changed",
+        action="store_true",
+        help="只孵化规范指纹有变化的技能，未变化的直接跳过（默认会重新验证其代码）",
+    )
+    subparsers = parser.add_subparsers(dest="command")
+
+    images_parser = subparsers.add_parser("images", help="管理预构建的工具链镜像")
+    images_sub = images_parser.add_subparsers(dest="images_command", required=True)
+    build_parser = images_sub.add_parser("build", help="构建各语言的工具链镜像")
+    build_parser.add_argument("--force", action="store_true", help="即使镜像已存在也重新构建")
+
+    subparsers.add_parser("prefetch", help="把任务清单中技能的依赖预取到共享包缓存（离线模式使用）")
+
+    status_parser = subparsers.add_parser("status", help="查看最近一次运行的进度")
+    status_parser.add_argument("--follow", "-f", action="store_true", help="持续输出新完成的技能")
+    status_parser.add_argument("--interval", type=float, default=2.0, help="--follow 的轮询间隔（秒）")
+
+    enqueue_parser = subparsers.add_parser("enqueue", help="把任务清单写入持久化任务队列（SQLite）")
+    enqueue_parser.add_argument("--file", default=None, help="任务清单路径（默认同 run）")
+
+    worker_parser = subparsers.add_parser(
+        "worker", help="从持久化任务队列领取任务执行（可在多个进程/机器上同时运行）"
+    )
+    worker_parser.add_argument(
+        "--exit-when-empty", action="store_true", help="队列中没有待执行的任务后退出"
+    )
+
+    jobs_parser = subparsers.add_parser("jobs", help="查看持久化任务队列状态")
+    jobs_parser.add_argument("--retry-failed", action="store_true", help="把失败的任务重新排队")
+
     args = parser.parse_args()
 
     Config.init()
-    orchestrator = SkillFactoryOrchestrator(max_concurrent=args.max_concurrent)
+    if args.command == "status":
+        raise SystemExit(_show_status(args))
+    if args.command == "images":
+        raise SystemExit(_build_images(args))
+    if args.command == "prefetch":
+        Config.DOCKER_PACKAGE_CACHE = True
+        raise SystemExit(asyncio.run(_prefetch_todos()))
+    if args.command == "enqueue":
+        raise SystemExit(_enqueue(args))
+    if args.command == "jobs":
+        raise SystemExit(_show_jobs(args))
+
+    orchestrator = SkillFactoryOrchestrator(
+        max_concurrent=args.max_concurrent,
+        resume=args.resume,
+        force=args.force,
+        only_changed=args.only_changed,
+    )
+    if args.command == "worker":
+        asyncio.run(
+            orchestrator.run_job_worker(open_job_store(), exit_when_empty=args.exit_when_empty)
+        )
+        return
+    processes = args.processes or Config.WORKER_PROCESSES
+    if processes > 1:
+        asyncio.run(orchestrator.run_sharded(processes))
+        return
     asyncio.run(orchestrator.run())
 
 
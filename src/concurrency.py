@@ -0,0 +1,218 @@
+"""自适应并发控制 - 按 LLM 轮次延迟、过载错误和主机内存压力动态调整同时在途的技能数（AIMD）"""
+
+from __future__ import annotations
+
+import asyncio
+import collections
+import logging
+import math
+import time
+from pathlib import Path
+from typing import Optional
+
+from .utils.docker_api import parse_memory
+
+MEMINFO_PATH = Path("/proc/meminfo")
+
+
+def read_meminfo(field: str, path: Path = MEMINFO_PATH) -> Optional[int]:
+    """读取 /proc/meminfo 中的一项（字节），非 Linux 或读取失败时返回 None"""
+    try:
+        with path.open("r", encoding="ascii") as f:
+            for line in f:
+                if line.startswith(f"{field}:"):
+                    return int(line.split()[1]) * 1024
+    except (OSError, ValueError, IndexError):
+        return None
+    return None
+
+
+def read_mem_available(path: Path = MEMINFO_PATH) -> Optional[int]:
+    """读取主机可用内存（字节）"""
+    return read_meminfo("MemAvailable", path)
+
+
+class AdaptiveLimiter:
+    """
+    AIMD 自适应并发限制，可替代 asyncio.Semaphore（支持 async with）
+
+    - 加性增：并发已用满、最近 limit 个轮次延迟正常且无错误，并且距上次调整超过
+      increase_interval 秒时，limit + 1
+    - 乘性减：API 429/过载错误时 limit 减半；某类轮次的延迟 EWMA 超过该类基线的
+      latency_tolerance 倍，或主机可用内存放不下再一个容器（memory_per_slot + memory_reserve）时，
+      limit x 0.75
+    - 延迟按轮次类型（研究/起草/修复/蒸馏）分别统计：修复轮次远比研究轮次短，
+      混在一起会把基线拉低，之后正常的研究轮次就会被误判为过载
+    - 减小后 decrease_cooldown 秒内不再减小（同一波过载会同时打到所有在途请求）
+
+    limit 减小不会中断已在途的技能，只是新的技能要等在途数量降到 limit 以下才能开始。
+    每次调整都会记录日志。
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        min_limit: int = 1,
+        max_limit: int = 8,
+        latency_tolerance: float = 2.0,
+        increase_interval: float = 60.0,
+        decrease_cooldown: float = 30.0,
+        memory_per_slot: Optional[str] = None,
+        memory_reserve: Optional[str] = None,
+        name: str = "workers",
+    ):
+        self.logger = logging.getLogger("skillfactory")
+        self.name = name
+        self.min_limit = max(1, min_limit)
+        self.max_limit = max(self.min_limit, max_limit)
+        self.limit = min(max(initial, self.min_limit), self.max_limit)
+        self.latency_tolerance = latency_tolerance
+        self.increase_interval = increase_interval
+        self.decrease_cooldown = decrease_cooldown
+        self.memory_per_slot = parse_memory(memory_per_slot) if memory_per_slot else 0
+        self.memory_reserve = parse_memory(memory_reserve) if memory_reserve else 0
+        self.active = 0
+        self._waiters: collections.deque[asyncio.Future] = collections.deque()
+        self._latency_ewma: dict[str, float] = {}
+        self._latency_baseline: dict[str, float] = {}
+        self._healthy_rounds = 0
+        self._last_change = time.monotonic()
+        self._last_decrease = 0.0
+        self._mem_checked_at = 0.0
+        self._mem_available: Optional[int] = None
+
+    # ===== 信号量接口 =====
+
+    async def acquire(self) -> None:
+        self._check_memory()
+        if self.active < self.limit and not self._waiters:
+            self.active += 1
+            return
+        future = asyncio.get_running_loop().create_future()
+        self._waiters.append(future)
+        try:
+            await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                self.release()  # 名额已分配但等待方被取消，归还名额
+            raise
+
+    def release(self) -> None:
+        self.active -= 1
+        self._wake()
+
+    async def __aenter__(self) -> "AdaptiveLimiter":
+        await self.acquire()
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        self.release()
+
+    def _wake(self) -> None:
+        while self._waiters and self.active < self.limit:
+            future = self._waiters.popleft()
+            if not future.done():
+                self.active += 1
+                future.set_result(None)
+
+    # ===== 反馈信号 =====
+
+    def observe_round(self, latency: float, kind: str = "round") -> None:
+        """记录一次成功的 LLM 轮次耗时，kind 为轮次类型，每类轮次各自维护 EWMA 和基线"""
+        ewma = self._latency_ewma.get(kind)
+        ewma = latency if ewma is None else 0.8 * ewma + 0.2 * latency
+        self._latency_ewma[kind] = ewma
+        # 基线取 EWMA 的最小值，并允许缓慢上浮，避免一次异常快的轮次永久压低基线
+        baseline = self._latency_baseline.get(kind)
+        baseline = ewma if baseline is None else min(ewma, baseline * 1.02)
+        self._latency_baseline[kind] = baseline
+
+        if self._check_memory():
+            return
+        if ewma > baseline * self.latency_tolerance:
+            self._decrease(
+                0.75,
+                f"{kind} round latency {ewma:.1f}s > "
+                f"{self.latency_tolerance}x baseline {baseline:.1f}s",
+            )
+            return
+
+        self._healthy_rounds += 1
+        if (
+            self.active >= self.limit
+            and self._healthy_rounds >= self.limit
+            and time.monotonic() - self._last_change >= self.increase_interval
+            and self.limit < self.max_limit
+            and not self._memory_tight()
+        ):
+            self._set_limit(self.limit + 1, f"{self._healthy_rounds} healthy rounds")
+
+    def observe_error(self, overloaded: bool = True, reason: str = "") -> None:
+        """记录一次失败的 LLM 轮次；overloaded 表示 429/529 等过载错误"""
+        self._healthy_rounds = 0
+        if overloaded:
+            self._decrease(0.5, reason or "API overloaded")
+
+    # ===== 主机内存 =====
+
+    # MemAvailable 已经扣除了正在运行的容器占用的内存，只需判断剩余内存能否再容纳新的容器，
+    # 不能再按在途技能数累加（在途技能大多在做 LLM 轮次，并不持有容器）
+
+    def _check_memory(self) -> bool:
+        """可用内存放不下再一个容器时减小 limit，返回是否存在内存压力"""
+        if not self.memory_per_slot:
+            return False
+        available = self._read_memory()
+        if available is None:
+            return False
+        required = self.memory_per_slot + self.memory_reserve
+        if self.active and available < required:
+            self._decrease(
+                0.75,
+                f"MemAvailable {available // 1024**2}MiB < "
+                f"{required // 1024**2}MiB for one more container",
+            )
+            return True
+        return False
+
+    def _memory_tight(self) -> bool:
+        """再增加一个在途技能后，可用内存放不下它和一个已在途技能同时启动的容器"""
+        if not self.memory_per_slot:
+            return False
+        available = self._read_memory()
+        return (
+            available is not None
+            and available < self.memory_per_slot * 2 + self.memory_reserve
+        )
+
+    def _read_memory(self) -> Optional[int]:
+        now = time.monotonic()
+        if now - self._mem_checked_at >= 5:
+            self._mem_available = read_mem_available()
+            self._mem_checked_at = now
+        return self._mem_available
+
+    # ===== 调整 =====
+
+    def _decrease(self, factor: float, reason: str) -> None:
+        now = time.monotonic()
+        if now - self._last_decrease < self.decrease_cooldown:
+            return
+        self._last_decrease = now
+        self._set_limit(max(self.min_limit, math.floor(self.limit * factor)), reason)
+
+    def _set_limit(self, limit: int, reason: str) -> None:
+        self._healthy_rounds = 0
+        self._last_change = time.monotonic()
+        if limit == self.limit:
+            return
+        self.logger.info(
+            "Concurrency limit (%s): %s -> %s (%s, active=%s)",
+            self.name,
+            self.limit,
+            limit,
+            reason,
+            self.active,
+        )
+        self.limit = limit
+        self._wake()
@@ -6,6 +6,11 @@ from pathlib import Path
 from dotenv import load_dotenv
 
 
+def _env_bool(name: str, default: str = "false") -> bool:
+    """读取布尔型环境变量（1/true/yes/on 视为开启）"""
+    return os.getenv(name, default).strip().lower() in ("1", "true", "yes", "on")
+
+
 class Config:
     """配置管理 - 支持环境变量覆盖"""
 
@@ -15,11 +20,63 @@ class Config:
     # - 2-3: 并行执行，需要 8GB+ 内存
     MAX_CONCURRENT_WORKERS = int(os.getenv("MAX_CONCURRENT_WORKERS", "1"))
     WORKER_TIMEOUT = int(os.getenv("WORKER_TIMEOUT", "900"))  # 15分钟
+    # 分片进程数：>1 时任务清单分给多个进程，每个进程独立事件循环、并发 MAX_CONCURRENT_WORKERS
+    WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", "1"))
+    # 自适应并发：以 MAX_CONCURRENT_WORKERS 为初值，按 LLM 轮次延迟、429/过载错误和主机内存压力
+    # 在 [ADAPTIVE_MIN_WORKERS, ADAPTIVE_MAX_WORKERS] 内调整同时在途的技能数（AIMD）
+    ADAPTIVE_CONCURRENCY = _env_bool("ADAPTIVE_CONCURRENCY")
+    ADAPTIVE_MIN_WORKERS = int(os.getenv("ADAPTIVE_MIN_WORKERS", "1"))
+    ADAPTIVE_MAX_WORKERS = int(os.getenv("ADAPTIVE_MAX_WORKERS", "0"))  # 0 = 2 x MAX_CONCURRENT_WORKERS
+    ADAPTIVE_LATENCY_TOLERANCE = float(os.getenv("ADAPTIVE_LATENCY_TOLERANCE", "2.0"))  # 延迟超过基线的倍数时降低
+    ADAPTIVE_INCREASE_INTERVAL = float(os.getenv("ADAPTIVE_INCREASE_INTERVAL", "60"))  # 两次加并发的最小间隔（秒）
+    ADAPTIVE_MEMORY_RESERVE = os.getenv("ADAPTIVE_MEMORY_RESERVE", "512m")  # 启动新容器时为主机保留的内存
+    # 模型 API 限流（令牌桶），0 表示不限制；多进程时通过 RATE_LIMIT_STATE_FILE 共享额度
+    API_RPM = int(os.getenv("API_RPM", "0"))  # 每分钟请求数（LLM 轮次）
+    API_TPM = int(os.getenv("API_TPM", "0"))  # 每分钟 token 数（估算，轮次结束后按实际用量修正）
+    RATE_LIMIT_ROUND_TOKENS = int(os.getenv("RATE_LIMIT_ROUND_TOKENS", "8000"))  # 每轮工具调用和输出的预估 token
+    RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "3"))  # 被限流的轮次最多重试次数
+    RATE_LIMIT_BACKOFF_BASE = float(os.getenv("RATE_LIMIT_BACKOFF_BASE", "5"))  # 退避基数（秒），每次重试翻倍
+    RATE_LIMIT_BACKOFF_MAX = float(os.getenv("RATE_LIMIT_BACKOFF_MAX", "120"))
+    RATE_LIMIT_STATE_FILE = os.getenv("RATE_LIMIT_STATE_FILE", "")  # 留空时只在进程内限流
+    # 耗时预测（data/durations.jsonl）：最长优先调度，并按预测耗时为每个技能设置超时
+    SCHEDULE_LONGEST_FIRST = _env_bool("SCHEDULE_LONGEST_FIRST", "true")
+    SCHEDULE_WINDOW = int(os.getenv("SCHEDULE_WINDOW", "1000"))  # 流式清单的重排窗口（任务数）
+    DURATION_MIN_SAMPLES = int(os.getenv("DURATION_MIN_SAMPLES", "3"))  # 特征组合至少需要的样本数
+    DURATION_TIMEOUT_FACTOR = float(os.getenv("DURATION_TIMEOUT_FACTOR", "2.0"))  # 超时 = 预测耗时 x 系数
+    DURATION_COARSE_MIN_SAMPLES = int(os.getenv("DURATION_COARSE_MIN_SAMPLES", "20"))  # 笼统组合缩短超时所需的样本数
+    DURATION_TIMEOUT_MIN = int(os.getenv("DURATION_TIMEOUT_MIN", "300"))  # 低于 WORKER_TIMEOUT，可信的预测会缩短超时
+    DURATION_TIMEOUT_MAX = int(os.getenv("DURATION_TIMEOUT_MAX", "0"))  # 0 = 3 x WORKER_TIMEOUT
+    # token 估算使用的分词器：空 = 内置估算；tiktoken[:encoding]；或 module:callable 插件
+    TOKENIZER = os.getenv("TOKENIZER", "")
+    # 会话模式：continuous 所有轮次延续同一个对话（Docker 验证期间释放会话，修复轮次恢复对话）；
+    # phased 每个阶段新建会话，只带研究笔记和当前代码/错误
+    SESSION_MODE = os.getenv("SESSION_MODE", "continuous").lower()
+    # 常驻会话池：复用已连接的 Claude 会话（技能之间用 /clear 重置对话），省去 CLI 启动和 MCP 连接
+    SESSION_POOL_ENABLED = _env_bool("SESSION_POOL_ENABLED")
+    SESSION_POOL_SIZE = int(os.getenv("SESSION_POOL_SIZE", "0"))  # 0 = 跟随同时在途的技能数
+    SESSION_POOL_MAX_USES = int(os.getenv("SESSION_POOL_MAX_USES", "10"))  # 单个会话最多服务的技能数
+    SESSION_POOL_HEALTHCHECK_INTERVAL = float(os.getenv("SESSION_POOL_HEALTHCHECK_INTERVAL", "60"))
+    SESSION_POOL_PREWARM = _env_bool("SESSION_POOL_PREWARM", "true")  # 启动时在后台逐个预先连接
+    # 流水线各阶段容量，技能只在对应轮次内占用名额；0 = 按资源推算（LLM 按 API_RPM/API_TPM，
+    # 沙箱按 CPU 核数/内存与 DOCKER_CPU_LIMIT/DOCKER_MEMORY_LIMIT，打包按 CPU 核数），不超过 MAX_CONCURRENT_WORKERS
+    LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "0"))  # 同时进行的 LLM 轮次
+    SANDBOX_CONCURRENCY = int(os.getenv("SANDBOX_CONCURRENCY", "0"))  # 同时进行的 Docker 验证
+    PACKAGING_CONCURRENCY = int(os.getenv("PACKAGING_CONCURRENCY", "0"))  # 同时进行的 .skill 打包
 
     # ===== Docker 配置 =====
     # 使用 alpine 镜像更轻量（~50MB vs ~150MB）
     DOCKER_IMAGE = os.getenv("DOCKER_IMAGE", "python:3.10-alpine")
     DOCKER_TIMEOUT = int(os.getenv("DOCKER_TIMEOUT", "300"))  # 5分钟
+
+    # 容器输出捕获：每个流最多保留的字节数（超出部分只保留开头和结尾）
+    DOCKER_OUTPUT_LIMIT = int(os.getenv("DOCKER_OUTPUT_LIMIT", str(256 * 1024)))
+    # 输出命中该正则且之后宽限期内没有新输出时提前终止容器（空字符串关闭）；
+    # 命中后继续输出的程序（记录了已处理的异常）不会被终止
+    DOCKER_FAIL_FAST_PATTERN = os.getenv(
+        "DOCKER_FAIL_FAST_PATTERN",
+        r"Traceback \(most recent call last\)|npm ERR!|Cannot find module|ERR_MODULE_NOT_FOUND",
+    )
+    DOCKER_FAIL_FAST_GRACE = float(os.getenv("DOCKER_FAIL_FAST_GRACE", "3"))
     
     # Docker 资源限制（4C4G 服务器）
     DOCKER_MEMORY_LIMIT = os.getenv("DOCKER_MEMORY_LIMIT", "800m")  # 限制单个容器最多 800MB
@@ -28,10 +85,65 @@ class Config:
     # Docker 镜像加速器（可选）
     DOCKER_REGISTRY_MIRROR = os.getenv("DOCKER_REGISTRY_MIRROR", "")
 
+    # Docker 调用方式：cli（fork docker 命令）| api（通过 unix socket 直接调用 Engine API）
+    DOCKER_BACKEND = os.getenv("DOCKER_BACKEND", "cli")
+    DOCKER_SOCKET = os.getenv("DOCKER_SOCKET", "/var/run/docker.sock")
+
+    # 遗留容器回收间隔（秒），启动时也会回收一次
+    DOCKER_REAPER_INTERVAL = int(os.getenv("DOCKER_REAPER_INTERVAL", "300"))
+
+    # Docker 容器池（常驻容器 + docker exec，避免每次冷启动）
+    DOCKER_POOL_ENABLED = _env_bool("DOCKER_POOL_ENABLED")
+    DOCKER_POOL_SIZE = int(os.getenv("DOCKER_POOL_SIZE", "0"))  # 0 = 跟随 SANDBOX_CONCURRENCY
+    DOCKER_POOL_MAX_USES = int(os.getenv("DOCKER_POOL_MAX_USES", "20"))  # 单容器最多复用次数
+    DOCKER_POOL_HEALTHCHECK_INTERVAL = int(os.getenv("DOCKER_POOL_HEALTHCHECK_INTERVAL", "60"))
+
+    # 依赖快照镜像（按依赖哈希构建并复用已安装依赖的镜像，优先于容器池）
+    DOCKER_SNAPSHOT_ENABLED = _env_bool("DOCKER_SNAPSHOT_ENABLED")
+    DOCKER_SNAPSHOT_BUDGET_MB = int(os.getenv("DOCKER_SNAPSHOT_BUDGET_MB", "10240"))  # 快照磁盘预算
+
+    # 批量验证：同一语言、同时到达测试阶段的技能合并到一个容器中验证
+    DOCKER_BATCH_ENABLED = _env_bool("DOCKER_BATCH_ENABLED")
+    DOCKER_BATCH_WINDOW = float(os.getenv("DOCKER_BATCH_WINDOW", "2"))  # 合并等待窗口（秒）
+    DOCKER_BATCH_MAX_SIZE = int(os.getenv("DOCKER_BATCH_MAX_SIZE", "8"))  # 单批最多项目数
+
+    # 预构建工具链镜像（如 TypeScript 的 ts-node），语言配置变化时自动重建
+    DOCKER_TOOLCHAIN_IMAGES = _env_bool("DOCKER_TOOLCHAIN_IMAGES", "true")
+
+    # 共享包缓存（pip 缓存/wheelhouse、npm 缓存），所有容器和 Worker 共用
+    DOCKER_PACKAGE_CACHE = _env_bool("DOCKER_PACKAGE_CACHE")
+    # 离线模式：容器以 --network none 运行，依赖只从预取的缓存安装（隐含开启共享缓存）
+    DOCKER_OFFLINE = _env_bool("DOCKER_OFFLINE")
+    PACKAGE_CACHE_DIR = Path(
+        os.getenv("PACKAGE_CACHE_DIR", str(Path.home() / ".cache" / "skillfactory"))
+    ).expanduser()
+
+    # 验证结果缓存：代码、依赖、镜像和资源限制都相同时复用上次的容器执行结果
+    VALIDATION_CACHE_ENABLED = _env_bool("VALIDATION_CACHE_ENABLED", "true")
+    VALIDATION_CACHE_TTL = int(os.getenv("VALIDATION_CACHE_TTL", str(7 * 24 * 3600)))  # 7天
+    VALIDATION_CACHE_MAX_MB = int(os.getenv("VALIDATION_CACHE_MAX_MB", "256"))
+    # 研究资料缓存（data/research_cache）：Context7 库 ID/文档和爬取结果在技能之间共享
+    RESEARCH_CACHE_ENABLED = _env_bool("RESEARCH_CACHE_ENABLED", "true")
+    RESEARCH_CACHE_TTL = int(os.getenv("RESEARCH_CACHE_TTL", str(3 * 24 * 3600)))  # 3天
+    RESEARCH_CACHE_MAX_MB = int(os.getenv("RESEARCH_CACHE_MAX_MB", "512"))
+
+    # 静态预检：运行容器前先在进程内检查语法错误（未声明的依赖只记录警告）
+    STATIC_CHECK_ENABLED = _env_bool("STATIC_CHECK_ENABLED", "true")
+
     # ===== Worker 配置 =====
     MAX_RETRY_ATTEMPTS = int(os.getenv("MAX_RETRY_ATTEMPTS", "3"))
     ROUND_TIMEOUT = int(os.getenv("ROUND_TIMEOUT", "1200"))  # 20分钟
 
+    # 任务清单路径（留空时优先使用 data/skills_todo.jsonl，其次 data/skills_todo.json）
+    SKILLS_TODO_FILE = os.getenv("SKILLS_TODO_FILE", "")
+
+    # 持久化任务队列（skillfactory enqueue / worker），留空时使用 data/jobs.sqlite3
+    JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", "")
+    JOB_STORE_WAL = _env_bool("JOB_STORE_WAL", "true")  # 多台机器共享网络卷时需关闭
+    JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "120"))  # 租约时长，Worker 每 1/3 续租一次
+    JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))  # 失败/超时/租约过期的最大尝试次数
+    JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "5"))  # 队列为空时的轮询间隔（秒）
+
     # ===== 存储路径 =====
     ROOT_DIR = Path(__file__).resolve().parent.parent
     SKILLS_DIR = Path.home() / ".ai_skills"
@@ -50,6 +162,10 @@ class Config:
     # ===== Context 7 MCP =====
     CONTEXT7_API_KEY = os.getenv("CONTEXT7_API_KEY", "")
     CONTEXT7_API_URL = os.getenv("CONTEXT7_API_URL", "https://mcp.context7.com/mcp")
+    # 调度器在技能开始前直接调用 Context7 获取文档（写入技能目录），研究轮次阅读本地文件
+    CONTEXT7_PREFETCH = _env_bool("CONTEXT7_PREFETCH", "true")
+    CONTEXT7_PREFETCH_CONCURRENCY = int(os.getenv("CONTEXT7_PREFETCH_CONCURRENCY", "4"))
+    CONTEXT7_TIMEOUT = float(os.getenv("CONTEXT7_TIMEOUT", "60"))
 
     # ===== 日志配置 =====
     LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
@@ -69,13 +185,83 @@ class Config:
 
     @classmethod
     def _reload_from_env(cls) -> None:
-        cls.MAX_CONCURRENT_WORKERS = int(os.getenv("MAX_CONCURRENT_WORKERS", "3"))
+        cls.MAX_CONCURRENT_WORKERS = int(os.getenv("MAX_CONCURRENT_WORKERS", "1"))
         cls.WORKER_TIMEOUT = int(os.getenv("WORKER_TIMEOUT", "600"))
+        cls.WORKER_PROCESSES = int(os.getenv("WORKER_PROCESSES", "1"))
+        cls.ADAPTIVE_CONCURRENCY = _env_bool("ADAPTIVE_CONCURRENCY")
+        cls.ADAPTIVE_MIN_WORKERS = int(os.getenv("ADAPTIVE_MIN_WORKERS", "1"))
+        cls.ADAPTIVE_MAX_WORKERS = int(os.getenv("ADAPTIVE_MAX_WORKERS", "0"))
+        cls.ADAPTIVE_LATENCY_TOLERANCE = float(os.getenv("ADAPTIVE_LATENCY_TOLERANCE", "2.0"))
+        cls.ADAPTIVE_INCREASE_INTERVAL = float(os.getenv("ADAPTIVE_INCREASE_INTERVAL", "60"))
+        cls.ADAPTIVE_MEMORY_RESERVE = os.getenv("ADAPTIVE_MEMORY_RESERVE", "512m")
+        cls.API_RPM = int(os.getenv("API_RPM", "0"))
+        cls.API_TPM = int(os.getenv("API_TPM", "0"))
+        cls.RATE_LIMIT_ROUND_TOKENS = int(os.getenv("RATE_LIMIT_ROUND_TOKENS", "8000"))
+        cls.RATE_LIMIT_MAX_RETRIES = int(os.getenv("RATE_LIMIT_MAX_RETRIES", "3"))
+        cls.RATE_LIMIT_BACKOFF_BASE = float(os.getenv("RATE_LIMIT_BACKOFF_BASE", "5"))
+        cls.RATE_LIMIT_BACKOFF_MAX = float(os.getenv("RATE_LIMIT_BACKOFF_MAX", "120"))
+        cls.RATE_LIMIT_STATE_FILE = os.getenv("RATE_LIMIT_STATE_FILE", "")
+        cls.SCHEDULE_LONGEST_FIRST = _env_bool("SCHEDULE_LONGEST_FIRST", "true")
+        cls.SCHEDULE_WINDOW = int(os.getenv("SCHEDULE_WINDOW", "1000"))
+        cls.DURATION_MIN_SAMPLES = int(os.getenv("DURATION_MIN_SAMPLES", "3"))
+        cls.DURATION_TIMEOUT_FACTOR = float(os.getenv("DURATION_TIMEOUT_FACTOR", "2.0"))
+        cls.DURATION_COARSE_MIN_SAMPLES = int(os.getenv("DURATION_COARSE_MIN_SAMPLES", "20"))
+        cls.DURATION_TIMEOUT_MIN = int(os.getenv("DURATION_TIMEOUT_MIN", "300"))
+        cls.DURATION_TIMEOUT_MAX = int(os.getenv("DURATION_TIMEOUT_MAX", "0"))
+        cls.TOKENIZER = os.getenv("TOKENIZER", "")
+        cls.SESSION_MODE = os.getenv("SESSION_MODE", "continuous").lower()
+        cls.SESSION_POOL_ENABLED = _env_bool("SESSION_POOL_ENABLED")
+        cls.SESSION_POOL_SIZE = int(os.getenv("SESSION_POOL_SIZE", "0"))
+        cls.SESSION_POOL_MAX_USES = int(os.getenv("SESSION_POOL_MAX_USES", "10"))
+        cls.SESSION_POOL_HEALTHCHECK_INTERVAL = float(os.getenv("SESSION_POOL_HEALTHCHECK_INTERVAL", "60"))
+        cls.SESSION_POOL_PREWARM = _env_bool("SESSION_POOL_PREWARM", "true")
+        cls.LLM_CONCURRENCY = int(os.getenv("LLM_CONCURRENCY", "0"))
+        cls.SANDBOX_CONCURRENCY = int(os.getenv("SANDBOX_CONCURRENCY", "0"))
+        cls.PACKAGING_CONCURRENCY = int(os.getenv("PACKAGING_CONCURRENCY", "0"))
         cls.DOCKER_IMAGE = os.getenv("DOCKER_IMAGE", "python:3.10-slim")
         cls.DOCKER_TIMEOUT = int(os.getenv("DOCKER_TIMEOUT", "300"))
+        cls.DOCKER_OUTPUT_LIMIT = int(os.getenv("DOCKER_OUTPUT_LIMIT", str(256 * 1024)))
+        cls.DOCKER_FAIL_FAST_PATTERN = os.getenv(
+            "DOCKER_FAIL_FAST_PATTERN",
+            r"Traceback \(most recent call last\)|npm ERR!|Cannot find module|ERR_MODULE_NOT_FOUND",
+        )
+        cls.DOCKER_FAIL_FAST_GRACE = float(os.getenv("DOCKER_FAIL_FAST_GRACE", "3"))
         cls.DOCKER_MEMORY_LIMIT = os.getenv("DOCKER_MEMORY_LIMIT", "800m")
         cls.DOCKER_CPU_LIMIT = os.getenv("DOCKER_CPU_LIMIT", "1.0")
         cls.DOCKER_REGISTRY_MIRROR = os.getenv("DOCKER_REGISTRY_MIRROR", "")
+        cls.DOCKER_BACKEND = os.getenv("DOCKER_BACKEND", "cli")
+        cls.DOCKER_SOCKET = os.getenv("DOCKER_SOCKET", "/var/run/docker.sock")
+        cls.DOCKER_REAPER_INTERVAL = int(os.getenv("DOCKER_REAPER_INTERVAL", "300"))
+        cls.DOCKER_POOL_ENABLED = _env_bool("DOCKER_POOL_ENABLED")
+        cls.DOCKER_POOL_SIZE = int(os.getenv("DOCKER_POOL_SIZE", "0"))
+        cls.DOCKER_POOL_MAX_USES = int(os.getenv("DOCKER_POOL_MAX_USES", "20"))
+        cls.DOCKER_POOL_HEALTHCHECK_INTERVAL = int(
+            os.getenv("DOCKER_POOL_HEALTHCHECK_INTERVAL", "60")
+        )
+        cls.DOCKER_SNAPSHOT_ENABLED = _env_bool("DOCKER_SNAPSHOT_ENABLED")
+        cls.DOCKER_SNAPSHOT_BUDGET_MB = int(os.getenv("DOCKER_SNAPSHOT_BUDGET_MB", "10240"))
+        cls.DOCKER_BATCH_ENABLED = _env_bool("DOCKER_BATCH_ENABLED")
+        cls.DOCKER_BATCH_WINDOW = float(os.getenv("DOCKER_BATCH_WINDOW", "2"))
+        cls.DOCKER_BATCH_MAX_SIZE = int(os.getenv("DOCKER_BATCH_MAX_SIZE", "8"))
+        cls.DOCKER_TOOLCHAIN_IMAGES = _env_bool("DOCKER_TOOLCHAIN_IMAGES", "true")
+        cls.DOCKER_PACKAGE_CACHE = _env_bool("DOCKER_PACKAGE_CACHE")
+        cls.DOCKER_OFFLINE = _env_bool("DOCKER_OFFLINE")
+        cls.PACKAGE_CACHE_DIR = Path(
+            os.getenv("PACKAGE_CACHE_DIR", str(Path.home() / ".cache" / "skillfactory"))
+        ).expanduser()
+        cls.VALIDATION_CACHE_ENABLED = _env_bool("VALIDATION_CACHE_ENABLED", "true")
+        cls.VALIDATION_CACHE_TTL = int(os.getenv("VALIDATION_CACHE_TTL", str(7 * 24 * 3600)))
+        cls.VALIDATION_CACHE_MAX_MB = int(os.getenv("VALIDATION_CACHE_MAX_MB", "256"))
+        cls.RESEARCH_CACHE_ENABLED = _env_bool("RESEARCH_CACHE_ENABLED", "true")
+        cls.RESEARCH_CACHE_TTL = int(os.getenv("RESEARCH_CACHE_TTL", str(3 * 24 * 3600)))
+        cls.RESEARCH_CACHE_MAX_MB = int(os.getenv("RESEARCH_CACHE_MAX_MB", "512"))
+        cls.STATIC_CHECK_ENABLED = _env_bool("STATIC_CHECK_ENABLED", "true")
+        cls.SKILLS_TODO_FILE = os.getenv("SKILLS_TODO_FILE", "")
+        cls.JOB_STORE_PATH = os.getenv("JOB_STORE_PATH", "")
+        cls.JOB_STORE_WAL = _env_bool("JOB_STORE_WAL", "true")
+        cls.JOB_LEASE_SECONDS = int(os.getenv("JOB_LEASE_SECONDS", "120"))
+        cls.JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))
+        cls.JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "5"))
         cls.MAX_RETRY_ATTEMPTS = int(os.getenv("MAX_RETRY_ATTEMPTS", "3"))
         cls.ROUND_TIMEOUT = int(os.getenv("ROUND_TIMEOUT", "1200"))
         cls.CLAUDE_MODEL = os.getenv("CLAUDE_MODEL", "claude-3-5-sonnet")
@@ -85,4 +271,7 @@ class Config:
         cls.CLAUDE_API_KEY = os.getenv("CLAUDE_API_KEY", "")
         cls.CONTEXT7_API_KEY = os.getenv("CONTEXT7_API_KEY", "")
         cls.CONTEXT7_API_URL = os.getenv("CONTEXT7_API_URL", "https://mcp.context7.com/mcp")
+        cls.CONTEXT7_PREFETCH = _env_bool("CONTEXT7_PREFETCH", "true")
+        cls.CONTEXT7_PREFETCH_CONCURRENCY = int(os.getenv("CONTEXT7_PREFETCH_CONCURRENCY", "4"))
+        cls.CONTEXT7_TIMEOUT = float(os.getenv("CONTEXT7_TIMEOUT", "60"))
         cls.LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO")
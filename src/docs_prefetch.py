@@ -0,0 +1,167 @@
+"""Context7 文档预取 - 在技能开始前并发获取官方文档并写入本地文件，研究轮次直接阅读，不消耗模型轮次"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Awaitable, Callable, Optional, TypeVar
+
+import httpx
+
+from .config import Config
+from .models import SkillSpec
+from .research_cache import ResearchCache
+from .utils.atomic_write import atomic_write_text
+from .utils.context7 import Context7Client, Context7Error
+from .utils.tokens import get_estimator
+
+DOCS_FILE = ".context7_docs.md"
+# 研究轮次会使用 Context 7 的策略
+PREFETCH_STRATEGIES = ("context7_first", "hybrid")
+
+T = TypeVar("T")
+
+
+@dataclass
+class PrefetchedDocs:
+    """预取到本地的 Context7 文档"""
+
+    path: Path
+    library_id: str
+    tokens: int
+
+
+class DocsPrefetcher:
+    """
+    Context7 文档预取器
+
+    - schedule() 在技能进入待执行队列时启动后台获取，前面的技能还在运行时文档已经就绪
+    - get() 在技能开始时等待（或立即启动）获取，失败时返回 None，研究轮次退回到模型调用 MCP
+    - 所有请求共享一个 Context7Client（同一个连接池和 MCP 会话），并发数有上限
+    - 提供 cache 时库 ID 和文档先查研究资料缓存；多个技能同时请求同一份资料时只请求一次
+    """
+
+    def __init__(
+        self,
+        client: Context7Client,
+        concurrency: int = 4,
+        cache: Optional[ResearchCache] = None,
+    ):
+        self.logger = logging.getLogger("skillfactory")
+        self.client = client
+        self.cache = cache
+        self.estimator = get_estimator(Config.TOKENIZER)
+        self._semaphore = asyncio.Semaphore(max(1, concurrency))
+        self._tasks: dict[str, asyncio.Task] = {}
+        self._inflight: dict[str, asyncio.Future] = {}  # 缓存 key -> 正在进行的请求
+        # 统计
+        self.fetched = 0
+        self.failed = 0
+
+    @classmethod
+    def from_config(cls, cache: Optional[ResearchCache] = None) -> Optional["DocsPrefetcher"]:
+        if not Config.CONTEXT7_PREFETCH:
+            return None
+        client = Context7Client(
+            Config.CONTEXT7_API_URL,
+            api_key=Config.CONTEXT7_API_KEY,
+            timeout=Config.CONTEXT7_TIMEOUT,
+            max_connections=Config.CONTEXT7_PREFETCH_CONCURRENCY,
+        )
+        return cls(client, concurrency=Config.CONTEXT7_PREFETCH_CONCURRENCY, cache=cache)
+
+    def schedule(self, spec: SkillSpec) -> None:
+        """开始在后台获取技能的文档（不使用 Context 7 的策略不获取）"""
+        if spec.research_strategy not in PREFETCH_STRATEGIES or spec.name in self._tasks:
+            return
+        self._tasks[spec.name] = asyncio.create_task(self._fetch(spec))
+
+    async def get(self, spec: SkillSpec) -> Optional[PrefetchedDocs]:
+        self.schedule(spec)
+        task = self._tasks.pop(spec.name, None)
+        if task is None:
+            return None
+        return await task
+
+    def discard(self, spec: SkillSpec) -> None:
+        """技能不需要孵化（产物已是最新）时取消预取"""
+        task = self._tasks.pop(spec.name, None)
+        if task is not None:
+            task.cancel()
+
+    async def close(self) -> None:
+        tasks = [*self._tasks.values(), *self._inflight.values()]
+        self._tasks, self._inflight = {}, {}
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        await self.client.close()
+
+    def summary(self) -> str:
+        return f"fetched={self.fetched} | failed={self.failed}"
+
+    async def _fetch(self, spec: SkillSpec) -> Optional[PrefetchedDocs]:
+        try:
+            library_id = await self._resolve(spec)
+            if not library_id:
+                self.logger.info("Context7 has no library for %s (%s)", spec.name, spec.keyword)
+                self.failed += 1
+                return None
+            docs = await self._query(spec, library_id)
+        except (httpx.HTTPError, Context7Error) as e:
+            self.logger.warning("Context7 prefetch failed for %s: %s", spec.name, e)
+            self.failed += 1
+            return None
+
+        path = Config.SKILLS_DIR / spec.name / DOCS_FILE
+        path.parent.mkdir(parents=True, exist_ok=True)
+        atomic_write_text(path, f"# Context7: {library_id}\n\n{docs}\n")
+        tokens = self.estimator.count(docs)
+        self.fetched += 1
+        self.logger.info("Prefetched Context7 docs for %s: %s (%s tokens)", spec.name, library_id, tokens)
+        return PrefetchedDocs(path=path, library_id=library_id, tokens=tokens)
+
+    async def _resolve(self, spec: SkillSpec) -> Optional[str]:
+        if self.cache is not None:
+            cached = self.cache.get_library_id(spec.keyword)
+            if cached is not None:
+                return cached
+
+        async def _request() -> Optional[str]:
+            async with self._semaphore:
+                library_id = await self.client.resolve_library_id(spec.keyword, spec.description)
+            if self.cache is not None:
+                self.cache.put_library_id(spec.keyword, library_id)
+            return library_id
+
+        return await self._once(ResearchCache.library_key(spec.keyword), _request)
+
+    async def _query(self, spec: SkillSpec, library_id: str) -> str:
+        if self.cache is not None:
+            cached = self.cache.get_docs(library_id, spec.keyword)
+            if cached is not None:
+                return cached
+
+        async def _request() -> str:
+            async with self._semaphore:
+                docs = await self.client.query_docs(
+                    library_id, spec.keyword, tokens=spec.min_context_tokens
+                )
+            if self.cache is not None:
+                self.cache.put_docs(library_id, spec.keyword, docs)
+            return docs
+
+        return await self._once(ResearchCache.docs_key(library_id, spec.keyword), _request)
+
+    async def _once(self, key: str, request: Callable[[], Awaitable[T]]) -> T:
+        """同一个 key 同时只发起一个请求，其他技能等待同一个结果（单个等待方被取消不影响其他方）"""
+        future = self._inflight.get(key)
+        if future is None:
+            future = asyncio.ensure_future(request())
+            self._inflight[key] = future
+            future.add_done_callback(
+                lambda done: self._inflight.pop(key) if self._inflight.get(key) is done else None
+            )
+        return await asyncio.shield(future)
@@ -0,0 +1,216 @@
+"""耗时预测 - 记录每个技能的阶段耗时，按规范特征预测新任务的耗时，用于最长优先调度和单独超时"""
+
+from __future__ import annotations
+
+import collections
+import heapq
+import json
+import statistics
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from .config import Config
+from .models import SkillResult, SkillSpec
+from .utils.file_lock import FileLock
+
+# 每个特征组合最多保留的样本数（只保留最近的，适应模型/环境的变化）
+MAX_SAMPLES = 50
+# 足够具体的特征组合，少量样本即可用来缩短超时
+SPECIFIC_KEYS = ("skill", "full")
+
+
+def working_time(durations: dict[str, float]) -> float:
+    """技能自身的耗时：总耗时减去排队等待阶段名额的时间（超时预算同样不含排队时间）"""
+    return max(0.0, float(durations["total"]) - float(durations.get("queued", 0.0)))
+
+
+def _bucket(value: int, step: int) -> int:
+    return value // step if step > 0 else 0
+
+
+def feature_keys(spec: SkillSpec) -> list[tuple]:
+    """
+    由具体到笼统的特征组合，预测时使用第一个样本足够的组合
+
+    同名技能 → 语言+研究策略+参考资料数+token 预算 → 语言+研究策略 → 语言 → 全部
+    """
+    references = len(spec.references or [])
+    return [
+        ("skill", spec.name),
+        (
+            "full",
+            spec.language,
+            spec.research_strategy,
+            min(references, 3),
+            _bucket(spec.min_context_tokens, 10000),
+            _bucket(spec.max_distilled_tokens, 5000),
+            spec.skip_distillation,
+        ),
+        ("strategy", spec.language, spec.research_strategy),
+        ("language", spec.language),
+        ("all",),
+    ]
+
+
+class DurationPredictor:
+    """
+    基于历史耗时的预测器
+
+    每个特征组合保留最近 MAX_SAMPLES 个总耗时样本，预测取中位数。
+    同名技能只需 1 个样本，其他组合至少需要 min_samples 个样本；都不满足时没有预测。
+
+    超时的样本是删失数据（真实耗时至少是超时时间），不按超时时间参与中位数，
+    而是排在所有完成的样本之后；中位数落在超时样本上时，预测取最大的超时时间。
+    """
+
+    def __init__(self, min_samples: int = 3, coarse_min_samples: int = 20):
+        self.min_samples = max(1, min_samples)
+        self.coarse_min_samples = max(self.min_samples, coarse_min_samples)
+        # 特征组合 -> (耗时, 是否超时)
+        self._samples: dict[tuple, collections.deque[tuple[float, bool]]] = {}
+
+    def observe(self, spec: SkillSpec, total: float, timed_out: bool = False) -> None:
+        for key in feature_keys(spec):
+            self._samples.setdefault(key, collections.deque(maxlen=MAX_SAMPLES)).append(
+                (total, timed_out)
+            )
+
+    def predict(self, spec: SkillSpec) -> Optional[float]:
+        found = self._lookup(spec)
+        return found[0] if found else None
+
+    def timeout_for(self, spec: SkillSpec) -> int:
+        """
+        单个技能的超时：预测耗时 x DURATION_TIMEOUT_FACTOR，
+        限制在 [DURATION_TIMEOUT_MIN, DURATION_TIMEOUT_MAX] 内；没有预测时使用 WORKER_TIMEOUT
+
+        只有同名技能、完整特征组合或样本数达到 coarse_min_samples 的笼统组合
+        才能把超时缩短到 WORKER_TIMEOUT 以下。
+        """
+        found = self._lookup(spec)
+        if found is None:
+            return Config.WORKER_TIMEOUT
+        predicted, key, count = found
+        lower = Config.DURATION_TIMEOUT_MIN
+        if key[0] not in SPECIFIC_KEYS and count < self.coarse_min_samples:
+            lower = max(lower, Config.WORKER_TIMEOUT)
+        upper = Config.DURATION_TIMEOUT_MAX or Config.WORKER_TIMEOUT * 3
+        timeout = predicted * Config.DURATION_TIMEOUT_FACTOR
+        return int(min(upper, max(lower, timeout)))
+
+    def _lookup(self, spec: SkillSpec) -> Optional[tuple[float, tuple, int]]:
+        """返回 (预测耗时, 使用的特征组合, 样本数)"""
+        for key in feature_keys(spec):
+            samples = self._samples.get(key)
+            required = 1 if key[0] == "skill" else self.min_samples
+            if samples and len(samples) >= required:
+                return self._median(samples), key, len(samples)
+        return None
+
+    @staticmethod
+    def _median(samples: Iterable[tuple[float, bool]]) -> float:
+        completed = sorted(total for total, timed_out in samples if not timed_out)
+        censored = [total for total, timed_out in samples if timed_out]
+        count = len(completed) + len(censored)
+        if len(completed) * 2 > count:
+            # 超时样本都排在完成的样本之后，中位数只由完成的样本决定
+            middle = count // 2
+            if count % 2:
+                return completed[middle]
+            return (completed[middle - 1] + completed[middle]) / 2
+        return max(censored)
+
+    def sample_count(self) -> int:
+        return len(self._samples.get(("all",), ()))
+
+
+class DurationHistory:
+    """
+    耗时历史（JSONL，每个完成的技能一行）
+
+    记录技能规范的特征和各阶段耗时；多个进程追加同一文件时持有文件锁。
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+
+    def append(self, spec: SkillSpec, result: SkillResult) -> bool:
+        """记录一次完整孵化的耗时；跳过/只重新验证等不代表完整耗时的结果不记录"""
+        total = result.durations.get("total")
+        if total is None or result.status == "skipped":
+            return False
+        if result.status != "timeout" and not {"research", "distill"} <= result.durations.keys():
+            return False  # 从断点续跑的部分耗时不能代表完整孵化
+        record = {
+            "skill_name": spec.name,
+            "language": spec.language,
+            "research_strategy": spec.research_strategy,
+            "references": len(spec.references or []),
+            "min_context_tokens": spec.min_context_tokens,
+            "max_distilled_tokens": spec.max_distilled_tokens,
+            "skip_distillation": spec.skip_distillation,
+            "status": result.status,
+            "durations": result.durations,
+            "ts": datetime.now(timezone.utc).isoformat(),
+        }
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with FileLock(self.path.with_name(self.path.name + ".lock")):
+            with self.path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return True
+
+    def load_predictor(
+        self, min_samples: int = 3, coarse_min_samples: int = 20
+    ) -> DurationPredictor:
+        """逐行读取历史构建预测器（每个特征组合只保留最近的样本，内存占用有上限）"""
+        predictor = DurationPredictor(min_samples, coarse_min_samples)
+        if not self.path.exists():
+            return predictor
+        with self.path.open("r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                    spec = SkillSpec(
+                        name=record["skill_name"],
+                        keyword="",
+                        description="",
+                        research_strategy=record["research_strategy"],
+                        language=record["language"],
+                        min_context_tokens=int(record["min_context_tokens"]),
+                        max_distilled_tokens=int(record["max_distilled_tokens"]),
+                        references=[""] * int(record["references"]),
+                        skip_distillation=bool(record.get("skip_distillation", False)),
+                    )
+                    predictor.observe(
+                        spec,
+                        working_time(record["durations"]),
+                        timed_out=record.get("status") == "timeout",
+                    )
+                except (json.JSONDecodeError, KeyError, TypeError, ValueError):
+                    continue
+        return predictor
+
+
+def longest_first(
+    todos: Iterable[SkillSpec], predictor: DurationPredictor, window: int
+) -> Iterator[SkillSpec]:
+    """
+    在 window 个任务的滑动窗口内按预测耗时从长到短输出
+
+    清单是流式读取的，只能在窗口内重排；没有预测的任务排在有预测的任务之前
+    （未知任务可能很长，先开始更安全）。window <= 1 时保持原顺序。
+    """
+    if window <= 1:
+        yield from todos
+        return
+
+    heap: list[tuple[float, int, SkillSpec]] = []
+    for index, spec in enumerate(todos):
+        predicted = predictor.predict(spec)
+        priority = float("-inf") if predicted is None else -predicted
+        heapq.heappush(heap, (priority, index, spec))
+        if len(heap) >= window:
+            yield heapq.heappop(heap)[2]
+    while heap:
+        yield heapq.heappop(heap)[2]
@@ -0,0 +1,264 @@
+"""SQLite 任务队列 - 多进程/多机 Worker 通过租约领取任务，租约过期的任务自动回收"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+from .models import SkillResult, SkillSpec
+
+# 任务状态
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_FAILED = "failed"
+
+# 这些孵化结果视为任务失败，未超过重试次数时重新排队
+RETRYABLE_RESULTS = ("failed", "timeout")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id               INTEGER PRIMARY KEY AUTOINCREMENT,
+    skill_name       TEXT NOT NULL UNIQUE,
+    spec             TEXT NOT NULL,
+    status           TEXT NOT NULL DEFAULT 'pending',
+    attempts         INTEGER NOT NULL DEFAULT 0,
+    max_attempts     INTEGER NOT NULL,
+    lease_owner      TEXT,
+    lease_expires_at REAL,
+    heartbeat_at     REAL,
+    result           TEXT,
+    last_error       TEXT,
+    created_at       REAL NOT NULL,
+    updated_at       REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_jobs_status ON jobs (status, id);
+CREATE INDEX IF NOT EXISTS idx_jobs_lease ON jobs (status, lease_expires_at);
+"""
+
+
+@dataclass
+class Job:
+    """已领取的任务"""
+
+    id: int
+    spec: SkillSpec
+    attempts: int
+    max_attempts: int
+    owner: str  # 租约持有者：Worker 标识 + 本次领取的随机令牌
+
+
+class JobStore:
+    """
+    基于 SQLite 文件的持久化任务队列
+
+    - 任务按技能名称唯一；重复入队时规范未变化则忽略，规范变化则重置为 pending
+    - claim() 在 BEGIN IMMEDIATE 事务中领取任务并写入租约，多个进程不会领到同一任务；
+      租约持有者带有每次领取的令牌，同一进程内的其他消费者或重新领取后的旧执行都不能续租/写回
+    - 执行期间定期 heartbeat() 续租；进程崩溃后租约过期，任务被重新排队
+      （超过最大尝试次数则标记为 failed）
+    - 所有数据库操作在线程中执行，每次操作使用独立连接，不阻塞事件循环
+
+    多台机器共享同一文件（NFS 等网络卷）时需关闭 WAL（JOB_STORE_WAL=false），
+    WAL 依赖共享内存，只能在单机上使用。
+    """
+
+    def __init__(self, path: Path, max_attempts: int = 3, wal: bool = True):
+        self.path = path
+        self.max_attempts = max(1, max_attempts)
+        self.wal = wal
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(f"PRAGMA journal_mode = {'WAL' if self.wal else 'DELETE'}")
+            conn.executescript(_SCHEMA)
+
+    @contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        # isolation_level=None：自动提交，需要原子性的地方显式 BEGIN IMMEDIATE
+        conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+        try:
+            conn.row_factory = sqlite3.Row
+            yield conn
+        finally:
+            conn.close()
+
+    # ===== 入队 =====
+
+    def enqueue(self, specs: Iterable[SkillSpec], batch_size: int = 1000) -> int:
+        """批量入队（按批提交，内存占用与任务数量无关），返回处理的任务数量"""
+        count = 0
+        batch: list[tuple] = []
+        with self._connect() as conn:
+            for spec in specs:
+                now = time.time()
+                spec_json = json.dumps(asdict(spec), ensure_ascii=False, sort_keys=True)
+                batch.append((spec.name, spec_json, self.max_attempts, now, now))
+                if len(batch) >= batch_size:
+                    count += self._insert(conn, batch)
+                    batch = []
+            if batch:
+                count += self._insert(conn, batch)
+        return count
+
+    @staticmethod
+    def _insert(conn: sqlite3.Connection, rows: list[tuple]) -> int:
+        conn.execute("BEGIN IMMEDIATE")
+        conn.executemany(
+            """
+            INSERT INTO jobs (skill_name, spec, max_attempts, created_at, updated_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT (skill_name) DO UPDATE SET
+                spec = excluded.spec,
+                status = 'pending',
+                attempts = 0,
+                max_attempts = excluded.max_attempts,
+                result = NULL,
+                last_error = NULL,
+                updated_at = excluded.updated_at
+            WHERE jobs.spec != excluded.spec AND jobs.status != 'running'
+            """,
+            rows,
+        )
+        conn.execute("COMMIT")
+        return len(rows)
+
+    def retry_failed(self) -> int:
+        """把所有 failed 任务重新排队（重置尝试次数）"""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET status = ?, attempts = 0, updated_at = ? WHERE status = ?",
+                (JOB_PENDING, time.time(), JOB_FAILED),
+            )
+            return cursor.rowcount
+
+    # ===== 领取与租约 =====
+
+    async def claim(self, owner: str, lease_seconds: int) -> Optional[Job]:
+        return await asyncio.to_thread(self._claim, owner, lease_seconds)
+
+    def _claim(self, owner: str, lease_seconds: int) -> Optional[Job]:
+        now = time.time()
+        owner = f"{owner}/{uuid.uuid4().hex[:12]}"
+        with self._connect() as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                # 回收租约过期的任务：还有尝试次数则重新排队，否则标记失败
+                conn.execute(
+                    """
+                    UPDATE jobs SET
+                        status = CASE WHEN attempts >= max_attempts THEN 'failed' ELSE 'pending' END,
+                        last_error = 'lease expired (owner ' || COALESCE(lease_owner, '?') || ')',
+                        lease_owner = NULL,
+                        lease_expires_at = NULL,
+                        updated_at = ?
+                    WHERE status = 'running' AND lease_expires_at < ?
+                    """,
+                    (now, now),
+                )
+                row = conn.execute(
+                    "SELECT id, spec, attempts, max_attempts FROM jobs "
+                    "WHERE status = 'pending' ORDER BY id LIMIT 1"
+                ).fetchone()
+                if row is None:
+                    conn.execute("COMMIT")
+                    return None
+                conn.execute(
+                    """
+                    UPDATE jobs SET
+                        status = 'running',
+                        attempts = attempts + 1,
+                        lease_owner = ?,
+                        lease_expires_at = ?,
+                        heartbeat_at = ?,
+                        updated_at = ?
+                    WHERE id = ?
+                    """,
+                    (owner, now + lease_seconds, now, now, row["id"]),
+                )
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+
+        return Job(
+            id=row["id"],
+            spec=SkillSpec.from_dict(json.loads(row["spec"])),
+            attempts=row["attempts"] + 1,
+            max_attempts=row["max_attempts"],
+            owner=owner,
+        )
+
+    async def heartbeat(self, job: Job, lease_seconds: int) -> bool:
+        """续租；返回 False 表示租约已丢失（已过期并被其他 Worker 领取）"""
+        return await asyncio.to_thread(self._heartbeat, job, lease_seconds)
+
+    def _heartbeat(self, job: Job, lease_seconds: int) -> bool:
+        now = time.time()
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET lease_expires_at = ?, heartbeat_at = ?, updated_at = ? "
+                "WHERE id = ? AND lease_owner = ? AND status = 'running'",
+                (now + lease_seconds, now, now, job.id, job.owner),
+            )
+            return cursor.rowcount == 1
+
+    async def complete(self, job: Job, result: SkillResult) -> bool:
+        """记录任务结果；失败/超时且未超过最大尝试次数时重新排队。租约已丢失时返回 False"""
+        return await asyncio.to_thread(self._complete, job, result)
+
+    def _complete(self, job: Job, result: SkillResult) -> bool:
+        if result.status not in RETRYABLE_RESULTS:
+            status = JOB_DONE
+        elif job.attempts < job.max_attempts:
+            status = JOB_PENDING
+        else:
+            status = JOB_FAILED
+        with self._connect() as conn:
+            cursor = conn.execute(
+                """
+                UPDATE jobs SET
+                    status = ?,
+                    result = ?,
+                    last_error = ?,
+                    lease_owner = NULL,
+                    lease_expires_at = NULL,
+                    updated_at = ?
+                WHERE id = ? AND lease_owner = ? AND status = 'running'
+                """,
+                (
+                    status,
+                    json.dumps(result.to_dict(), ensure_ascii=False),
+                    result.error_log[-4000:] or None,
+                    time.time(),
+                    job.id,
+                    job.owner,
+                ),
+            )
+            return cursor.rowcount == 1
+
+    # ===== 查询 =====
+
+    async def counts(self) -> dict[str, int]:
+        return await asyncio.to_thread(self.counts_sync)
+
+    def counts_sync(self) -> dict[str, int]:
+        with self._connect() as conn:
+            rows = conn.execute("SELECT status, COUNT(*) AS n FROM jobs GROUP BY status").fetchall()
+        return {row["status"]: row["n"] for row in rows}
+
+    def failed_jobs(self, limit: int = 20) -> list[tuple[str, int, str]]:
+        """最近失败的任务 (技能名称, 尝试次数, 错误信息)"""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT skill_name, attempts, last_error FROM jobs WHERE status = ? "
+                "ORDER BY updated_at DESC LIMIT ?",
+                (JOB_FAILED, limit),
+            ).fetchall()
+        return [(row["skill_name"], row["attempts"], row["last_error"] or "") for row in rows]
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import hashlib
+import json
 from dataclasses import dataclass, field, asdict
 from typing import Optional, Any
 
@@ -19,6 +21,8 @@ class SkillSpec:
 
     references: Optional[list[str]] = field(default_factory=list)
     skip_distillation: bool = False
+    # 预先声明的依赖（如 "requests==2.31.0"），用于在生成代码前预取到共享包缓存
+    dependencies: list[str] = field(default_factory=list)
 
     @classmethod
     def from_dict(cls, data: dict[str, Any]) -> "SkillSpec":
@@ -32,20 +36,66 @@ class SkillSpec:
             max_distilled_tokens=int(data.get("max_distilled_tokens", 10000)),
             references=data.get("references", []) or [],
             skip_distillation=bool(data.get("skip_distillation", False)),
+            dependencies=[str(dep) for dep in data.get("dependencies", []) or []],
         )
 
+    def fingerprint(self, *extra: str) -> str:
+        """规范字段加上额外因素（模型、Prompt 模板版本等）的哈希，用于判断产物是否过期"""
+        spec = asdict(self)
+        # 未声明依赖时不计入指纹，保持新增该字段之前生成的指纹不变
+        if not spec["dependencies"]:
+            del spec["dependencies"]
+        payload = json.dumps([spec, *extra], sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
 
 @dataclass
 class SkillResult:
     """技能孵化结果"""
 
     skill_name: str
-    status: str  # success | partial_success | failed | timeout
+    status: str  # success | partial_success | failed | timeout | skipped
     skill_dir: str
     skill_file: str
     demo_code: str = ""
     error_log: str = ""
     created_at: str = ""
+    durations: dict[str, float] = field(default_factory=dict)  # 各阶段耗时（秒），total 为总耗时
+    tokens: dict[str, int] = field(default_factory=dict)  # token 统计（研究上下文/笔记/SKILL.md 估算值，API 实际用量）
 
     def to_dict(self) -> dict[str, Any]:
         return asdict(self)
+
+
+@dataclass
+class SkillCheckpoint:
+    """技能孵化断点（每轮结束后持久化，--resume 时从最后完成的轮次继续）"""
+
+    skill_name: str
+    completed_rounds: list[str] = field(default_factory=list)  # research | drafting | test | distill
+    research_notes: str = ""  # 研究笔记文件路径
+    attempts: int = 0  # 已完成的测试次数
+    last_test_success: bool = False
+    last_error: str = ""
+    last_result: Optional[dict[str, Any]] = None  # 最近一次验证结果（DockerExecutionResult.to_dict）
+    status: str = ""  # 全部轮次完成后的最终状态
+    fingerprint: str = ""  # 生成该断点时的规范指纹（SkillSpec + 模型 + Prompt 模板版本）
+    updated_at: str = ""
+
+    def to_dict(self) -> dict[str, Any]:
+        return asdict(self)
+
+    @classmethod
+    def from_dict(cls, data: dict[str, Any]) -> "SkillCheckpoint":
+        return cls(
+            skill_name=data["skill_name"],
+            completed_rounds=list(data.get("completed_rounds", [])),
+            research_notes=data.get("research_notes", ""),
+            attempts=int(data.get("attempts", 0)),
+            last_test_success=bool(data.get("last_test_success", False)),
+            last_error=data.get("last_error", ""),
+            last_result=data.get("last_result"),
+            status=data.get("status", ""),
+            fingerprint=data.get("fingerprint", ""),
+            updated_at=data.get("updated_at", ""),
+        )
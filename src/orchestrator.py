@@ -1,16 +1,34 @@
 from __future__ import annotations
 
 import asyncio
+import contextlib
+import itertools
 import json
 import logging
-import subprocess
+import logging.handlers
+import multiprocessing
+import queue as queue_module
+import sqlite3
+import time
+from collections import Counter
 from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Optional
+from typing import Any, Awaitable, Iterator, Optional
 
+from .concurrency import AdaptiveLimiter
 from .config import Config
+from .docs_prefetch import DocsPrefetcher
+from .durations import DurationHistory, DurationPredictor, longest_first, working_time
+from .job_store import Job, JobStore
 from .models import SkillResult, SkillSpec
-from .worker import SkillFactoryWorker
+from .pipeline import SkillBudget, StagePools
+from .rate_limit import RateLimiter
+from .research_cache import ResearchCache
+from .results_stream import ResultsStream, compact_run
+from .session_pool import SessionPool
+from .utils.docker_lifecycle import owner_id
+from .utils.docker_multilang import MultiLangDockerRunner
+from .worker import SkillFactoryWorker, build_client_options
 
 
 def _setup_logger() -> logging.Logger:
@@ -31,56 +49,194 @@ def _setup_logger() -> logging.Logger:
     return logger
 
 
-def load_skills_todo() -> list[SkillSpec]:
-    data_file = Config.DATA_DIR / "skills_todo.json"
+class _ShardTag(logging.Filter):
+    """给分片进程的日志加上分片编号前缀"""
+
+    def __init__(self, index: int):
+        super().__init__()
+        self.prefix = f"[shard {index}] "
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.msg = self.prefix + record.getMessage()
+        record.args = None
+        return True
+
+
+class _ShardResults:
+    """分片进程内代替 ResultsStream：把结果发回主进程，由主进程统一写入结果流"""
+
+    def __init__(self, result_queue: Any):
+        self.result_queue = result_queue
+
+    def append(self, result: SkillResult) -> None:
+        self.result_queue.put(result)
+
+
+def _shard_main(
+    index: int, options: dict[str, Any], task_queue: Any, result_queue: Any, log_queue: Any
+) -> None:
+    """分片进程入口（spawn 启动）：日志经队列交给主进程，独立事件循环执行分到的任务"""
+    logger = logging.getLogger("skillfactory")
+    logger.setLevel(getattr(logging, Config.LOG_LEVEL.upper(), logging.INFO))
+    handler = logging.handlers.QueueHandler(log_queue)
+    handler.addFilter(_ShardTag(index))
+    logger.addHandler(handler)
+
+    Config.init()
+    if not Config.RATE_LIMIT_STATE_FILE:
+        # 分片进程之间必须共享限流额度，否则总速率是配置值的 N 倍
+        Config.RATE_LIMIT_STATE_FILE = str(Config.DATA_DIR / "rate_limit_state.json")
+    orchestrator = SkillFactoryOrchestrator(**options)
+    orchestrator.results_stream = _ShardResults(result_queue)
+    try:
+        asyncio.run(orchestrator._run_shard(task_queue))
+    finally:
+        result_queue.put(index)  # 分片结束标记
+
+
+def skills_todo_path() -> Path:
+    """任务清单路径：优先 SKILLS_TODO_FILE，其次 data/skills_todo.jsonl，最后 data/skills_todo.json"""
+    if Config.SKILLS_TODO_FILE:
+        return Path(Config.SKILLS_TODO_FILE).expanduser()
+    jsonl_file = Config.DATA_DIR / "skills_todo.jsonl"
+    if jsonl_file.exists():
+        return jsonl_file
+    return Config.DATA_DIR / "skills_todo.json"
+
+
+def iter_skills_todo(path: Optional[Path] = None) -> Iterator[SkillSpec]:
+    """
+    逐条读取任务清单
+
+    .jsonl 格式每行一个技能对象，按行惰性读取，内存占用与清单大小无关；
+    格式错误的行记录警告后跳过。.json 格式（{"skills": [...]}）需要整体解析，只适合小清单。
+    """
+    data_file = path or skills_todo_path()
     if not data_file.exists():
-        return []
+        return
 
+    if data_file.suffix != ".jsonl":
+        with data_file.open("r", encoding="utf-8") as f:
+            data = json.load(f)
+        for item in data.get("skills", []):
+            yield SkillSpec.from_dict(item)
+        return
+
+    logger = logging.getLogger("skillfactory")
     with data_file.open("r", encoding="utf-8") as f:
-        data = json.load(f)
+        for line_no, line in enumerate(f, start=1):
+            line = line.strip()
+            if not line or line.startswith("#"):
+                continue
+            try:
+                yield SkillSpec.from_dict(json.loads(line))
+            except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+                logger.warning("Skipping invalid todo entry at %s:%s: %s", data_file.name, line_no, e)
 
-    skills = data.get("skills", [])
-    return [SkillSpec.from_dict(item) for item in skills]
 
+def load_skills_todo() -> list[SkillSpec]:
+    return list(iter_skills_todo())
 
-def _write_results(results: list[SkillResult]) -> None:
-    results_file = Config.DATA_DIR / "results_log.json"
-    payload = {
-        "generated_at": datetime.now(timezone.utc).isoformat(),
-        "results": [r.to_dict() for r in results],
-    }
-    with results_file.open("w", encoding="utf-8") as f:
-        json.dump(payload, f, ensure_ascii=False, indent=2)
 
+def results_stream_path() -> Path:
+    return Config.DATA_DIR / "results_stream.jsonl"
 
-def _log_docker_status(logger: logging.Logger) -> None:
-    try:
-        result = subprocess.run(
-            ["docker", "version", "--format", "{{.Server.Version}}"],
-            capture_output=True,
-            text=True,
-            check=False,
-        )
-        if result.returncode == 0:
-            version = result.stdout.strip() or "unknown"
-            logger.info("Docker detected: %s", version)
-        else:
-            stderr = result.stderr.strip() or "unknown error"
-            logger.warning("Docker not ready (exit=%s): %s", result.returncode, stderr)
-    except FileNotFoundError:
-        logger.warning("Docker CLI not found in PATH")
+
+def duration_history() -> DurationHistory:
+    return DurationHistory(Config.DATA_DIR / "durations.jsonl")
+
+
+def schedule(todos: Iterator[SkillSpec], predictor: DurationPredictor) -> Iterator[SkillSpec]:
+    """按历史耗时预测在 SCHEDULE_WINDOW 窗口内最长优先排序（关闭时保持清单顺序）"""
+    if not Config.SCHEDULE_LONGEST_FIRST:
+        return todos
+    return longest_first(todos, predictor, Config.SCHEDULE_WINDOW)
+
+
+def open_job_store() -> JobStore:
+    path = Path(Config.JOB_STORE_PATH).expanduser() if Config.JOB_STORE_PATH else (
+        Config.DATA_DIR / "jobs.sqlite3"
+    )
+    return JobStore(path, max_attempts=Config.JOB_MAX_ATTEMPTS, wal=Config.JOB_STORE_WAL)
+
+
+def _write_results(run_id: str) -> None:
+    """运行结束后把本次结果从结果流压缩写入 results_log.json（逐条结果已实时写入结果流）"""
+    compact_run(
+        results_stream_path(),
+        run_id,
+        Config.DATA_DIR / "results_log.json",
+        generated_at=datetime.now(timezone.utc).isoformat(),
+    )
+
+
+async def _log_docker_status(logger: logging.Logger) -> None:
+    available, detail = await MultiLangDockerRunner().docker_version()
+    if available:
+        logger.info("Docker detected: %s", detail)
+    else:
+        logger.warning("Docker not ready: %s", detail)
 
 
 class SkillFactoryOrchestrator:
     """主调度器，支持并发执行技能孵化任务"""
 
-    def __init__(self, max_concurrent: Optional[int] = None):
+    def __init__(
+        self,
+        max_concurrent: Optional[int] = None,
+        resume: bool = False,
+        force: bool = False,
+        only_changed: bool = False,
+    ):
         self.max_concurrent = max_concurrent or Config.MAX_CONCURRENT_WORKERS
-        self.semaphore = asyncio.Semaphore(self.max_concurrent)
-        self.results: List[SkillResult] = []
+        self.resume = resume  # 从各技能的断点继续，跳过已完成的轮次
+        # 规范指纹未变化的技能：默认只重新验证代码；only_changed 时直接跳过；force 时全部重跑
+        self.force = force
+        self.only_changed = only_changed
+        # 同时在途的技能数：固定信号量，或按延迟/过载/内存压力自适应调整（上限 worker_slots）
+        self.limiter: Optional[AdaptiveLimiter] = None
+        self.worker_slots = self.max_concurrent
+        if Config.ADAPTIVE_CONCURRENCY:
+            self.limiter = AdaptiveLimiter(
+                initial=self.max_concurrent,
+                min_limit=Config.ADAPTIVE_MIN_WORKERS,
+                max_limit=Config.ADAPTIVE_MAX_WORKERS or self.max_concurrent * 2,
+                latency_tolerance=Config.ADAPTIVE_LATENCY_TOLERANCE,
+                increase_interval=Config.ADAPTIVE_INCREASE_INTERVAL,
+                memory_per_slot=Config.DOCKER_MEMORY_LIMIT,
+                memory_reserve=Config.ADAPTIVE_MEMORY_RESERVE,
+            )
+            self.worker_slots = self.limiter.max_limit
+        self.semaphore = self.limiter or asyncio.Semaphore(self.max_concurrent)
+        # 各阶段（LLM / 沙箱 / 打包）的容量在本进程的所有 Worker 间共享
+        self.stages = StagePools.from_config(self.worker_slots)
+        self.rate_limiter = RateLimiter.from_config()
+        # 常驻会话池：技能之间复用已连接的 Claude 会话（每个在途技能占用一个）
+        self.session_pool: Optional[SessionPool] = None
+        if Config.SESSION_POOL_ENABLED:
+            self.session_pool = SessionPool(
+                build_client_options(),
+                size=Config.SESSION_POOL_SIZE or self.worker_slots,
+                max_uses=Config.SESSION_POOL_MAX_USES,
+                healthcheck_interval=Config.SESSION_POOL_HEALTHCHECK_INTERVAL,
+            )
+        # Context7 文档预取：技能进入待执行队列时开始获取，不占用模型轮次
+        self.research_cache = ResearchCache.from_config()
+        self.docs_prefetcher: Optional[DocsPrefetcher] = DocsPrefetcher.from_config(
+            self.research_cache
+        )
+        # 耗时历史：预测每个技能的耗时，用于最长优先调度和单独的超时
+        self.history = duration_history()
+        self.predictor = self.history.load_predictor(
+            Config.DURATION_MIN_SAMPLES, Config.DURATION_COARSE_MIN_SAMPLES
+        )
+        # 只保留各状态的计数，完整结果在结果流中，内存占用与任务数量无关
+        self.status_counts: Counter[str] = Counter()
+        self.token_counts: Counter[str] = Counter()  # 所有技能的 token 统计合计
+        self.results_stream: Optional[ResultsStream] = None
         self.logger = _setup_logger()
 
-    async def run(self) -> None:
+    async def _startup(self) -> None:
         Config.init()
         self.logger.info("SkillFactory Agent starting...")
         if not Config.ANTHROPIC_AUTH_TOKEN and not Config.CLAUDE_API_KEY:
@@ -89,41 +245,408 @@ class SkillFactoryOrchestrator:
             )
         if not Config.CONTEXT7_API_KEY:
             self.logger.warning("未检测到 Context7 API Key（CONTEXT7_API_KEY）。")
-        _log_docker_status(self.logger)
-        todos = load_skills_todo()
-        if not todos:
-            self.logger.warning("skills_todo.json 为空或不存在，未执行任何任务")
+        await _log_docker_status(self.logger)
+
+    async def run(self) -> None:
+        await self._startup()
+        todo_file = skills_todo_path()
+        todos = iter_skills_todo(todo_file)
+        first = next(todos, None)
+        if first is None:
+            self.logger.warning("%s 为空或不存在，未执行任何任务", todo_file.name)
+            return
+        self.logger.info("任务清单: %s（流式读取）", todo_file)
+        ordered = self._schedule(itertools.chain([first], todos))
+
+        # 有界队列提供背压：生产者最多领先消费者 worker_slots 个任务
+        queue: asyncio.Queue[Optional[SkillSpec]] = asyncio.Queue(maxsize=self.worker_slots)
+        await self._run_pipeline(
+            self._produce(queue, ordered, self.worker_slots),
+            *[self._consume(queue) for _ in range(self.worker_slots)],
+        )
+
+    async def run_job_worker(self, store: JobStore, exit_when_empty: bool = False) -> None:
+        """
+        作为任务队列 Worker 运行：从共享的 SQLite 任务库领取任务直到被停止
+
+        可以在多个进程或多台机器上同时运行（共享同一个任务库文件）。
+        exit_when_empty 时队列中没有待执行和执行中的任务后退出。
+        """
+        await self._startup()
+        self.logger.info("Job worker %s using %s", owner_id(), store.path)
+        await self._run_pipeline(
+            *[self._consume_jobs(store, exit_when_empty) for _ in range(self.worker_slots)]
+        )
+
+    async def run_sharded(self, processes: int) -> None:
+        """
+        多进程分片运行：任务清单分发给 processes 个子进程，每个进程有独立的事件循环，
+        各自最多并发 max_concurrent 个技能。结果和日志经队列汇总回主进程的结果流和日志。
+
+        每个分片有自己的任务队列，主进程记录发给每个分片、尚未收到结果的任务；
+        分片异常退出时这些任务记为失败，不会从结果流中消失。
+        """
+        await self._startup()
+        todo_file = skills_todo_path()
+        todos = iter_skills_todo(todo_file)
+        first = next(todos, None)
+        if first is None:
+            self.logger.warning("%s 为空或不存在，未执行任何任务", todo_file.name)
             return
-        self.logger.info("待执行技能数量: %s", len(todos))
+        self.logger.info(
+            "任务清单: %s（%s 个进程 x %s 并发）", todo_file, processes, self.max_concurrent
+        )
+
+        ctx = multiprocessing.get_context("spawn")
+        # 每个分片一个有界任务队列提供背压：主进程最多领先每个分片 max_concurrent 个任务
+        task_queues = [ctx.Queue(maxsize=self.worker_slots) for _ in range(processes)]
+        # 分片编号 -> 已发出但还没有结果的任务（技能名称 -> 规范）
+        outstanding: list[dict[str, SkillSpec]] = [{} for _ in range(processes)]
+        result_queue = ctx.Queue()
+        log_queue = ctx.Queue()
+        listener = logging.handlers.QueueListener(
+            log_queue, *self.logger.handlers, respect_handler_level=True
+        )
+        listener.start()
+        options = {
+            "max_concurrent": self.max_concurrent,
+            "resume": self.resume,
+            "force": self.force,
+            "only_changed": self.only_changed,
+        }
+        shards = [
+            ctx.Process(
+                target=_shard_main,
+                args=(index, options, task_queues[index], result_queue, log_queue),
+                name=f"skillfactory-shard-{index}",
+            )
+            for index in range(processes)
+        ]
+        for shard in shards:
+            shard.start()
+        # 主进程不运行 Worker，会话池和文档预取由各分片进程各自持有
+        self.session_pool = None
+        if self.docs_prefetcher is not None:
+            await self.docs_prefetcher.close()
+            self.docs_prefetcher = None
+        try:
+            await self._run_pipeline(
+                self._feed_shards(
+                    task_queues,
+                    self._schedule(itertools.chain([first], todos)),
+                    shards,
+                    outstanding,
+                ),
+                self._collect_shards(result_queue, shards, outstanding),
+            )
+        finally:
+            for shard in shards:
+                if shard.is_alive():
+                    shard.terminate()
+            for shard in shards:
+                await asyncio.to_thread(shard.join)
+            listener.stop()
+
+    async def _feed_shards(
+        self,
+        task_queues: list[Any],
+        todos: Iterator[SkillSpec],
+        shards: list[Any],
+        outstanding: list[dict[str, SkillSpec]],
+    ) -> None:
+        """
+        逐条把任务发给未完成任务最少、队列未满的分片（都满时等待），
+        读完后给每个分片发送结束标记
+        """
+        for skill_spec in todos:
+            while not self._dispatch(skill_spec, task_queues, shards, outstanding):
+                if not any(shard.is_alive() for shard in shards):
+                    raise RuntimeError("all shard processes exited before the todo list was drained")
+                await asyncio.sleep(0.2)
+        for task_queue, shard in zip(task_queues, shards):
+            while shard.is_alive():
+                try:
+                    await asyncio.to_thread(task_queue.put, None, True, 1.0)
+                    break
+                except queue_module.Full:
+                    continue
+
+    @staticmethod
+    def _dispatch(
+        skill_spec: SkillSpec,
+        task_queues: list[Any],
+        shards: list[Any],
+        outstanding: list[dict[str, SkillSpec]],
+    ) -> bool:
+        for index in sorted(range(len(shards)), key=lambda i: len(outstanding[i])):
+            if not shards[index].is_alive():
+                continue
+            try:
+                task_queues[index].put_nowait(skill_spec)
+            except queue_module.Full:
+                continue
+            outstanding[index][skill_spec.name] = skill_spec
+            return True
+        return False
+
+    async def _collect_shards(
+        self, result_queue: Any, shards: list[Any], outstanding: list[dict[str, SkillSpec]]
+    ) -> None:
+        """接收分片进程发回的结果写入结果流，直到所有分片结束"""
+        running = set(range(len(shards)))
+        while running:
+            try:
+                item = await asyncio.to_thread(result_queue.get, True, 1.0)
+            except queue_module.Empty:
+                # 被强制终止（OOM 等）的分片不会发送结束标记；此时队列已读空，它发出的结果都已收到
+                for index in list(running):
+                    exitcode = shards[index].exitcode
+                    if exitcode not in (0, None):
+                        self.logger.error("%s exited with code %s", shards[index].name, exitcode)
+                        running.discard(index)
+                        self._fail_unfinished(outstanding[index], f"exit code {exitcode}")
+                continue
+            if isinstance(item, int):
+                running.discard(item)
+                self._fail_unfinished(outstanding[item], "shard stopped")
+            else:
+                for pending in outstanding:
+                    if pending.pop(item.skill_name, None) is not None:
+                        break
+                self._record(item)
 
-        tasks = [
-            self.spawn_worker_with_timeout(skill, timeout=Config.WORKER_TIMEOUT)
-            for skill in todos
+    def _fail_unfinished(self, pending: dict[str, SkillSpec], reason: str) -> None:
+        """分片结束时仍未返回结果的任务记为失败"""
+        for skill_spec in pending.values():
+            self.log_error(
+                skill_spec, RuntimeError(f"shard process ended before the skill finished ({reason})")
+            )
+        pending.clear()
+
+    async def _run_shard(self, task_queue: Any) -> None:
+        """分片进程内：单个线程从进程间队列取任务，放入本地有界队列供 worker_slots 个消费者执行"""
+        local: asyncio.Queue[Optional[SkillSpec]] = asyncio.Queue(maxsize=self.worker_slots)
+        warmup = self._start_sessions()
+        consumers = [
+            asyncio.create_task(self._consume(local)) for _ in range(self.worker_slots)
         ]
+        try:
+            while True:
+                try:
+                    skill_spec = await asyncio.to_thread(task_queue.get, True, 1.0)
+                except queue_module.Empty:
+                    parent = multiprocessing.parent_process()
+                    if parent is not None and not parent.is_alive():
+                        break  # 主进程已退出，不再领取新任务
+                    continue
+                if skill_spec is None:
+                    break
+                await local.put(skill_spec)
+            for _ in consumers:
+                await local.put(None)
+            await asyncio.gather(*consumers)
+        finally:
+            for task in consumers:
+                task.cancel()
+            await asyncio.gather(*consumers, return_exceptions=True)
+            await self._stop_sessions(warmup)
+            await MultiLangDockerRunner.shutdown()
+
+    def _start_sessions(self) -> Optional[asyncio.Task]:
+        """在后台逐个预热会话池（不阻塞第一个技能的开始）"""
+        if self.session_pool is None or not Config.SESSION_POOL_PREWARM:
+            return None
+        return asyncio.create_task(self.session_pool.warm())
 
-        results = await asyncio.gather(*tasks, return_exceptions=True)
+    async def _stop_sessions(self, warmup: Optional[asyncio.Task]) -> None:
+        if warmup is not None:
+            warmup.cancel()
+            await asyncio.gather(warmup, return_exceptions=True)
+        if self.session_pool is not None:
+            await self.session_pool.close()
+        if self.docs_prefetcher is not None:
+            await self.docs_prefetcher.close()
 
-        for skill_spec, result in zip(todos, results):
-            if isinstance(result, Exception):
-                self.log_error(skill_spec, result)
-            elif isinstance(result, SkillResult):
-                self.save_result(result)
+    def _schedule(self, todos: Iterator[SkillSpec]) -> Iterator[SkillSpec]:
+        if Config.SCHEDULE_LONGEST_FIRST:
+            self.logger.info(
+                "Longest-first scheduling (window %s, %s historical samples)",
+                Config.SCHEDULE_WINDOW,
+                self.predictor.sample_count(),
+            )
+        return schedule(todos, self.predictor)
+
+    async def _run_pipeline(self, *coros: Awaitable[None]) -> None:
+        """启动容器回收器和结果流，运行生产者/消费者协程，结束后统一清理并生成汇总"""
+        reaper = MultiLangDockerRunner().create_reaper()
+        await reaper.reap_once()
+        reaper.start()
+
+        self.results_stream = ResultsStream(results_stream_path())
+        self.results_stream.open()
+        warmup = self._start_sessions()
+        completed = False
+        tasks = [asyncio.create_task(coro) for coro in coros]
+        try:
+            await asyncio.gather(*tasks)
+            completed = True
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            await self._stop_sessions(warmup)
+            self.results_stream.close(completed=completed)
+            await reaper.stop()
+            await MultiLangDockerRunner.shutdown()
 
         self.generate_summary_report()
-        _write_results(self.results)
+        _write_results(self.results_stream.run_id)
+
+    async def _produce(
+        self, queue: asyncio.Queue, todos: Iterator[SkillSpec], consumer_count: int
+    ) -> None:
+        """逐条读取任务放入队列（队列满时等待），读完后给每个消费者发送结束标记"""
+        for skill_spec in todos:
+            if self.docs_prefetcher is not None:
+                self.docs_prefetcher.schedule(skill_spec)
+            await queue.put(skill_spec)
+        for _ in range(consumer_count):
+            await queue.put(None)
+
+    async def _consume(self, queue: asyncio.Queue) -> None:
+        """从队列取任务执行，每个结果完成后立即写入结果流"""
+        while True:
+            skill_spec = await queue.get()
+            if skill_spec is None:
+                return
+            await self._run_and_record(skill_spec)
+
+    async def _consume_jobs(self, store: JobStore, exit_when_empty: bool) -> None:
+        """
+        从任务库领取任务执行，执行期间定期续租，完成后写回结果
 
-    async def spawn_worker_with_timeout(self, skill_spec: SkillSpec, timeout: int):
-        async with self.semaphore:
+        先占用并发名额再领取任务：自适应限制降低后，多出的消费者不会领着任务
+        （占着租约）排队等待名额。
+        """
+        while True:
+            await self.semaphore.acquire()
             try:
-                return await asyncio.wait_for(self._run_single_worker(skill_spec), timeout=timeout)
+                job = await store.claim(owner_id(), Config.JOB_LEASE_SECONDS)
+                if job is not None:
+                    await self._run_job(store, job)
+                    continue
+            finally:
+                self.semaphore.release()
+
+            if exit_when_empty:
+                counts = await store.counts()
+                if not counts.get("pending") and not counts.get("running"):
+                    return
+            await asyncio.sleep(Config.JOB_POLL_INTERVAL)
+
+    async def _run_job(self, store: JobStore, job: Job) -> None:
+        """在已占用的并发名额内运行领取到的任务"""
+        self.logger.info(
+            "Claimed job %s: %s (attempt %s/%s)",
+            job.id,
+            job.spec.name,
+            job.attempts,
+            job.max_attempts,
+        )
+        run = asyncio.create_task(self._run_and_record(job.spec, slot_held=True))
+        heartbeat = asyncio.create_task(self._heartbeat(store, job))
+        try:
+            await asyncio.wait({run, heartbeat}, return_when=asyncio.FIRST_COMPLETED)
+        finally:
+            heartbeat.cancel()
+            if not run.done():
+                # 租约已丢失（任务可能已被其他 Worker 重新领取）或本消费者被取消：停止技能
+                run.cancel()
+                await asyncio.gather(run, return_exceptions=True)
+        if run.cancelled():
+            self.logger.warning("Lease lost for job %s (%s), skill cancelled", job.id, job.spec.name)
+            return
+        result = run.result()
+        if result is not None and not await store.complete(job, result):
+            self.logger.warning("Lease lost for job %s (%s), result not recorded", job.id, job.spec.name)
+
+    async def _heartbeat(self, store: JobStore, job: Job) -> None:
+        """定期续租，租约丢失时返回"""
+        interval = max(1, Config.JOB_LEASE_SECONDS // 3)
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                if await store.heartbeat(job, Config.JOB_LEASE_SECONDS):
+                    continue
+            except sqlite3.Error as e:
+                # 任务库暂时不可用（锁超时等）不代表租约丢失，下次再续
+                self.logger.warning("Failed to renew lease for job %s (%s): %s", job.id, job.spec.name, e)
+                continue
+            return
+
+    async def _run_and_record(
+        self, skill_spec: SkillSpec, slot_held: bool = False
+    ) -> Optional[SkillResult]:
+        """运行单个技能并记录结果（计数 + 结果流）；slot_held 表示调用方已占用并发名额"""
+        skill_spec, result = await self._run_tagged(skill_spec, slot_held)
+        if isinstance(result, Exception):
+            return self.log_error(skill_spec, result)
+        if isinstance(result, SkillResult):
+            self._record_duration(skill_spec, result)
+            self.save_result(result)
+            return result
+        return None
+
+    def _record_duration(self, skill_spec: SkillSpec, result: SkillResult) -> None:
+        predicted = self.predictor.predict(skill_spec)
+        try:
+            recorded = self.history.append(skill_spec, result)
+        except OSError as e:
+            self.logger.warning("Failed to record durations for %s: %s", skill_spec.name, e)
+            return
+        if recorded:
+            total = working_time(result.durations)
+            self.predictor.observe(skill_spec, total, timed_out=result.status == "timeout")
+            self.logger.debug(
+                "Duration %s: %.0fs (predicted %s)",
+                skill_spec.name,
+                total,
+                "n/a" if predicted is None else f"{predicted:.0f}s",
+            )
+
+    async def _run_tagged(self, skill_spec: SkillSpec, slot_held: bool = False):
+        """运行单个技能，返回 (技能, 结果或异常)"""
+        try:
+            timeout = self.predictor.timeout_for(skill_spec)
+            result = await self.spawn_worker_with_timeout(
+                skill_spec, timeout=timeout, slot_held=slot_held
+            )
+        except Exception as exc:
+            return skill_spec, exc
+        return skill_spec, result
+
+    async def spawn_worker_with_timeout(
+        self, skill_spec: SkillSpec, timeout: int, slot_held: bool = False
+    ):
+        async with contextlib.nullcontext() if slot_held else self.semaphore:
+            started = time.monotonic()
+            budget = SkillBudget(timeout)
+            try:
+                return await self._wait_with_budget(
+                    self._run_single_worker(skill_spec, budget), budget
+                )
             except asyncio.TimeoutError:
+                durations = {"total": round(time.monotonic() - started, 3)}
+                if budget.queued:
+                    durations["queued"] = round(budget.queued, 3)
                 return SkillResult(
                     skill_name=skill_spec.name,
                     status="timeout",
                     skill_dir=str(Config.SKILLS_DIR / skill_spec.name),
                     skill_file=str(Config.SKILLS_DIR / f"{skill_spec.name}.skill"),
-                    error_log=f"超过 {timeout} 秒",
+                    error_log=f"超过 {timeout} 秒（不含排队等待阶段名额的 {budget.queued:.0f} 秒）",
                     created_at=datetime.now(timezone.utc).isoformat(),
+                    durations=durations,
                 )
             except Exception as exc:  # pragma: no cover - 防守性处理
                 return SkillResult(
@@ -135,40 +658,104 @@ class SkillFactoryOrchestrator:
                     created_at=datetime.now(timezone.utc).isoformat(),
                 )
 
-    async def _run_single_worker(self, skill_spec: SkillSpec) -> SkillResult:
-        worker = SkillFactoryWorker(skill_spec)
-        return await worker.run()
+    @staticmethod
+    async def _wait_with_budget(coro, budget: SkillBudget):
+        """
+        等待技能完成，超出预算时取消并抛出 asyncio.TimeoutError
+
+        与 asyncio.wait_for 不同，排队等待阶段名额的时间会顺延截止时间。
+        """
+        task = asyncio.create_task(coro)
+        try:
+            while True:
+                remaining = budget.remaining()
+                if remaining <= 0:
+                    break
+                done, _ = await asyncio.wait({task}, timeout=remaining)
+                if done:
+                    return task.result()
+        finally:
+            if not task.done():
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+        raise asyncio.TimeoutError
+
+    async def _run_single_worker(
+        self, skill_spec: SkillSpec, budget: Optional[SkillBudget] = None
+    ) -> SkillResult:
+        worker = SkillFactoryWorker(
+            skill_spec,
+            resume=self.resume,
+            stages=self.stages,
+            limiter=self.limiter,
+            rate_limiter=self.rate_limiter,
+            session_pool=self.session_pool,
+            research_cache=self.research_cache,
+            budget=budget,
+        )
+        if not self.force and worker.is_up_to_date():
+            if self.docs_prefetcher is not None:
+                self.docs_prefetcher.discard(skill_spec)
+            if self.only_changed:
+                return worker.skipped_result()
+            return await worker.revalidate()
+        context_docs = None
+        if self.docs_prefetcher is not None:
+            context_docs = await self.docs_prefetcher.get(skill_spec)
+        return await worker.run(context_docs=context_docs)
+
+    def _record(self, result: SkillResult) -> None:
+        self.status_counts[result.status] += 1
+        self.token_counts.update(result.tokens)
+        if self.results_stream is not None:
+            self.results_stream.append(result)
 
     def save_result(self, result: SkillResult) -> None:
-        self.results.append(result)
+        self._record(result)
         self.logger.info("技能完成: %s (%s)", result.skill_name, result.status)
 
-    def log_error(self, skill_spec: SkillSpec, error: Exception) -> None:
+    def log_error(self, skill_spec: SkillSpec, error: Exception) -> SkillResult:
         self.logger.error("技能失败: %s, error=%s", skill_spec.name, error)
-        self.results.append(
-            SkillResult(
-                skill_name=skill_spec.name,
-                status="failed",
-                skill_dir=str(Config.SKILLS_DIR / skill_spec.name),
-                skill_file=str(Config.SKILLS_DIR / f"{skill_spec.name}.skill"),
-                error_log=str(error),
-                created_at=datetime.now(timezone.utc).isoformat(),
-            )
+        result = SkillResult(
+            skill_name=skill_spec.name,
+            status="failed",
+            skill_dir=str(Config.SKILLS_DIR / skill_spec.name),
+            skill_file=str(Config.SKILLS_DIR / f"{skill_spec.name}.skill"),
+            error_log=str(error),
+            created_at=datetime.now(timezone.utc).isoformat(),
         )
+        self._record(result)
+        return result
 
     def generate_summary_report(self) -> None:
-        success = sum(1 for r in self.results if r.status == "success")
-        failed = sum(1 for r in self.results if r.status == "failed")
-        timeout = sum(1 for r in self.results if r.status == "timeout")
-        partial = sum(1 for r in self.results if r.status == "partial_success")
+        success = self.status_counts["success"]
+        failed = self.status_counts["failed"]
+        timeout = self.status_counts["timeout"]
+        partial = self.status_counts["partial_success"]
+        skipped = self.status_counts["skipped"]
 
         self.logger.info(
-            "Summary: success=%s | partial=%s | failed=%s | timeout=%s",
+            "Summary: success=%s | partial=%s | failed=%s | timeout=%s | skipped=%s",
             success,
             partial,
             failed,
             timeout,
+            skipped,
         )
+        self.logger.info("Stages: %s", self.stages.summary())
+        self.logger.info("Rate limiter: %s", self.rate_limiter.summary())
+        if self.docs_prefetcher is not None:
+            self.logger.info("Context7 prefetch: %s", self.docs_prefetcher.summary())
+        if self.research_cache is not None:
+            self.logger.info("Research cache: %s", self.research_cache.stats())
+        if self.token_counts:
+            self.logger.info(
+                "Tokens: %s",
+                " | ".join(f"{key}={value}" for key, value in sorted(self.token_counts.items())),
+            )
+        if self.limiter is not None:
+            self.logger.info("Final concurrency limit: %s", self.limiter.limit)
 
 
 if __name__ == "__main__":
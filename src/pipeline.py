@@ -0,0 +1,175 @@
+"""阶段化流水线 - LLM 会话、Docker 沙箱和打包各自限流，不同技能的不同阶段可以重叠执行"""
+
+from __future__ import annotations
+
+import asyncio
+import os
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Optional
+
+from .concurrency import read_meminfo
+from .config import Config
+from .utils.docker_api import parse_memory
+
+STAGE_LLM = "llm"
+STAGE_SANDBOX = "sandbox"
+STAGE_PACKAGING = "packaging"
+
+# 进行中的 LLM 轮次（工具调用循环）大约每 10 秒发出一次模型请求，用于由 API_RPM 推算 LLM 并发
+ROUND_REQUESTS_PER_MINUTE = 6
+
+
+class SkillBudget:
+    """
+    单个技能的超时预算
+
+    在阶段队列中排队等待名额的时间不计入预算（截止时间相应顺延），
+    技能只会因为自身的工作超时，而不是因为其他技能占满了 LLM/沙箱名额。
+    排队时间累计在 queued 中，单独写入结果的耗时统计。
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.deadline = time.monotonic() + timeout
+        self.queued = 0.0
+        self._waiting = 0
+        self._wait_started = 0.0
+
+    def remaining(self) -> float:
+        """剩余预算（秒）；排队期间预算暂停，不会减少"""
+        now = self._wait_started if self._waiting else time.monotonic()
+        return self.deadline - now
+
+    def pause(self) -> None:
+        if self._waiting == 0:
+            self._wait_started = time.monotonic()
+        self._waiting += 1
+
+    def resume(self) -> None:
+        self._waiting -= 1
+        if self._waiting == 0:
+            waited = time.monotonic() - self._wait_started
+            self.queued += waited
+            self.deadline += waited
+
+
+class StagePool:
+    """
+    单个阶段的容量限制
+
+    等待 slot() 的技能按到达顺序排队（asyncio.Semaphore 是 FIFO 的），
+    同时统计排队等待时间，用于判断哪个阶段是瓶颈。
+    传入 budgets 时排队期间暂停这些技能的超时预算（批量验证一次为多个技能占用名额）。
+    """
+
+    def __init__(self, name: str, capacity: int):
+        self.name = name
+        self.capacity = max(1, capacity)
+        self._semaphore = asyncio.Semaphore(self.capacity)
+        self.active = 0
+        self.waiting = 0
+        self.acquired = 0
+        self.total_wait = 0.0
+
+    @asynccontextmanager
+    async def slot(self, *budgets: Optional[SkillBudget]) -> AsyncIterator[None]:
+        start = time.monotonic()
+        paused = [budget for budget in budgets if budget is not None]
+        for budget in paused:
+            budget.pause()
+        self.waiting += 1
+        try:
+            await self._semaphore.acquire()
+        finally:
+            self.waiting -= 1
+            for budget in paused:
+                budget.resume()
+        self.total_wait += time.monotonic() - start
+        self.acquired += 1
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self._semaphore.release()
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "capacity": self.capacity,
+            "active": self.active,
+            "waiting": self.waiting,
+            "acquired": self.acquired,
+            "avg_wait": round(self.total_wait / self.acquired, 3) if self.acquired else 0.0,
+        }
+
+
+class StagePools:
+    """
+    流水线各阶段的容量
+
+    - llm: 同时进行的 LLM 轮次（研究、起草、修复、蒸馏）
+    - sandbox: 同时进行的 Docker 验证
+    - packaging: 同时进行的 .skill 打包
+
+    技能只在某一轮次内占用对应阶段的名额，等待 Docker 安装依赖的技能不占 LLM 名额，反之亦然。
+    同时在途的技能数量仍由 MAX_CONCURRENT_WORKERS 限制；在途数量大于各阶段容量时，
+    一部分技能在做 LLM 轮次的同时另一部分在 Docker 中验证。
+
+    未配置的阶段容量按各自的资源推算（见 llm_capacity / sandbox_capacity），
+    不超过同时在途的技能数。
+    """
+
+    def __init__(self, llm: int, sandbox: int, packaging: int):
+        self.llm = StagePool(STAGE_LLM, llm)
+        self.sandbox = StagePool(STAGE_SANDBOX, sandbox)
+        self.packaging = StagePool(STAGE_PACKAGING, packaging)
+
+    @classmethod
+    def from_config(cls, in_flight: Optional[int] = None) -> "StagePools":
+        """未配置的阶段容量按资源推算，上限为同时在途的技能数（默认 MAX_CONCURRENT_WORKERS）"""
+        in_flight = in_flight or Config.MAX_CONCURRENT_WORKERS
+        return cls(
+            llm=Config.LLM_CONCURRENCY or min(in_flight, llm_capacity() or in_flight),
+            sandbox=Config.SANDBOX_CONCURRENCY or min(in_flight, sandbox_capacity()),
+            packaging=Config.PACKAGING_CONCURRENCY or min(in_flight, os.cpu_count() or 1),
+        )
+
+    def pools(self) -> list[StagePool]:
+        return [self.llm, self.sandbox, self.packaging]
+
+    def summary(self) -> str:
+        return " | ".join(
+            f"{pool.name}: cap={pool.capacity} runs={pool.acquired} avg_wait={pool.stats()['avg_wait']}s"
+            for pool in self.pools()
+        )
+
+
+def llm_capacity() -> Optional[int]:
+    """
+    由模型 API 限流推算同时进行的 LLM 轮次数，未配置限流时返回 None
+
+    - API_RPM：每个进行中的轮次每分钟约 ROUND_REQUESTS_PER_MINUTE 次请求
+    - API_TPM：每个轮次预估 RATE_LIMIT_ROUND_TOKENS 个 token，轮次通常持续一分钟以上
+    """
+    caps = []
+    if Config.API_RPM:
+        caps.append(Config.API_RPM // ROUND_REQUESTS_PER_MINUTE)
+    if Config.API_TPM and Config.RATE_LIMIT_ROUND_TOKENS:
+        caps.append(Config.API_TPM // Config.RATE_LIMIT_ROUND_TOKENS)
+    return max(1, min(caps)) if caps else None
+
+
+def sandbox_capacity() -> int:
+    """由主机 CPU 核数和内存推算同时运行的 Docker 验证数（每个容器按 DOCKER_CPU_LIMIT/DOCKER_MEMORY_LIMIT 计）"""
+    cpus = os.cpu_count() or 1
+    try:
+        cpu_limit = float(Config.DOCKER_CPU_LIMIT)
+    except ValueError:
+        cpu_limit = 1.0
+    caps = [int(cpus / cpu_limit) if cpu_limit > 0 else cpus]
+    memory_total = read_meminfo("MemTotal")
+    memory_limit = parse_memory(Config.DOCKER_MEMORY_LIMIT) if Config.DOCKER_MEMORY_LIMIT else 0
+    if memory_total and memory_limit:
+        caps.append(memory_total // memory_limit)
+    return max(1, min(caps))
@@ -0,0 +1,207 @@
+"""模型 API 限流 - 请求数/分钟和 token 数/分钟双令牌桶，限流响应时抖动指数退避"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+import random
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from .config import Config
+from .utils.atomic_write import atomic_write_text
+from .utils.file_lock import FileLock
+
+# 单次等待的最长睡眠时间：跨进程共享时其他进程可能先退还额度，需要定期重新检查
+_MAX_SLEEP = 5.0
+
+
+class _BucketState:
+    """令牌桶状态（两个桶的剩余额度、上次补充时间、全局退避截止时间）"""
+
+    def __init__(self, requests: float, tokens: float):
+        self.requests = requests
+        self.tokens = tokens
+        self.updated_at = time.time()
+        self.blocked_until = 0.0
+
+    def to_dict(self) -> dict[str, float]:
+        return {
+            "requests": self.requests,
+            "tokens": self.tokens,
+            "updated_at": self.updated_at,
+            "blocked_until": self.blocked_until,
+        }
+
+    def load(self, data: dict) -> None:
+        self.requests = float(data.get("requests", self.requests))
+        self.tokens = float(data.get("tokens", self.tokens))
+        self.updated_at = float(data.get("updated_at", self.updated_at))
+        self.blocked_until = float(data.get("blocked_until", self.blocked_until))
+
+
+class RateLimiter:
+    """
+    模型 API 的全局限流器
+
+    - 每个 LLM 轮次开始前 acquire()：同时从请求桶（rpm）和 token 桶（tpm）扣除额度，
+      额度不足时按到达顺序排队等待，平滑放行而不是突发后集体失败
+    - token 数在轮次开始前只能估算，结束后用 settle() 按实际用量多退少补
+    - 收到限流响应时 backoff() 计算抖动指数退避时间，并暂停所有 Worker 的放行
+    - state_file 不为空时桶状态保存在本地文件中（文件锁保护），多个进程共享同一额度
+
+    rpm/tpm 为 0 表示不限制对应的桶（仍然提供退避和等待统计）。
+    """
+
+    def __init__(
+        self,
+        rpm: int = 0,
+        tpm: int = 0,
+        backoff_base: float = 5.0,
+        backoff_max: float = 120.0,
+        state_file: Optional[Path] = None,
+    ):
+        self.logger = logging.getLogger("skillfactory")
+        self.rpm = max(0, rpm)
+        self.tpm = max(0, tpm)
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.state_file = state_file
+        self._lock_file = (
+            state_file.with_name(state_file.name + ".lock") if state_file is not None else None
+        )
+        self._state = _BucketState(float(self.rpm), float(self.tpm))
+        self._queue = asyncio.Lock()  # 进程内按到达顺序放行
+        # 统计
+        self.admitted = 0
+        self.throttled = 0
+        self.rate_limited = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+
+    @classmethod
+    def from_config(cls) -> "RateLimiter":
+        state_file = Path(Config.RATE_LIMIT_STATE_FILE).expanduser() if Config.RATE_LIMIT_STATE_FILE else None
+        return cls(
+            rpm=Config.API_RPM,
+            tpm=Config.API_TPM,
+            backoff_base=Config.RATE_LIMIT_BACKOFF_BASE,
+            backoff_max=Config.RATE_LIMIT_BACKOFF_MAX,
+            state_file=state_file,
+        )
+
+    # ===== 放行 =====
+
+    async def acquire(self, tokens: int) -> float:
+        """等待直到可以发起一个估算消耗 tokens 的请求，返回排队等待的秒数"""
+        start = time.monotonic()
+        async with self._queue:
+            while True:
+                wait = await self._update(lambda state, now: self._take(state, now, tokens))
+                if wait <= 0:
+                    break
+                await asyncio.sleep(min(wait, _MAX_SLEEP))
+        waited = time.monotonic() - start
+        self.admitted += 1
+        self.total_wait += waited
+        self.max_wait = max(self.max_wait, waited)
+        if waited >= 1:
+            self.throttled += 1
+        return waited
+
+    def _take(self, state: _BucketState, now: float, tokens: int) -> float:
+        """尝试扣除额度，成功返回 0，否则返回还需等待的秒数"""
+        self._refill(state, now)
+        if now < state.blocked_until:
+            return state.blocked_until - now
+        tokens = min(tokens, self.tpm) if self.tpm else 0  # 超过桶容量的估算按满桶计，避免永远等待
+        waits = [0.0]
+        if self.rpm and state.requests < 1:
+            waits.append((1 - state.requests) * 60 / self.rpm)
+        if self.tpm and state.tokens < tokens:
+            waits.append((tokens - state.tokens) * 60 / self.tpm)
+        wait = max(waits)
+        if wait <= 0:
+            if self.rpm:
+                state.requests -= 1
+            state.tokens -= tokens
+        return wait
+
+    def _refill(self, state: _BucketState, now: float) -> None:
+        elapsed = max(0.0, now - state.updated_at)
+        state.updated_at = now
+        if self.rpm:
+            state.requests = min(float(self.rpm), state.requests + elapsed * self.rpm / 60)
+        if self.tpm:
+            state.tokens = min(float(self.tpm), state.tokens + elapsed * self.tpm / 60)
+
+    # ===== 轮次结束后的反馈 =====
+
+    async def settle(self, estimated: int, actual: Optional[int]) -> None:
+        """用实际 token 用量修正估算（实际更多时 token 桶可以为负，后续请求相应推迟）"""
+        if not self.tpm or actual is None or actual == estimated:
+            return
+        charged = min(estimated, self.tpm)
+
+        def _adjust(state: _BucketState, now: float) -> float:
+            self._refill(state, now)
+            state.tokens = max(-float(self.tpm), state.tokens - (actual - charged))
+            return 0.0
+
+        await self._update(_adjust)
+
+    async def backoff(self, attempt: int, reason: str = "") -> float:
+        """
+        收到限流响应后计算退避时间（指数增长 + 抖动），并在此期间暂停所有放行
+
+        抖动取 [d/2, d]，避免同时被限流的 Worker 在同一时刻重试。
+        """
+        ceiling = min(self.backoff_max, self.backoff_base * (2**attempt))
+        delay = random.uniform(ceiling / 2, ceiling)
+        self.rate_limited += 1
+
+        def _block(state: _BucketState, now: float) -> float:
+            state.blocked_until = max(state.blocked_until, now + delay)
+            return 0.0
+
+        await self._update(_block)
+        self.logger.warning(
+            "Rate limited%s, backing off %.1fs (retry %s)",
+            f" ({reason})" if reason else "",
+            delay,
+            attempt + 1,
+        )
+        return delay
+
+    # ===== 状态读写 =====
+
+    async def _update(self, fn: Callable[[_BucketState, float], float]) -> float:
+        if self.state_file is None:
+            return fn(self._state, time.time())
+        return await asyncio.to_thread(self._update_shared, fn)
+
+    def _update_shared(self, fn: Callable[[_BucketState, float], float]) -> float:
+        """在文件锁内读取、修改并写回共享状态"""
+        with FileLock(self._lock_file):
+            try:
+                self._state.load(json.loads(self.state_file.read_text(encoding="utf-8")))
+            except (OSError, json.JSONDecodeError, TypeError, ValueError):
+                pass  # 首次使用或文件损坏时从满桶开始
+            result = fn(self._state, time.time())
+            atomic_write_text(self.state_file, json.dumps(self._state.to_dict()))
+        return result
+
+    def stats(self) -> dict[str, float]:
+        return {
+            "admitted": self.admitted,
+            "throttled": self.throttled,
+            "rate_limited": self.rate_limited,
+            "avg_wait": round(self.total_wait / self.admitted, 3) if self.admitted else 0.0,
+            "max_wait": round(self.max_wait, 3),
+        }
+
+    def summary(self) -> str:
+        stats = self.stats()
+        return " | ".join(f"{key}={value}" for key, value in stats.items())
@@ -0,0 +1,98 @@
+"""研究资料缓存 - 按规范化的库 ID/URL 和查询缓存 Context7 文档与爬取结果，在技能之间共享"""
+
+from __future__ import annotations
+
+from typing import Iterable, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+from .config import Config
+from .utils.disk_cache import DiskCache, cache_key
+
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+
+def normalize_source(source: str) -> str:
+    """
+    规范化资料来源，使写法不同的同一来源命中同一个缓存条目
+
+    URL：协议和主机名小写、去掉默认端口、片段和末尾的 /；
+    Context7 库 ID（/org/project）：小写、去掉首尾的 /。
+    """
+    source = source.strip()
+    parts = urlsplit(source)
+    if parts.scheme in _DEFAULT_PORTS and parts.netloc:
+        host = (parts.hostname or "").lower()
+        if parts.port and parts.port != _DEFAULT_PORTS[parts.scheme]:
+            host = f"{host}:{parts.port}"
+        path = parts.path.rstrip("/") or "/"
+        return urlunsplit((parts.scheme, host, path, parts.query, ""))
+    return source.strip("/").lower()
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+class ResearchCache:
+    """
+    研究输入的共享缓存（DiskCache：TTL 过期、按总大小 LRU 淘汰、原子写入）
+
+    - 库名 → Context7 库 ID（找不到的库也缓存为空字符串，避免重复查询）
+    - (库 ID, 查询) → Context7 文档
+    - (参考 URL 列表, 查询) → 爬取得到的 Markdown 文件
+    """
+
+    def __init__(self, cache: DiskCache):
+        self.cache = cache
+
+    @classmethod
+    def from_config(cls) -> Optional["ResearchCache"]:
+        if not Config.RESEARCH_CACHE_ENABLED:
+            return None
+        return cls(
+            DiskCache(
+                root=Config.DATA_DIR / "research_cache",
+                ttl=Config.RESEARCH_CACHE_TTL,
+                max_bytes=Config.RESEARCH_CACHE_MAX_MB * 1024 * 1024,
+                name="Research cache",
+            )
+        )
+
+    @staticmethod
+    def library_key(library_name: str) -> str:
+        return cache_key("context7-library", normalize_query(library_name))
+
+    @staticmethod
+    def docs_key(library_id: str, query: str) -> str:
+        return cache_key("context7-docs", normalize_source(library_id), normalize_query(query))
+
+    @staticmethod
+    def crawl_key(urls: Iterable[str], query: str) -> str:
+        sources = sorted({normalize_source(url) for url in urls if url.strip()})
+        return cache_key("crawl", *sources, normalize_query(query))
+
+    def get_library_id(self, library_name: str) -> Optional[str]:
+        """返回缓存的库 ID；空字符串表示已知 Context7 中没有该库，None 表示未缓存"""
+        value = self.cache.get(self.library_key(library_name))
+        return value if isinstance(value, str) else None
+
+    def put_library_id(self, library_name: str, library_id: Optional[str]) -> None:
+        self.cache.put(self.library_key(library_name), library_id or "")
+
+    def get_docs(self, library_id: str, query: str) -> Optional[str]:
+        value = self.cache.get(self.docs_key(library_id, query))
+        return value if isinstance(value, str) else None
+
+    def put_docs(self, library_id: str, query: str, docs: str) -> None:
+        self.cache.put(self.docs_key(library_id, query), docs)
+
+    def get_crawl(self, urls: Iterable[str], query: str) -> Optional[dict[str, str]]:
+        """返回缓存的爬取文件（相对路径 → 内容）"""
+        value = self.cache.get(self.crawl_key(urls, query))
+        return value if isinstance(value, dict) and value else None
+
+    def put_crawl(self, urls: Iterable[str], query: str, files: dict[str, str]) -> None:
+        self.cache.put(self.crawl_key(urls, query), files)
+
+    def stats(self) -> str:
+        return self.cache.stats()
@@ -0,0 +1,168 @@
+"""结果流 - 每个技能完成即追加一条 JSONL 记录（逐条 fsync），崩溃后已完成的结果不会丢失"""
+
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+import time
+import uuid
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Any, Iterator, Optional
+
+from .models import SkillResult
+
+EVENT_RUN_START = "run_start"
+EVENT_RESULT = "result"
+EVENT_RUN_END = "run_end"
+
+
+class ResultsStream:
+    """
+    追加写入的 JSONL 结果流
+
+    每次运行先写一条 run_start（含任务总数，流式读取任务清单时未知为 null），
+    每个技能完成时写一条 result，正常结束时写 run_end。
+    多次运行追加到同一文件，status 命令只看最后一次运行。
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.run_id = uuid.uuid4().hex[:12]
+        self._file = None
+
+    def open(self, total: Optional[int] = None) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._file = self.path.open("a", encoding="utf-8")
+        self._write({"event": EVENT_RUN_START, "total": total})
+
+    def append(self, result: SkillResult) -> None:
+        self._write({"event": EVENT_RESULT, **result.to_dict()})
+
+    def close(self, completed: bool = True) -> None:
+        if self._file is None:
+            return
+        if completed:
+            self._write({"event": EVENT_RUN_END})
+        self._file.close()
+        self._file = None
+
+    def _write(self, record: dict[str, Any]) -> None:
+        if self._file is None:
+            return
+        record = {
+            "run_id": self.run_id,
+            "ts": datetime.now(timezone.utc).isoformat(),
+            **record,
+        }
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+
+def read_records(path: Path) -> list[dict[str, Any]]:
+    """读取结果流中的全部记录（忽略崩溃时写了一半的最后一行）"""
+    if not path.exists():
+        return []
+    records = []
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                continue
+    return records
+
+
+def last_run(records: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """返回最后一次运行的记录（从最后一条 run_start 开始）"""
+    for index in range(len(records) - 1, -1, -1):
+        if records[index].get("event") == EVENT_RUN_START:
+            run_id = records[index].get("run_id")
+            return [r for r in records[index:] if r.get("run_id") == run_id]
+    return []
+
+
+def iter_run_results(path: Path, run_id: str) -> Iterator[dict[str, Any]]:
+    """逐行读取指定运行的结果记录（不把整个文件读入内存）"""
+    if not path.exists():
+        return
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                continue
+            if record.get("run_id") == run_id and record.get("event") == EVENT_RESULT:
+                yield {
+                    key: value
+                    for key, value in record.items()
+                    if key not in ("run_id", "ts", "event")
+                }
+
+
+def compact_run(path: Path, run_id: str, out_path: Path, generated_at: str) -> int:
+    """
+    把一次运行的结果从结果流压缩写入 JSON 汇总文件
+
+    逐条写入临时文件后原子替换，内存占用与结果数量无关。返回写入的结果数量。
+    """
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=out_path.parent, prefix=f".{out_path.name}.", suffix=".tmp")
+    count = 0
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as out:
+            out.write(f'{{"generated_at":{json.dumps(generated_at)},"results":[')
+            for result in iter_run_results(path, run_id):
+                if count:
+                    out.write(",")
+                out.write(json.dumps(result, ensure_ascii=False, separators=(",", ":")))
+                count += 1
+            out.write("]}")
+        os.replace(tmp_name, out_path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return count
+
+
+def follow_records(
+    path: Path, poll_interval: float = 1.0, from_start: bool = True
+) -> Iterator[dict[str, Any]]:
+    """持续读取结果流的新记录（类似 tail -f），文件被截断或替换时从头读取"""
+    position = 0 if from_start else (path.stat().st_size if path.exists() else 0)
+    pending = b""
+    while True:
+        if not path.exists() or path.stat().st_size < position:
+            position, pending = 0, b""
+        if path.exists():
+            with path.open("rb") as f:
+                f.seek(position)
+                chunk = f.read()
+                position = f.tell()
+            *lines, pending = (pending + chunk).split(b"\n")
+            for line in lines:
+                try:
+                    yield json.loads(line.decode("utf-8"))
+                except (json.JSONDecodeError, UnicodeDecodeError):
+                    continue
+        time.sleep(poll_interval)
+
+
+def summarize(run: list[dict[str, Any]]) -> dict[str, Any]:
+    """统计一次运行的进度"""
+    start: Optional[dict[str, Any]] = run[0] if run else None
+    results = [r for r in run if r.get("event") == EVENT_RESULT]
+    counts: dict[str, int] = {}
+    for result in results:
+        status = result.get("status", "unknown")
+        counts[status] = counts.get(status, 0) + 1
+    return {
+        "run_id": start.get("run_id") if start else None,
+        "started_at": start.get("ts") if start else None,
+        "total": start.get("total") if start else 0,
+        "done": len(results),
+        "counts": counts,
+        "finished": any(r.get("event") == EVENT_RUN_END for r in run),
+    }
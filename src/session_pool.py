@@ -0,0 +1,192 @@
+"""Claude 会话池 - 复用已连接的 ClaudeSDKClient，省去每个技能启动 CLI 子进程和连接 MCP 的开销"""
+
+from __future__ import annotations
+
+import asyncio
+import collections
+import logging
+import time
+from typing import Optional
+
+from claude_agent_sdk import ClaudeAgentOptions, ClaudeSDKClient
+
+# 重置会话和健康检查的超时（秒）
+RESET_TIMEOUT = 30
+HEALTHCHECK_TIMEOUT = 10
+
+
+class PooledSession:
+    """池中的一个已连接会话"""
+
+    def __init__(self, client: ClaudeSDKClient, index: int):
+        self.client = client
+        self.index = index
+        self.uses = 0
+        self.created_at = time.monotonic()
+        self.checked_at = time.monotonic()
+
+    def __repr__(self) -> str:
+        return f"PooledSession(#{self.index}, uses={self.uses})"
+
+
+class SessionPool:
+    """
+    常驻 ClaudeSDKClient 会话池
+
+    - 池中所有会话使用相同的 ClaudeAgentOptions，最多 size 个（含使用中的）
+    - 技能用完归还时发送 /clear 重置对话，下一个技能从空白对话开始
+    - 空闲超过 healthcheck_interval 秒的会话在交给下一个技能前先做健康检查
+      （查询 MCP 状态，失败的 MCP 服务尝试重连），检查失败则断开并新建
+    - 每个会话被借用 max_uses 次后回收，避免 CLI 进程状态和内存无限累积
+    - 技能异常、被取消或轮次超时（响应未读完）时会话不再复用，直接断开
+    - warm() 逐个预先建立连接，避免大量 Worker 同时启动 CLI 造成内存尖峰
+    """
+
+    def __init__(
+        self,
+        options: ClaudeAgentOptions,
+        size: int,
+        max_uses: int = 10,
+        healthcheck_interval: float = 60,
+    ):
+        self.logger = logging.getLogger("skillfactory")
+        self.options = options
+        self.size = max(1, size)
+        self.max_uses = max(1, max_uses)
+        self.healthcheck_interval = healthcheck_interval
+        self._idle: collections.deque[PooledSession] = collections.deque()
+        self._total = 0  # 已连接（含使用中）和正在连接的会话数
+        self._next_index = 0
+        self._available = asyncio.Condition()
+        self._closed = False
+        # 统计
+        self.created = 0
+        self.reused = 0
+        self.discarded = 0
+
+    async def warm(self, count: Optional[int] = None) -> None:
+        """逐个预先建立连接（最多 count 个，默认填满池）"""
+        target = min(self.size, count or self.size)
+        while not self._closed and self._total < target:
+            self._total += 1
+            try:
+                session = await self._connect()
+            except Exception as e:
+                self._total -= 1
+                self.logger.warning("Session pool warm-up failed: %s", e)
+                return
+            async with self._available:
+                self._idle.append(session)
+                self._available.notify()
+
+    async def acquire(self) -> PooledSession:
+        while True:
+            async with self._available:
+                await self._available.wait_for(
+                    lambda: self._closed or self._idle or self._total < self.size
+                )
+                if self._closed:
+                    raise RuntimeError("session pool is closed")
+                session = self._idle.popleft() if self._idle else None
+                if session is None:
+                    self._total += 1  # 先占位再在锁外连接
+            if session is None:
+                try:
+                    return await self._connect()
+                except BaseException:
+                    await self._forget()
+                    raise
+            if time.monotonic() - session.checked_at < self.healthcheck_interval:
+                self.reused += 1
+                return session
+            if await self._healthy(session):
+                self.reused += 1
+                return session
+            await self._discard(session, "health check failed")
+
+    async def release(self, session: PooledSession, reusable: bool = True) -> None:
+        session.uses += 1
+        if self._closed or not reusable:
+            await self._discard(session, "not reusable")
+            return
+        if session.uses >= self.max_uses:
+            await self._discard(session, f"recycled after {session.uses} skills")
+            return
+        if not await self._reset(session):
+            await self._discard(session, "reset failed")
+            return
+        session.checked_at = time.monotonic()
+        async with self._available:
+            self._idle.append(session)
+            self._available.notify()
+
+    async def close(self) -> None:
+        self._closed = True
+        async with self._available:
+            idle, self._idle = list(self._idle), collections.deque()
+            self._available.notify_all()
+        for session in idle:
+            await self._discard(session, "pool closed")
+        self.logger.info(
+            "Session pool closed: created=%s reused=%s discarded=%s",
+            self.created,
+            self.reused,
+            self.discarded,
+        )
+
+    async def _connect(self) -> PooledSession:
+        client = ClaudeSDKClient(options=self.options)
+        await client.connect()
+        self._next_index += 1
+        self.created += 1
+        session = PooledSession(client, self._next_index)
+        self.logger.debug("Session pool connected %s", session)
+        return session
+
+    async def _reset(self, session: PooledSession) -> bool:
+        """发送 /clear 清空对话历史并读完其响应"""
+        try:
+            await session.client.query("/clear")
+            await asyncio.wait_for(self._drain(session.client), timeout=RESET_TIMEOUT)
+        except Exception as e:
+            self.logger.debug("Session reset failed for %s: %s", session, e)
+            return False
+        return True
+
+    @staticmethod
+    async def _drain(client: ClaudeSDKClient) -> None:
+        async for _ in client.receive_response():
+            pass
+
+    async def _healthy(self, session: PooledSession) -> bool:
+        try:
+            status = await asyncio.wait_for(
+                session.client.get_mcp_status(), timeout=HEALTHCHECK_TIMEOUT
+            )
+            for server in status.get("mcpServers", []):
+                if server.get("status") == "failed":
+                    self.logger.info("Reconnecting MCP server %s for %s", server.get("name"), session)
+                    await asyncio.wait_for(
+                        session.client.reconnect_mcp_server(server["name"]),
+                        timeout=HEALTHCHECK_TIMEOUT,
+                    )
+        except Exception as e:
+            self.logger.debug("Session health check failed for %s: %s", session, e)
+            return False
+        session.checked_at = time.monotonic()
+        return True
+
+    async def _discard(self, session: PooledSession, reason: str) -> None:
+        self.discarded += 1
+        self.logger.debug("Session pool discarding %s: %s", session, reason)
+        try:
+            await session.client.disconnect()
+        except Exception as e:
+            self.logger.debug("Error disconnecting %s: %s", session, e)
+        finally:
+            await self._forget()
+
+    async def _forget(self) -> None:
+        async with self._available:
+            self._total -= 1
+            self._available.notify()
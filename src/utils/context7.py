@@ -0,0 +1,171 @@
+"""Context7 MCP 客户端 - 用 httpx 直接调用 Context7 的 MCP 工具（Streamable HTTP），不经过模型轮次"""
+
+import asyncio
+import json
+import logging
+import re
+from typing import Any, Optional
+
+import httpx
+
+PROTOCOL_VERSION = "2025-03-26"
+CLIENT_INFO = {"name": "skillfactory", "version": "0.1.0"}
+
+# resolve-library-id 的返回文本中列出候选库，取第一个（最匹配的）库 ID
+LIBRARY_ID_PATTERN = re.compile(r"Context7-compatible library ID:\s*`?(/[^\s`]+)")
+FALLBACK_ID_PATTERN = re.compile(r"(?<![\w/])(/[\w.-]+/[\w.-]+(?:/[\w.-]+)?)")
+
+
+class Context7Error(Exception):
+    """Context7 MCP 返回错误"""
+
+    def __init__(self, message: str, status_code: Optional[int] = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class Context7Client:
+    """
+    Context7 MCP 的异步客户端
+
+    所有调用共享一个 httpx 连接池和一个 MCP 会话（首次调用时 initialize，
+    会话过期返回 404 时自动重新初始化一次）。服务端可以用 JSON 或 SSE 返回响应。
+    测试时可以把 url 指向本地的假服务，或传入 transport（如 httpx.MockTransport）。
+    """
+
+    def __init__(
+        self,
+        url: str,
+        api_key: str = "",
+        timeout: float = 60.0,
+        max_connections: int = 10,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.logger = logging.getLogger("skillfactory")
+        self.url = url
+        headers = {"Accept": "application/json, text/event-stream"}
+        if api_key:
+            headers["CONTEXT7_API_KEY"] = api_key
+        self._client = httpx.AsyncClient(
+            transport=transport,
+            headers=headers,
+            timeout=httpx.Timeout(timeout),
+            limits=httpx.Limits(max_connections=max_connections),
+        )
+        self._session_id: Optional[str] = None
+        self._initialized = False
+        self._init_lock = asyncio.Lock()
+        self._next_id = 0
+        self.tools: set[str] = set()
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+    # ===== 工具 =====
+
+    async def resolve_library_id(self, library_name: str, query: str = "") -> Optional[str]:
+        """把库名解析为 Context7 库 ID（如 /pydantic/pydantic），找不到时返回 None"""
+        text = await self.call_tool(
+            "resolve-library-id", {"libraryName": library_name, "query": query or library_name}
+        )
+        match = LIBRARY_ID_PATTERN.search(text) or FALLBACK_ID_PATTERN.search(text)
+        return match.group(1) if match else None
+
+    async def query_docs(self, library_id: str, query: str, tokens: Optional[int] = None) -> str:
+        """获取库文档；兼容旧版服务的 get-library-docs 工具"""
+        await self._ensure_session()  # 首次调用时先取得工具列表
+        if "query-docs" in self.tools or "get-library-docs" not in self.tools:
+            return await self.call_tool("query-docs", {"libraryId": library_id, "query": query})
+        arguments: dict[str, Any] = {"context7CompatibleLibraryID": library_id, "topic": query}
+        if tokens:
+            arguments["tokens"] = tokens
+        return await self.call_tool("get-library-docs", arguments)
+
+    async def call_tool(self, name: str, arguments: dict[str, Any]) -> str:
+        """调用 MCP 工具，返回文本内容"""
+        params = {"name": name, "arguments": arguments}
+        await self._ensure_session()
+        try:
+            result = await self._rpc("tools/call", params)
+        except Context7Error as e:
+            if e.status_code != 404 or self._session_id is None:
+                raise
+            # 会话过期：重新初始化后重试一次
+            self._initialized = False
+            self._session_id = None
+            await self._ensure_session()
+            result = await self._rpc("tools/call", params)
+
+        text = "\n".join(
+            str(block.get("text", ""))
+            for block in result.get("content", [])
+            if isinstance(block, dict) and block.get("type") == "text"
+        )
+        if result.get("isError"):
+            raise Context7Error(f"{name} failed: {text[:200]}")
+        return text
+
+    # ===== MCP 协议 =====
+
+    async def _ensure_session(self) -> None:
+        async with self._init_lock:
+            if self._initialized:
+                return
+            await self._rpc(
+                "initialize",
+                {
+                    "protocolVersion": PROTOCOL_VERSION,
+                    "capabilities": {},
+                    "clientInfo": CLIENT_INFO,
+                },
+            )
+            await self._post({"jsonrpc": "2.0", "method": "notifications/initialized"})
+            try:
+                listed = await self._rpc("tools/list", {})
+                self.tools = {tool.get("name", "") for tool in listed.get("tools", [])}
+            except Context7Error as e:
+                self.logger.debug("Context7 tools/list failed: %s", e)
+            self._initialized = True
+
+    async def _post(self, payload: dict[str, Any]) -> httpx.Response:
+        headers = {"MCP-Protocol-Version": PROTOCOL_VERSION}
+        if self._session_id:
+            headers["Mcp-Session-Id"] = self._session_id
+        return await self._client.post(self.url, json=payload, headers=headers)
+
+    async def _rpc(self, method: str, params: dict[str, Any]) -> dict[str, Any]:
+        self._next_id += 1
+        request_id = self._next_id
+        response = await self._post(
+            {"jsonrpc": "2.0", "id": request_id, "method": method, "params": params}
+        )
+        if response.status_code >= 400:
+            raise Context7Error(
+                f"{method}: HTTP {response.status_code}: {response.text[:200]}",
+                status_code=response.status_code,
+            )
+        session_id = response.headers.get("mcp-session-id")
+        if session_id:
+            self._session_id = session_id
+
+        message = self._parse(response, request_id)
+        if "error" in message:
+            error = message["error"]
+            raise Context7Error(f"{method}: {error.get('message', error)}")
+        return message.get("result", {})
+
+    @staticmethod
+    def _parse(response: httpx.Response, request_id: int) -> dict[str, Any]:
+        """解析 JSON 响应，或从 SSE 流中找到对应请求 ID 的消息"""
+        try:
+            if response.headers.get("content-type", "").startswith("text/event-stream"):
+                for line in response.text.splitlines():
+                    if not line.startswith("data:"):
+                        continue
+                    message = json.loads(line[5:].strip())
+                    if message.get("id") == request_id:
+                        return message
+                raise Context7Error(f"No response for request {request_id} in event stream")
+            return response.json()
+        except (json.JSONDecodeError, ValueError) as e:
+            raise Context7Error(f"Invalid MCP response: {e}") from e
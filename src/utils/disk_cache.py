@@ -0,0 +1,119 @@
+"""磁盘 JSON 缓存 - 内容寻址、TTL 过期、按总大小 LRU 淘汰，多进程并发写安全"""
+
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Any, Optional
+
+from .atomic_write import atomic_write_text
+
+
+def cache_key(*parts: str) -> str:
+    """由若干字段计算缓存 key（字段之间用 NUL 分隔，避免拼接歧义）"""
+    digest = hashlib.sha256()
+    for part in parts:
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+class DiskCache:
+    """
+    基于文件的 JSON 缓存
+
+    - 每个条目一个文件 <root>/<key[:2]>/<key>.json，写入时先写临时文件再 os.replace，
+      多个 Worker/进程同时写同一个 key 也不会读到半个文件
+    - 条目记录写入时间，超过 ttl 秒视为过期
+    - 命中时更新文件 mtime，淘汰时按 mtime 从旧到新删除，直到总大小低于 max_bytes
+    """
+
+    def __init__(self, root: Path, ttl: int, max_bytes: int, name: str = "cache"):
+        self.logger = logging.getLogger("skillfactory")
+        self.root = root
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.name = name
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._approx_bytes: Optional[int] = None
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / f"{key}.json"
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError, UnicodeDecodeError):
+            self.misses += 1
+            return None
+
+        if self.ttl > 0 and time.time() - entry.get("stored_at", 0) > self.ttl:
+            path.unlink(missing_ok=True)
+            self.misses += 1
+            return None
+
+        try:
+            os.utime(path)  # 记录最近使用时间，供 LRU 淘汰
+        except FileNotFoundError:
+            pass
+        self.hits += 1
+        return entry.get("value")
+
+    def put(self, key: str, value: Any) -> None:
+        payload = json.dumps({"stored_at": time.time(), "value": value}, ensure_ascii=False)
+        atomic_write_text(self._path(key), payload)
+
+        if self._approx_bytes is None:
+            self._approx_bytes = self._total_bytes()
+        else:
+            self._approx_bytes += len(payload.encode("utf-8"))
+        if self._approx_bytes > self.max_bytes:
+            self.evict()
+
+    def evict(self) -> int:
+        """删除最久未使用的条目直到总大小不超过 max_bytes，返回删除数量"""
+        entries = []
+        for path in self.root.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, path))
+
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for _, size, path in sorted(entries):
+            if total <= self.max_bytes:
+                break
+            path.unlink(missing_ok=True)
+            total -= size
+            removed += 1
+
+        self._approx_bytes = total
+        self.evictions += removed
+        if removed:
+            self.logger.info(f"{self.name} evicted {removed} entries ({total} bytes kept)")
+        return removed
+
+    def _total_bytes(self) -> int:
+        total = 0
+        for path in self.root.glob("*/*.json"):
+            try:
+                total += path.stat().st_size
+            except FileNotFoundError:
+                continue
+        return total
+
+    def stats(self) -> str:
+        lookups = self.hits + self.misses
+        ratio = self.hits / lookups if lookups else 0.0
+        return (
+            f"hits={self.hits} misses={self.misses} "
+            f"hit_rate={ratio:.0%} evictions={self.evictions}"
+        )
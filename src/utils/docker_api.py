@@ -0,0 +1,283 @@
+"""Docker Engine API 异步客户端 - 通过 unix socket 直接访问 dockerd，无需 fork docker CLI"""
+
+import json
+import logging
+import struct
+from typing import Any, AsyncIterator, Optional
+from urllib.parse import quote
+
+import httpx
+
+DEFAULT_SOCKET = "/var/run/docker.sock"
+DEFAULT_API_VERSION = "v1.41"
+
+# attach/logs 多路复用流中的流类型
+STREAM_STDOUT = 1
+STREAM_STDERR = 2
+
+
+class DockerAPIError(Exception):
+    """Docker Engine API 返回错误"""
+
+    def __init__(self, status_code: int, message: str):
+        super().__init__(f"Docker API error {status_code}: {message}")
+        self.status_code = status_code
+        self.message = message
+
+
+def parse_memory(limit: str) -> int:
+    """把 docker CLI 风格的内存限制（如 800m、1g）转换为字节数"""
+    units = {"b": 1, "k": 1024, "m": 1024**2, "g": 1024**3}
+    value = limit.strip().lower()
+    if value and value[-1] in units:
+        return int(float(value[:-1]) * units[value[-1]])
+    return int(value)
+
+
+async def demux_stream(chunks: AsyncIterator[bytes]) -> AsyncIterator[tuple[int, bytes]]:
+    """
+    解析非 TTY 容器的多路复用输出流
+
+    每帧 8 字节头：[流类型, 0, 0, 0, 长度(大端 uint32)]，后跟负载。
+    """
+    buffer = b""
+    async for chunk in chunks:
+        buffer += chunk
+        while len(buffer) >= 8:
+            stream_type, length = struct.unpack(">BxxxL", buffer[:8])
+            if len(buffer) < 8 + length:
+                break
+            yield stream_type, buffer[8 : 8 + length]
+            buffer = buffer[8 + length :]
+
+
+class DockerAPIClient:
+    """
+    基于 httpx 的 Docker Engine API 客户端
+
+    httpx 的 AsyncHTTPTransport 原生支持 unix socket，并维护连接池，
+    短请求（inspect/create/start/kill/remove）复用同一批连接。
+    """
+
+    def __init__(
+        self,
+        socket_path: str = DEFAULT_SOCKET,
+        api_version: str = DEFAULT_API_VERSION,
+        max_connections: int = 20,
+        base_url: Optional[str] = None,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.logger = logging.getLogger("skillfactory.docker")
+        if transport is None:
+            transport = httpx.AsyncHTTPTransport(
+                uds=socket_path,
+                limits=httpx.Limits(max_connections=max_connections),
+            )
+        # 测试时可以传入 base_url + transport 指向假的 API 服务
+        self._client = httpx.AsyncClient(
+            transport=transport,
+            base_url=f"{base_url or 'http://docker'}/{api_version}",
+            timeout=httpx.Timeout(30.0),
+        )
+
+    async def close(self) -> None:
+        await self._client.aclose()
+
+    async def _request(self, method: str, path: str, **kwargs: Any) -> httpx.Response:
+        response = await self._client.request(method, path, **kwargs)
+        if response.status_code >= 400:
+            raise DockerAPIError(response.status_code, self._error_message(response))
+        return response
+
+    @staticmethod
+    def _error_message(response: httpx.Response) -> str:
+        try:
+            return response.json().get("message", response.text)
+        except (json.JSONDecodeError, ValueError):
+            return response.text
+
+    # ===== 系统 =====
+
+    async def ping(self) -> bool:
+        try:
+            response = await self._client.get("/_ping", timeout=5)
+            return response.status_code == 200
+        except httpx.HTTPError:
+            return False
+
+    async def version(self) -> dict:
+        return (await self._request("GET", "/version", timeout=5)).json()
+
+    # ===== 镜像 =====
+
+    async def inspect_image(self, image: str) -> dict:
+        return (await self._request("GET", f"/images/{quote(image, safe='')}/json")).json()
+
+    async def pull(self, image: str, timeout: Optional[float] = None) -> None:
+        """拉取镜像；进度流中出现 error 字段时抛出 DockerAPIError"""
+        name, _, tag = image.rpartition(":") if ":" in image.split("/")[-1] else (image, "", "")
+        params = {"fromImage": name or image, "tag": tag or "latest"}
+        async with self._client.stream(
+            "POST", "/images/create", params=params, timeout=timeout
+        ) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                raise DockerAPIError(response.status_code, self._error_message(response))
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                if "error" in event:
+                    raise DockerAPIError(500, event["error"])
+
+    async def build(self, context: bytes, tag: str, timeout: Optional[float] = None) -> str:
+        """用 tar 格式的构建上下文构建镜像，返回构建输出；构建失败时抛出 DockerAPIError"""
+        params = {"t": tag, "q": "1", "rm": "1"}
+        output: list[str] = []
+        async with self._client.stream(
+            "POST",
+            "/build",
+            params=params,
+            content=context,
+            headers={"Content-Type": "application/x-tar"},
+            timeout=timeout,
+        ) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                raise DockerAPIError(response.status_code, self._error_message(response))
+            async for line in response.aiter_lines():
+                if not line.strip():
+                    continue
+                event = json.loads(line)
+                if "error" in event:
+                    raise DockerAPIError(500, "".join(output) + event["error"])
+                output.append(event.get("stream", ""))
+        return "".join(output)
+
+    async def commit(
+        self, container_id: str, repo: str, tag: str, changes: Optional[list[str]] = None
+    ) -> str:
+        """把容器提交为镜像（changes 为 LABEL 等 Dockerfile 指令），返回镜像 ID"""
+        params = {"container": container_id, "repo": repo, "tag": tag}
+        if changes:
+            params["changes"] = "\n".join(changes)
+        return (await self._request("POST", "/commit", params=params)).json()["Id"]
+
+    async def remove_image(self, image: str, force: bool = False) -> None:
+        """删除镜像；镜像不存在视为已删除，仍被容器使用时抛出 409 DockerAPIError"""
+        try:
+            await self._request(
+                "DELETE",
+                f"/images/{quote(image, safe='')}",
+                params={"force": "1" if force else "0"},
+            )
+        except DockerAPIError as e:
+            if e.status_code != 404:
+                raise
+
+    # ===== 容器 =====
+
+    async def create_container(self, config: dict, name: Optional[str] = None) -> str:
+        params = {"name": name} if name else None
+        response = await self._request("POST", "/containers/create", params=params, json=config)
+        return response.json()["Id"]
+
+    async def start(self, container_id: str) -> None:
+        await self._request("POST", f"/containers/{container_id}/start")
+
+    async def attach(self, container_id: str) -> AsyncIterator[tuple[int, bytes]]:
+        """附加到容器的 stdout/stderr，按帧返回 (流类型, 数据)"""
+        params = {"stream": "1", "stdout": "1", "stderr": "1"}
+        async with self._client.stream(
+            "POST", f"/containers/{container_id}/attach", params=params, timeout=None
+        ) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                raise DockerAPIError(response.status_code, self._error_message(response))
+            async for frame in demux_stream(response.aiter_bytes()):
+                yield frame
+
+    async def logs(self, container_id: str, follow: bool = True) -> AsyncIterator[tuple[int, bytes]]:
+        """读取容器输出（follow 时持续到容器退出），按帧返回 (流类型, 数据)"""
+        params = {"stdout": "1", "stderr": "1", "follow": "1" if follow else "0"}
+        async with self._client.stream(
+            "GET", f"/containers/{container_id}/logs", params=params, timeout=None
+        ) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                raise DockerAPIError(response.status_code, self._error_message(response))
+            async for frame in demux_stream(response.aiter_bytes()):
+                yield frame
+
+    async def wait(self, container_id: str) -> int:
+        response = await self._request(
+            "POST", f"/containers/{container_id}/wait", timeout=None
+        )
+        return int(response.json().get("StatusCode", -1))
+
+    async def kill(self, container_id: str, signal: str = "SIGKILL") -> None:
+        try:
+            await self._request(
+                "POST", f"/containers/{container_id}/kill", params={"signal": signal}
+            )
+        except DockerAPIError as e:
+            # 404 已不存在 / 409 未在运行，都视为已停止
+            if e.status_code not in (404, 409):
+                raise
+
+    async def remove(self, container_id: str, force: bool = True) -> None:
+        try:
+            await self._request(
+                "DELETE",
+                f"/containers/{container_id}",
+                params={"force": "1" if force else "0", "v": "1"},
+            )
+        except DockerAPIError as e:
+            if e.status_code != 404:
+                raise
+
+    # ===== exec =====
+
+    async def exec_create(
+        self,
+        container_id: str,
+        cmd: list[str],
+        workdir: Optional[str] = None,
+        env: Optional[dict[str, str]] = None,
+    ) -> str:
+        """在运行中的容器内创建一条命令（等价于 docker exec 的准备阶段），返回 exec ID"""
+        config: dict = {"AttachStdout": True, "AttachStderr": True, "Cmd": cmd}
+        if workdir:
+            config["WorkingDir"] = workdir
+        if env:
+            config["Env"] = [f"{key}={value}" for key, value in env.items()]
+        response = await self._request("POST", f"/containers/{container_id}/exec", json=config)
+        return response.json()["Id"]
+
+    async def exec_start(self, exec_id: str) -> AsyncIterator[tuple[int, bytes]]:
+        """启动 exec 并读取输出直到命令结束，按帧返回 (流类型, 数据)"""
+        async with self._client.stream(
+            "POST",
+            f"/exec/{exec_id}/start",
+            json={"Detach": False, "Tty": False},
+            timeout=None,
+        ) as response:
+            if response.status_code >= 400:
+                await response.aread()
+                raise DockerAPIError(response.status_code, self._error_message(response))
+            async for frame in demux_stream(response.aiter_bytes()):
+                yield frame
+
+    async def exec_inspect(self, exec_id: str) -> dict:
+        return (await self._request("GET", f"/exec/{exec_id}/json")).json()
+
+    async def list_containers(
+        self, all: bool = False, filters: Optional[dict[str, list[str]]] = None
+    ) -> list[dict]:
+        params = {"all": "1" if all else "0"}
+        if filters:
+            params["filters"] = json.dumps(filters)
+        return (await self._request("GET", "/containers/json", params=params)).json()
+
+    async def inspect_container(self, container_id: str) -> dict:
+        return (await self._request("GET", f"/containers/{container_id}/json")).json()
@@ -0,0 +1,328 @@
+"""Docker 调用后端 - 镜像构建、容器池和预取等辅助操作按 DOCKER_BACKEND 走 docker CLI 或 Engine API"""
+
+import asyncio
+import io
+import json
+import tarfile
+from pathlib import Path
+from typing import Optional
+
+import httpx
+
+from .docker_api import STREAM_STDERR, DockerAPIClient, DockerAPIError, parse_memory
+from .docker_cli import run_docker
+from .docker_lifecycle import label_args
+
+# 以下函数的 api 参数为 None 时 fork docker CLI，否则通过 Engine API 完成同样的操作
+
+
+async def inspect_image(image: str, api: Optional[DockerAPIClient] = None) -> Optional[dict]:
+    """返回镜像的 inspect 信息（含 Id、Size），镜像不存在时返回 None"""
+    if api is not None:
+        try:
+            return await api.inspect_image(image)
+        except DockerAPIError:
+            return None
+
+    exit_code, stdout, _ = await run_docker(["image", "inspect", image], timeout=30)
+    if exit_code != 0:
+        return None
+    try:
+        return json.loads(stdout)[0]
+    except (json.JSONDecodeError, IndexError):
+        return None
+
+
+async def pull_image(image: str, timeout: int, api: Optional[DockerAPIClient] = None) -> bool:
+    """拉取镜像，返回是否成功"""
+    if api is not None:
+        try:
+            await api.pull(image, timeout=timeout)
+            return True
+        except (DockerAPIError, httpx.HTTPError):
+            return False
+
+    exit_code, _, _ = await run_docker(["pull", image], timeout=timeout)
+    return exit_code == 0
+
+
+def build_context(context_dir: Path) -> bytes:
+    """把构建目录打包成 Engine API 需要的 tar 构建上下文"""
+    buffer = io.BytesIO()
+    with tarfile.open(fileobj=buffer, mode="w") as tar:
+        for path in sorted(context_dir.rglob("*")):
+            tar.add(path, arcname=path.relative_to(context_dir).as_posix(), recursive=False)
+    return buffer.getvalue()
+
+
+async def build_image(
+    context_dir: Path, tag: str, timeout: int, api: Optional[DockerAPIClient] = None
+) -> tuple[int, str]:
+    """
+    用 context_dir 中的 Dockerfile 构建镜像
+
+    Returns:
+        (exit_code, 构建输出)，超时返回 exit_code=-1
+    """
+    if api is not None:
+        try:
+            return 0, await api.build(build_context(context_dir), tag, timeout=timeout)
+        except DockerAPIError as e:
+            return 1, e.message
+        except httpx.TimeoutException:
+            return -1, f"docker build timeout after {timeout}s"
+
+    exit_code, stdout, stderr = await run_docker(
+        ["build", "-q", "-t", tag, str(context_dir)], timeout=timeout
+    )
+    return exit_code, stderr or stdout
+
+
+async def build_by_commit(
+    image: str,
+    command: str,
+    tag: str,
+    name: str,
+    binds: list[str],
+    env: dict[str, str],
+    labels: dict[str, str],
+    timeout: int,
+    workdir: str = "/app",
+    network: Optional[str] = None,
+    changes: Optional[list[str]] = None,
+    api: Optional[DockerAPIClient] = None,
+) -> tuple[int, str]:
+    """
+    在容器中执行命令并把结果提交为镜像（docker run + docker commit）
+
+    与 docker build 不同，构建过程可以使用宿主机挂载（如共享包缓存）和指定的网络模式；
+    挂载的目录不会进入镜像。构建容器无论成功与否都会删除。
+
+    Returns:
+        (exit_code, 输出)，超时返回 exit_code=-1
+    """
+    repo, _, version = tag.rpartition(":")
+    if api is None:
+        args = ["run", "--name", name, *label_args(labels), "-w", workdir]
+        for bind in binds:
+            args.extend(["-v", bind])
+        if network:
+            args.extend(["--network", network])
+        for key, value in env.items():
+            args.extend(["-e", f"{key}={value}"])
+        args.extend([image, "sh", "-c", command])
+        try:
+            exit_code, stdout, stderr = await run_docker(args, timeout=timeout)
+            if exit_code != 0:
+                return exit_code, stderr or stdout
+            commit_args = ["commit"]
+            for change in changes or []:
+                commit_args.extend(["--change", change])
+            exit_code, stdout, stderr = await run_docker([*commit_args, name, tag], timeout=120)
+            return exit_code, stderr or stdout
+        finally:
+            await asyncio.shield(run_docker(["rm", "-f", name], timeout=30))
+
+    host_config: dict = {"Binds": binds}
+    if network:
+        host_config["NetworkMode"] = network
+    config = {
+        "Image": image,
+        "Cmd": ["sh", "-c", command],
+        "WorkingDir": workdir,
+        "Env": [f"{key}={value}" for key, value in env.items()],
+        "Labels": labels,
+        "HostConfig": host_config,
+    }
+    try:
+        container_id = await api.create_container(config, name=name)
+    except DockerAPIError as e:
+        return 1, e.message
+    try:
+        await api.start(container_id)
+        try:
+            exit_code = await asyncio.wait_for(api.wait(container_id), timeout=timeout)
+        except asyncio.TimeoutError:
+            await api.kill(container_id)
+            return -1, f"docker run timeout after {timeout}s"
+        if exit_code != 0:
+            output = [data async for _, data in api.logs(container_id, follow=False)]
+            return exit_code, b"".join(output).decode("utf-8", errors="replace")
+        return 0, await api.commit(container_id, repo, version, changes)
+    except DockerAPIError as e:
+        return 1, e.message
+    finally:
+        await asyncio.shield(api.remove(container_id, force=True))
+
+
+async def remove_image(image: str, api: Optional[DockerAPIClient] = None) -> tuple[bool, str]:
+    """
+    删除镜像
+
+    Returns:
+        (是否已不存在, 错误信息)；镜像仍被容器使用时返回 False
+    """
+    if api is not None:
+        try:
+            await api.remove_image(image)
+            return True, ""
+        except DockerAPIError as e:
+            return False, e.message
+
+    exit_code, _, stderr = await run_docker(["rmi", image], timeout=60)
+    return exit_code == 0 or "No such image" in stderr, stderr
+
+
+async def start_detached(
+    image: str,
+    command: list[str],
+    binds: list[str],
+    labels: dict[str, str],
+    memory_limit: str,
+    cpu_limit: str,
+    workdir: str,
+    network: Optional[str] = None,
+    api: Optional[DockerAPIClient] = None,
+) -> str:
+    """
+    启动一个后台常驻容器（等价于 docker run -d --rm），返回容器 ID
+
+    Raises:
+        RuntimeError: 启动失败
+    """
+    if api is not None:
+        host_config: dict = {
+            "Binds": binds,
+            "Memory": parse_memory(memory_limit),
+            "NanoCpus": int(float(cpu_limit) * 1e9),
+            "AutoRemove": True,
+        }
+        if network:
+            host_config["NetworkMode"] = network
+        config = {
+            "Image": image,
+            "Cmd": command,
+            "WorkingDir": workdir,
+            "Labels": labels,
+            "HostConfig": host_config,
+        }
+        try:
+            try:
+                container_id = await api.create_container(config)
+            except DockerAPIError as e:
+                if e.status_code != 404:
+                    raise
+                await api.pull(image, timeout=300)
+                container_id = await api.create_container(config)
+            await api.start(container_id)
+        except (DockerAPIError, httpx.HTTPError) as e:
+            raise RuntimeError(str(e)) from e
+        return container_id
+
+    args = ["run", "-d", "--rm", f"--memory={memory_limit}", f"--cpus={cpu_limit}"]
+    args.extend(label_args(labels))
+    for bind in binds:
+        args.extend(["-v", bind])
+    if network:
+        args.extend(["--network", network])
+    args.extend(["-w", workdir, image, *command])
+    exit_code, stdout, stderr = await run_docker(args, timeout=120)
+    if exit_code != 0:
+        raise RuntimeError(stderr.strip())
+    return stdout.strip()
+
+
+async def exec_command(
+    container_id: str, command: list[str], timeout: int, api: Optional[DockerAPIClient] = None
+) -> int:
+    """在运行中的容器内执行一条命令并等待结束，返回退出码（超时或出错为 -1）"""
+    if api is not None:
+        try:
+            exec_id = await api.exec_create(container_id, command)
+
+            async def _drain() -> None:
+                async for _ in api.exec_start(exec_id):
+                    pass
+
+            await asyncio.wait_for(_drain(), timeout=timeout)
+            exit_code = (await api.exec_inspect(exec_id)).get("ExitCode")
+            return -1 if exit_code is None else int(exit_code)
+        except (DockerAPIError, httpx.HTTPError, asyncio.TimeoutError):
+            return -1
+
+    exit_code, _, _ = await run_docker(["exec", container_id, *command], timeout=timeout)
+    return exit_code
+
+
+async def remove_container(container_id: str, api: Optional[DockerAPIClient] = None) -> None:
+    """强制删除容器（不存在时忽略）"""
+    if api is not None:
+        await api.remove(container_id, force=True)
+        return
+    await run_docker(["rm", "-f", container_id], timeout=30)
+
+
+async def run_container(
+    image: str,
+    command: str,
+    binds: list[str],
+    env: dict[str, str],
+    timeout: int,
+    network: Optional[str] = None,
+    api: Optional[DockerAPIClient] = None,
+) -> tuple[int, str, str]:
+    """
+    运行一次性容器并收集输出（等价于 docker run --rm image sh -c command）
+
+    Returns:
+        (exit_code, stdout, stderr)，超时返回 exit_code=-1
+    """
+    if api is None:
+        args = ["run", "--rm"]
+        for bind in binds:
+            args.extend(["-v", bind])
+        if network:
+            args.extend(["--network", network])
+        for key, value in env.items():
+            args.extend(["-e", f"{key}={value}"])
+        args.extend([image, "sh", "-c", command])
+        return await run_docker(args, timeout=timeout)
+
+    host_config: dict = {"Binds": binds}
+    if network:
+        host_config["NetworkMode"] = network
+    config = {
+        "Image": image,
+        "Cmd": ["sh", "-c", command],
+        "Env": [f"{key}={value}" for key, value in env.items()],
+        "HostConfig": host_config,
+    }
+    try:
+        container_id = await api.create_container(config)
+    except DockerAPIError as e:
+        if e.status_code != 404:
+            return 1, "", e.message
+        if not await pull_image(image, timeout, api):
+            return 1, "", f"Failed to pull image: {image}"
+        container_id = await api.create_container(config)
+
+    try:
+        await api.start(container_id)
+        try:
+            exit_code = await asyncio.wait_for(api.wait(container_id), timeout=timeout)
+        except asyncio.TimeoutError:
+            await api.kill(container_id)
+            return -1, "", f"docker run timeout after {timeout}s"
+        stdout: list[bytes] = []
+        stderr: list[bytes] = []
+        async for stream, data in api.logs(container_id, follow=False):
+            (stderr if stream == STREAM_STDERR else stdout).append(data)
+        return (
+            exit_code,
+            b"".join(stdout).decode("utf-8", errors="replace"),
+            b"".join(stderr).decode("utf-8", errors="replace"),
+        )
+    except DockerAPIError as e:
+        return 1, "", e.message
+    finally:
+        await asyncio.shield(api.remove(container_id, force=True))
@@ -0,0 +1,211 @@
+"""批量验证 - 把同一语言、同时到达测试阶段的多个项目合并到一个容器中运行"""
+
+import asyncio
+import logging
+from contextlib import nullcontext
+from pathlib import Path
+from typing import TYPE_CHECKING, AsyncContextManager, Callable, Optional
+
+from .output_capture import BoundedOutput
+
+if TYPE_CHECKING:
+    from ..pipeline import SkillBudget
+    from .docker_multilang import DockerExecutionResult, MultiLangDockerRunner
+
+# 批量容器内的挂载点，每个项目使用其下的独立子目录
+BATCH_ROOT = "/batch"
+# 项目目录下存放代码和依赖的运行目录，项目结束后在容器内删除
+BATCH_WORKDIR = "work"
+# 整批运行期间检查各项目完成标记的间隔（秒）
+BATCH_POLL_INTERVAL = 0.5
+
+# 单个项目完成时的回调：(项目在批次中的序号, 执行结果)
+ResultCallback = Callable[[int, "DockerExecutionResult"], None]
+# 运行一批（或单个）验证前需要占用的名额，如流水线沙箱阶段的 StagePool.slot；
+# 参数为批次中各项目的超时预算，排队等待名额期间暂停
+SlotFactory = Callable[..., AsyncContextManager[None]]
+
+
+class BatchProject:
+    """批量验证中的单个项目"""
+
+    def __init__(
+        self,
+        code: str,
+        dependencies: str,
+        skill_name: Optional[str] = None,
+        attempt: int = 0,
+        timeout: Optional[int] = None,
+        budget: Optional["SkillBudget"] = None,
+    ):
+        self.code = code
+        self.dependencies = dependencies
+        self.skill_name = skill_name
+        self.attempt = attempt
+        self.timeout = timeout  # 单个项目的执行超时（秒），None 表示使用 DOCKER_TIMEOUT
+        self.budget = budget  # 提交方的超时预算，None 表示不限
+
+    @property
+    def deadline(self) -> Optional[float]:
+        """提交方的预算截止时间（time.monotonic()），排队等待名额后会顺延"""
+        return self.budget.deadline if self.budget is not None else None
+
+    def __repr__(self) -> str:
+        return f"BatchProject(skill={self.skill_name}, attempt={self.attempt})"
+
+
+def batch_script(projects: list[tuple[str, int]]) -> str:
+    """
+    生成批量容器的驱动脚本
+
+    依次进入每个项目的运行目录执行 run.sh，输出写入项目目录下的 stdout.log/stderr.log，
+    最后写入 elapsed 和 exit_code（exit_code 存在即表示该项目已执行完，
+    先写临时文件再改名，宿主机轮询时不会读到写了一半的文件）。
+
+    run.sh 在独立的进程组中运行，由同样独立成组的看门狗在超时后杀死整个进程组
+    （busybox 的 timeout 只向 sh 发信号，node 等子进程会继续运行），结束后再清理一次该组，
+    不留下后台子进程。退出码由信号决定，所以额外记录耗时来判断超时。
+    运行目录中的 node_modules/.pydeps 由容器内的 root 写入，宿主机进程可能无权删除，
+    写入 exit_code 之前在容器内删除。
+    """
+    lines = [
+        "#!/bin/sh",
+        "run_project() {",
+        f'    cd "{BATCH_ROOT}/$1/{BATCH_WORKDIR}" || return',
+        "    start=$(date +%s)",
+        "    setsid sh run.sh > ../stdout.log 2> ../stderr.log &",
+        "    pid=$!",
+        """    setsid sh -c 'sleep "$1"; kill -KILL -"$2"' watchdog "$2" "$pid" 2>/dev/null &""",
+        "    watchdog=$!",
+        '    wait "$pid"',
+        "    code=$?",
+        '    kill -KILL -"$watchdog" -"$pid" 2>/dev/null',
+        "    echo $(( $(date +%s) - start )) > ../elapsed",
+        f"    cd .. && rm -rf {BATCH_WORKDIR}",
+        '    echo "$code" > exit_code.tmp && mv exit_code.tmp exit_code',
+        "}",
+    ]
+    lines.extend(f"run_project {name} {timeout}" for name, timeout in projects)
+    return "\n".join(lines) + "\n"
+
+
+class BatchCoordinator:
+    """
+    批量验证协调器
+
+    Worker 调用 submit() 提交验证请求，同一语言的请求在 window 秒内合并为一批
+    （达到 max_size 时立即发出），由 MultiLangDockerRunner.run_batch 在一个容器中运行，
+    每个项目完成后立即把结果分发回对应的 Worker，不等整批结束。只有一个请求时直接走 run_code。
+
+    提交时可以传入 slot（如沙箱阶段的名额），每批运行时只占用一个名额，
+    而不是每个提交方各占一个名额等待合批。
+    """
+
+    def __init__(self, runner: "MultiLangDockerRunner", window: float, max_size: int):
+        self.logger = logging.getLogger("skillfactory.docker")
+        self.runner = runner
+        self.window = window
+        self.max_size = max(1, max_size)
+        self._pending: dict[str, list[tuple[BatchProject, asyncio.Future]]] = {}
+        self._timers: dict[str, asyncio.TimerHandle] = {}
+        self._slots: dict[str, SlotFactory] = {}
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(
+        self,
+        project: BatchProject,
+        language: str = "python",
+        slot: Optional[SlotFactory] = None,
+    ) -> "DockerExecutionResult":
+        future = asyncio.get_running_loop().create_future()
+        queue = self._pending.setdefault(language, [])
+        queue.append((project, future))
+        if slot is not None:
+            self._slots[language] = slot
+
+        if len(queue) >= self.max_size:
+            self._flush(language)
+        elif language not in self._timers:
+            self._timers[language] = asyncio.get_running_loop().call_later(
+                self.window, self._flush, language
+            )
+        return await future
+
+    def _flush(self, language: str) -> None:
+        timer = self._timers.pop(language, None)
+        if timer is not None:
+            timer.cancel()
+        slot = self._slots.pop(language, None)
+        batch = [
+            (project, future)
+            for project, future in self._pending.pop(language, [])
+            if not future.done()  # 已取消的请求不再运行
+        ]
+        if not batch:
+            return
+        task = asyncio.create_task(self._run(language, batch, slot))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _run(
+        self,
+        language: str,
+        batch: list[tuple[BatchProject, asyncio.Future]],
+        slot: Optional[SlotFactory] = None,
+    ) -> None:
+        budgets = [project.budget for project, _ in batch]
+        async with slot(*budgets) if slot is not None else nullcontext():
+            await self._run_batch(language, batch)
+
+    async def _run_batch(
+        self, language: str, batch: list[tuple[BatchProject, asyncio.Future]]
+    ) -> None:
+        projects = [project for project, _ in batch]
+
+        def _deliver(index: int, result: "DockerExecutionResult") -> None:
+            future = batch[index][1]
+            if not future.done():
+                future.set_result(result)
+
+        try:
+            if len(projects) == 1:
+                project = projects[0]
+                results = [
+                    await self.runner.run_code(
+                        project.code,
+                        project.dependencies,
+                        language=language,
+                        skill_name=project.skill_name,
+                        attempt=project.attempt,
+                    )
+                ]
+            else:
+                self.logger.info(f"Running batch of {len(projects)} {language} projects")
+                results = await self.runner.run_batch(projects, language, on_result=_deliver)
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for index, result in enumerate(results):
+            _deliver(index, result)
+
+    async def close(self) -> None:
+        """立即发出所有等待中的批次并等待完成"""
+        for language in list(self._pending):
+            self._flush(language)
+        if self._tasks:
+            await asyncio.gather(*self._tasks, return_exceptions=True)
+
+
+def read_bounded(path: Path, max_bytes: int) -> str:
+    """分块读取输出文件，只保留头尾（与流式捕获的截断方式一致）"""
+    output = BoundedOutput(max_bytes)
+    try:
+        with path.open("rb") as f:
+            while chunk := f.read(65536):
+                output.append(chunk)
+    except FileNotFoundError:
+        return ""
+    return output.text()
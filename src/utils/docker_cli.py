@@ -0,0 +1,33 @@
+"""Docker CLI 调用辅助函数"""
+
+import asyncio
+
+
+async def run_docker(args: list[str], timeout: int = 60) -> tuple[int, str, str]:
+    """
+    执行一条 docker CLI 命令
+
+    Args:
+        args: docker 之后的参数，例如 ["image", "inspect", "python:3.10-slim"]
+        timeout: 超时时间（秒）
+
+    Returns:
+        (exit_code, stdout, stderr)，超时返回 exit_code=-1
+    """
+    process = await asyncio.create_subprocess_exec(
+        "docker",
+        *args,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+    )
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        return -1, "", f"docker {args[0]} timeout after {timeout}s"
+    return (
+        process.returncode or 0,
+        stdout.decode("utf-8", errors="replace"),
+        stderr.decode("utf-8", errors="replace"),
+    )
@@ -0,0 +1,164 @@
+"""预构建工具链镜像 - 把每次运行都要安装的编译器/运行时工具固化进派生镜像"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Optional
+
+from .docker_api import DockerAPIClient
+from .docker_backend import build_image, inspect_image
+
+TOOLCHAIN_REPOSITORY = "skillfactory-toolchain"
+
+
+class ToolchainImageBuilder:
+    """
+    工具链镜像构建器
+
+    对声明了 toolchain_cmd 的语言，基于原始镜像构建
+    skillfactory-toolchain:<language>-<配置哈希> 派生镜像。
+    标签由语言配置决定，配置变化后会自动构建新镜像；
+    构建结果（镜像 ID、配置哈希）记录在 manifest 文件中。
+    传入 api 时通过 Engine API 查询和构建镜像，否则调用 docker CLI。
+    """
+
+    def __init__(
+        self,
+        manifest_file: Path,
+        build_timeout: int = 600,
+        api: Optional[DockerAPIClient] = None,
+    ):
+        self.logger = logging.getLogger("skillfactory.docker")
+        self.manifest_file = manifest_file
+        self.build_timeout = build_timeout
+        self.api = api
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._failed: set[str] = set()
+
+    @staticmethod
+    def config_hash(base_image: str, config: dict) -> str:
+        payload = json.dumps(
+            {"image": base_image, "toolchain_cmd": config.get("toolchain_cmd", "")},
+            sort_keys=True,
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:12]
+
+    def image_tag(self, language: str, base_image: str, config: dict) -> str:
+        return f"{TOOLCHAIN_REPOSITORY}:{language}-{self.config_hash(base_image, config)}"
+
+    async def resolve(
+        self, language: str, base_image: str, config: dict, build: bool = True
+    ) -> tuple[str, bool]:
+        """
+        返回运行该语言应使用的镜像
+
+        Returns:
+            (image, prebaked)：prebaked 为 True 表示工具链已在镜像中
+        """
+        if not config.get("toolchain_cmd"):
+            return base_image, False
+
+        tag = self.image_tag(language, base_image, config)
+        lock = self._locks.setdefault(tag, asyncio.Lock())
+        async with lock:
+            if await inspect_image(tag, self.api) is not None:
+                return tag, True
+            if not build or tag in self._failed:
+                return base_image, False
+            if await self._build(language, tag, base_image, config):
+                return tag, True
+            # 构建失败时本进程内不再重试，退回每次安装工具链
+            self._failed.add(tag)
+            return base_image, False
+
+    async def build_all(
+        self, language_config: dict, image_for, force: bool = False
+    ) -> dict[str, Optional[str]]:
+        """
+        构建所有声明了工具链的语言镜像
+
+        Args:
+            language_config: MultiLangDockerRunner.LANGUAGE_CONFIG
+            image_for: 原始镜像名 -> 实际使用的镜像名（例如加速器地址）
+            force: 即使镜像已存在也重新构建
+
+        Returns:
+            language -> 镜像标签（无需工具链的语言为原始镜像，构建失败为 None）
+        """
+        results: dict[str, Optional[str]] = {}
+        for language, config in language_config.items():
+            base_image = image_for(config["image"])
+            if not config.get("toolchain_cmd"):
+                results[language] = base_image
+                continue
+
+            tag = self.image_tag(language, base_image, config)
+            if not force:
+                if await inspect_image(tag, self.api) is not None:
+                    self.logger.info(f"Toolchain image up to date: {tag}")
+                    results[language] = tag
+                    continue
+            ok = await self._build(language, tag, base_image, config)
+            results[language] = tag if ok else None
+        return results
+
+    async def _build(self, language: str, tag: str, base_image: str, config: dict) -> bool:
+        context_dir = Path(tempfile.mkdtemp(prefix="skillfactory_toolchain_"))
+        try:
+            # 工具链安装在根目录，/app 等任意子目录的模块解析都能向上找到它；
+            # 可执行文件不在 npx 的查找范围内，语言配置用 prebaked_run_cmd 直接调用 /node_modules/.bin
+            (context_dir / "Dockerfile").write_text(
+                "\n".join(
+                    [
+                        f"FROM {base_image}",
+                        "WORKDIR /",
+                        f"RUN {config['toolchain_cmd']}",
+                        f"LABEL skillfactory.toolchain={language}",
+                        "WORKDIR /app",
+                        "",
+                    ]
+                ),
+                encoding="utf-8",
+            )
+
+            self.logger.info(f"Building toolchain image: {tag}")
+            started = time.monotonic()
+            exit_code, log = await build_image(context_dir, tag, self.build_timeout, self.api)
+            if exit_code != 0:
+                self.logger.error(f"Toolchain image build failed: {tag}\n{log}")
+                return False
+
+            self.logger.info(
+                f"Toolchain image built: {tag} ({time.monotonic() - started:.1f}s)"
+            )
+            await self._record(language, tag, base_image, config)
+            return True
+        finally:
+            shutil.rmtree(context_dir, ignore_errors=True)
+
+    async def _record(self, language: str, tag: str, base_image: str, config: dict) -> None:
+        info = await inspect_image(tag, self.api) or {}
+        manifest = self.load_manifest()
+        manifest[language] = {
+            "tag": tag,
+            "base_image": base_image,
+            "config_hash": self.config_hash(base_image, config),
+            "image_id": info.get("Id", ""),
+            "built_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+        self.manifest_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.manifest_file.with_suffix(f".{os.getpid()}.tmp")
+        tmp_file.write_text(json.dumps(manifest, indent=2), encoding="utf-8")
+        os.replace(tmp_file, self.manifest_file)
+
+    def load_manifest(self) -> dict:
+        try:
+            return json.loads(self.manifest_file.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
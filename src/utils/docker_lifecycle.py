@@ -0,0 +1,177 @@
+"""容器生命周期管理 - 统一的容器命名/标签，以及清理遗留容器的回收器"""
+
+import asyncio
+import json
+import logging
+import os
+import re
+import socket
+import time
+import uuid
+from typing import Optional
+
+from .docker_api import DockerAPIClient
+from .docker_cli import run_docker
+
+LABEL_MANAGED = "skillfactory.managed"
+LABEL_KIND = "skillfactory.kind"  # run | pool | batch | snapshot
+LABEL_SKILL = "skillfactory.skill"
+LABEL_ATTEMPT = "skillfactory.attempt"
+LABEL_OWNER = "skillfactory.owner"  # <hostname>:<pid>
+LABEL_CREATED = "skillfactory.created"  # unix 时间戳
+
+HOSTNAME = socket.gethostname()
+# 本进程的随机标识，写入容器名称，避免不同进程（或 pid 复用后的新进程）的容器重名
+INSTANCE_ID = uuid.uuid4().hex[:8]
+
+
+def owner_id() -> str:
+    return f"{HOSTNAME}:{os.getpid()}"
+
+
+def container_name(skill_name: Optional[str], attempt: int = 0) -> str:
+    """
+    生成容器名称
+
+    指定技能时名称由 (技能, 尝试次数, 本进程标识) 确定，同时运行的多个进程不会重名，
+    也就不会删除其他进程正在运行的容器（遗留容器由 ContainerReaper 按 owner 标签回收）；
+    未指定技能时使用随机后缀。
+    """
+    if not skill_name:
+        return f"skillfactory-run-{uuid.uuid4().hex[:12]}"
+    safe = re.sub(r"[^a-zA-Z0-9_.-]", "-", skill_name).strip("-.") or "skill"
+    return f"skillfactory-{safe[:80]}-a{attempt}-{INSTANCE_ID}"
+
+
+def container_labels(
+    kind: str, skill_name: Optional[str] = None, attempt: Optional[int] = None
+) -> dict[str, str]:
+    labels = {
+        LABEL_MANAGED: "true",
+        LABEL_KIND: kind,
+        LABEL_OWNER: owner_id(),
+        LABEL_CREATED: str(int(time.time())),
+    }
+    if skill_name:
+        labels[LABEL_SKILL] = skill_name
+    if attempt is not None:
+        labels[LABEL_ATTEMPT] = str(attempt)
+    return labels
+
+
+def label_args(labels: dict[str, str]) -> list[str]:
+    args: list[str] = []
+    for key, value in labels.items():
+        args.extend(["--label", f"{key}={value}"])
+    return args
+
+
+def _owner_alive(owner: str) -> bool:
+    """判断创建容器的进程是否仍存活（只能判断本机进程，其他主机视为存活）"""
+    host, _, pid = owner.rpartition(":")
+    if host != HOSTNAME or not pid.isdigit():
+        return True
+    try:
+        os.kill(int(pid), 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class ContainerReaper:
+    """
+    遗留容器回收器
+
+    以下带 skillfactory.managed 标签的容器会被强制删除：
+    - 创建它的本机进程已经退出（进程崩溃、被 kill 后遗留）
+    - kind=run 且存活时间超过 max_age（运行容器不应超过执行超时）
+    """
+
+    def __init__(
+        self,
+        max_age: int,
+        interval: int = 300,
+        api: Optional[DockerAPIClient] = None,
+    ):
+        self.logger = logging.getLogger("skillfactory.docker")
+        self.max_age = max_age
+        self.interval = interval
+        self.api = api
+        self._task: Optional[asyncio.Task] = None
+
+    async def reap_once(self) -> int:
+        """执行一次回收，返回删除的容器数量"""
+        try:
+            containers = await self._list_managed()
+        except Exception as e:
+            self.logger.warning(f"Container reaper could not list containers: {e}")
+            return 0
+
+        now = time.time()
+        stale: list[str] = []
+        for container_id, labels in containers:
+            created = int(labels.get(LABEL_CREATED, "0") or 0)
+            too_old = labels.get(LABEL_KIND) == "run" and now - created > self.max_age
+            if too_old or not _owner_alive(labels.get(LABEL_OWNER, "")):
+                stale.append(container_id)
+
+        for container_id in stale:
+            await self._remove(container_id)
+        if stale:
+            self.logger.info(f"Container reaper removed {len(stale)} stale container(s)")
+        return len(stale)
+
+    def start(self) -> None:
+        """启动后台周期回收任务"""
+        if self._task is None:
+            self._task = asyncio.create_task(self._loop())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.interval)
+            await self.reap_once()
+
+    async def _list_managed(self) -> list[tuple[str, dict[str, str]]]:
+        if self.api is not None:
+            items = await self.api.list_containers(
+                all=True, filters={"label": [f"{LABEL_MANAGED}=true"]}
+            )
+            return [(item["Id"], item.get("Labels") or {}) for item in items]
+
+        exit_code, stdout, stderr = await run_docker(
+            ["ps", "-aq", "--filter", f"label={LABEL_MANAGED}=true"], timeout=30
+        )
+        if exit_code != 0:
+            raise RuntimeError(stderr.strip())
+        ids = stdout.split()
+        if not ids:
+            return []
+        exit_code, stdout, stderr = await run_docker(
+            ["inspect", "--format", "{{.Id}}\t{{json .Config.Labels}}", *ids], timeout=30
+        )
+        result: list[tuple[str, dict[str, str]]] = []
+        for line in stdout.splitlines():
+            container_id, _, labels = line.partition("\t")
+            if container_id:
+                result.append((container_id, json.loads(labels or "{}") or {}))
+        return result
+
+    async def _remove(self, container_id: str) -> None:
+        try:
+            if self.api is not None:
+                await self.api.remove(container_id, force=True)
+            else:
+                await run_docker(["rm", "-f", container_id], timeout=30)
+        except Exception as e:
+            self.logger.warning(f"Failed to remove stale container {container_id[:12]}: {e}")
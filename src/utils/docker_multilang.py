@@ -1,12 +1,36 @@
 """Docker 沙盒执行工具 - 多语言支持版本"""
 
 import asyncio
+import json
 import logging
+import shutil
 import tempfile
+import time
 from pathlib import Path
-from typing import Optional
+from typing import Awaitable, Callable, Optional
 
 from ..config import Config
+from ..pipeline import sandbox_capacity
+from .docker_api import STREAM_STDERR, DockerAPIClient, DockerAPIError, parse_memory
+from .disk_cache import DiskCache, cache_key
+from .docker_batch import (
+    BATCH_POLL_INTERVAL,
+    BATCH_ROOT,
+    BATCH_WORKDIR,
+    BatchCoordinator,
+    BatchProject,
+    ResultCallback,
+    batch_script,
+    read_bounded,
+)
+from .docker_cli import run_docker
+from .docker_images import ToolchainImageBuilder
+from .docker_lifecycle import ContainerReaper, container_labels, container_name, label_args
+from .docker_pool import DockerContainerPool
+from .docker_snapshots import DependencySnapshotManager
+from .output_capture import OutputCapture
+from .package_cache import PackageCache
+from .static_check import static_check
 
 
 class DockerExecutionResult:
@@ -19,17 +43,39 @@ class DockerExecutionResult:
         stderr: str,
         timeout: bool = False,
         error: Optional[str] = None,
+        cached: bool = False,
     ):
         self.exit_code = exit_code
         self.stdout = stdout
         self.stderr = stderr
         self.timeout = timeout
         self.error = error
+        self.cached = cached  # 是否来自验证结果缓存
 
     @property
     def success(self) -> bool:
         return self.exit_code == 0 and not self.timeout and not self.error
 
+    def to_dict(self) -> dict:
+        return {
+            "exit_code": self.exit_code,
+            "stdout": self.stdout,
+            "stderr": self.stderr,
+            "timeout": self.timeout,
+            "error": self.error,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict, cached: bool = False) -> "DockerExecutionResult":
+        return cls(
+            exit_code=data["exit_code"],
+            stdout=data.get("stdout", ""),
+            stderr=data.get("stderr", ""),
+            timeout=data.get("timeout", False),
+            error=data.get("error"),
+            cached=cached,
+        )
+
     def __repr__(self) -> str:
         status = "SUCCESS" if self.success else "FAILED"
         return f"DockerExecutionResult(status={status}, exit_code={self.exit_code})"
@@ -51,8 +97,15 @@ class MultiLangDockerRunner:
             "image": "python:3.10-slim",
             "code_file": "demo.py",
             "deps_file": "requirements.txt",
-            "install_cmd": "pip install --no-cache-dir -q -r requirements.txt",
+            "install_cmd": "pip install -q -r requirements.txt",
             "run_cmd": "python demo.py",
+            # 容器池模式下依赖装到运行目录内，避免不同技能互相污染 site-packages
+            "pool_install_cmd": "pip install -q --target .pydeps -r requirements.txt",
+            "pool_run_cmd": "PYTHONPATH=.pydeps python demo.py",
+            # 默认不使用缓存；开启共享缓存时改用 cache_env，离线时再叠加 offline_env
+            "env": {"PIP_NO_CACHE_DIR": "1"},
+            "cache_env": {"PIP_CACHE_DIR": "/cache/pip", "PIP_FIND_LINKS": "/cache/wheelhouse"},
+            "offline_env": {"PIP_NO_INDEX": "1"},
         },
         "javascript": {
             "image": "node:20-alpine",
@@ -60,22 +113,314 @@ class MultiLangDockerRunner:
             "deps_file": "package.json",
             "install_cmd": "npm install --silent",
             "run_cmd": "node demo.js",
+            "cache_env": {"npm_config_cache": "/cache/npm"},
+            "offline_env": {"npm_config_offline": "true"},
         },
         "typescript": {
             "image": "node:20-alpine",
             "code_file": "demo.ts",
             "deps_file": "package.json",
-            "install_cmd": "npm install --silent && npm install --silent ts-node typescript @types/node",
+            "install_cmd": "npm install --silent",
+            # 工具链：优先预构建进派生镜像，镜像不可用时每次运行前安装
+            "toolchain_cmd": "npm install --silent ts-node typescript @types/node",
             "run_cmd": "npx ts-node demo.ts",
+            # 预构建镜像中工具链在 /node_modules，npx 在 /app 下找不到会重新下载（离线时失败）
+            "prebaked_run_cmd": "/node_modules/.bin/ts-node demo.ts",
+            "cache_env": {"npm_config_cache": "/cache/npm"},
+            "offline_env": {"npm_config_offline": "true"},
         },
     }
 
+    # 所有 Worker 共享的常驻容器池（仅在 DOCKER_POOL_ENABLED 时创建）
+    _pool: Optional[DockerContainerPool] = None
+    # 共享的依赖快照管理器（仅在 DOCKER_SNAPSHOT_ENABLED 时创建）
+    _snapshots: Optional[DependencySnapshotManager] = None
+    # 共享的工具链镜像构建器
+    _image_builder: Optional[ToolchainImageBuilder] = None
+    # 共享的 Docker Engine API 客户端（仅在 DOCKER_BACKEND=api 时创建）
+    _api: Optional[DockerAPIClient] = None
+    _api_loop: Optional[asyncio.AbstractEventLoop] = None
+    # 共享的验证结果缓存（仅在 VALIDATION_CACHE_ENABLED 时创建）
+    _validation_cache: Optional[DiskCache] = None
+    # 镜像标签 -> 镜像 ID，进程内只查询一次
+    _image_ids: dict[str, str] = {}
+    # 共享的批量验证协调器（仅在 DOCKER_BATCH_ENABLED 时使用）
+    _batcher: Optional[BatchCoordinator] = None
+    _batcher_loop: Optional[asyncio.AbstractEventLoop] = None
+
     def __init__(self):
         self.logger = logging.getLogger("skillfactory.docker")
         self.timeout = Config.DOCKER_TIMEOUT
         self.memory_limit = Config.DOCKER_MEMORY_LIMIT
         self.cpu_limit = Config.DOCKER_CPU_LIMIT
         self.registry_mirror = Config.DOCKER_REGISTRY_MIRROR
+        self.use_pool = Config.DOCKER_POOL_ENABLED
+        self.use_snapshots = Config.DOCKER_SNAPSHOT_ENABLED
+        self.use_toolchain_images = Config.DOCKER_TOOLCHAIN_IMAGES
+        self.use_api = Config.DOCKER_BACKEND == "api"
+        self.output_limit = Config.DOCKER_OUTPUT_LIMIT
+        self.fail_fast_pattern = Config.DOCKER_FAIL_FAST_PATTERN
+        self.fail_fast_grace = Config.DOCKER_FAIL_FAST_GRACE
+        self.use_validation_cache = Config.VALIDATION_CACHE_ENABLED
+        self.package_cache: Optional[PackageCache] = None
+        if Config.DOCKER_PACKAGE_CACHE or Config.DOCKER_OFFLINE:
+            self.package_cache = PackageCache(
+                Config.PACKAGE_CACHE_DIR, offline=Config.DOCKER_OFFLINE
+            )
+
+    @classmethod
+    def get_api_client(cls) -> DockerAPIClient:
+        """获取当前事件循环下共享的 Docker Engine API 客户端（连接池复用）"""
+        loop = asyncio.get_running_loop()
+        if cls._api is None or cls._api_loop is not loop:
+            cls._api = DockerAPIClient(socket_path=Config.DOCKER_SOCKET)
+            cls._api_loop = loop
+        return cls._api
+
+    @classmethod
+    def get_batch_coordinator(cls) -> BatchCoordinator:
+        """获取当前事件循环下共享的批量验证协调器"""
+        loop = asyncio.get_running_loop()
+        if cls._batcher is None or cls._batcher_loop is not loop:
+            cls._batcher = BatchCoordinator(
+                cls(), window=Config.DOCKER_BATCH_WINDOW, max_size=Config.DOCKER_BATCH_MAX_SIZE
+            )
+            cls._batcher_loop = loop
+        return cls._batcher
+
+    @classmethod
+    def get_pool(cls) -> DockerContainerPool:
+        """获取（必要时创建）共享容器池，池大小默认跟随沙箱阶段容量"""
+        if cls._pool is None:
+            binds, network = cls._shared_cache_mounts()
+            cls._pool = DockerContainerPool(
+                size=(
+                    Config.DOCKER_POOL_SIZE
+                    or Config.SANDBOX_CONCURRENCY
+                    or min(Config.MAX_CONCURRENT_WORKERS, sandbox_capacity())
+                ),
+                max_uses=Config.DOCKER_POOL_MAX_USES,
+                memory_limit=Config.DOCKER_MEMORY_LIMIT,
+                cpu_limit=Config.DOCKER_CPU_LIMIT,
+                healthcheck_interval=Config.DOCKER_POOL_HEALTHCHECK_INTERVAL,
+                binds=binds,
+                network=network,
+                api=cls._backend_api(),
+            )
+        return cls._pool
+
+    @classmethod
+    def get_validation_cache(cls) -> DiskCache:
+        """获取（必要时创建）共享验证结果缓存"""
+        if cls._validation_cache is None:
+            cls._validation_cache = DiskCache(
+                root=Config.DATA_DIR / "validation_cache",
+                ttl=Config.VALIDATION_CACHE_TTL,
+                max_bytes=Config.VALIDATION_CACHE_MAX_MB * 1024 * 1024,
+                name="Validation cache",
+            )
+        return cls._validation_cache
+
+    @staticmethod
+    def _shared_cache_mounts() -> tuple[list[str], Optional[str]]:
+        """共享包缓存的挂载列表和网络模式（容器池创建容器时使用）"""
+        if not (Config.DOCKER_PACKAGE_CACHE or Config.DOCKER_OFFLINE):
+            return [], None
+        cache = PackageCache(Config.PACKAGE_CACHE_DIR, offline=Config.DOCKER_OFFLINE)
+        return cache.binds(), cache.network
+
+    @classmethod
+    def _backend_api(cls) -> Optional[DockerAPIClient]:
+        """DOCKER_BACKEND=api 时返回共享的 API 客户端，供容器池、快照和工具链镜像使用"""
+        return cls.get_api_client() if Config.DOCKER_BACKEND == "api" else None
+
+    @classmethod
+    def get_snapshots(cls) -> DependencySnapshotManager:
+        """获取（必要时创建）共享依赖快照管理器"""
+        if cls._snapshots is None:
+            cls._snapshots = DependencySnapshotManager(
+                index_file=Config.DATA_DIR / "docker_snapshots.json",
+                budget_mb=Config.DOCKER_SNAPSHOT_BUDGET_MB,
+                build_timeout=Config.DOCKER_TIMEOUT,
+                api=cls._backend_api(),
+            )
+        return cls._snapshots
+
+    @classmethod
+    def get_image_builder(cls) -> ToolchainImageBuilder:
+        """获取（必要时创建）共享工具链镜像构建器"""
+        if cls._image_builder is None:
+            cls._image_builder = ToolchainImageBuilder(
+                manifest_file=Config.DATA_DIR / "toolchain_images.json",
+                build_timeout=Config.DOCKER_TIMEOUT,
+                api=cls._backend_api(),
+            )
+        return cls._image_builder
+
+    async def build_toolchain_images(self, force: bool = False) -> dict[str, Optional[str]]:
+        """构建所有语言的工具链镜像，返回 language -> 镜像标签"""
+        return await self.get_image_builder().build_all(
+            self.LANGUAGE_CONFIG, self._get_image_with_mirror, force=force
+        )
+
+    async def _resolve_image(self, language: str) -> tuple[str, bool]:
+        """返回 (镜像, 是否已预装工具链)"""
+        config = self.LANGUAGE_CONFIG[language]
+        image = self._get_image_with_mirror(config["image"])
+        if not self.use_toolchain_images:
+            return image, False
+        return await self.get_image_builder().resolve(language, image, config)
+
+    @staticmethod
+    def _install_command(config: dict, prebaked: bool, pooled: bool = False) -> str:
+        """组合依赖安装命令；镜像未预装工具链时追加工具链安装"""
+        install_cmd = config["install_cmd"]
+        if pooled:
+            install_cmd = config.get("pool_install_cmd", install_cmd)
+        if config.get("toolchain_cmd") and not prebaked:
+            install_cmd = f"{install_cmd} && {config['toolchain_cmd']}"
+        return install_cmd
+
+    @staticmethod
+    def _run_command(config: dict, prebaked: bool, pooled: bool = False) -> str:
+        """选择运行命令；镜像已预装工具链时直接调用镜像中的工具"""
+        if prebaked and config.get("prebaked_run_cmd"):
+            return config["prebaked_run_cmd"]
+        if pooled:
+            return config.get("pool_run_cmd", config["run_cmd"])
+        return config["run_cmd"]
+
+    def _container_env(self, config: dict) -> dict[str, str]:
+        """运行容器时注入的环境变量"""
+        if self.package_cache is not None:
+            return self.package_cache.env(config)
+        return dict(config.get("env", {}))
+
+    @staticmethod
+    def _env_args(env: dict[str, str]) -> list[str]:
+        args: list[str] = []
+        for key, value in env.items():
+            args.extend(["-e", f"{key}={value}"])
+        return args
+
+    async def prefetch_dependencies(
+        self, dependencies: str, language: str = "python"
+    ) -> tuple[bool, str]:
+        """
+        把依赖预取到共享缓存（pip wheelhouse / npm 缓存），供离线模式使用
+
+        Returns:
+            (是否成功, 错误输出)
+        """
+        if language not in self.LANGUAGE_CONFIG:
+            return False, f"Unsupported language: {language}"
+        if self.package_cache is None:
+            return False, "Package cache is disabled (set DOCKER_PACKAGE_CACHE=true)"
+
+        config = self.LANGUAGE_CONFIG[language]
+        image, prebaked = await self._resolve_image(language)
+        return await self.package_cache.prefetch(
+            image,
+            config,
+            dependencies,
+            install_cmd=self._install_command(config, prebaked),
+            timeout=self.timeout,
+            api=self._backend_api(),
+        )
+
+    def create_reaper(self) -> ContainerReaper:
+        """创建遗留容器回收器（与执行器使用相同的 Docker 调用方式）"""
+        return ContainerReaper(
+            # 运行容器不会超过执行超时，留出余量后仍存在即视为遗留
+            max_age=self.timeout * 2 + 60,
+            interval=Config.DOCKER_REAPER_INTERVAL,
+            api=self.get_api_client() if self.use_api else None,
+        )
+
+    @classmethod
+    async def shutdown(cls) -> None:
+        """发出剩余的批量验证，销毁共享容器池中的所有容器，并关闭 API 客户端连接"""
+        if cls._batcher is not None:
+            batcher, cls._batcher, cls._batcher_loop = cls._batcher, None, None
+            await batcher.close()
+        if cls._pool is not None:
+            pool, cls._pool = cls._pool, None
+            await pool.close()
+        if cls._api is not None:
+            api, cls._api, cls._api_loop = cls._api, None, None
+            # 快照管理器和工具链镜像构建器持有该客户端，下次使用时随新的客户端重建
+            cls._snapshots = cls._image_builder = None
+            await api.close()
+
+    async def _image_id(self, image: str) -> Optional[str]:
+        """查询本地镜像 ID（内容摘要）；镜像尚未拉取时返回 None"""
+        if image in self._image_ids:
+            return self._image_ids[image]
+        try:
+            if self.use_api:
+                image_id = (await self.get_api_client().inspect_image(image)).get("Id")
+            else:
+                exit_code, stdout, _ = await run_docker(
+                    ["image", "inspect", "--format", "{{.Id}}", image], timeout=30
+                )
+                image_id = stdout.strip() if exit_code == 0 else None
+        except Exception:
+            image_id = None
+        if image_id:
+            self._image_ids[image] = image_id
+        return image_id
+
+    async def _validation_key(
+        self,
+        code: str,
+        dependencies: str,
+        language: str,
+        image: str,
+        mode: str,
+        timeout: Optional[int] = None,
+    ) -> Optional[str]:
+        """
+        验证结果缓存的 key
+
+        由代码、依赖、语言配置、镜像 ID、资源限制、运行模式（cold/pool/snapshot/batch）
+        和快速失败规则共同决定；镜像 ID 不可用时返回 None
+        （此时不读写缓存，避免标签指向的镜像变化后误命中）。
+        """
+        image_id = await self._image_id(image)
+        if image_id is None:
+            return None
+        return cache_key(
+            code,
+            dependencies,
+            language,
+            json.dumps(self.LANGUAGE_CONFIG[language], sort_keys=True),
+            image_id,
+            self.memory_limit,
+            self.cpu_limit,
+            str(timeout or self.timeout),
+            "offline" if self.package_cache and self.package_cache.offline else "online",
+            mode,
+            # 批量模式不使用快速失败
+            "" if mode == "batch" else self.fail_fast_pattern or "",
+        )
+
+    def _run_mode(self) -> str:
+        """单次运行使用的模式（与 _execute 的选择一致）"""
+        if self.use_snapshots:
+            return "snapshot"
+        if self.use_pool:
+            return "pool"
+        return "cold"
+
+    @staticmethod
+    def _is_cacheable(result: DockerExecutionResult) -> bool:
+        """
+        只缓存成功的结果
+
+        失败可能来自依赖安装（网络、镜像源、包缓存状态）等与代码无关的环境问题，
+        缓存后修复轮次会一直拿到同一个失败；超时和执行器自身的错误同理。
+        """
+        return result.success
 
     def _get_image_with_mirror(self, image: str) -> str:
         """
@@ -101,12 +446,42 @@ class MultiLangDockerRunner:
         
         return image
 
+    def precheck(
+        self, code: str, dependencies: str, language: str = "python"
+    ) -> Optional[DockerExecutionResult]:
+        """
+        进程内静态预检，不启动容器
+
+        只有运行时必然失败的问题（语法错误、无法解析的 package.json）直接判定失败；
+        可能未声明的依赖只记录警告，继续在容器中运行。
+
+        Returns:
+            发现问题时返回失败的 DockerExecutionResult，通过时返回 None
+        """
+        if language not in self.LANGUAGE_CONFIG:
+            return None
+        config = self.LANGUAGE_CONFIG[language]
+        check = static_check(code, dependencies, language, config["code_file"])
+        for warning in check.warnings:
+            self.logger.warning(f"Static check ({language}): {warning}")
+        error = check.error
+        if error is None:
+            return None
+        self.logger.info(f"Static check failed ({language}), skipping container run")
+        return DockerExecutionResult(
+            exit_code=1,
+            stdout="",
+            stderr=f"[static-check] {config['code_file']} / {config['deps_file']}:\n{error}",
+        )
+
     async def run_code(
         self,
         code: str,
         dependencies: str,
         work_dir: Optional[Path] = None,
         language: str = "python",
+        skill_name: Optional[str] = None,
+        attempt: int = 0,
     ) -> DockerExecutionResult:
         """
         在 Docker 容器中运行代码
@@ -116,6 +491,8 @@ class MultiLangDockerRunner:
             dependencies: 依赖文件内容（requirements.txt 或 package.json）
             work_dir: 工作目录（可选，默认使用临时目录）
             language: 编程语言（python | javascript | typescript）
+            skill_name: 技能名称（可选，用于生成确定的容器名称和标签）
+            attempt: 测试尝试次数（与 skill_name 一起决定容器名称）
         
         Returns:
             DockerExecutionResult: 执行结果
@@ -129,7 +506,58 @@ class MultiLangDockerRunner:
                 error=f"Unsupported language: {language}. Supported: {list(self.LANGUAGE_CONFIG.keys())}",
             )
 
+        # 获取镜像地址（可能使用加速器或预构建的工具链镜像）
+        try:
+            image, prebaked = await self._resolve_image(language)
+        except Exception as e:
+            self.logger.error(f"Docker image resolution error: {e}")
+            return DockerExecutionResult(exit_code=-1, stdout="", stderr="", error=str(e))
+
+        # 代码、依赖和镜像都没变时直接复用上次的执行结果
+        cache = self.get_validation_cache() if self.use_validation_cache else None
+        key = None
+        if cache is not None:
+            key = await self._validation_key(
+                code, dependencies, language, image, self._run_mode()
+            )
+            entry = cache.get(key) if key else None
+            if entry is not None:
+                self.logger.info(f"Validation cache hit, skipping container run ({cache.stats()})")
+                return DockerExecutionResult.from_dict(entry, cached=True)
+
+        result = await self._execute(
+            code, dependencies, work_dir, language, image, prebaked, skill_name, attempt
+        )
+
+        if cache is not None and self._is_cacheable(result):
+            # 首次运行时镜像可能刚被拉取，此时才能拿到镜像 ID
+            key = key or await self._validation_key(
+                code, dependencies, language, image, self._run_mode()
+            )
+            if key:
+                cache.put(key, result.to_dict())
+                self.logger.info(f"Validation result cached ({cache.stats()})")
+        return result
+
+    async def _execute(
+        self,
+        code: str,
+        dependencies: str,
+        work_dir: Optional[Path],
+        language: str,
+        image: str,
+        prebaked: bool,
+        skill_name: Optional[str],
+        attempt: int,
+    ) -> DockerExecutionResult:
+        """按当前模式（容器池/快照/冷启动）实际运行代码"""
         config = self.LANGUAGE_CONFIG[language]
+        install_cmd = self._install_command(config, prebaked)
+        run_cmd = self._run_command(config, prebaked)
+
+        # 快照模式下依赖已在镜像中，直接冷启动运行即可，不再经过容器池
+        if self.use_pool and not self.use_snapshots:
+            return await self._run_in_pool(code, dependencies, language, image, prebaked)
 
         # 创建临时目录
         if work_dir is None:
@@ -145,9 +573,6 @@ class MultiLangDockerRunner:
             code_file.write_text(code, encoding="utf-8")
             deps_file.write_text(dependencies, encoding="utf-8")
 
-            # 获取镜像地址（可能使用加速器）
-            image = self._get_image_with_mirror(config["image"])
-            
             if self.registry_mirror:
                 self.logger.info(f"Using Docker registry mirror: {self.registry_mirror}")
                 self.logger.info(f"Original image: {config['image']}")
@@ -155,71 +580,392 @@ class MultiLangDockerRunner:
             else:
                 self.logger.info(f"No registry mirror configured, using original image: {image}")
 
+            if self.use_snapshots:
+                # 依赖已安装在快照镜像的 /app 中，只把代码文件拷进去运行
+                snapshot = await self.get_snapshots().ensure(
+                    language,
+                    image,
+                    config["deps_file"],
+                    install_cmd,
+                    dependencies,
+                    env=self._container_env(config),
+                    binds=self.package_cache.binds() if self.package_cache else None,
+                    network=self.package_cache.network if self.package_cache else None,
+                )
+                if not snapshot.ok:
+                    return DockerExecutionResult(
+                        exit_code=snapshot.exit_code or 1,
+                        stdout="",
+                        stderr=snapshot.log,
+                    )
+                image = snapshot.tag
+                binds = [f"{temp_dir.absolute()}:/src:ro"]
+                command = f"cp /src/{config['code_file']} . && {run_cmd}"
+            else:
+                binds = [f"{temp_dir.absolute()}:/app"]
+                command = f"{install_cmd} && {run_cmd}"
+
+            network = None
+            if self.package_cache is not None:
+                binds.extend(self.package_cache.binds())  # 共享缓存
+                network = self.package_cache.network
+            env = self._container_env(config)
+            name = container_name(skill_name, attempt)
+            labels = container_labels("run", skill_name, attempt)
+
             self.logger.info(
                 f"Running {language} code in Docker "
                 f"(image={image}, memory={self.memory_limit}, cpu={self.cpu_limit})"
             )
 
+            if self.use_api:
+                return await self._run_via_api(image, command, binds, env, network, name, labels)
+
             # 构建 Docker 命令
             docker_cmd = [
                 "docker",
                 "run",
                 "--rm",  # 自动清理
+                "--name",
+                name,
+                *label_args(labels),
                 f"--memory={self.memory_limit}",  # 内存限制
                 f"--cpus={self.cpu_limit}",  # CPU 限制
-                "-v",
-                f"{temp_dir.absolute()}:/app",  # 挂载代码目录
-                "-w",
-                "/app",
-                image,  # 使用可能加速的镜像地址
-                "sh",
-                "-c",
-                f"{config['install_cmd']} && {config['run_cmd']}",
             ]
+            for bind in binds:
+                docker_cmd.extend(["-v", bind])  # 挂载代码目录和共享缓存
+            if network:
+                docker_cmd.extend(["--network", network])
+            docker_cmd.extend(
+                [
+                    *self._env_args(env),
+                    "-w",
+                    "/app",
+                    image,  # 使用可能加速的镜像地址
+                    "sh",
+                    "-c",
+                    command,
+                ]
+            )
 
-            # 执行 Docker 命令（带超时）
-            try:
-                process = await asyncio.create_subprocess_exec(
-                    *docker_cmd,
-                    stdout=asyncio.subprocess.PIPE,
-                    stderr=asyncio.subprocess.PIPE,
+            async def _kill() -> None:
+                # 只杀死 docker CLI 进程不会停止容器，需要显式删除
+                await run_docker(["rm", "-f", name], timeout=30)
+
+            return await self._run_process(docker_cmd, cleanup=_kill)
+
+        except Exception as e:
+            self.logger.error(f"Docker execution error: {e}")
+            return DockerExecutionResult(
+                exit_code=-1,
+                stdout="",
+                stderr="",
+                error=str(e),
+            )
+
+        finally:
+            # 清理临时目录（如果是自动创建的）
+            if work_dir is None:
+                shutil.rmtree(temp_dir, ignore_errors=True)
+
+    async def run_batch(
+        self,
+        projects: list[BatchProject],
+        language: str = "python",
+        on_result: Optional[ResultCallback] = None,
+    ) -> list[DockerExecutionResult]:
+        """
+        在一个容器中依次验证多个同语言项目
+
+        每个项目使用独立目录（Python 依赖装到目录内的 .pydeps，Node 使用目录内的
+        node_modules）和独立的超时，结果按输入顺序返回。验证结果缓存命中的项目不再运行。
+
+        Args:
+            projects: 待验证的项目列表
+            language: 编程语言（python | javascript | typescript）
+            on_result: 每个项目有结果后立即回调（序号, 结果），不等整批结束
+
+        Returns:
+            与 projects 一一对应的执行结果
+        """
+        if language not in self.LANGUAGE_CONFIG:
+            error = f"Unsupported language: {language}. Supported: {list(self.LANGUAGE_CONFIG.keys())}"
+            return [
+                DockerExecutionResult(exit_code=-1, stdout="", stderr="", error=error)
+                for _ in projects
+            ]
+        if not projects:
+            return []
+
+        try:
+            image, prebaked = await self._resolve_image(language)
+        except Exception as e:
+            self.logger.error(f"Docker image resolution error: {e}")
+            return [
+                DockerExecutionResult(exit_code=-1, stdout="", stderr="", error=str(e))
+                for _ in projects
+            ]
+
+        results: list[Optional[DockerExecutionResult]] = [None] * len(projects)
+        keys: list[Optional[str]] = [None] * len(projects)
+        cache = self.get_validation_cache() if self.use_validation_cache else None
+        if cache is not None:
+            for index, project in enumerate(projects):
+                keys[index] = await self._validation_key(
+                    project.code, project.dependencies, language, image, "batch", project.timeout
                 )
+                entry = cache.get(keys[index]) if keys[index] else None
+                if entry is not None:
+                    results[index] = DockerExecutionResult.from_dict(entry, cached=True)
+                    if on_result is not None:
+                        on_result(index, results[index])
+
+        pending = [index for index, result in enumerate(results) if result is None]
+        if pending and cache is not None:
+            self.logger.info(
+                f"Validation cache hits for {len(projects) - len(pending)}/{len(projects)} "
+                f"batch projects ({cache.stats()})"
+            )
+        if pending:
 
-                stdout_bytes, stderr_bytes = await asyncio.wait_for(
-                    process.communicate(), timeout=self.timeout
+            def _finished(position: int, result: DockerExecutionResult) -> None:
+                index = pending[position]
+                results[index] = result
+                if on_result is not None:
+                    on_result(index, result)
+
+            executed = await self._execute_batch(
+                [projects[index] for index in pending], language, image, prebaked, _finished
+            )
+            for index, result in zip(pending, executed):
+                results[index] = result
+                if cache is not None and self._is_cacheable(result):
+                    project = projects[index]
+                    key = keys[index] or await self._validation_key(
+                        project.code,
+                        project.dependencies,
+                        language,
+                        image,
+                        "batch",
+                        project.timeout,
+                    )
+                    if key:
+                        cache.put(key, result.to_dict())
+        return results
+
+    async def _execute_batch(
+        self,
+        projects: list[BatchProject],
+        language: str,
+        image: str,
+        prebaked: bool,
+        on_result: Optional[ResultCallback] = None,
+    ) -> list[DockerExecutionResult]:
+        """
+        写入各项目目录和驱动脚本，启动一个容器运行整批项目
+
+        运行期间轮询各项目的完成标记，完成的项目立即通过 on_result 回调结果；
+        每个项目只回调一次，整批结束时补齐其余项目。
+        """
+        config = self.LANGUAGE_CONFIG[language]
+        install_cmd = self._install_command(config, prebaked, pooled=True)
+        run_cmd = self._run_command(config, prebaked, pooled=True)
+        batch_dir = Path(tempfile.mkdtemp(prefix="skillfactory_batch_"))
+        reported: set[int] = set()
+
+        def _report(index: int, result: DockerExecutionResult) -> None:
+            if on_result is not None and index not in reported:
+                reported.add(index)
+                on_result(index, result)
+
+        async def _watch(entries: list[tuple[str, int]]) -> None:
+            while True:
+                await asyncio.sleep(BATCH_POLL_INTERVAL)
+                for index, (project_name, timeout) in enumerate(entries):
+                    project_dir = batch_dir / project_name
+                    if index not in reported and (project_dir / "exit_code").exists():
+                        _report(index, self._batch_project_result(project_dir, timeout))
+
+        watcher: Optional[asyncio.Task] = None
+        try:
+            entries: list[tuple[str, int]] = []
+            for index, project in enumerate(projects):
+                project_name = f"p{index}"
+                run_dir = batch_dir / project_name / BATCH_WORKDIR
+                run_dir.mkdir(parents=True)
+                (run_dir / config["code_file"]).write_text(project.code, encoding="utf-8")
+                (run_dir / config["deps_file"]).write_text(project.dependencies, encoding="utf-8")
+                (run_dir / "run.sh").write_text(
+                    f"{install_cmd} && {run_cmd}\n", encoding="utf-8"
                 )
+                entries.append((project_name, project.timeout or self.timeout))
+            (batch_dir / "batch.sh").write_text(batch_script(entries), encoding="utf-8")
 
-                stdout = stdout_bytes.decode("utf-8", errors="replace")
-                stderr = stderr_bytes.decode("utf-8", errors="replace")
-                exit_code = process.returncode or 0
+            binds = [f"{batch_dir.absolute()}:{BATCH_ROOT}"]
+            network = None
+            if self.package_cache is not None:
+                binds.extend(self.package_cache.binds())
+                network = self.package_cache.network
+            env = self._container_env(config)
+            name = container_name(None)
+            labels = container_labels("batch")
+            command = f"sh {BATCH_ROOT}/batch.sh"
+            # 整批的超时：各项目超时之和，再留出容器启动的余量；
+            # 提交方超过各自的预算后会被取消，整批不必运行到最晚的截止时间之后
+            total_timeout = sum(timeout for _, timeout in entries) + 60
+            deadlines = [project.deadline for project in projects]
+            if all(deadline is not None for deadline in deadlines):
+                remaining = int(max(deadlines) - time.monotonic())
+                total_timeout = max(1, min(total_timeout, remaining))
 
-                self.logger.info(f"Docker execution completed (exit_code={exit_code})")
+            self.logger.info(
+                f"Running batch of {len(projects)} {language} projects in Docker "
+                f"(image={image}, memory={self.memory_limit}, cpu={self.cpu_limit}, "
+                f"timeout={total_timeout}s)"
+            )
 
-                return DockerExecutionResult(
-                    exit_code=exit_code,
-                    stdout=stdout,
-                    stderr=stderr,
-                    timeout=False,
+            if on_result is not None:
+                watcher = asyncio.create_task(_watch(entries))
+            if self.use_api:
+                batch_result = await self._run_via_api(
+                    image, command, binds, env, network, name, labels,
+                    timeout=total_timeout, fail_fast=False,
                 )
+            else:
+                docker_cmd = [
+                    "docker",
+                    "run",
+                    "--rm",
+                    "--name",
+                    name,
+                    *label_args(labels),
+                    f"--memory={self.memory_limit}",
+                    f"--cpus={self.cpu_limit}",
+                ]
+                for bind in binds:
+                    docker_cmd.extend(["-v", bind])
+                if network:
+                    docker_cmd.extend(["--network", network])
+                docker_cmd.extend([*self._env_args(env), "-w", BATCH_ROOT, image, "sh", "-c", command])
 
-            except asyncio.TimeoutError:
-                self.logger.warning(f"Docker execution timeout after {self.timeout}s")
-                # 尝试杀死进程
-                try:
-                    process.kill()
-                    await process.wait()
-                except Exception:
-                    pass
+                async def _kill() -> None:
+                    await run_docker(["rm", "-f", name], timeout=30)
 
-                return DockerExecutionResult(
-                    exit_code=-1,
-                    stdout="",
-                    stderr=f"Execution timeout after {self.timeout} seconds",
-                    timeout=True,
+                batch_result = await self._run_process(
+                    docker_cmd, cleanup=_kill, timeout=total_timeout, fail_fast=False
                 )
 
+            if watcher is not None:
+                watcher.cancel()
+            results = [
+                self._batch_project_result(batch_dir / project_name, timeout, batch_result)
+                for project_name, timeout in entries
+            ]
+
         except Exception as e:
-            self.logger.error(f"Docker execution error: {e}")
+            self.logger.error(f"Docker batch execution error: {e}")
+            results = [
+                DockerExecutionResult(exit_code=-1, stdout="", stderr="", error=str(e))
+                for _ in projects
+            ]
+
+        finally:
+            if watcher is not None:
+                watcher.cancel()
+            # 正常结束的项目已在容器内删除运行目录；整批被中途终止时可能残留 root 写入的文件
+            shutil.rmtree(batch_dir, ignore_errors=True)
+            if batch_dir.exists():
+                self.logger.warning(f"Could not fully remove batch directory {batch_dir}")
+
+        for index, result in enumerate(results):
+            _report(index, result)
+        return results
+
+    def _batch_project_result(
+        self,
+        project_dir: Path,
+        timeout: int,
+        batch_result: Optional[DockerExecutionResult] = None,
+    ) -> DockerExecutionResult:
+        """从项目目录中读取单个项目的执行结果（batch_result 为整批容器的结果，运行期间为 None）"""
+        stdout = read_bounded(project_dir / "stdout.log", self.output_limit)
+        stderr = read_bounded(project_dir / "stderr.log", self.output_limit)
+        exit_file = project_dir / "exit_code"
+        if not exit_file.exists():
+            # 整批容器在运行到该项目前已结束（启动失败、整体超时等）
+            reason = "batch container exited"
+            if batch_result is not None:
+                reason = batch_result.error or batch_result.stderr.strip() or reason
+            return DockerExecutionResult(
+                exit_code=-1,
+                stdout=stdout,
+                stderr=stderr,
+                error=f"Batch container stopped before this project finished: {reason[-2000:]}",
+            )
+
+        exit_code = int(exit_file.read_text().strip() or -1)
+        elapsed_file = project_dir / "elapsed"
+        elapsed = int(elapsed_file.read_text().strip() or 0) if elapsed_file.exists() else 0
+        if exit_code != 0 and elapsed >= timeout:
+            return DockerExecutionResult(
+                exit_code=-1,
+                stdout=stdout,
+                stderr=f"{stderr}\nExecution timeout after {timeout} seconds".lstrip(),
+                timeout=True,
+            )
+        return DockerExecutionResult(exit_code=exit_code, stdout=stdout, stderr=stderr)
+
+    async def _run_in_pool(
+        self, code: str, dependencies: str, language: str, image: str, prebaked: bool
+    ) -> DockerExecutionResult:
+        """在常驻容器中通过 exec 运行代码，每次运行使用独立目录"""
+        config = self.LANGUAGE_CONFIG[language]
+        install_cmd = self._install_command(config, prebaked, pooled=True)
+        run_cmd = self._run_command(config, prebaked, pooled=True)
+        pool = self.get_pool()
+
+        try:
+            async with pool.lease(language, image) as container:
+                host_dir, container_dir = container.new_run_dir()
+                (host_dir / config["code_file"]).write_text(code, encoding="utf-8")
+                (host_dir / config["deps_file"]).write_text(dependencies, encoding="utf-8")
+
+                self.logger.info(
+                    f"Running {language} code in pooled container "
+                    f"(container={container.container_id[:12]}, uses={container.uses})"
+                )
+
+                async def _discard() -> None:
+                    # 超时或取消后容器内可能残留进程，直接回收该容器
+                    container.healthy = False
+
+                env = self._container_env(config)
+                command = f"{install_cmd} && {run_cmd}"
+                try:
+                    if self.use_api:
+                        return await self._exec_via_api(
+                            container.container_id, container_dir, env, command, _discard
+                        )
+                    return await self._run_process(
+                        [
+                            "docker",
+                            "exec",
+                            "-w",
+                            container_dir,
+                            *self._env_args(env),
+                            container.container_id,
+                            "sh",
+                            "-c",
+                            command,
+                        ],
+                        cleanup=_discard,
+                    )
+                finally:
+                    if container.healthy:
+                        await pool.cleanup_run_dir(container, container_dir)
+
+        except Exception as e:
+            self.logger.error(f"Docker pool execution error: {e}")
             return DockerExecutionResult(
                 exit_code=-1,
                 stdout="",
@@ -227,17 +973,231 @@ class MultiLangDockerRunner:
                 error=str(e),
             )
 
+    async def _run_process(
+        self,
+        docker_cmd: list[str],
+        cleanup: Optional[Callable[[], Awaitable[None]]] = None,
+        timeout: Optional[int] = None,
+        fail_fast: bool = True,
+    ) -> DockerExecutionResult:
+        """
+        执行 docker 命令（带超时），流式捕获输出并返回执行结果
+
+        超时、出现致命错误或任务被取消时，除了杀死 docker CLI 进程，
+        还会调用 cleanup 停止对应的容器。timeout 默认使用 DOCKER_TIMEOUT。
+        """
+        process = await asyncio.create_subprocess_exec(
+            *docker_cmd,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        capture = self._new_capture(fail_fast)
+
+        async def _finished() -> int:
+            await asyncio.gather(
+                capture.pump("stdout", process.stdout),
+                capture.pump("stderr", process.stderr),
+            )
+            return await process.wait() or 0
+
+        async def _abort() -> None:
+            try:
+                process.kill()
+            except ProcessLookupError:
+                pass
+            await process.wait()
+            if cleanup is not None:
+                await cleanup()
+
+        return await self._supervise(capture, _finished(), _abort, timeout)
+
+    def _new_capture(self, fail_fast: bool = True) -> OutputCapture:
+        pattern = self.fail_fast_pattern if fail_fast else None
+        return OutputCapture(self.output_limit, pattern or None)
+
+    async def _supervise(
+        self,
+        capture: OutputCapture,
+        finished: Awaitable[int],
+        abort: Callable[[], Awaitable[None]],
+        timeout: Optional[int] = None,
+    ) -> DockerExecutionResult:
+        """
+        等待执行结束并生成结果
+
+        - 正常结束：返回捕获的输出
+        - 输出命中致命错误模式：之后一个宽限期内没有新的输出且仍未结束则终止；
+          命中后继续输出的程序（记录了已处理的异常）照常运行
+        - 超时：终止并返回已捕获的部分输出
+        - 任务被取消：终止后继续抛出 CancelledError
+        """
+        timeout = timeout or self.timeout
+        done_task = asyncio.ensure_future(finished)
+        fatal_task = asyncio.ensure_future(capture.wait_fatal(self.fail_fast_grace))
+        try:
+            await asyncio.wait(
+                {done_task, fatal_task},
+                timeout=timeout,
+                return_when=asyncio.FIRST_COMPLETED,
+            )
+
+            if done_task.done():
+                exit_code = done_task.result()
+                self.logger.info(f"Docker execution completed (exit_code={exit_code})")
+                return DockerExecutionResult(
+                    exit_code=exit_code,
+                    stdout=capture.stdout.text(),
+                    stderr=capture.stderr.text(),
+                    timeout=False,
+                )
+
+            await abort()
+            if fatal_task.done():
+                self.logger.warning(f"Docker execution killed on fatal output: {capture.fatal_line}")
+                return DockerExecutionResult(
+                    exit_code=1,
+                    stdout=capture.stdout.text(),
+                    stderr=(
+                        f"{capture.stderr.text()}\n"
+                        f"[fail-fast] Execution killed after fatal output: {capture.fatal_line}"
+                    ),
+                    timeout=False,
+                )
+
+            self.logger.warning(f"Docker execution timeout after {timeout}s")
+            return DockerExecutionResult(
+                exit_code=-1,
+                stdout=capture.stdout.text(),
+                stderr=(
+                    f"{capture.stderr.text()}\n"
+                    f"Execution timeout after {timeout} seconds"
+                ).lstrip(),
+                timeout=True,
+            )
+        except asyncio.CancelledError:
+            # Worker 超时等情况下任务被取消，容器不能继续占用资源
+            await asyncio.shield(abort())
+            raise
         finally:
-            # 清理临时目录（如果是自动创建的）
-            if work_dir is None:
-                try:
-                    import shutil
-                    shutil.rmtree(temp_dir, ignore_errors=True)
-                except Exception:
-                    pass
+            fatal_task.cancel()
+            if not done_task.done():
+                done_task.cancel()
+
+    async def _run_via_api(
+        self,
+        image: str,
+        command: str,
+        binds: list[str],
+        env: dict[str, str],
+        network: Optional[str],
+        name: str,
+        labels: dict[str, str],
+        timeout: Optional[int] = None,
+        fail_fast: bool = True,
+    ) -> DockerExecutionResult:
+        """通过 Docker Engine API 创建并运行容器（等价于 docker run --rm）"""
+        api = self.get_api_client()
+        host_config: dict = {
+            "Binds": binds,
+            "Memory": parse_memory(self.memory_limit),
+            "NanoCpus": int(float(self.cpu_limit) * 1e9),
+        }
+        if network:
+            host_config["NetworkMode"] = network
+        container_config = {
+            "Image": image,
+            "Cmd": ["sh", "-c", command],
+            "WorkingDir": "/app",
+            "Env": [f"{key}={value}" for key, value in env.items()],
+            "Labels": labels,
+            "HostConfig": host_config,
+        }
+
+        try:
+            container_id = await api.create_container(container_config, name=name)
+        except DockerAPIError as e:
+            if e.status_code != 404:
+                raise
+            # 与 docker run 一致：本地没有镜像时先拉取
+            await api.pull(image, timeout=self.timeout)
+            container_id = await api.create_container(container_config, name=name)
+
+        capture = self._new_capture(fail_fast)
+
+        async def _finished() -> int:
+            async def _collect() -> None:
+                async for stream, data in api.logs(container_id, follow=True):
+                    capture.feed("stderr" if stream == STREAM_STDERR else "stdout", data)
+
+            collector = asyncio.create_task(_collect())
+            try:
+                exit_code = await api.wait(container_id)
+                # 容器退出后日志流随之结束，这里只等待剩余数据读完
+                await asyncio.wait({collector}, timeout=10)
+                return exit_code
+            finally:
+                collector.cancel()
+
+        async def _abort() -> None:
+            await api.kill(container_id)
+
+        try:
+            await api.start(container_id)
+            return await self._supervise(capture, _finished(), _abort, timeout)
+        finally:
+            # 正常结束、超时和取消都会走到这里；force 删除会先杀死仍在运行的容器
+            await asyncio.shield(api.remove(container_id, force=True))
+
+    async def _exec_via_api(
+        self,
+        container_id: str,
+        workdir: str,
+        env: dict[str, str],
+        command: str,
+        abort: Callable[[], Awaitable[None]],
+    ) -> DockerExecutionResult:
+        """
+        通过 Docker Engine API 在常驻容器中执行命令（等价于 docker exec）
+
+        API 不能单独终止 exec 中的进程，超时或快速失败时由 abort 回收整个容器。
+        """
+        api = self.get_api_client()
+        exec_id = await api.exec_create(
+            container_id, ["sh", "-c", command], workdir=workdir, env=env
+        )
+        capture = self._new_capture()
+
+        async def _finished() -> int:
+            async for stream, data in api.exec_start(exec_id):
+                capture.feed("stderr" if stream == STREAM_STDERR else "stdout", data)
+            exit_code = (await api.exec_inspect(exec_id)).get("ExitCode")
+            return -1 if exit_code is None else int(exit_code)
+
+        return await self._supervise(capture, _finished(), abort)
+
+    async def docker_version(self) -> tuple[bool, str]:
+        """返回 (Docker 是否可用, 服务端版本或错误信息)"""
+        if self.use_api:
+            try:
+                version = await self.get_api_client().version()
+                return True, version.get("Version", "unknown")
+            except Exception as e:
+                return False, str(e)
+
+        try:
+            exit_code, stdout, stderr = await run_docker(
+                ["version", "--format", "{{.Server.Version}}"], timeout=5
+            )
+        except FileNotFoundError:
+            return False, "Docker CLI not found in PATH"
+        if exit_code != 0:
+            return False, stderr.strip() or "unknown error"
+        return True, stdout.strip() or "unknown"
 
     async def check_docker_available(self) -> bool:
         """检查 Docker 是否可用"""
+        if self.use_api:
+            return await self.get_api_client().ping()
         try:
             process = await asyncio.create_subprocess_exec(
                 "docker",
@@ -262,7 +1222,12 @@ class MultiLangDockerRunner:
             self.logger.info(f"Pulling Docker image: {image}")
             if self.registry_mirror:
                 self.logger.info(f"Using registry mirror: {self.registry_mirror}")
-                
+
+            if self.use_api:
+                await self.get_api_client().pull(image, timeout=300)
+                self.logger.info(f"Docker image pulled successfully: {image}")
+                return True
+
             process = await asyncio.create_subprocess_exec(
                 "docker",
                 "pull",
@@ -0,0 +1,206 @@
+"""Docker 常驻容器池 - 按语言保持预热容器，通过 exec 执行代码"""
+
+import asyncio
+import logging
+import shutil
+import tempfile
+import time
+import uuid
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import AsyncIterator, Optional
+
+from .docker_api import DockerAPIClient
+from .docker_backend import exec_command, remove_container, start_detached
+from .docker_lifecycle import container_labels
+
+# 容器内挂载的工作区根目录，每次运行在其下创建独立子目录
+POOL_WORKSPACE = "/workspace"
+
+
+class PooledContainer:
+    """池中的单个常驻容器"""
+
+    def __init__(self, container_id: str, language: str, image: str, host_dir: Path):
+        self.container_id = container_id
+        self.language = language
+        self.image = image
+        self.host_dir = host_dir
+        self.uses = 0
+        self.healthy = True
+        self.last_health_check = time.monotonic()
+
+    def new_run_dir(self) -> tuple[Path, str]:
+        """创建本次运行的独立目录，返回 (宿主机路径, 容器内路径)"""
+        run_id = uuid.uuid4().hex[:12]
+        host_path = self.host_dir / run_id
+        host_path.mkdir(parents=True, exist_ok=True)
+        return host_path, f"{POOL_WORKSPACE}/{run_id}"
+
+    def __repr__(self) -> str:
+        return (
+            f"PooledContainer(id={self.container_id[:12]}, language={self.language}, "
+            f"uses={self.uses})"
+        )
+
+
+class DockerContainerPool:
+    """
+    按语言划分的常驻容器池
+
+    - 每种语言最多 size 个容器，容器以 `tail -f /dev/null` 常驻并带资源限制
+    - 每次运行通过 lease() 借出一个空闲容器，用完归还
+    - 借出前按间隔做健康检查，复用次数达到 max_uses 或运行异常时销毁重建
+    - 传入 api 时容器的创建、健康检查和销毁都通过 Engine API 完成，否则调用 docker CLI
+    """
+
+    def __init__(
+        self,
+        size: int,
+        max_uses: int,
+        memory_limit: str,
+        cpu_limit: str,
+        healthcheck_interval: int = 60,
+        binds: Optional[list[str]] = None,
+        network: Optional[str] = None,
+        api: Optional[DockerAPIClient] = None,
+    ):
+        self.logger = logging.getLogger("skillfactory.docker")
+        self.size = max(1, size)
+        self.max_uses = max(1, max_uses)
+        self.memory_limit = memory_limit
+        self.cpu_limit = cpu_limit
+        self.healthcheck_interval = healthcheck_interval
+        self.binds = binds or []  # 额外的挂载（如共享包缓存）
+        self.network = network
+        self.api = api
+
+        self._idle: dict[str, list[PooledContainer]] = {}
+        self._total: dict[str, int] = {}
+        self._all: set[PooledContainer] = set()
+        self._cond = asyncio.Condition()
+        self._closed = False
+
+    @asynccontextmanager
+    async def lease(self, language: str, image: str) -> AsyncIterator[PooledContainer]:
+        """借出一个容器；块内抛出异常或将 healthy 置为 False 时容器会被销毁"""
+        container = await self._acquire(language, image)
+        try:
+            yield container
+        except BaseException:
+            container.healthy = False
+            raise
+        finally:
+            await self._release(container)
+
+    async def _acquire(self, language: str, image: str) -> PooledContainer:
+        while True:
+            async with self._cond:
+                if self._closed:
+                    raise RuntimeError("Docker container pool is closed")
+
+                idle = self._idle.setdefault(language, [])
+                container: Optional[PooledContainer] = None
+                if idle:
+                    container = idle.pop()
+                elif self._total.get(language, 0) < self.size:
+                    # 先占位，避免并发创建超过上限
+                    self._total[language] = self._total.get(language, 0) + 1
+                else:
+                    await self._cond.wait()
+                    continue
+
+            if container is None:
+                try:
+                    return await self._start_container(language, image)
+                except BaseException:
+                    async with self._cond:
+                        self._total[language] -= 1
+                        self._cond.notify_all()
+                    raise
+
+            if container.image != image or not await self._check_health(container):
+                await self._destroy(container)
+                continue
+            return container
+
+    async def _release(self, container: PooledContainer) -> None:
+        container.uses += 1
+        recycle = not container.healthy or container.uses >= self.max_uses or self._closed
+        if recycle:
+            if container.healthy and container.uses >= self.max_uses:
+                self.logger.info(f"Recycling pooled container after {container.uses} uses")
+            await self._destroy(container)
+            return
+
+        async with self._cond:
+            self._idle.setdefault(container.language, []).append(container)
+            self._cond.notify_all()
+
+    async def _start_container(self, language: str, image: str) -> PooledContainer:
+        host_dir = Path(tempfile.mkdtemp(prefix="skillfactory_pool_"))
+        try:
+            container_id = await start_detached(
+                image,
+                ["tail", "-f", "/dev/null"],
+                binds=[f"{host_dir.absolute()}:{POOL_WORKSPACE}", *self.binds],
+                labels={"skillfactory.pool": language, **container_labels("pool")},
+                memory_limit=self.memory_limit,
+                cpu_limit=self.cpu_limit,
+                workdir=POOL_WORKSPACE,
+                network=self.network,
+                api=self.api,
+            )
+        except RuntimeError as e:
+            shutil.rmtree(host_dir, ignore_errors=True)
+            raise RuntimeError(f"Failed to start pooled container ({image}): {e}") from e
+
+        container = PooledContainer(container_id, language, image, host_dir)
+        self._all.add(container)
+        self.logger.info(f"Started pooled container {container}")
+        return container
+
+    async def _check_health(self, container: PooledContainer) -> bool:
+        if time.monotonic() - container.last_health_check < self.healthcheck_interval:
+            return True
+        exit_code = await exec_command(container.container_id, ["true"], timeout=10, api=self.api)
+        container.last_health_check = time.monotonic()
+        if exit_code != 0:
+            self.logger.warning(f"Pooled container failed health check: {container}")
+            return False
+        return True
+
+    async def _destroy(self, container: PooledContainer) -> None:
+        self._all.discard(container)
+        async with self._cond:
+            self._total[container.language] = max(0, self._total.get(container.language, 0) - 1)
+            self._cond.notify_all()
+
+        # 容器内文件属于 root，先在容器内清空工作区再删除容器
+        await exec_command(
+            container.container_id,
+            ["sh", "-c", f"rm -rf {POOL_WORKSPACE}/*"],
+            timeout=30,
+            api=self.api,
+        )
+        try:
+            await remove_container(container.container_id, api=self.api)
+        except Exception as e:
+            self.logger.warning(f"Failed to remove pooled container {container}: {e}")
+        shutil.rmtree(container.host_dir, ignore_errors=True)
+        self.logger.info(f"Removed pooled container {container}")
+
+    async def cleanup_run_dir(self, container: PooledContainer, container_path: str) -> None:
+        """删除单次运行的工作目录（在容器内执行，避免宿主机权限问题）"""
+        await exec_command(
+            container.container_id, ["rm", "-rf", container_path], timeout=30, api=self.api
+        )
+
+    async def close(self) -> None:
+        """销毁池中所有容器"""
+        async with self._cond:
+            self._closed = True
+            self._idle.clear()
+            self._cond.notify_all()
+        for container in list(self._all):
+            await self._destroy(container)
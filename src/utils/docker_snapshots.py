@@ -0,0 +1,257 @@
+"""依赖快照镜像 - 按依赖文件内容寻址，复用已安装依赖的镜像"""
+
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import shutil
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Optional
+
+from .docker_api import DockerAPIClient
+from .docker_backend import build_by_commit, inspect_image, pull_image, remove_image
+from .docker_lifecycle import INSTANCE_ID, container_labels
+from .file_lock import FileLock
+
+SNAPSHOT_REPOSITORY = "skillfactory-deps"
+
+
+def normalize_dependencies(dependencies: str, deps_file: str) -> str:
+    """
+    规范化依赖文件内容，使等价的依赖得到相同的哈希
+
+    - requirements.txt: 去掉注释和空行，去除空白，按行排序
+    - package.json: 保留全部字段（type、scripts 等也影响运行，快照运行时只拷入代码文件），
+      按 key 排序并去掉格式差异
+    """
+    if deps_file == "package.json":
+        try:
+            data = json.loads(dependencies or "{}")
+        except json.JSONDecodeError:
+            return dependencies.strip()
+        return json.dumps(data, sort_keys=True, separators=(",", ":"))
+
+    lines = []
+    for line in dependencies.splitlines():
+        line = line.split("#", 1)[0].strip()
+        if line:
+            lines.append(" ".join(line.split()))
+    return "\n".join(sorted(set(lines)))
+
+
+class SnapshotBuild:
+    """快照镜像构建结果"""
+
+    def __init__(self, tag: Optional[str], exit_code: int = 0, log: str = "", cached: bool = False):
+        self.tag = tag
+        self.exit_code = exit_code
+        self.log = log
+        self.cached = cached
+
+    @property
+    def ok(self) -> bool:
+        return self.tag is not None
+
+
+class DependencySnapshotManager:
+    """
+    依赖快照镜像管理器
+
+    快照标签由 (语言, 基础镜像 digest, 安装命令, 环境变量, 网络模式, 规范化依赖) 的哈希决定，
+    相同依赖只构建一次；索引文件记录每个快照的独占大小和最近使用时间，
+    超出磁盘预算时按 LRU 删除旧快照。多个进程共享索引文件，读改写时持有文件锁。
+
+    快照在容器中安装依赖后提交为镜像（而不是 docker build），安装时使用与正常运行相同的
+    挂载、环境变量和网络模式：开启共享包缓存时复用缓存，离线模式下同样断网、只从 wheelhouse 安装。
+
+    传入 api 时镜像的查询、构建和删除通过 Engine API 完成，否则调用 docker CLI。
+    """
+
+    def __init__(
+        self,
+        index_file: Path,
+        budget_mb: int,
+        build_timeout: int = 600,
+        api: Optional[DockerAPIClient] = None,
+    ):
+        self.logger = logging.getLogger("skillfactory.docker")
+        self.index_file = index_file
+        self.budget_bytes = budget_mb * 1024 * 1024
+        self.build_timeout = build_timeout
+        self.api = api
+        self._locks: dict[str, asyncio.Lock] = {}
+        self._digests: dict[str, str] = {}
+
+    async def ensure(
+        self,
+        language: str,
+        base_image: str,
+        deps_file: str,
+        install_cmd: str,
+        dependencies: str,
+        env: Optional[dict[str, str]] = None,
+        binds: Optional[list[str]] = None,
+        network: Optional[str] = None,
+    ) -> SnapshotBuild:
+        """
+        返回包含依赖的快照镜像，不存在时构建
+
+        env、binds、network 为安装依赖时使用的环境变量、挂载（如共享包缓存）和网络模式，
+        与不使用快照时运行容器的设置相同。
+        """
+        digest = await self._image_digest(base_image)
+        if digest is None:
+            return SnapshotBuild(None, exit_code=-1, log=f"Base image not available: {base_image}")
+
+        env = env or {}
+        normalized = normalize_dependencies(dependencies, deps_file)
+        env_line = " ".join(f"{key}={value}" for key, value in sorted(env.items()))
+        key = hashlib.sha256(
+            "\n".join([language, digest, install_cmd, env_line, network or "", normalized]).encode(
+                "utf-8"
+            )
+        ).hexdigest()
+        tag = f"{SNAPSHOT_REPOSITORY}:{language}-{key[:16]}"
+
+        lock = self._locks.setdefault(tag, asyncio.Lock())
+        async with lock:
+            if await inspect_image(tag, self.api) is not None:
+                self.logger.info(f"Dependency snapshot hit: {tag}")
+                await self._touch(tag)
+                return SnapshotBuild(tag, cached=True)
+
+            build = await self._build(
+                tag, base_image, deps_file, install_cmd, dependencies, env, binds or [], network
+            )
+            if build.ok:
+                await self._record(tag, base_image, language)
+                await self._evict(keep=tag)
+            return build
+
+    async def _build(
+        self,
+        tag: str,
+        base_image: str,
+        deps_file: str,
+        install_cmd: str,
+        dependencies: str,
+        env: dict[str, str],
+        binds: list[str],
+        network: Optional[str],
+    ) -> SnapshotBuild:
+        src_dir = Path(tempfile.mkdtemp(prefix="skillfactory_snapshot_"))
+        try:
+            (src_dir / deps_file).write_text(dependencies, encoding="utf-8")
+
+            self.logger.info(f"Building dependency snapshot: {tag}")
+            started = time.monotonic()
+            exit_code, log = await build_by_commit(
+                base_image,
+                f"cp /src/{deps_file} ./ && {install_cmd}",
+                tag,
+                name=f"skillfactory-snapshot-{tag.rpartition('-')[2][:12]}-{INSTANCE_ID}",
+                binds=[f"{src_dir.absolute()}:/src:ro", *binds],
+                env=env,
+                labels=container_labels("snapshot"),
+                timeout=self.build_timeout,
+                network=network,
+                changes=["LABEL skillfactory.snapshot=1"],
+                api=self.api,
+            )
+            if exit_code != 0:
+                self.logger.warning(f"Dependency snapshot build failed: {tag}")
+                return SnapshotBuild(None, exit_code=exit_code, log=log)
+
+            self.logger.info(
+                f"Dependency snapshot built: {tag} ({time.monotonic() - started:.1f}s)"
+            )
+            return SnapshotBuild(tag)
+        finally:
+            shutil.rmtree(src_dir, ignore_errors=True)
+
+    async def _image_digest(self, image: str) -> Optional[str]:
+        if image in self._digests:
+            return self._digests[image]
+
+        info = await inspect_image(image, self.api)
+        if info is None:
+            if not await pull_image(image, self.build_timeout, self.api):
+                return None
+            info = await inspect_image(image, self.api)
+            if info is None:
+                return None
+
+        self._digests[image] = info["Id"]
+        return self._digests[image]
+
+    async def _image_size(self, image: str) -> int:
+        info = await inspect_image(image, self.api)
+        try:
+            return int(info.get("Size", 0)) if info else 0
+        except (TypeError, ValueError):
+            return 0
+
+    async def _record(self, tag: str, base_image: str, language: str) -> None:
+        # 只统计快照相对基础镜像新增的大小，基础层是共享的
+        size = max(0, await self._image_size(tag) - await self._image_size(base_image))
+
+        def _add(index: dict) -> None:
+            index[tag] = {"language": language, "size": size, "last_used": time.time()}
+
+        await asyncio.to_thread(self._update_index, _add)
+
+    async def _touch(self, tag: str) -> None:
+        def _use(index: dict) -> None:
+            index.setdefault(tag, {"size": 0})["last_used"] = time.time()
+
+        await asyncio.to_thread(self._update_index, _use)
+
+    async def _evict(self, keep: str) -> None:
+        index = self._load_index()
+        total = sum(entry.get("size", 0) for entry in index.values())
+        if total <= self.budget_bytes:
+            return
+
+        # 删除镜像时不持有索引锁，删除完成后只从最新的索引中移除已删除的条目
+        evicted: list[str] = []
+        for tag, entry in sorted(index.items(), key=lambda item: item[1].get("last_used", 0)):
+            if total <= self.budget_bytes:
+                break
+            if tag == keep:
+                continue
+            removed, _ = await remove_image(tag, self.api)
+            if not removed:
+                # 镜像可能正在被容器使用，下次再回收
+                continue
+            total -= entry.get("size", 0)
+            evicted.append(tag)
+            self.logger.info(f"Evicted dependency snapshot: {tag}")
+
+        def _remove(index: dict) -> None:
+            for tag in evicted:
+                index.pop(tag, None)
+
+        if evicted:
+            await asyncio.to_thread(self._update_index, _remove)
+
+    def _update_index(self, update: Callable[[dict], None]) -> None:
+        """在文件锁内读取、修改并写回索引，避免多个进程互相覆盖"""
+        with FileLock(self.index_file.with_name(self.index_file.name + ".lock")):
+            index = self._load_index()
+            update(index)
+            self._save_index(index)
+
+    def _load_index(self) -> dict:
+        try:
+            return json.loads(self.index_file.read_text(encoding="utf-8"))
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {}
+
+    def _save_index(self, index: dict) -> None:
+        self.index_file.parent.mkdir(parents=True, exist_ok=True)
+        tmp_file = self.index_file.with_suffix(f".{os.getpid()}.tmp")
+        tmp_file.write_text(json.dumps(index, indent=2), encoding="utf-8")
+        os.replace(tmp_file, self.index_file)
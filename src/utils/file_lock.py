@@ -0,0 +1,85 @@
+"""跨进程文件锁 - Unix 使用 fcntl.flock，Windows 使用 msvcrt.locking"""
+
+import asyncio
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+class FileLock:
+    """
+    基于锁文件的排他锁，同时支持 with（阻塞）和 async with（在线程中等待，不占用事件循环）
+
+    锁随文件描述符关闭自动释放，持锁进程崩溃不会留下死锁。
+    """
+
+    def __init__(self, path: Path):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    def acquire(self) -> None:
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            else:
+                # msvcrt.LK_LOCK 只重试 10 次（约 10 秒）后抛出 OSError，需要循环等待
+                while True:
+                    try:
+                        msvcrt.locking(fd, msvcrt.LK_LOCK, 1)
+                        break
+                    except OSError:
+                        time.sleep(0.1)
+        except BaseException:
+            os.close(fd)
+            raise
+        self._fd = fd
+
+    def release(self) -> None:
+        if self._fd is None:
+            return
+        fd, self._fd = self._fd, None
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+            else:
+                os.lseek(fd, 0, os.SEEK_SET)
+                msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+        finally:
+            os.close(fd)
+
+    def __enter__(self) -> "FileLock":
+        self.acquire()
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.release()
+
+    async def __aenter__(self) -> "FileLock":
+        acquiring = asyncio.ensure_future(asyncio.to_thread(self.acquire))
+        try:
+            await asyncio.shield(acquiring)
+        except asyncio.CancelledError:
+            # 线程中的 acquire 无法中断：等它拿到锁后立即释放再抛出取消，否则锁会一直被持有
+            try:
+                await asyncio.shield(acquiring)
+            except asyncio.CancelledError:
+                # 等待期间再次被取消，由线程结束后的回调释放
+                acquiring.add_done_callback(lambda _: self.release())
+                raise
+            except Exception:
+                pass
+            self.release()
+            raise
+        return self
+
+    async def __aexit__(self, *exc) -> None:
+        self.release()
@@ -0,0 +1,128 @@
+"""容器输出捕获 - 流式读取、按字节上限截断（保留头尾），并支持致命错误提前终止"""
+
+import asyncio
+import re
+import time
+from collections import deque
+from typing import Optional
+
+# 未换行的残留数据超过该长度时直接按一行处理，避免超长行占用内存
+MAX_PENDING_LINE = 8192
+
+
+class BoundedOutput:
+    """
+    有上限的输出缓冲区
+
+    保留最前面的 head_bytes 和最后面的 tail_bytes，中间部分只计数。
+    报错信息通常在开头（安装失败）或结尾（Traceback），两端都要保留。
+    """
+
+    def __init__(self, max_bytes: int):
+        self.head_bytes = max(0, max_bytes // 4)
+        self.tail_bytes = max(0, max_bytes - self.head_bytes)
+        self.total_bytes = 0
+        self._head = bytearray()
+        self._tail: deque[bytes] = deque()
+        self._tail_size = 0
+
+    def append(self, data: bytes) -> None:
+        self.total_bytes += len(data)
+        room = self.head_bytes - len(self._head)
+        if room > 0:
+            self._head += data[:room]
+            data = data[room:]
+        if not data:
+            return
+
+        self._tail.append(data)
+        self._tail_size += len(data)
+        while self._tail and self._tail_size - len(self._tail[0]) >= self.tail_bytes:
+            self._tail_size -= len(self._tail.popleft())
+
+    @property
+    def truncated_bytes(self) -> int:
+        kept = len(self._head) + min(self._tail_size, self.tail_bytes)
+        return self.total_bytes - kept
+
+    def text(self) -> str:
+        tail = b"".join(self._tail)
+        if len(tail) > self.tail_bytes:
+            tail = tail[len(tail) - self.tail_bytes :]
+        head = bytes(self._head).decode("utf-8", errors="replace")
+        tail_text = tail.decode("utf-8", errors="replace")
+        if self.truncated_bytes > 0:
+            return f"{head}\n... [{self.truncated_bytes} bytes truncated] ...\n{tail_text}"
+        return head + tail_text
+
+
+class OutputCapture:
+    """
+    同时捕获 stdout/stderr，并逐行检查致命错误模式
+
+    CLI 后端（读取子进程管道）和 API 后端（读取日志流）都通过 feed() 写入。
+    命中模式只说明输出了错误信息，是否终止由 wait_fatal() 结合之后的输出判断。
+    """
+
+    def __init__(self, max_bytes: int, fail_fast_pattern: Optional[str] = None):
+        self.stdout = BoundedOutput(max_bytes)
+        self.stderr = BoundedOutput(max_bytes)
+        self._pattern = re.compile(fail_fast_pattern) if fail_fast_pattern else None
+        self._pending = {"stdout": b"", "stderr": b""}
+        self.fatal = asyncio.Event()
+        self.fatal_line: Optional[str] = None
+        self.fatal_at = 0.0
+        self.last_output = time.monotonic()
+
+    def feed(self, stream: str, data: bytes) -> None:
+        (self.stderr if stream == "stderr" else self.stdout).append(data)
+        if data:
+            self.last_output = time.monotonic()
+        if self._pattern is None or self.fatal.is_set():
+            return
+
+        pending = self._pending[stream] + data
+        *lines, pending = pending.split(b"\n")
+        if len(pending) > MAX_PENDING_LINE:
+            lines.append(pending)
+            pending = b""
+        self._pending[stream] = pending
+        for raw in lines:
+            line = raw.decode("utf-8", errors="replace")
+            if self._pattern.search(line):
+                self.fatal_line = line.strip()
+                self.fatal_at = time.monotonic()
+                self.fatal.set()
+                return
+
+    async def wait_fatal(self, grace: float) -> None:
+        """
+        等待致命错误：输出命中模式，并且之后 grace 秒内没有新的输出
+
+        命中后继续输出超过 grace 秒的程序（记录了已处理的异常后继续运行）不终止，
+        重新开始匹配之后的输出。
+        """
+        while True:
+            await self.fatal.wait()
+            while True:
+                now = time.monotonic()
+                quiet = now - self.last_output
+                if quiet >= grace:
+                    return
+                if self.last_output - self.fatal_at >= grace:
+                    self._rearm()
+                    break
+                await asyncio.sleep(grace - quiet)
+
+    def _rearm(self) -> None:
+        self.fatal.clear()
+        self.fatal_line = None
+        self._pending = {"stdout": b"", "stderr": b""}
+
+    async def pump(self, stream: str, reader: asyncio.StreamReader) -> None:
+        """持续读取子进程管道直到 EOF"""
+        while True:
+            chunk = await reader.read(65536)
+            if not chunk:
+                return
+            self.feed(stream, chunk)
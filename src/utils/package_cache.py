@@ -0,0 +1,132 @@
+"""共享包缓存 - 在所有容器之间复用 pip/npm 缓存，并支持离线 wheelhouse 模式"""
+
+import logging
+import os
+import shutil
+import tempfile
+from pathlib import Path
+from typing import Optional
+
+from .docker_api import DockerAPIClient
+from .docker_backend import run_container
+from .file_lock import FileLock
+
+# 容器内的缓存挂载点
+CONTAINER_CACHE_ROOT = "/cache"
+
+
+class PackageCache:
+    """
+    宿主机上的持久化包缓存
+
+    目录结构：
+    - pip/        pip HTTP 与 wheel 缓存
+    - wheelhouse/ 预取阶段构建的 wheel，离线安装时作为唯一来源
+    - npm/        npm 缓存（cacache，本身支持并发读写）
+
+    pip 与 npm 缓存都是原子写入，可以被多个容器同时挂载；
+    wheelhouse 只在预取时写入：每次预取先下载到各自的临时目录，
+    只有把 wheel 移入 wheelhouse 时才持有跨进程文件锁。
+    """
+
+    SUBDIRS = ("pip", "wheelhouse", "npm")
+
+    def __init__(self, root: Path, offline: bool = False):
+        self.logger = logging.getLogger("skillfactory.docker")
+        self.root = root
+        self.offline = offline
+        for name in self.SUBDIRS:
+            (self.root / name).mkdir(parents=True, exist_ok=True)
+
+    @property
+    def network(self) -> Optional[str]:
+        """离线模式下容器使用的网络模式"""
+        return "none" if self.offline else None
+
+    def binds(self) -> list[str]:
+        """缓存目录的挂载列表（host:container）"""
+        return [
+            f"{(self.root / name).absolute()}:{CONTAINER_CACHE_ROOT}/{name}"
+            for name in self.SUBDIRS
+        ]
+
+    def env(self, config: dict, offline: Optional[bool] = None) -> dict[str, str]:
+        """语言对应的缓存环境变量（覆盖默认的禁用缓存设置）"""
+        env = {k: v for k, v in config.get("env", {}).items() if k != "PIP_NO_CACHE_DIR"}
+        env.update(config.get("cache_env", {}))
+        if self.offline if offline is None else offline:
+            env.update(config.get("offline_env", {}))
+        return env
+
+    async def prefetch(
+        self,
+        image: str,
+        config: dict,
+        dependencies: str,
+        install_cmd: str,
+        timeout: int,
+        api: Optional[DockerAPIClient] = None,
+    ) -> tuple[bool, str]:
+        """
+        在联网容器中解析依赖并写入缓存
+
+        Python 用 `pip wheel` 把依赖（包括只有 sdist 的包）构建到本次预取的临时目录，
+        成功后在文件锁内移入 wheelhouse（下载期间不持锁，多个预取可以并行）；
+        Node 在临时目录执行一次安装，把 tarball 和元数据写入 npm 缓存。
+        传入 api 时通过 Engine API 运行预取容器，否则调用 docker CLI。
+
+        Returns:
+            (是否成功, 错误输出)
+        """
+        # 放在缓存目录下，保证与 wheelhouse 在同一文件系统，移入时是原子的 rename
+        tmp_root = self.root / ".tmp"
+        tmp_root.mkdir(exist_ok=True)
+        run_dir = Path(tempfile.mkdtemp(prefix="prefetch_", dir=tmp_root))
+        try:
+            src_dir = run_dir / "src"
+            out_dir = run_dir / "out"
+            src_dir.mkdir()
+            out_dir.mkdir()
+            deps_file = config["deps_file"]
+            (src_dir / deps_file).write_text(dependencies, encoding="utf-8")
+
+            env = self.env(config, offline=False)
+            writes_wheelhouse = deps_file == "requirements.txt"
+            if writes_wheelhouse:
+                # wheelhouse 仍通过 PIP_FIND_LINKS 可读，已有的 wheel 直接复制到输出目录
+                command = f"pip wheel -q -w /out -r /src/{deps_file}"
+            else:
+                command = (
+                    f"mkdir -p /tmp/prefetch && cp /src/{deps_file} /tmp/prefetch/ "
+                    f"&& cd /tmp/prefetch && {install_cmd}"
+                )
+
+            binds = [
+                *self.binds(),
+                f"{src_dir.absolute()}:/src:ro",
+                f"{out_dir.absolute()}:/out",
+            ]
+            exit_code, stdout, stderr = await run_container(
+                image, command, binds, env, timeout, api=api
+            )
+            if exit_code != 0:
+                return False, stderr or stdout
+
+            if writes_wheelhouse:
+                async with FileLock(self.root / ".wheelhouse.lock"):
+                    self._publish_wheels(out_dir)
+            return True, stderr or stdout
+        finally:
+            shutil.rmtree(run_dir, ignore_errors=True)
+
+    def _publish_wheels(self, out_dir: Path) -> int:
+        """把预取输出目录中的 wheel 移入 wheelhouse（已存在的同名 wheel 保留），返回新增数量"""
+        wheelhouse = self.root / "wheelhouse"
+        added = 0
+        for wheel in sorted(out_dir.iterdir()):
+            target = wheelhouse / wheel.name
+            if not wheel.is_file() or target.exists():
+                continue
+            os.replace(wheel, target)
+            added += 1
+        return added
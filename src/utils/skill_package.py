@@ -0,0 +1,37 @@
+"""技能打包 - 把技能目录压缩为 .skill 文件（zip 格式）"""
+
+import os
+import tempfile
+import zipfile
+from pathlib import Path
+
+# 不打包的目录（依赖安装产物、缓存）
+EXCLUDED_DIRS = frozenset({"__pycache__", "node_modules", ".venv", "venv", "target"})
+
+
+def package_skill(skill_dir: Path, skill_file: Path) -> int:
+    """
+    把 skill_dir 打包为 skill_file，返回打包的文件数量
+
+    以技能名作为包内顶层目录；隐藏文件（断点、研究笔记等内部状态）不打包。
+    先写临时文件再原子替换，打包中断不会留下损坏的 .skill 文件。
+    """
+    skill_file.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=skill_file.parent, prefix=f".{skill_file.name}.", suffix=".tmp")
+    os.close(fd)
+    count = 0
+    try:
+        with zipfile.ZipFile(tmp_name, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+            for root, dirs, files in os.walk(skill_dir):
+                dirs[:] = sorted(d for d in dirs if d not in EXCLUDED_DIRS and not d.startswith("."))
+                for name in sorted(files):
+                    if name.startswith("."):
+                        continue
+                    path = Path(root) / name
+                    archive.write(path, Path(skill_dir.name) / path.relative_to(skill_dir))
+                    count += 1
+        os.replace(tmp_name, skill_file)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return count
@@ -0,0 +1,257 @@
+"""
+进程内静态预检 - 在启动容器前发现语法错误，毫秒级快速失败
+
+导入名与包名的对应关系无法静态确定（grpc -> grpcio、git -> GitPython 等），
+未声明的依赖只作为警告，交给容器运行给出确定的结果。
+"""
+
+import ast
+import json
+import re
+import sys
+from dataclasses import dataclass, field
+from typing import Optional
+
+# 导入名与 PyPI 包名不一致的常见情况（导入名 -> 可能的包名，均为规范化后的形式）
+PYTHON_IMPORT_ALIASES: dict[str, tuple[str, ...]] = {
+    "attr": ("attrs",),
+    "bs4": ("beautifulsoup4",),
+    "crypto": ("pycryptodome", "pycryptodomex"),
+    "cv2": ("opencv_python", "opencv_python_headless", "opencv_contrib_python"),
+    "dateutil": ("python_dateutil",),
+    "docx": ("python_docx",),
+    "dotenv": ("python_dotenv",),
+    "fitz": ("pymupdf",),
+    "jose": ("python_jose",),
+    "jwt": ("pyjwt",),
+    "magic": ("python_magic",),
+    "multipart": ("python_multipart",),
+    "pil": ("pillow",),
+    "pptx": ("python_pptx",),
+    "serial": ("pyserial",),
+    "skimage": ("scikit_image",),
+    "sklearn": ("scikit_learn",),
+    "telegram": ("python_telegram_bot",),
+    "usb": ("pyusb",),
+    "yaml": ("pyyaml",),
+    "zmq": ("pyzmq",),
+}
+
+NODE_BUILTINS = frozenset(
+    """
+    assert async_hooks buffer child_process cluster console constants crypto dgram
+    diagnostics_channel dns domain events fs http http2 https inspector module net os
+    path perf_hooks process punycode querystring readline repl stream string_decoder
+    sys timers tls trace_events tty url util v8 vm wasi worker_threads zlib test
+    """.split()
+)
+
+_JS_SPECIFIER_PATTERNS = [
+    re.compile(r"""\brequire\s*\(\s*['"]([^'"]+)['"]\s*\)"""),
+    re.compile(r"""\bimport\s*\(\s*['"]([^'"]+)['"]\s*\)"""),
+    re.compile(r"""(?:^|;)\s*import\s*['"]([^'"]+)['"]""", re.MULTILINE),
+    re.compile(r"""\b(?:import|export)\b[^'";]*?\bfrom\s*['"]([^'"]+)['"]"""),
+]
+
+# TypeScript 只导入类型的语句，编译后会被删除，不是运行时依赖
+_TS_TYPE_ONLY_STATEMENT = re.compile(
+    r"""\b(?:import|export)\s+type\b[^'";]*?\bfrom\s*['"][^'"]+['"]"""
+)
+_TS_NAMED_IMPORT = re.compile(r"""\bimport\s*\{([^}]*)\}\s*from\s*['"][^'"]+['"]""")
+
+_REQUIREMENT_NAME = re.compile(r"^([A-Za-z0-9][A-Za-z0-9._-]*)")
+_EGG_NAME = re.compile(r"#egg=([A-Za-z0-9][A-Za-z0-9._-]*)")
+
+
+@dataclass
+class StaticCheckResult:
+    """静态预检结果"""
+
+    error: Optional[str] = None  # 运行时必然失败的问题（语法错误、无法解析的 package.json）
+    warnings: list[str] = field(default_factory=list)  # 可能未声明的依赖，只提示
+
+
+def _normalize(name: str) -> str:
+    return re.sub(r"[-_.]+", "_", name).lower()
+
+
+def check_python(code: str, requirements: str, code_file: str = "demo.py") -> StaticCheckResult:
+    """编译代码（语法错误为 error），并检查顶层导入是否在 requirements.txt 中声明（warning）"""
+    try:
+        tree = compile(code, code_file, "exec", flags=ast.PyCF_ONLY_AST, dont_inherit=True)
+        compile(tree, code_file, "exec", dont_inherit=True)
+    except SyntaxError as e:
+        lines = [f'  File "{code_file}", line {e.lineno}']
+        if e.text:
+            lines.append(f"    {e.text.rstrip()}")
+            if e.offset:
+                lines.append("    " + " " * (e.offset - 1) + "^")
+        lines.append(f"{type(e).__name__}: {e.msg}")
+        return StaticCheckResult(error="\n".join(lines))
+
+    declared = _parse_requirements(requirements)
+    if declared is None:
+        return StaticCheckResult()  # 含有无法解析包名的条目（URL 等），跳过依赖检查
+
+    missing = []
+    for module, lineno in _python_imports(tree):
+        if module in sys.stdlib_module_names or module == "__future__":
+            continue
+        if not _python_declared(module, declared):
+            missing.append((module, lineno))
+
+    return StaticCheckResult(
+        warnings=[
+            f"'{module}' is imported in {code_file} (line {lineno}) "
+            f"but no matching package is declared in requirements.txt"
+            for module, lineno in missing
+        ]
+    )
+
+
+def _python_imports(tree: ast.AST) -> list[tuple[str, int]]:
+    """收集绝对导入的顶层模块名（位于 try/except ImportError 中的可选导入除外）"""
+    optional: set[int] = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Try) and any(
+            _catches_import_error(handler) for handler in node.handlers
+        ):
+            for child in node.body:
+                optional.update(id(n) for n in ast.walk(child))
+
+    seen: dict[str, int] = {}
+    for node in ast.walk(tree):
+        if id(node) in optional:
+            continue
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.level == 0 and node.module:
+            names = [node.module]
+        else:
+            continue
+        for name in names:
+            seen.setdefault(name.split(".")[0], node.lineno)
+    return sorted(seen.items(), key=lambda item: item[1])
+
+
+def _catches_import_error(handler: ast.ExceptHandler) -> bool:
+    if handler.type is None:
+        return True
+    types = handler.type.elts if isinstance(handler.type, ast.Tuple) else [handler.type]
+    return any(
+        isinstance(t, ast.Name) and t.id in ("ImportError", "ModuleNotFoundError", "Exception")
+        for t in types
+    )
+
+
+def _parse_requirements(requirements: str) -> Optional[set[str]]:
+    """解析 requirements.txt 中的包名（规范化），遇到无法识别的条目返回 None"""
+    names: set[str] = set()
+    for raw in requirements.splitlines():
+        line = raw.split(" #")[0].strip()
+        if not line or line.startswith("#"):
+            continue
+        egg = _EGG_NAME.search(line)
+        if egg:
+            names.add(_normalize(egg.group(1)))
+            continue
+        if line.startswith("-") or "://" in line:
+            return None  # -r/-e/--index-url、直接 URL 等无法静态判断
+        match = _REQUIREMENT_NAME.match(line)
+        if not match:
+            return None
+        names.add(_normalize(match.group(1)))
+    return names
+
+
+def _python_declared(module: str, declared: set[str]) -> bool:
+    normalized = _normalize(module)
+    if normalized in declared:
+        return True
+    if any(alias in declared for alias in PYTHON_IMPORT_ALIASES.get(normalized, ())):
+        return True
+    # 命名空间包（google.cloud.storage -> google-cloud-storage）和 py 前缀包（pyzmq 等）
+    return any(
+        name.startswith(normalized + "_") or name == "py" + normalized for name in declared
+    )
+
+
+def check_javascript(
+    code: str, package_json: str, code_file: str = "demo.js"
+) -> StaticCheckResult:
+    """解析 package.json（无法解析为 error），并检查 require/import 的包是否已声明（warning）"""
+    try:
+        manifest = json.loads(package_json)
+    except json.JSONDecodeError as e:
+        return StaticCheckResult(
+            error=f"package.json: invalid JSON at line {e.lineno} column {e.colno}: {e.msg}"
+        )
+    if not isinstance(manifest, dict):
+        return StaticCheckResult(error="package.json: top-level value must be an object")
+
+    declared: set[str] = set()
+    for section_name in (
+        "dependencies",
+        "devDependencies",
+        "peerDependencies",
+        "optionalDependencies",
+    ):
+        section = manifest.get(section_name) or {}
+        if not isinstance(section, dict):
+            return StaticCheckResult(error=f'package.json: "{section_name}" must be an object')
+        declared.update(section)
+
+    missing = sorted(
+        package
+        for package in {_package_name(spec) for spec in _js_specifiers(code)}
+        if package and package not in declared
+    )
+    return StaticCheckResult(
+        warnings=[
+            f"'{package}' is imported in {code_file} but not declared in package.json"
+            for package in missing
+        ]
+    )
+
+
+def _js_specifiers(code: str) -> set[str]:
+    # 去掉注释，避免把注释中的示例代码当成导入（行内 // 可能出现在字符串 URL 中，不处理）
+    code = re.sub(r"/\*.*?\*/", "", code, flags=re.DOTALL)
+    code = re.sub(r"^\s*//.*$", "", code, flags=re.MULTILINE)
+    code = _TS_TYPE_ONLY_STATEMENT.sub("", code)
+    code = _TS_NAMED_IMPORT.sub(_drop_type_only_import, code)
+    specifiers: set[str] = set()
+    for pattern in _JS_SPECIFIER_PATTERNS:
+        specifiers.update(pattern.findall(code))
+    return specifiers
+
+
+def _drop_type_only_import(match: re.Match) -> str:
+    """import { type A, type B } from "x" 只导入类型，整条语句删除"""
+    names = [name.strip() for name in match.group(1).split(",") if name.strip()]
+    if names and all(name.startswith("type ") for name in names):
+        return ""
+    return match.group(0)
+
+
+def _package_name(specifier: str) -> Optional[str]:
+    """把导入路径转换为包名；相对路径和 Node 内置模块返回 None"""
+    if specifier.startswith((".", "/")) or specifier.startswith("node:"):
+        return None
+    parts = specifier.split("/")
+    if specifier.startswith("@"):
+        return "/".join(parts[:2]) if len(parts) >= 2 else None
+    if parts[0] in NODE_BUILTINS:
+        return None
+    return parts[0]
+
+
+def static_check(
+    code: str, dependencies: str, language: str, code_file: str
+) -> StaticCheckResult:
+    """按语言执行静态预检"""
+    if language == "python":
+        return check_python(code, dependencies, code_file)
+    if language in ("javascript", "typescript"):
+        return check_javascript(code, dependencies, code_file)
+    return StaticCheckResult()
@@ -1,67 +1,180 @@
 from __future__ import annotations
 
 import asyncio
+import dataclasses
+import json
 import logging
 import re
+import time
+from contextlib import asynccontextmanager, contextmanager, nullcontext
 from datetime import datetime, timezone
 from pathlib import Path
+from typing import AsyncIterator, Iterator, Optional
 
 from claude_agent_sdk import ClaudeAgentOptions, ClaudeSDKClient
 
+from .concurrency import AdaptiveLimiter
 from .config import Config
-from .models import SkillResult, SkillSpec
-from .utils.docker_multilang import MultiLangDockerRunner
+from .docs_prefetch import PrefetchedDocs
+from .models import SkillCheckpoint, SkillResult, SkillSpec
+from .pipeline import SkillBudget, StagePools
+from .rate_limit import RateLimiter
+from .research_cache import ResearchCache
+from .session_pool import SessionPool
+from .utils.atomic_write import atomic_write_text
+from .utils.docker_batch import BatchProject
+from .utils.docker_multilang import DockerExecutionResult, MultiLangDockerRunner
+from .utils.skill_package import package_skill
+from .utils.tokens import TokenEstimator, get_estimator
+
+# Prompt 模板版本，修改任何 _prompt_* 模板后递增，使已有产物的规范指纹失效
+PROMPT_TEMPLATE_VERSION = "5"
+
+# 视为 API 过载的错误（AssistantMessage.error / ResultMessage.api_error_status / 异常信息）
+OVERLOAD_ERRORS = ("rate_limit", "server_error")
+OVERLOAD_STATUS = (429, 503, 529)
+OVERLOAD_PATTERN = re.compile(r"\b(429|529|rate[ _-]?limit|overloaded)\b", re.IGNORECASE)
+
+# 孵化轮次（写入断点的 completed_rounds）
+ROUND_RESEARCH = "research"
+ROUND_DRAFTING = "drafting"
+ROUND_TEST = "test"
+ROUND_FIX = "fix"
+ROUND_DISTILL = "distill"
+
+CHECKPOINT_FILE = ".checkpoint.json"
+RESEARCH_NOTES_FILE = ".research_notes.md"
+CRAWL_DOCS_DIR = ".crawl_docs"  # 爬取得到的文档（写入研究资料缓存供其他技能复用）
+CRAWL_DOC_SUFFIXES = (".md", ".markdown", ".txt")
+
+# 会话模式：continuous 所有轮次延续同一个对话（Docker 验证期间释放会话，修复时恢复）；
+# phased 每个阶段（每次修复）新建会话，只带研究笔记和当前代码
+SESSION_CONTINUOUS = "continuous"
+SESSION_PHASED = "phased"
+
+NOTES_PATTERN = re.compile(r"<research_notes>(.*?)</research_notes>", re.DOTALL)
+# Prompt 中附带的当前代码/依赖文件、错误信息的 token 上限
+MAX_SEED_CODE_TOKENS = 6000
+MAX_ERROR_TOKENS = 800
+CONTEXT7_TOOL_PREFIX = "mcp__context7__"
+
+
+def extract_research_notes(response_text: str, max_tokens: int, estimator: TokenEstimator) -> str:
+    """
+    从研究轮次的响应中提取蒸馏笔记，并限制在 max_tokens 以内
+
+    优先取最后一个 <research_notes> 标签内的内容（排除工具调用过程中的说明文字），
+    没有标签时使用整个响应；超出上限时在行边界截断。
+    """
+    matches = NOTES_PATTERN.findall(response_text)
+    notes = (matches[-1] if matches else response_text).strip()
+    return estimator.truncate(notes, max_tokens, f"[笔记超出 {max_tokens} tokens 上限，已截断]")
+
+
+def _tool_result_text(content: object) -> str:
+    """ToolResultBlock.content 可能是字符串或内容块列表"""
+    if isinstance(content, str):
+        return content
+    if isinstance(content, list):
+        return "\n".join(
+            str(item.get("text", "")) for item in content if isinstance(item, dict)
+        )
+    return ""
+
+
+def build_client_options() -> ClaudeAgentOptions:
+    """Worker 使用的 Claude Agent 选项（所有技能相同，会话池中的会话可以互相替代）"""
+    env_vars: dict[str, str] = {}
+    if Config.ANTHROPIC_BASE_URL:
+        env_vars["ANTHROPIC_BASE_URL"] = Config.ANTHROPIC_BASE_URL
+    if Config.ANTHROPIC_AUTH_TOKEN:
+        env_vars["ANTHROPIC_AUTH_TOKEN"] = Config.ANTHROPIC_AUTH_TOKEN
+
+    return ClaudeAgentOptions(
+        mcp_servers={
+            "context7": {
+                "type": "http",
+                "url": Config.CONTEXT7_API_URL,
+                "headers": {"CONTEXT7_API_KEY": Config.CONTEXT7_API_KEY},
+                "tools": ["query-docs", "resolve-library-id"],
+            }
+        },
+        allowed_tools=[
+            "mcp__context7__query-docs",
+            "mcp__context7__resolve-library-id",
+            "Skill",  # 启用 Skill 工具以使用 .claude/skills/ 中的技能
+            "Read",
+            "Write",
+            "Edit",
+            "Bash",
+        ],
+        # 禁止网页相关工具，强制使用 Skill 爬取
+        disallowed_tools=[
+            "WebSearch",
+            "WebFetch",
+            "webReader",
+            "BrowserFetch",
+        ],
+        permission_mode=Config.PERMISSION_MODE,
+        model=Config.CLAUDE_MODEL,
+        env=env_vars,
+        # 设置 cwd 为项目根目录，这样 .claude/skills/ 才能被正确加载
+        cwd=str(Config.ROOT_DIR),
+        # 从文件系统加载 Skills（从 project 和 user 目录）
+        setting_sources=["project", "user"],
+    )
 
 
 class SkillFactoryWorker:
     """基于 ClaudeSDKClient 的单个技能孵化 Agent"""
 
-    def __init__(self, skill_spec: SkillSpec):
+    def __init__(
+        self,
+        skill_spec: SkillSpec,
+        resume: bool = False,
+        stages: Optional[StagePools] = None,
+        limiter: Optional[AdaptiveLimiter] = None,
+        rate_limiter: Optional[RateLimiter] = None,
+        session_pool: Optional[SessionPool] = None,
+        research_cache: Optional[ResearchCache] = None,
+        budget: Optional[SkillBudget] = None,
+    ):
         self.skill_spec = skill_spec
+        self.resume = resume  # 从断点继续（跳过已完成的轮次）
+        # 各阶段的容量限制，由调度器在所有 Worker 间共享；未提供时只限制本 Worker 自身
+        self.stages = stages or StagePools.from_config()
+        self.limiter = limiter  # 自适应并发控制，每个 LLM 轮次结束后反馈延迟和过载错误
+        self.rate_limiter = rate_limiter  # 模型 API 限流（rpm/tpm），所有 Worker 共享
+        self.session_pool = session_pool  # 常驻会话池，未提供时每个技能新建会话
+        self._session_dirty = False  # 会话中有未读完的响应（轮次超时/出错），不能归还复用
+        self.research_cache = research_cache  # 研究资料缓存（爬取结果在技能之间共享）
+        self.budget = budget  # 调度器给本技能的超时预算（排队等待阶段名额的时间不计入）
+        self._conversation_id: Optional[str] = None  # continuous 模式下的对话 ID，释放会话后用于恢复
+        self._fresh_session = False  # 当前阶段的会话不含之前的对话，需要附带研究笔记和当前代码
+        self._crawl_cached = False  # 本技能的爬取文档来自缓存
+        # 规范指纹：技能规范、模型或 Prompt 模板变化时产物视为过期
+        self.fingerprint = skill_spec.fingerprint(Config.CLAUDE_MODEL, PROMPT_TEMPLATE_VERSION)
+        self.checkpoint = SkillCheckpoint(skill_name=skill_spec.name, fingerprint=self.fingerprint)
         self._last_test_success: bool = False
         self._last_error: str = ""
+        self._resumed_notes: str = ""
+        self.phased = Config.SESSION_MODE == SESSION_PHASED
+        self._research_notes: str = ""  # 分阶段模式下每个新会话附带的研究笔记
+        self._round_overload: str = ""  # 当前轮次收到的过载错误
+        self._round_timed_out: bool = False
+        self._round_failed: bool = False  # 当前轮次超时或出错，响应不完整
+        self._stage_failed: bool = False  # 当前阶段有轮次超时或出错，不能标记为已完成
+        self._round_tokens: Optional[int] = None  # 当前轮次的实际 token 用量（ResultMessage.usage）
+        self.durations: dict[str, float] = {}  # 各阶段耗时（秒），写入 SkillResult 并用于耗时预测
+        self.context_docs: Optional[PrefetchedDocs] = None  # 调度器预取的 Context7 文档
+        self.estimator = get_estimator(Config.TOKENIZER)
+        self.tokens: dict[str, int] = {}  # token 统计，写入 SkillResult
+        self._tool_names: dict[str, str] = {}  # tool_use_id -> 工具名
+        self._round_tool_tokens: dict[str, int] = {}  # 当前轮次各工具返回内容的 token 数
         self.logger = logging.getLogger("skillfactory")
         self.docker_runner = MultiLangDockerRunner()  # 多语言 Docker 执行器
 
-        env_vars: dict[str, str] = {}
-        if Config.ANTHROPIC_BASE_URL:
-            env_vars["ANTHROPIC_BASE_URL"] = Config.ANTHROPIC_BASE_URL
-        if Config.ANTHROPIC_AUTH_TOKEN:
-            env_vars["ANTHROPIC_AUTH_TOKEN"] = Config.ANTHROPIC_AUTH_TOKEN
-
-        self.client_options = ClaudeAgentOptions(
-            mcp_servers={
-                "context7": {
-                    "type": "http",
-                    "url": Config.CONTEXT7_API_URL,
-                    "headers": {"CONTEXT7_API_KEY": Config.CONTEXT7_API_KEY},
-                    "tools": ["query-docs", "resolve-library-id"],
-                }
-            },
-            allowed_tools=[
-                "mcp__context7__query-docs",
-                "mcp__context7__resolve-library-id",
-                "Skill",  # 启用 Skill 工具以使用 .claude/skills/ 中的技能
-                "Read",
-                "Write",
-                "Edit",
-                "Bash",
-            ],
-            # 禁止网页相关工具，强制使用 Skill 爬取
-            disallowed_tools=[
-                "WebSearch",
-                "WebFetch",
-                "webReader",
-                "BrowserFetch",
-            ],
-            permission_mode=Config.PERMISSION_MODE,
-            model=Config.CLAUDE_MODEL,
-            env=env_vars,
-            # 设置 cwd 为项目根目录，这样 .claude/skills/ 才能被正确加载
-            cwd=str(Config.ROOT_DIR),
-            # 从文件系统加载 Skills（从 project 和 user 目录）
-            setting_sources=["project", "user"],
-        )
+        self.client_options = session_pool.options if session_pool else build_client_options()
         
         self.logger.info(f"Worker initialized for skill: {skill_spec.name}")
         self.logger.info(f"Research strategy: {skill_spec.research_strategy}")
@@ -70,73 +183,329 @@ class SkillFactoryWorker:
         self.logger.info(f"Setting sources: {self.client_options.setting_sources}")
         self.logger.info(f"CWD: {self.client_options.cwd}")
 
-    async def run(self) -> SkillResult:
+    async def run(self, context_docs: Optional[PrefetchedDocs] = None) -> SkillResult:
+        started = time.monotonic()
+        self.context_docs = context_docs
         skill_dir = Config.SKILLS_DIR / self.skill_spec.name
         skill_file = Config.SKILLS_DIR / f"{self.skill_spec.name}.skill"
         skill_dir.mkdir(parents=True, exist_ok=True)
 
+        checkpoint = self._load_checkpoint(skill_dir) if self.resume else None
+        if checkpoint is not None and checkpoint.fingerprint != self.fingerprint:
+            self.logger.info("Spec changed since checkpoint, restarting: %s", self.skill_spec.name)
+            checkpoint = None
+        if checkpoint is None:
+            checkpoint = SkillCheckpoint(
+                skill_name=self.skill_spec.name, fingerprint=self.fingerprint
+            )
+        else:
+            self.logger.info(
+                "Resuming %s from checkpoint (completed rounds: %s)",
+                self.skill_spec.name,
+                ", ".join(checkpoint.completed_rounds) or "none",
+            )
+        self.checkpoint = checkpoint
+        self._last_test_success = checkpoint.last_test_success
+        self._last_error = checkpoint.last_error
+
+        if ROUND_DISTILL in checkpoint.completed_rounds and checkpoint.status:
+            self.logger.info("Skill already completed, skipping: %s", self.skill_spec.name)
+            if not skill_file.exists():
+                await self._stage_package(skill_dir, skill_file)
+            return self._build_result(checkpoint.status, skill_dir, skill_file)
+
         # 检查 Docker 是否可用
         docker_available = await self.docker_runner.check_docker_available()
         if not docker_available:
             self.logger.warning("Docker not available, skipping code validation")
 
-        async with ClaudeSDKClient(options=self.client_options) as client:
-            self.logger.info("Worker start: %s", self.skill_spec.name)
-            
-            # Round 1: Research
-            await self._run_round(client, self._prompt_research())
-            
-            # Round 2: Drafting (生成简单的 demo.py 和 requirements.txt)
-            await self._run_round(client, self._prompt_drafting())
-            
-            # Round 3-N: Test & Fix Loop (如果 Docker 可用)
-            if docker_available:
-                for attempt in range(1, Config.MAX_RETRY_ATTEMPTS + 1):
-                    self.logger.info(f"Test attempt {attempt}/{Config.MAX_RETRY_ATTEMPTS}")
-                    
-                    # 读取生成的代码
-                    demo_file = skill_dir / "scripts" / self._get_code_filename()
-                    req_file = skill_dir / "scripts" / self._get_deps_filename()
-                    
-                    if not demo_file.exists() or not req_file.exists():
-                        self.logger.warning("Code files not found, skipping test")
-                        break
-                    
-                    code = demo_file.read_text(encoding="utf-8")
-                    dependencies = req_file.read_text(encoding="utf-8")
-                    
-                    # 在 Docker 中运行代码（传递语言参数）
-                    result = await self.docker_runner.run_code(
-                        code=code,
-                        dependencies=dependencies,
-                        work_dir=skill_dir / "scripts",
-                        language=self.skill_spec.language,
+        # 从断点恢复时是新的会话，需要把之前的研究笔记带进后续轮次的 Prompt
+        if ROUND_RESEARCH in checkpoint.completed_rounds:
+            notes = self._read_research_notes(checkpoint)
+            self.tokens["notes"] = self.estimator.count(notes)
+            self._research_notes = notes
+            if not self.phased:
+                self._resumed_notes = notes
+
+        # 各阶段只在执行期间占用对应的名额（LLM / 沙箱 / 打包）
+        # continuous 模式下研究和起草共用一个会话，进入 Docker 验证前释放，
+        # 之后的修复/蒸馏轮次在 _phase_client 中恢复同一对话；phased 模式下每个阶段新建会话
+        self.logger.info("Worker start: %s", self.skill_spec.name)
+        shared = not self.phased and not {ROUND_RESEARCH, ROUND_DRAFTING} <= set(
+            checkpoint.completed_rounds
+        )
+        async with self._client() if shared else nullcontext() as client:
+            await self._stage_research(client, skill_dir)
+            await self._stage_draft(client, skill_dir)
+        if docker_available:
+            await self._stage_test(None, skill_dir)
+        status = await self._stage_distill(None, skill_dir, docker_available)
+
+        await self._stage_package(skill_dir, skill_file)
+        self.durations["total"] = time.monotonic() - started
+        self.logger.info("Worker end: %s (%s)", self.skill_spec.name, status)
+        return self._build_result(status, skill_dir, skill_file)
+
+    @asynccontextmanager
+    async def _client(self) -> AsyncIterator[ClaudeSDKClient]:
+        """从会话池借用会话（用完重置后归还），没有会话池时新建一个"""
+        if self.session_pool is None:
+            async with ClaudeSDKClient(options=self.client_options) as client:
+                yield client
+            return
+        session = await self.session_pool.acquire()
+        self._session_dirty = False
+        reusable = False
+        try:
+            yield session.client
+            reusable = not self._session_dirty
+        finally:
+            await self.session_pool.release(session, reusable=reusable)
+
+    @asynccontextmanager
+    async def _phase_client(
+        self, shared: Optional[ClaudeSDKClient]
+    ) -> AsyncIterator[ClaudeSDKClient]:
+        """
+        本阶段使用的会话
+
+        - 传入 shared（continuous 模式的研究/起草）时直接复用
+        - continuous 模式释放会话之后：没有会话池时新建会话恢复（resume）之前的对话；
+          使用会话池时借用池中的会话，附带研究笔记和当前代码（与 phased 模式相同）
+        - phased 模式为本阶段新建一个会话
+        """
+        if shared is not None:
+            self._fresh_session = False
+            yield shared
+            return
+        if not self.phased and self._conversation_id and self.session_pool is None:
+            self._fresh_session = False
+            options = dataclasses.replace(self.client_options, resume=self._conversation_id)
+            async with ClaudeSDKClient(options=options) as client:
+                yield client
+            return
+        self._fresh_session = True
+        async with self._client() as client:
+            yield client
+
+    @contextmanager
+    def _timed(self, stage: str) -> Iterator[None]:
+        """累计阶段耗时（测试/修复等阶段可能分多段执行）"""
+        start = time.monotonic()
+        try:
+            yield
+        finally:
+            self.durations[stage] = self.durations.get(stage, 0.0) + time.monotonic() - start
+
+    # ===== 流水线阶段 =====
+
+    async def _stage_research(
+        self, client: Optional[ClaudeSDKClient], skill_dir: Path
+    ) -> None:
+        """Round 1: Research（LLM）"""
+        if ROUND_RESEARCH in self.checkpoint.completed_rounds:
+            return
+        context7_first = self.skill_spec.research_strategy == "context7_first"
+        prefetched = self.context_docs.tokens if self.context_docs is not None else 0
+        # 预取的文档已经不足时在研究轮次中直接补充爬取，不再多一个轮次
+        crawl_now = (
+            context7_first
+            and self.context_docs is not None
+            and prefetched < self.skill_spec.min_context_tokens
+        )
+        crawled = not context7_first or crawl_now
+        if crawled:
+            self._restore_crawl()
+        with self._timed(ROUND_RESEARCH):
+            async with self._phase_client(client) as session:
+                research_text = await self._run_round(
+                    session,
+                    self._prompt_research(crawl_tokens=prefetched if crawl_now else None),
+                    ROUND_RESEARCH,
+                )
+                context = sum(self._round_tool_tokens.values())
+                context7 = prefetched + sum(
+                    tokens
+                    for name, tokens in self._round_tool_tokens.items()
+                    if name.startswith(CONTEXT7_TOOL_PREFIX)
+                )
+                # context7_first：按实际统计的 Context 7 文档量决定是否补充本地爬取
+                if (
+                    context7_first
+                    and not crawl_now
+                    and context7 < self.skill_spec.min_context_tokens
+                ):
+                    self.logger.info(
+                        "Context7 returned %s tokens (< %s), falling back to crawling: %s",
+                        context7,
+                        self.skill_spec.min_context_tokens,
+                        self.skill_spec.name,
                     )
-                    
-                    if result.success:
-                        self.logger.info("Code validation successful!")
-                        self._last_test_success = True
-                        break
-                    else:
-                        self.logger.warning(f"Code validation failed (attempt {attempt})")
-                        self._last_error = result.stderr or result.error or "Unknown error"
-                        
-                        # 如果不是最后一次尝试，让 Claude 修复代码
-                        if attempt < Config.MAX_RETRY_ATTEMPTS:
-                            await self._run_round(
-                                client,
-                                self._prompt_fix(attempt, result),
-                                check_test_status=False,
-                            )
-                        else:
-                            self.logger.error("Max retry attempts reached, code validation failed")
-            
-            # Round N+1: Distill (生成最终 SKILL.md)
-            await self._run_round(client, self._prompt_distill())
-            
-            status = "success" if self._last_test_success or not docker_available else "partial_success"
-            self.logger.info("Worker end: %s (%s)", self.skill_spec.name, status)
+                    crawled = True
+                    self._restore_crawl()
+                    research_text = await self._run_round(
+                        session, self._prompt_research_crawl(context7), ROUND_RESEARCH
+                    )
+                    context += sum(self._round_tool_tokens.values())
+        self.tokens["context"] = context
+        if crawled:
+            self._store_crawl()
+        notes = extract_research_notes(
+            research_text, self.skill_spec.max_distilled_tokens, self.estimator
+        )
+        self.tokens["notes"] = self.estimator.count(notes)
+        self._research_notes = notes
+        notes_file = skill_dir / RESEARCH_NOTES_FILE
+        atomic_write_text(notes_file, notes)
+        self.checkpoint.research_notes = str(notes_file)
+        self._complete_round(skill_dir, ROUND_RESEARCH)
+
+    @property
+    def crawl_dir(self) -> Path:
+        return Config.SKILLS_DIR / self.skill_spec.name / CRAWL_DOCS_DIR
+
+    def _restore_crawl(self) -> bool:
+        """相同参考文档和关键词的爬取结果已缓存时写入 crawl_dir，研究轮次直接阅读"""
+        if self.research_cache is None or self._crawl_cached:
+            return self._crawl_cached
+        files = self.research_cache.get_crawl(self.skill_spec.references or [], self.skill_spec.keyword)
+        if files is None:
+            return False
+        written = 0
+        for relative, content in files.items():
+            parts = Path(relative).parts
+            if not parts or Path(relative).is_absolute() or ".." in parts:
+                continue
+            atomic_write_text(self.crawl_dir / relative, content)
+            written += 1
+        self._crawl_cached = written > 0
+        if self._crawl_cached:
+            self.logger.info(
+                "Research cache hit, reusing %s crawled documents: %s", written, self.skill_spec.name
+            )
+        return self._crawl_cached
+
+    def _store_crawl(self) -> None:
+        """把本次爬取得到的文档写入研究资料缓存"""
+        if self.research_cache is None or self._crawl_cached or not self.crawl_dir.is_dir():
+            return
+        files: dict[str, str] = {}
+        for path in sorted(self.crawl_dir.rglob("*")):
+            if not path.is_file() or path.suffix.lower() not in CRAWL_DOC_SUFFIXES:
+                continue
+            try:
+                files[path.relative_to(self.crawl_dir).as_posix()] = path.read_text(encoding="utf-8")
+            except (OSError, UnicodeDecodeError):
+                continue
+        if files:
+            self.research_cache.put_crawl(
+                self.skill_spec.references or [], self.skill_spec.keyword, files
+            )
+            self.logger.info("Cached %s crawled documents: %s", len(files), self.skill_spec.name)
 
+    async def _stage_draft(self, client: Optional[ClaudeSDKClient], skill_dir: Path) -> None:
+        """Round 2: Drafting，生成 demo 代码和依赖文件（LLM）"""
+        if ROUND_DRAFTING in self.checkpoint.completed_rounds:
+            return
+        with self._timed(ROUND_DRAFTING):
+            async with self._phase_client(client) as session:
+                await self._run_round(session, self._seed(self._prompt_drafting()), ROUND_DRAFTING)
+        self._complete_round(skill_dir, ROUND_DRAFTING)
+
+    async def _stage_test(self, client: Optional[ClaudeSDKClient], skill_dir: Path) -> None:
+        """Round 3-N: Test & Fix Loop，验证占用沙箱名额，修复占用 LLM 名额"""
+        if ROUND_TEST in self.checkpoint.completed_rounds:
+            return
+        for attempt in range(self.checkpoint.attempts + 1, Config.MAX_RETRY_ATTEMPTS + 1):
+            self.logger.info(f"Test attempt {attempt}/{Config.MAX_RETRY_ATTEMPTS}")
+
+            with self._timed(ROUND_TEST):
+                result = await self._validate(skill_dir, attempt)
+            if result is None:
+                self.logger.warning("Code files not found, skipping test")
+                break
+
+            if result.success:
+                self.logger.info("Code validation successful!")
+                self._last_test_success = True
+                self._last_error = ""
+                self._record_attempt(skill_dir, attempt, result)
+                break
+
+            self.logger.warning(f"Code validation failed (attempt {attempt})")
+            self._last_test_success = False
+            self._last_error = result.stderr or result.error or "Unknown error"
+
+            # 如果不是最后一次尝试，让 Claude 修复代码
+            if attempt < Config.MAX_RETRY_ATTEMPTS:
+                with self._timed(ROUND_FIX):
+                    async with self._phase_client(client) as session:
+                        await self._run_round(
+                            session,
+                            self._seed(self._prompt_fix(attempt, result), skill_dir),
+                            ROUND_FIX,
+                            check_test_status=False,
+                        )
+                if self._round_failed:
+                    # 修复轮次没有完成，不记录本次尝试，中断后续跑时重新测试并修复；
+                    # 下一次尝试仍会验证修复后的代码，所以不影响测试阶段标记完成
+                    self._stage_failed = False
+                    continue
+            else:
+                self.logger.error("Max retry attempts reached, code validation failed")
+            # 修复轮次完成后再记录，中断后续跑时会重新测试修复后的代码
+            self._record_attempt(skill_dir, attempt, result)
+        self._complete_round(skill_dir, ROUND_TEST)
+
+    async def _stage_distill(
+        self, client: Optional[ClaudeSDKClient], skill_dir: Path, docker_available: bool
+    ) -> str:
+        """Round N+1: Distill，生成最终 SKILL.md（LLM），返回技能状态"""
+        with self._timed(ROUND_DISTILL):
+            async with self._phase_client(client) as session:
+                await self._run_round(
+                    session, self._seed(self._prompt_distill(), skill_dir), ROUND_DISTILL
+                )
+        self._measure_skill_md(skill_dir)
+        status = "success" if self._last_test_success or not docker_available else "partial_success"
+        self.checkpoint.status = status
+        self._complete_round(skill_dir, ROUND_DISTILL)
+        return status
+
+    def _measure_skill_md(self, skill_dir: Path) -> None:
+        """统计 SKILL.md 的 token 数，超出 max_distilled_tokens 时记录警告"""
+        try:
+            content = (skill_dir / "SKILL.md").read_text(encoding="utf-8")
+        except OSError:
+            return
+        tokens = self.estimator.count(content)
+        self.tokens["skill_md"] = tokens
+        if tokens > self.skill_spec.max_distilled_tokens:
+            self.logger.warning(
+                "SKILL.md exceeds token budget (%s > %s): %s",
+                tokens,
+                self.skill_spec.max_distilled_tokens,
+                self.skill_spec.name,
+            )
+
+    async def _stage_package(self, skill_dir: Path, skill_file: Path) -> None:
+        """把技能目录打包为 .skill 文件（打包名额，在线程中执行）"""
+        if not (skill_dir / "SKILL.md").exists():
+            self.logger.warning("SKILL.md not found, skipping packaging: %s", self.skill_spec.name)
+            return
+        async with self.stages.packaging.slot(self.budget):
+            try:
+                with self._timed("package"):
+                    count = await asyncio.to_thread(package_skill, skill_dir, skill_file)
+            except OSError as e:
+                self.logger.warning("Packaging failed (%s): %s", self.skill_spec.name, e)
+                return
+        self.logger.info("Packaged %s (%s files): %s", self.skill_spec.name, count, skill_file)
+
+    def _build_result(self, status: str, skill_dir: Path, skill_file: Path) -> SkillResult:
+        if self.budget is not None and self.budget.queued:
+            # 排队等待阶段名额的时间单独统计（不计入超时，也不代表技能自身的耗时）
+            self.durations["queued"] = self.budget.queued
         return SkillResult(
             skill_name=self.skill_spec.name,
             status=status,
@@ -145,23 +514,262 @@ class SkillFactoryWorker:
             demo_code="",
             error_log=self._last_error,
             created_at=datetime.now(timezone.utc).isoformat(),
+            durations={stage: round(seconds, 3) for stage, seconds in self.durations.items()},
+            tokens=dict(self.tokens),
+        )
+
+    async def _validate(self, skill_dir: Path, attempt: int) -> Optional[DockerExecutionResult]:
+        """验证生成的代码（静态预检 + Docker 运行），代码文件不存在时返回 None"""
+        # 读取生成的代码
+        demo_file = skill_dir / "scripts" / self._get_code_filename()
+        req_file = skill_dir / "scripts" / self._get_deps_filename()
+        if not demo_file.exists() or not req_file.exists():
+            return None
+
+        code = demo_file.read_text(encoding="utf-8")
+        dependencies = req_file.read_text(encoding="utf-8")
+
+        # 先做进程内静态预检，语法错误和无法解析的依赖文件无需启动容器
+        if Config.STATIC_CHECK_ENABLED:
+            result = self.docker_runner.precheck(
+                code, dependencies, language=self.skill_spec.language
+            )
+            if result is not None:
+                return result
+
+        # 批量模式：与同时到达测试阶段的同语言技能合并到一个容器中验证，
+        # 沙箱名额由协调器按批占用（每批一个），等待合批时不占名额
+        if Config.DOCKER_BATCH_ENABLED:
+            return await self.docker_runner.get_batch_coordinator().submit(
+                BatchProject(
+                    code,
+                    dependencies,
+                    skill_name=self.skill_spec.name,
+                    attempt=attempt,
+                    budget=self.budget,
+                ),
+                language=self.skill_spec.language,
+                slot=self.stages.sandbox.slot,
+            )
+
+        async with self.stages.sandbox.slot(self.budget):
+            # 在 Docker 中运行代码（传递语言参数）
+            return await self.docker_runner.run_code(
+                code=code,
+                dependencies=dependencies,
+                work_dir=skill_dir / "scripts",
+                language=self.skill_spec.language,
+                skill_name=self.skill_spec.name,
+                attempt=attempt,
+            )
+
+    # ===== 规范指纹 =====
+
+    def is_up_to_date(self) -> bool:
+        """已有完整产物且规范指纹未变化（SKILL.md 存在、全部轮次完成）"""
+        skill_dir = Config.SKILLS_DIR / self.skill_spec.name
+        checkpoint = self._load_checkpoint(skill_dir)
+        return (
+            checkpoint is not None
+            and checkpoint.fingerprint == self.fingerprint
+            and ROUND_DISTILL in checkpoint.completed_rounds
+            and (skill_dir / "SKILL.md").exists()
+        )
+
+    def skipped_result(self) -> SkillResult:
+        skill_dir = Config.SKILLS_DIR / self.skill_spec.name
+        skill_file = Config.SKILLS_DIR / f"{self.skill_spec.name}.skill"
+        self.logger.info("Skill unchanged, skipped: %s", self.skill_spec.name)
+        return self._build_result("skipped", skill_dir, skill_file)
+
+    async def revalidate(self) -> SkillResult:
+        """规范未变化时只重新验证已有代码，不调用 LLM"""
+        skill_dir = Config.SKILLS_DIR / self.skill_spec.name
+        skill_file = Config.SKILLS_DIR / f"{self.skill_spec.name}.skill"
+        self.checkpoint = self._load_checkpoint(skill_dir) or self.checkpoint
+        self._last_error = self.checkpoint.last_error
+
+        if not await self.docker_runner.check_docker_available():
+            self.logger.warning("Docker not available, skipping re-validation")
+            return self._build_result("skipped", skill_dir, skill_file)
+
+        self.logger.info("Skill unchanged, re-validating: %s", self.skill_spec.name)
+        with self._timed(ROUND_TEST):
+            result = await self._validate(skill_dir, self.checkpoint.attempts + 1)
+        if result is None:
+            self.logger.warning("Code files not found, skipping re-validation")
+            return self._build_result("skipped", skill_dir, skill_file)
+
+        self._last_test_success = result.success
+        self._last_error = "" if result.success else (result.stderr or result.error or "Unknown error")
+        self.checkpoint.last_result = result.to_dict()
+        self.checkpoint.status = "success" if result.success else "partial_success"
+        self._save_checkpoint(skill_dir)
+        return self._build_result(self.checkpoint.status, skill_dir, skill_file)
+
+    # ===== 断点续跑 =====
+
+    def _load_checkpoint(self, skill_dir: Path) -> Optional[SkillCheckpoint]:
+        checkpoint_file = skill_dir / CHECKPOINT_FILE
+        if not checkpoint_file.exists():
+            return None
+        try:
+            data = json.loads(checkpoint_file.read_text(encoding="utf-8"))
+            return SkillCheckpoint.from_dict(data)
+        except (json.JSONDecodeError, KeyError, TypeError, ValueError) as e:
+            self.logger.warning("Ignoring unreadable checkpoint for %s: %s", self.skill_spec.name, e)
+            return None
+
+    def _save_checkpoint(self, skill_dir: Path) -> None:
+        self.checkpoint.last_test_success = self._last_test_success
+        self.checkpoint.last_error = self._last_error
+        self.checkpoint.updated_at = datetime.now(timezone.utc).isoformat()
+        atomic_write_text(
+            skill_dir / CHECKPOINT_FILE,
+            json.dumps(self.checkpoint.to_dict(), ensure_ascii=False, indent=2),
         )
 
+    def _complete_round(self, skill_dir: Path, round_name: str) -> None:
+        if self._stage_failed:
+            # 轮次超时或出错时产物可能不完整，不标记完成，续跑时重新执行该阶段
+            self._stage_failed = False
+            self.logger.warning(
+                "Round %s did not finish, not marking it complete: %s",
+                round_name,
+                self.skill_spec.name,
+            )
+            self._save_checkpoint(skill_dir)
+            return
+        if round_name not in self.checkpoint.completed_rounds:
+            self.checkpoint.completed_rounds.append(round_name)
+        self._save_checkpoint(skill_dir)
+
+    def _record_attempt(self, skill_dir: Path, attempt: int, result) -> None:
+        self.checkpoint.attempts = attempt
+        self.checkpoint.last_result = result.to_dict()
+        self._save_checkpoint(skill_dir)
+
+    def _read_research_notes(self, checkpoint: SkillCheckpoint) -> str:
+        if not checkpoint.research_notes:
+            return ""
+        try:
+            return Path(checkpoint.research_notes).read_text(encoding="utf-8")
+        except OSError:
+            self.logger.warning("Research notes not found: %s", checkpoint.research_notes)
+            return ""
+
+    def _seed(self, prompt: str, skill_dir: Optional[Path] = None) -> str:
+        """
+        准备阶段 Prompt
+
+        continuous 模式在原对话中只在恢复后的第一轮附上研究笔记；phased 模式和不含之前对话的
+        新会话都附上研究笔记，提供 skill_dir 时再附上当前代码和依赖文件（修复/蒸馏阶段）。
+        """
+        if not self.phased and not self._fresh_session:
+            return self._take_notes(prompt)
+        code = self._current_code(skill_dir) if skill_dir is not None else ""
+        return self._with_notes(
+            f"{code}\n\n{prompt}" if code else prompt,
+            self._research_notes,
+            intro="以下是本技能研究阶段整理的蒸馏笔记（本阶段是新会话，请以此为研究结果）：",
+        )
+
+    def _current_code(self, skill_dir: Path) -> str:
+        """当前的代码和依赖文件内容（分阶段会话的上下文）"""
+        sections = []
+        for filename in (self._get_code_filename(), self._get_deps_filename()):
+            path = skill_dir / "scripts" / filename
+            try:
+                content = path.read_text(encoding="utf-8")
+            except OSError:
+                continue
+            content = self.estimator.truncate(content, MAX_SEED_CODE_TOKENS, "... (truncated)")
+            sections.append(f"当前 {path}：\n```\n{content}\n```")
+        return "\n\n".join(sections)
+
+    def _take_notes(self, prompt: str) -> str:
+        """新会话的第一轮附上恢复的研究笔记（只附一次）"""
+        prompt, self._resumed_notes = self._with_notes(prompt, self._resumed_notes), ""
+        return prompt
+
+    @staticmethod
+    def _with_notes(
+        prompt: str,
+        notes: str,
+        intro: str = "以下是本技能此前研究轮次整理的蒸馏笔记（会话已重启，请以此为研究结果继续）：",
+    ) -> str:
+        """在 Prompt 前附上之前会话的研究笔记（从断点恢复或分阶段会话时使用）"""
+        if not notes:
+            return prompt
+        return f"""
+{intro}
+
+<research_notes>
+{notes}
+</research_notes>
+
+{prompt}
+""".strip()
+
     async def _run_round(
-        self, client: ClaudeSDKClient, prompt: str, check_test_status: bool = False
-    ) -> None:
-        self.logger.info("Round start (%s): %s", self.skill_spec.name, prompt.splitlines()[0])
-        await client.query(prompt)
-        response_text = await self._collect_response_text(client)
+        self,
+        client: ClaudeSDKClient,
+        prompt: str,
+        kind: str,
+        check_test_status: bool = False,
+    ) -> str:
+        estimated = self._estimate_round_tokens(prompt)
+        self._tool_names = {}
+        for retry in range(Config.RATE_LIMIT_MAX_RETRIES + 1):
+            if self.rate_limiter is not None:
+                waited = await self.rate_limiter.acquire(estimated)
+                if waited >= 1:
+                    self.logger.info("Rate limiter wait (%s): %.1fs", self.skill_spec.name, waited)
+            async with self.stages.llm.slot(self.budget):
+                self.logger.info("Round start (%s): %s", self.skill_spec.name, prompt.splitlines()[0])
+                started = time.monotonic()
+                await client.query(prompt)
+                response_text = await self._collect_response_text(client)
+                self._report_round(time.monotonic() - started, kind)
+            if self.rate_limiter is None:
+                break
+            await self.rate_limiter.settle(estimated, self._round_tokens)
+            if not self._round_overload or retry >= Config.RATE_LIMIT_MAX_RETRIES:
+                break
+            # 被限流的轮次等待退避后用同一 Prompt 重试（会话中已有的进展不会丢失）
+            await self.rate_limiter.backoff(retry, self._round_overload)
+        if self._round_failed:
+            self._stage_failed = True
         # 打印响应摘要（前 500 字符），便于调试
         response_summary = response_text[:500].replace("\n", " ")
         self.logger.debug("Response (%s): %s...", self.skill_spec.name, response_summary)
         if check_test_status:
             self._update_test_status(response_text)
         self.logger.info("Round end (%s)", self.skill_spec.name)
+        return response_text
+
+    def _estimate_round_tokens(self, prompt: str) -> int:
+        """估算一个轮次的 token 消耗：Prompt 的估算 token 数加上工具调用和输出的预估量"""
+        return self.estimator.count(prompt) + Config.RATE_LIMIT_ROUND_TOKENS
+
+    def _report_round(self, latency: float, kind: str) -> None:
+        """把轮次耗时（按轮次类型）和过载错误反馈给自适应并发控制"""
+        if self.limiter is None:
+            return
+        if self._round_overload:
+            self.limiter.observe_error(overloaded=True, reason=self._round_overload)
+        elif self._round_timed_out:
+            self.limiter.observe_error(overloaded=False)
+        else:
+            self.limiter.observe_round(latency, kind)
 
     async def _collect_response_text(self, client: ClaudeSDKClient) -> str:
         parts: list[str] = []
+        self._round_overload = ""
+        self._round_timed_out = False
+        self._round_failed = False
+        self._round_tokens = None
+        self._round_tool_tokens = {}
 
         async def _collect() -> None:
             try:
@@ -169,6 +777,22 @@ class SkillFactoryWorker:
                     # 打印消息类型用于调试
                     msg_type = type(message).__name__
                     self.logger.debug(f"Received message type: {msg_type}")
+
+                    error = getattr(message, "error", None)
+                    status = getattr(message, "api_error_status", None)
+                    if error in OVERLOAD_ERRORS or status in OVERLOAD_STATUS:
+                        self._round_overload = f"{msg_type} {error or status}"
+                    session_id = getattr(message, "session_id", None)
+                    if hasattr(message, "subtype") and isinstance(session_id, str):
+                        self._conversation_id = session_id
+                    usage = getattr(message, "usage", None)
+                    if hasattr(message, "subtype") and isinstance(usage, dict):
+                        # ResultMessage.usage 是整个轮次的累计用量
+                        self._round_tokens = sum(
+                            int(usage.get(key) or 0)
+                            for key in ("input_tokens", "output_tokens", "cache_creation_input_tokens")
+                        )
+                        self._add_usage(usage)
                     
                     # 跳过 SystemMessage，只处理 AssistantMessage 和 ResultMessage
                     if hasattr(message, "content") and isinstance(getattr(message, "content"), list):
@@ -188,7 +812,17 @@ class SkillFactoryWorker:
                             elif hasattr(block, "name"):
                                 # ToolUseBlock
                                 tool_name = getattr(block, "name", "unknown")
+                                self._tool_names[str(getattr(block, "id", ""))] = tool_name
                                 self.logger.info(f"Tool called: {tool_name}")
+                            elif hasattr(block, "tool_use_id"):
+                                # ToolResultBlock：统计工具返回的文档量（研究阶段的上下文大小）
+                                tool_name = self._tool_names.get(str(block.tool_use_id), "unknown")
+                                tokens = self.estimator.count(
+                                    _tool_result_text(getattr(block, "content", None))
+                                )
+                                self._round_tool_tokens[tool_name] = (
+                                    self._round_tool_tokens.get(tool_name, 0) + tokens
+                                )
                     
                     # 当收到 ResultMessage 时停止
                     if hasattr(message, "subtype") and getattr(message, "subtype") == "final":
@@ -196,10 +830,17 @@ class SkillFactoryWorker:
                         break
             except Exception as e:
                 self.logger.debug(f"Error collecting response ({self.skill_spec.name}): {e}")
+                self._session_dirty = True
+                self._round_failed = True
+                if OVERLOAD_PATTERN.search(str(e)):
+                    self._round_overload = f"{type(e).__name__}: {str(e)[:200]}"
 
         try:
             await asyncio.wait_for(_collect(), timeout=Config.ROUND_TIMEOUT)
         except asyncio.TimeoutError:
+            self._round_timed_out = True
+            self._round_failed = True
+            self._session_dirty = True
             self.logger.warning(
                 "Round timeout after %s seconds (%s)",
                 Config.ROUND_TIMEOUT,
@@ -210,6 +851,18 @@ class SkillFactoryWorker:
         self.logger.info(f"Response collected ({self.skill_spec.name}): {len(response_text)} chars")
         return response_text
 
+    def _add_usage(self, usage: dict) -> None:
+        """累计 API 实际用量（ResultMessage.usage）"""
+        for key, name in (
+            ("input_tokens", "input"),
+            ("cache_creation_input_tokens", "cache_write"),
+            ("cache_read_input_tokens", "cache_read"),
+            ("output_tokens", "output"),
+        ):
+            value = int(usage.get(key) or 0)
+            if value:
+                self.tokens[name] = self.tokens.get(name, 0) + value
+
     @staticmethod
     def _message_to_text(message: object) -> str:
         """已废弃，改为在 _collect_response_text 中直接处理"""
@@ -238,12 +891,104 @@ class SkillFactoryWorker:
             self._last_test_success = True
             self._last_error = ""
 
-    def _prompt_research(self) -> str:
+    def _prompt_research(self, crawl_tokens: Optional[int] = None) -> str:
         if self.skill_spec.research_strategy == "local_first":
-            return self._prompt_research_local_first()
-        if self.skill_spec.research_strategy == "hybrid":
-            return self._prompt_research_hybrid()
-        return self._prompt_research_context7_first()
+            prompt = self._prompt_research_local_first()
+        elif self.skill_spec.research_strategy == "hybrid":
+            prompt = self._prompt_research_hybrid()
+        else:
+            prompt = self._prompt_research_context7_first()
+        if crawl_tokens is not None:
+            prompt = f"{prompt}\n\n{self._crawl_instructions(crawl_tokens)}"
+        return self._with_notes_instruction(prompt)
+
+    def _with_notes_instruction(self, prompt: str) -> str:
+        return f"""
+{prompt}
+
+把最终的蒸馏笔记完整地放在 <research_notes> 和 </research_notes> 标签之间，
+只有标签内的内容会被保存并交给后续阶段（不超过 {self.skill_spec.max_distilled_tokens} tokens）。
+""".strip()
+
+    def _prompt_research_crawl(self, context_tokens: int) -> str:
+        """Context 7 文档不足 min_context_tokens 时的补充爬取轮次"""
+        return self._with_notes_instruction(self._crawl_instructions(context_tokens))
+
+    def _crawl_instructions(self, context_tokens: int) -> str:
+        references_str = "\n  ".join(self.skill_spec.references) if self.skill_spec.references else "无"
+        if self._crawl_cached:
+            step = self._cached_crawl_hint()
+        else:
+            step = (
+                f'使用 skill-browser-crawl Skill 爬取 "{self.skill_spec.keyword}" 的官方文档'
+                f"（必须使用 Skill，不要使用网页工具），{self._crawl_save_hint()}"
+            )
+        return f"""
+Context 7 只返回了约 {context_tokens} tokens 的文档，少于本技能要求的 {self.skill_spec.min_context_tokens} tokens，需要补充本地爬取。
+
+参考文档 URL:
+  {references_str}
+
+1. {step}
+2. 使用 Read 工具阅读爬取的文档，与已获取的 Context 7 信息合并去重
+3. 合并两个来源后进行知识蒸馏，输出完整的结构化蒸馏笔记
+""".strip()
+
+    def _crawl_save_hint(self) -> str:
+        return f"并把爬取得到的 Markdown 文档保存（或复制）到 {self.crawl_dir}（供其他技能复用）"
+
+    def _cached_crawl_hint(self) -> str:
+        return (
+            f"相同参考文档此前已爬取过，文档已放在 {self.crawl_dir}，"
+            "直接使用 Read 工具阅读（可用 Bash ls 查看文件列表），不需要再爬取"
+        )
+
+    def _local_crawl_step(self) -> str:
+        """local_first 的第一步：有缓存时阅读缓存的爬取文档，否则爬取并保存到 crawl_dir"""
+        if self._crawl_cached:
+            return f"""
+【第一步】阅读已缓存的爬取文档
+1. {self._cached_crawl_hint()}
+""".strip()
+        return f"""
+【第一步】使用 skill-browser-crawl Skill 爬取官方文档（必须使用 Skill，不要使用网页工具）
+1. 调用 skill-browser-crawl Skill 来深度爬取参考文档 URL
+   - 爬虫策略：递归爬取，深度优先
+   - 关键词过滤："{self.skill_spec.keyword}"
+   - 最大页面数：50-100 页
+   - 排除模式：/api/changelog, /blog, /community
+   - 包含模式：/docs, /guide, /tutorial, /reference
+2. Skill 会将爬取的文档保存到本地 Markdown 格式，{self._crawl_save_hint()}
+3. 等待 Skill 完成爬取
+""".strip()
+
+    def _hybrid_crawl_source(self) -> str:
+        """hybrid 的来源 B：有缓存时阅读缓存的爬取文档，否则爬取并保存到 crawl_dir"""
+        if self._crawl_cached:
+            return f"""
+来源 B：已缓存的爬取文档
+  - {self._cached_crawl_hint()}
+""".strip()
+        return f"""
+来源 B：本地爬取（深度研究）
+  - 使用 skill-browser-crawl 爬取参考文档 URL
+  - 爬取策略：深度爬虫，递归爬取相关页面
+  - 关键词过滤："{self.skill_spec.keyword}"
+  - 将爬取的文档保存到本地，{self._crawl_save_hint()}
+""".strip()
+
+    def _context7_steps(self, indent: str) -> str:
+        """获取 Context 7 文档的步骤：已预取时阅读本地文件，否则由模型调用 MCP 工具"""
+        if self.context_docs is not None:
+            return (
+                f"{indent}使用 Read 工具阅读已预取的 Context 7 文档 {self.context_docs.path}"
+                f"（库 {self.context_docs.library_id}，约 {self.context_docs.tokens} tokens），"
+                "不需要再调用 Context 7 MCP"
+            )
+        return (
+            f'{indent}使用 mcp__context7__query-docs(keyword="{self.skill_spec.keyword}")\n'
+            f'{indent}使用 mcp__context7__resolve-library-id(keyword="{self.skill_spec.keyword}")'
+        )
 
     def _prompt_research_context7_first(self) -> str:
         return f"""
@@ -255,13 +1000,11 @@ class SkillFactoryWorker:
 
 执行流程：
 
-【第一步】调用 Context 7 MCP 获取官方文档
-1. 使用 mcp__context7__query-docs(keyword="{self.skill_spec.keyword}")
-2. 使用 mcp__context7__resolve-library-id(keyword="{self.skill_spec.keyword}")
-3. 评估返回的上下文大小（token 数）
+【第一步】获取 Context 7 官方文档
+{self._context7_steps("- ")}
 
 【第二步】知识蒸馏（关键！）
-若上下文 >= {self.skill_spec.min_context_tokens} tokens，执行以下蒸馏：
+对返回的文档执行以下蒸馏：
   a) 识别 3-5 个核心概念（简洁定义，每个 1-2 句话）
   b) 筛选 10-20 个关键 API/函数/类（列表形式）
   c) 提取 3-5 个代表性使用示例（可直接运行的代码片段）
@@ -274,11 +1017,6 @@ class SkillFactoryWorker:
 
   最终蒸馏文档应控制在 {self.skill_spec.max_distilled_tokens} tokens 以内。
 
-【第三步】若上下文不足，补充本地爬取
-若 Context 7 返回 < {self.skill_spec.min_context_tokens} tokens，则：
-  1. 使用 skill-browser-crawl 爬取官方文档
-  2. 重复第二步的知识蒸馏流程
-
 【最终输出】
 整理成结构化的蒸馏笔记，包含：
 - 版本信息和更新日期
@@ -301,15 +1039,7 @@ class SkillFactoryWorker:
 
 执行流程：
 
-【第一步】使用 skill-browser-crawl Skill 爬取官方文档（必须使用 Skill，不要使用网页工具）
-1. 调用 skill-browser-crawl Skill 来深度爬取参考文档 URL
-   - 爬虫策略：递归爬取，深度优先
-   - 关键词过滤："{self.skill_spec.keyword}"
-   - 最大页面数：50-100 页
-   - 排除模式：/api/changelog, /blog, /community
-   - 包含模式：/docs, /guide, /tutorial, /reference
-2. Skill 会将爬取的文档保存到本地 Markdown 格式
-3. 等待 Skill 完成爬取
+{self._local_crawl_step()}
 
 【第二步】阅读爬取的本地文档并进行知识蒸馏
 1. 使用 Read 工具阅读爬取的 Markdown 文档
@@ -357,15 +1087,9 @@ class SkillFactoryWorker:
 【第一步】并行获取文档（两个来源同时进行）
 
 来源 A：Context 7 MCP（快速查询）
-  - 使用 mcp__context7__query-docs(keyword="{self.skill_spec.keyword}")
-  - 使用 mcp__context7__resolve-library-id(keyword="{self.skill_spec.keyword}")
-  - 评估返回的上下文大小
+{self._context7_steps("  - ")}
 
-来源 B：本地爬取（深度研究）
-  - 使用 skill-browser-crawl 爬取参考文档 URL
-  - 爬取策略：深度爬虫，递归爬取相关页面
-  - 关键词过滤："{self.skill_spec.keyword}"
-  - 将爬取的文档保存到本地
+{self._hybrid_crawl_source()}
 
 【第二步】文档阅读与分析
 1. 阅读爬取的 Markdown 文档
@@ -430,6 +1154,11 @@ numpy==1.24.0
 ```
 """
         
+        # 任务清单声明了依赖时限定使用这些依赖（离线模式下缓存中只有预取过的包）
+        if self.skill_spec.dependencies:
+            declared = ", ".join(self.skill_spec.dependencies)
+            deps_example += f"\n   - 只使用以下已声明的依赖：{declared}\n"
+
         return f"""
 现在基于研究结果创建演示代码（简化版）。
 
@@ -451,7 +1180,12 @@ numpy==1.24.0
 
     def _prompt_fix(self, attempt: int, result) -> str:
         """生成修复代码的 Prompt"""
-        error_info = result.stderr or result.error or "Unknown error"
+        error_info = self.estimator.truncate(
+            result.stderr or result.error or "Unknown error",
+            MAX_ERROR_TOKENS,
+            "... (truncated)",
+            keep="tail",
+        )
         skill_dir = Config.SKILLS_DIR / self.skill_spec.name
         code_file = self._get_code_filename()
         deps_file = self._get_deps_filename()
@@ -464,7 +1198,7 @@ numpy==1.24.0
 
 错误信息：
 ```
-{error_info[:2000]}  # 限制错误信息长度
+{error_info}
 ```
 
 请分析错误原因并修复代码：
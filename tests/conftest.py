@@ -0,0 +1,117 @@
+"""测试公共夹具 - 不调用模型和 Docker 的 SkillFactoryWorker"""
+
+from typing import Optional
+
+import pytest
+
+from src import worker as worker_module
+from src.config import Config
+from src.models import SkillSpec
+from src.utils.docker_multilang import DockerExecutionResult
+from src.worker import (
+    ROUND_DISTILL,
+    ROUND_DRAFTING,
+    ROUND_RESEARCH,
+    SkillFactoryWorker,
+)
+
+NOTES = "requests.get(url, timeout=10) returns a Response"
+
+
+class FakeClient:
+    """代替 ClaudeSDKClient 的空会话，记录创建时的选项"""
+
+    created: list = []
+
+    def __init__(self, options=None):
+        self.options = options
+        FakeClient.created.append(self)
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc):
+        return None
+
+
+class FakeWorker:
+    """
+    替换轮次和验证的 Worker 工厂
+
+    - 轮次按类型写入产物（起草写代码和依赖，蒸馏写 SKILL.md），记录 (类型, Prompt, 会话)
+    - fail 中的轮次类型模拟超时（响应不完整），crash 中的类型抛出异常模拟进程中断
+    - 验证依次返回 results 中的结果（元素为异常时抛出）
+    """
+
+    def __init__(self):
+        self.rounds: list[tuple[str, str, object]] = []
+        self.attempts: list[int] = []
+        self.results: list = []
+        self.fail: set[str] = set()
+        self.crash: set[str] = set()
+
+    @property
+    def kinds(self) -> list[str]:
+        return [kind for kind, _, _ in self.rounds]
+
+    def prompt(self, kind: str) -> str:
+        return next(prompt for round_kind, prompt, _ in self.rounds if round_kind == kind)
+
+    def make(self, spec: Optional[SkillSpec] = None, resume: bool = False) -> SkillFactoryWorker:
+        spec = spec or SkillSpec(
+            name="skill-demo",
+            keyword="requests",
+            description="HTTP client",
+            research_strategy="local_first",
+        )
+        worker = SkillFactoryWorker(spec, resume=resume)
+        fake = self
+
+        async def run_round(client, prompt, kind, check_test_status=False):
+            fake.rounds.append((kind, prompt, client))
+            if kind in fake.crash:
+                raise RuntimeError(f"interrupted during {kind}")
+            skill_dir = Config.SKILLS_DIR / spec.name
+            if kind == ROUND_DRAFTING:
+                (skill_dir / "scripts").mkdir(parents=True, exist_ok=True)
+                (skill_dir / "scripts" / "demo.py").write_text("print('ok')\n")
+                (skill_dir / "scripts" / "requirements.txt").write_text("requests\n")
+            elif kind == ROUND_DISTILL:
+                (skill_dir / "SKILL.md").write_text("---\nname: skill-demo\n---\n")
+            if kind in fake.fail:
+                worker._stage_failed = True
+            return f"<research_notes>{NOTES}</research_notes>" if kind == ROUND_RESEARCH else ""
+
+        async def validate(skill_dir, attempt):
+            fake.attempts.append(attempt)
+            result = fake.results.pop(0) if fake.results else success()
+            if isinstance(result, BaseException):
+                raise result
+            return result
+
+        async def docker_available():
+            return True
+
+        worker._run_round = run_round
+        worker._validate = validate
+        worker.docker_runner.check_docker_available = docker_available
+        return worker
+
+
+def success() -> DockerExecutionResult:
+    return DockerExecutionResult(exit_code=0, stdout="ok", stderr="")
+
+
+def failure(stderr: str = "AssertionError") -> DockerExecutionResult:
+    return DockerExecutionResult(exit_code=1, stdout="", stderr=stderr)
+
+
+@pytest.fixture
+def fake_worker(monkeypatch, tmp_path) -> FakeWorker:
+    monkeypatch.setattr(Config, "SKILLS_DIR", tmp_path / "skills")
+    monkeypatch.setattr(Config, "SESSION_MODE", "continuous")
+    monkeypatch.setattr(Config, "MAX_RETRY_ATTEMPTS", 3)
+    monkeypatch.setattr(Config, "DOCKER_PACKAGE_CACHE", False)
+    monkeypatch.setattr(worker_module, "ClaudeSDKClient", FakeClient)
+    FakeClient.created = []
+    return FakeWorker()
@@ -0,0 +1,175 @@
+"""AdaptiveLimiter 测试 - 信号量语义、AIMD 加减、按轮次类型的延迟基线和内存压力"""
+
+import asyncio
+import types
+
+import pytest
+
+from src import concurrency
+from src.concurrency import AdaptiveLimiter, read_meminfo
+
+GIB = 1024**3
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """可控的时钟：只替换 concurrency 模块看到的 time"""
+    now = [1000.0]
+    monkeypatch.setattr(concurrency, "time", types.SimpleNamespace(monotonic=lambda: now[0]))
+    return now
+
+
+@pytest.fixture
+def memory(monkeypatch):
+    """可控的 MemAvailable（字节）"""
+    available = [64 * GIB]
+    monkeypatch.setattr(concurrency, "read_mem_available", lambda: available[0])
+    return available
+
+
+def make_limiter(**kwargs):
+    options = {"initial": 2, "max_limit": 4, "increase_interval": 60, "decrease_cooldown": 30}
+    options.update(kwargs)
+    return AdaptiveLimiter(**options)
+
+
+async def test_limit_caps_in_flight():
+    limiter = make_limiter(initial=2)
+    peak = 0
+
+    async def run():
+        nonlocal peak
+        async with limiter:
+            peak = max(peak, limiter.active)
+            await asyncio.sleep(0.01)
+
+    await asyncio.gather(*(run() for _ in range(5)))
+    assert peak == 2
+    assert limiter.active == 0
+
+
+async def test_cancelled_waiter_does_not_leak_slot():
+    limiter = make_limiter(initial=1)
+    await limiter.acquire()
+    waiter = asyncio.create_task(limiter.acquire())
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    limiter.release()
+    assert limiter.active == 0
+    await limiter.acquire()
+    assert limiter.active == 1
+
+
+def test_overload_halves_limit_with_cooldown(clock):
+    limiter = make_limiter(initial=4, max_limit=8)
+
+    limiter.observe_error(overloaded=True)
+    assert limiter.limit == 2
+    # 同一波过载打到多个在途请求，冷却期内只减一次
+    limiter.observe_error(overloaded=True)
+    assert limiter.limit == 2
+
+    clock[0] += 31
+    limiter.observe_error(overloaded=True)
+    assert limiter.limit == 1
+    clock[0] += 31
+    limiter.observe_error(overloaded=True)
+    assert limiter.limit == 1  # 不低于 min_limit
+
+
+def test_additive_increase_after_healthy_rounds(clock):
+    limiter = make_limiter(initial=2)
+    limiter.active = 2
+
+    limiter.observe_round(10.0, "fix")
+    limiter.observe_round(10.0, "fix")
+    assert limiter.limit == 2  # 距上次调整不足 increase_interval
+
+    clock[0] += 61
+    limiter.observe_round(10.0, "fix")
+    assert limiter.limit == 3
+
+
+def test_no_increase_when_not_saturated(clock):
+    limiter = make_limiter(initial=2)
+    limiter.active = 1
+    clock[0] += 61
+    for _ in range(5):
+        limiter.observe_round(10.0)
+    assert limiter.limit == 2
+
+
+def test_latency_baseline_tracked_per_round_kind(clock):
+    limiter = make_limiter(initial=4, max_limit=4, latency_tolerance=2.0)
+
+    # 大量很快的修复轮次不会拉低研究轮次的基线
+    for _ in range(20):
+        limiter.observe_round(5.0, "fix")
+    for _ in range(5):
+        limiter.observe_round(120.0, "research")
+    assert limiter.limit == 4
+
+    # 研究轮次本身变慢时才减小
+    for _ in range(10):
+        limiter.observe_round(600.0, "research")
+    assert limiter.limit == 3
+
+
+def test_mixed_kinds_would_trip_single_baseline(clock):
+    """同一类型下快慢轮次混合会被误判为过载（按类型统计正是为了避免这种情况）"""
+    limiter = make_limiter(initial=4, max_limit=4, latency_tolerance=2.0)
+    for _ in range(20):
+        limiter.observe_round(5.0)
+    limiter.observe_round(120.0)
+    assert limiter.limit == 3
+
+
+def test_memory_pressure_compares_against_one_container(clock, memory):
+    limiter = make_limiter(initial=4, max_limit=8, memory_per_slot="1g", memory_reserve="512m")
+    limiter.active = 4
+
+    # MemAvailable 已扣除运行中的容器：还能再放下一个容器就不算内存压力，与在途技能数无关
+    memory[0] = 2 * GIB
+    limiter.observe_round(10.0)
+    assert limiter.limit == 4
+
+    clock[0] += 5
+    memory[0] = GIB
+    limiter.observe_round(10.0)
+    assert limiter.limit == 3
+
+
+def test_memory_tight_blocks_increase(clock, memory):
+    limiter = make_limiter(initial=2, memory_per_slot="1g", memory_reserve="512m")
+    limiter.active = 2
+    memory[0] = 2 * GIB  # 够一个容器，不够两个
+
+    clock[0] += 61
+    for _ in range(3):
+        limiter.observe_round(10.0)
+    assert limiter.limit == 2
+
+    clock[0] += 5
+    memory[0] = 4 * GIB
+    limiter.observe_round(10.0)
+    assert limiter.limit == 3
+
+
+async def test_memory_pressure_checked_on_acquire(clock, memory):
+    limiter = make_limiter(initial=4, memory_per_slot="1g")
+    await limiter.acquire()
+    clock[0] += 5
+    memory[0] = GIB // 2
+    await limiter.acquire()
+    assert limiter.limit == 3
+
+
+def test_read_meminfo(tmp_path):
+    meminfo = tmp_path / "meminfo"
+    meminfo.write_text("MemTotal:       16384 kB\nMemAvailable:    8192 kB\n", encoding="ascii")
+    assert read_meminfo("MemTotal", meminfo) == 16384 * 1024
+    assert read_meminfo("MemAvailable", meminfo) == 8192 * 1024
+    assert read_meminfo("SwapTotal", meminfo) is None
+    assert read_meminfo("MemTotal", tmp_path / "missing") is None
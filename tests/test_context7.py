@@ -0,0 +1,140 @@
+"""Context7Client 测试 - 用 httpx.MockTransport 模拟 MCP 服务"""
+
+import json
+
+import httpx
+import pytest
+
+from src.utils.context7 import Context7Client, Context7Error
+
+
+class FakeServer:
+    """最小的 MCP 服务：记录请求，按方法返回结果，可以让会话过期或改用 SSE 返回"""
+
+    def __init__(self, tools=("resolve-library-id", "query-docs"), sse=False):
+        self.tools = list(tools)
+        self.sse = sse
+        self.requests: list[dict] = []
+        self.sessions = 0
+        self.expired: set[str] = set()
+        self.replies: dict[str, str] = {}
+
+    def handler(self, request: httpx.Request) -> httpx.Response:
+        payload = json.loads(request.content)
+        session = request.headers.get("mcp-session-id")
+        self.requests.append({"payload": payload, "session": session})
+        method = payload.get("method")
+        if "id" not in payload:
+            return httpx.Response(202)
+        if session in self.expired:
+            return httpx.Response(404, text="session not found")
+
+        headers = {}
+        if method == "initialize":
+            self.sessions += 1
+            headers["mcp-session-id"] = f"session-{self.sessions}"
+            result = {"protocolVersion": "2025-03-26", "capabilities": {}}
+        elif method == "tools/list":
+            result = {"tools": [{"name": name} for name in self.tools]}
+        else:
+            name = payload["params"]["name"]
+            result = {"content": [{"type": "text", "text": self.replies.get(name, "")}]}
+        message = {"jsonrpc": "2.0", "id": payload["id"], "result": result}
+
+        if self.sse:
+            # 先发一条无关的通知，客户端应按请求 ID 找到对应的响应
+            notice = {"jsonrpc": "2.0", "method": "notifications/message", "params": {}}
+            body = f"event: message\ndata: {json.dumps(notice)}\n\n"
+            body += f"event: message\ndata: {json.dumps(message)}\n\n"
+            headers["content-type"] = "text/event-stream"
+            return httpx.Response(200, text=body, headers=headers)
+        return httpx.Response(200, json=message, headers=headers)
+
+    def methods(self) -> list[str]:
+        return [request["payload"].get("method") for request in self.requests]
+
+
+def make_client(server: FakeServer) -> Context7Client:
+    return Context7Client(
+        "https://context7.test/mcp", api_key="key", transport=httpx.MockTransport(server.handler)
+    )
+
+
+async def test_json_response_initializes_once():
+    server = FakeServer()
+    server.replies["resolve-library-id"] = (
+        "- Title: Pydantic\n- Context7-compatible library ID: /pydantic/pydantic\n"
+    )
+    server.replies["query-docs"] = "validators docs"
+    client = make_client(server)
+    try:
+        assert await client.resolve_library_id("pydantic") == "/pydantic/pydantic"
+        assert await client.query_docs("/pydantic/pydantic", "validators") == "validators docs"
+    finally:
+        await client.close()
+
+    assert server.methods() == [
+        "initialize",
+        "notifications/initialized",
+        "tools/list",
+        "tools/call",
+        "tools/call",
+    ]
+    # initialize 之后的请求都带上服务端分配的会话 ID
+    assert all(request["session"] == "session-1" for request in server.requests[1:])
+    assert client.tools == {"resolve-library-id", "query-docs"}
+
+
+async def test_sse_response_matches_request_id():
+    server = FakeServer(sse=True)
+    server.replies["query-docs"] = "streamed docs"
+    client = make_client(server)
+    try:
+        assert await client.query_docs("/encode/httpx", "async client") == "streamed docs"
+    finally:
+        await client.close()
+
+
+async def test_expired_session_reinitializes_and_retries():
+    server = FakeServer()
+    server.replies["query-docs"] = "docs"
+    client = make_client(server)
+    try:
+        await client.query_docs("/encode/httpx", "first")
+        server.expired.add("session-1")
+        assert await client.query_docs("/encode/httpx", "second") == "docs"
+    finally:
+        await client.close()
+
+    assert server.sessions == 2
+    assert server.requests[-1]["session"] == "session-2"
+
+
+async def test_legacy_server_uses_get_library_docs():
+    server = FakeServer(tools=("resolve-library-id", "get-library-docs"))
+    server.replies["get-library-docs"] = "legacy docs"
+    client = make_client(server)
+    try:
+        assert await client.query_docs("/encode/httpx", "timeouts", tokens=2000) == "legacy docs"
+    finally:
+        await client.close()
+
+    arguments = server.requests[-1]["payload"]["params"]["arguments"]
+    assert arguments == {
+        "context7CompatibleLibraryID": "/encode/httpx",
+        "topic": "timeouts",
+        "tokens": 2000,
+    }
+
+
+async def test_http_error_raises():
+    client = Context7Client(
+        "https://context7.test/mcp",
+        transport=httpx.MockTransport(lambda request: httpx.Response(500, text="boom")),
+    )
+    try:
+        with pytest.raises(Context7Error) as excinfo:
+            await client.call_tool("query-docs", {})
+    finally:
+        await client.close()
+    assert excinfo.value.status_code == 500
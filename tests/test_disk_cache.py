@@ -0,0 +1,138 @@
+"""磁盘缓存与验证结果缓存测试 - TTL、LRU 淘汰，以及按代码/依赖/镜像 ID 复用验证结果"""
+
+import os
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from src.config import Config
+from src.utils import disk_cache
+from src.utils.disk_cache import DiskCache, cache_key
+from src.utils.docker_multilang import DockerExecutionResult, MultiLangDockerRunner
+
+
+def test_cache_key_separates_fields():
+    assert cache_key("ab", "c") != cache_key("a", "bc")
+    assert cache_key("a", "b") == cache_key("a", "b")
+
+
+def test_get_put_and_stats(tmp_path):
+    cache = DiskCache(tmp_path, ttl=0, max_bytes=1024 * 1024)
+    key = cache_key("code")
+
+    assert cache.get(key) is None
+    cache.put(key, {"exit_code": 0})
+
+    assert cache.get(key) == {"exit_code": 0}
+    assert (tmp_path / key[:2] / f"{key}.json").exists()
+    assert cache.stats() == "hits=1 misses=1 hit_rate=50% evictions=0"
+
+
+def test_expired_entries_are_dropped(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(disk_cache, "time", SimpleNamespace(time=lambda: now[0]))
+    cache = DiskCache(tmp_path, ttl=60, max_bytes=1024 * 1024)
+    key = cache_key("code")
+    cache.put(key, "value")
+
+    now[0] += 30
+    assert cache.get(key) == "value"
+    now[0] += 31
+    assert cache.get(key) is None
+    assert not (tmp_path / key[:2] / f"{key}.json").exists()
+
+
+def test_evicts_least_recently_used(tmp_path):
+    cache = DiskCache(tmp_path, ttl=0, max_bytes=1024 * 1024)
+    keys = [cache_key(str(i)) for i in range(3)]
+    for age, key in zip((300, 200, 100), keys):
+        cache.put(key, "x" * 100)
+        path = tmp_path / key[:2] / f"{key}.json"
+        stamp = time.time() - age
+        os.utime(path, (stamp, stamp))
+
+    # 读取最旧的条目后它变成最近使用
+    assert cache.get(keys[0]) is not None
+    entry_size = (tmp_path / keys[1][:2] / f"{keys[1]}.json").stat().st_size
+    cache.max_bytes = entry_size * 2
+
+    assert cache.evict() == 1
+    assert cache.get(keys[1]) is None
+    assert cache.get(keys[0]) is not None
+    assert cache.get(keys[2]) is not None
+
+
+@pytest.fixture
+def runner(monkeypatch, tmp_path):
+    """验证缓存开启、镜像解析和执行都被替换的执行器"""
+    monkeypatch.setattr(Config, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(Config, "VALIDATION_CACHE_ENABLED", True)
+    monkeypatch.setattr(Config, "DOCKER_PACKAGE_CACHE", False)
+    monkeypatch.setattr(Config, "DOCKER_POOL_ENABLED", False)
+    monkeypatch.setattr(Config, "DOCKER_SNAPSHOT_ENABLED", False)
+    monkeypatch.setattr(MultiLangDockerRunner, "_validation_cache", None)
+    runner = MultiLangDockerRunner()
+    runner.image_id = "sha256:one"
+    runner.results = []
+    runner.executions = 0
+
+    async def resolve_image(language):
+        return "python:3.10-slim", False
+
+    async def image_id(image):
+        return runner.image_id
+
+    async def execute(code, dependencies, *args):
+        runner.executions += 1
+        return runner.results.pop(0)
+
+    runner._resolve_image = resolve_image
+    runner._image_id = image_id
+    runner._execute = execute
+    return runner
+
+
+async def test_successful_validation_reused(runner):
+    runner.results = [DockerExecutionResult(exit_code=0, stdout="ok", stderr="")]
+
+    first = await runner.run_code("print('ok')", "requests\n")
+    second = await runner.run_code("print('ok')", "requests\n")
+
+    assert runner.executions == 1
+    assert not first.cached
+    assert second.cached and second.success and second.stdout == "ok"
+
+
+async def test_failed_validation_not_cached(runner):
+    runner.results = [
+        DockerExecutionResult(exit_code=1, stdout="", stderr="pip: network unreachable"),
+        DockerExecutionResult(exit_code=0, stdout="ok", stderr=""),
+    ]
+
+    assert not (await runner.run_code("print('ok')", "requests\n")).success
+    assert (await runner.run_code("print('ok')", "requests\n")).success
+    assert runner.executions == 2
+
+
+async def test_key_includes_code_deps_and_image_id(runner):
+    runner.results = [DockerExecutionResult(exit_code=0, stdout="ok", stderr="") for _ in range(4)]
+
+    await runner.run_code("print('ok')", "requests\n")
+    await runner.run_code("print('changed')", "requests\n")
+    await runner.run_code("print('ok')", "requests==2.31\n")
+    # 标签指向了新的镜像
+    runner.image_id = "sha256:two"
+    await runner.run_code("print('ok')", "requests\n")
+
+    assert runner.executions == 4
+
+
+async def test_no_cache_without_image_id(runner):
+    runner.image_id = None
+    runner.results = [DockerExecutionResult(exit_code=0, stdout="ok", stderr="") for _ in range(2)]
+
+    await runner.run_code("print('ok')", "")
+    await runner.run_code("print('ok')", "")
+
+    assert runner.executions == 2
@@ -0,0 +1,328 @@
+"""DockerAPIClient 测试 - 用 unix socket 上的假 dockerd 验证请求、流解析和 API 后端的辅助操作"""
+
+import asyncio
+import io
+import json
+import struct
+import tarfile
+from urllib.parse import parse_qs, urlsplit
+
+import pytest
+
+from src.utils import docker_backend
+from src.utils.docker_api import STREAM_STDERR, STREAM_STDOUT, DockerAPIClient, DockerAPIError
+from src.utils.docker_pool import DockerContainerPool
+
+API = "/v1.41"
+
+
+def frame(stream: int, data: bytes) -> bytes:
+    return struct.pack(">BxxxL", stream, len(data)) + data
+
+
+def json_lines(*events: dict) -> bytes:
+    return b"".join(json.dumps(event).encode() + b"\r\n" for event in events)
+
+
+class FakeDockerd:
+    """
+    最小的 HTTP/1.1 dockerd：routes 把 (方法, 路径) 映射为响应或响应列表（依次返回）
+
+    响应为 (状态码, JSON 对象) 或 (状态码, bytes)；raw=True 的 bytes 响应模拟 attach/exec
+    的原始流（不带 Content-Length，写完后关闭连接）。
+    """
+
+    def __init__(self):
+        self.routes: dict[tuple[str, str], object] = {}
+        self.requests: list[tuple[str, str, dict, bytes]] = []
+
+    def route(self, method: str, path: str, *responses) -> None:
+        self.routes[(method, API + path)] = list(responses)
+
+    def bodies(self, method: str, path: str) -> list[bytes]:
+        return [body for m, p, _, body in self.requests if (m, p) == (method, API + path)]
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                method, target, _ = line.decode().split(" ", 2)
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b""):
+                        break
+                    key, _, value = header.decode().partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                url = urlsplit(target)
+                query = {key: values[0] for key, values in parse_qs(url.query).items()}
+                self.requests.append((method, url.path, query, body))
+
+                responses = self.routes.get((method, url.path))
+                if not responses:
+                    status, payload, raw = 404, {"message": f"no route {method} {url.path}"}, False
+                else:
+                    response = responses.pop(0) if len(responses) > 1 else responses[0]
+                    status, payload, raw = (*response, False)[:3]
+
+                if raw:
+                    writer.write(
+                        f"HTTP/1.1 {status} OK\r\n"
+                        "Content-Type: application/vnd.docker.raw-stream\r\n"
+                        "Connection: close\r\n\r\n".encode() + payload
+                    )
+                    await writer.drain()
+                    break
+                data = payload if isinstance(payload, bytes) else json.dumps(payload).encode()
+                writer.write(
+                    f"HTTP/1.1 {status} OK\r\n"
+                    "Content-Type: application/json\r\n"
+                    f"Content-Length: {len(data)}\r\n\r\n".encode() + data
+                )
+                await writer.drain()
+        finally:
+            writer.close()
+
+
+@pytest.fixture
+async def dockerd(tmp_path):
+    fake = FakeDockerd()
+    socket_path = str(tmp_path / "docker.sock")
+    server = await asyncio.start_unix_server(fake.handle, path=socket_path)
+    api = DockerAPIClient(socket_path=socket_path)
+    yield fake, api
+    await api.close()
+    server.close()
+    await server.wait_closed()
+
+
+async def test_ping_and_version(dockerd):
+    fake, api = dockerd
+    fake.route("GET", "/_ping", (200, b"OK"))
+    fake.route("GET", "/version", (200, {"Version": "27.0.1"}))
+
+    assert await api.ping() is True
+    assert (await api.version())["Version"] == "27.0.1"
+
+
+async def test_error_message_and_tolerated_statuses(dockerd):
+    fake, api = dockerd
+    fake.route("GET", "/containers/c1/json", (404, {"message": "No such container: c1"}))
+    fake.route("POST", "/containers/c1/kill", (409, {"message": "is not running"}))
+    fake.route("DELETE", "/containers/c1", (404, {"message": "No such container: c1"}))
+
+    with pytest.raises(DockerAPIError) as excinfo:
+        await api.inspect_container("c1")
+    assert excinfo.value.status_code == 404
+    assert excinfo.value.message == "No such container: c1"
+    # 已停止/已删除的容器视为成功
+    await api.kill("c1")
+    await api.remove("c1")
+
+
+async def test_logs_demultiplexed(dockerd):
+    fake, api = dockerd
+    stream = (
+        frame(STREAM_STDOUT, b"hello ")
+        + frame(STREAM_STDERR, b"oops")
+        + frame(STREAM_STDOUT, b"world")
+    )
+    fake.route("GET", "/containers/c1/logs", (200, stream, True))
+
+    frames = [item async for item in api.logs("c1")]
+
+    assert frames == [
+        (STREAM_STDOUT, b"hello "),
+        (STREAM_STDERR, b"oops"),
+        (STREAM_STDOUT, b"world"),
+    ]
+
+
+async def test_pull_reports_stream_error(dockerd):
+    fake, api = dockerd
+    fake.route(
+        "POST",
+        "/images/create",
+        (200, json_lines({"status": "Pulling"}, {"error": "manifest unknown"})),
+    )
+
+    with pytest.raises(DockerAPIError, match="manifest unknown"):
+        await api.pull("python:3.10-slim")
+    _, _, query, _ = fake.requests[-1]
+    assert query == {"fromImage": "python", "tag": "3.10-slim"}
+
+
+async def test_run_container_pulls_missing_image_and_collects_output(dockerd):
+    fake, api = dockerd
+    fake.route(
+        "POST",
+        "/containers/create",
+        (404, {"message": "No such image"}),
+        (201, {"Id": "c1"}),
+    )
+    fake.route("POST", "/images/create", (200, json_lines({"status": "Downloaded"})))
+    fake.route("POST", "/containers/c1/start", (204, b""))
+    fake.route("POST", "/containers/c1/wait", (200, {"StatusCode": 0}))
+    fake.route(
+        "GET",
+        "/containers/c1/logs",
+        (200, frame(STREAM_STDOUT, b"done") + frame(STREAM_STDERR, b"warn"), True),
+    )
+    fake.route("DELETE", "/containers/c1", (204, b""))
+
+    result = await docker_backend.run_container(
+        "python:3.10-slim",
+        "pip download -r /src/requirements.txt",
+        binds=["/host/cache:/cache", "/host/src:/src:ro"],
+        env={"PIP_CACHE_DIR": "/cache/pip"},
+        timeout=30,
+        network="none",
+        api=api,
+    )
+
+    assert result == (0, "done", "warn")
+    config = json.loads(fake.bodies("POST", "/containers/create")[-1])
+    assert config["Cmd"] == ["sh", "-c", "pip download -r /src/requirements.txt"]
+    assert config["Env"] == ["PIP_CACHE_DIR=/cache/pip"]
+    assert config["HostConfig"] == {
+        "Binds": ["/host/cache:/cache", "/host/src:/src:ro"],
+        "NetworkMode": "none",
+    }
+    # 一次性容器用完即删
+    assert fake.bodies("DELETE", "/containers/c1")
+
+
+async def test_exec_command_returns_exit_code(dockerd):
+    fake, api = dockerd
+    fake.route("POST", "/containers/c1/exec", (201, {"Id": "e1"}))
+    fake.route("POST", "/exec/e1/start", (200, frame(STREAM_STDOUT, b"ok"), True))
+    fake.route("GET", "/exec/e1/json", (200, {"ExitCode": 3, "Running": False}))
+
+    exit_code = await docker_backend.exec_command(
+        "c1", ["rm", "-rf", "/workspace/x"], timeout=5, api=api
+    )
+
+    assert exit_code == 3
+    config = json.loads(fake.bodies("POST", "/containers/c1/exec")[0])
+    assert config["Cmd"] == ["rm", "-rf", "/workspace/x"]
+    assert json.loads(fake.bodies("POST", "/exec/e1/start")[0]) == {"Detach": False, "Tty": False}
+
+
+async def test_build_image_sends_tar_context(dockerd, tmp_path):
+    fake, api = dockerd
+    context_dir = tmp_path / "ctx"
+    context_dir.mkdir()
+    (context_dir / "Dockerfile").write_text("FROM python:3.10-slim\n", encoding="utf-8")
+    (context_dir / "requirements.txt").write_text("requests\n", encoding="utf-8")
+    fake.route(
+        "POST",
+        "/build",
+        (200, json_lines({"stream": "sha256:abc\n"})),
+        (200, json_lines({"stream": "Step 1/2\n"}, {"error": "pip install failed"})),
+    )
+
+    result = await docker_backend.build_image(context_dir, "deps:py-1", 60, api)
+    assert result == (0, "sha256:abc\n")
+    exit_code, log = await docker_backend.build_image(context_dir, "deps:py-2", 60, api)
+    assert exit_code == 1
+    assert "pip install failed" in log
+
+    method, _, query, body = fake.requests[0]
+    assert query["t"] == "deps:py-1"
+    with tarfile.open(fileobj=io.BytesIO(body)) as tar:
+        assert sorted(tar.getnames()) == ["Dockerfile", "requirements.txt"]
+
+
+async def test_remove_image_in_use_and_missing(dockerd):
+    fake, api = dockerd
+    fake.route("DELETE", "/images/deps%3Apy-1", (409, {"message": "image is being used"}))
+    fake.route("DELETE", "/images/deps%3Apy-2", (404, {"message": "No such image"}))
+
+    assert await docker_backend.remove_image("deps:py-1", api) == (False, "image is being used")
+    assert await docker_backend.remove_image("deps:py-2", api) == (True, "")
+
+
+async def test_inspect_image_missing_returns_none(dockerd):
+    fake, api = dockerd
+    fake.route("GET", "/images/python%3A3.10-slim/json", (200, {"Id": "sha256:1", "Size": 10}))
+
+    assert (await docker_backend.inspect_image("python:3.10-slim", api))["Id"] == "sha256:1"
+    assert await docker_backend.inspect_image("missing:latest", api) is None
+
+
+async def test_container_pool_uses_api(dockerd, tmp_path):
+    fake, api = dockerd
+    fake.route("POST", "/containers/create", (201, {"Id": "pool1"}))
+    fake.route("POST", "/containers/pool1/start", (204, b""))
+    fake.route("POST", "/containers/pool1/exec", (201, {"Id": "e1"}))
+    fake.route("POST", "/exec/e1/start", (200, b"", True))
+    fake.route("GET", "/exec/e1/json", (200, {"ExitCode": 0}))
+    fake.route("DELETE", "/containers/pool1", (204, b""))
+    pool = DockerContainerPool(
+        size=1,
+        max_uses=1,
+        memory_limit="512m",
+        cpu_limit="0.5",
+        binds=["/host/cache:/cache"],
+        network="none",
+        api=api,
+    )
+
+    async with pool.lease("python", "python:3.10-slim") as container:
+        assert container.container_id == "pool1"
+
+    config = json.loads(fake.bodies("POST", "/containers/create")[0])
+    assert config["Cmd"] == ["tail", "-f", "/dev/null"]
+    assert config["Labels"]["skillfactory.pool"] == "python"
+    host_config = config["HostConfig"]
+    assert host_config["AutoRemove"] is True
+    assert host_config["Memory"] == 512 * 1024**2
+    assert host_config["NanoCpus"] == 500_000_000
+    assert host_config["NetworkMode"] == "none"
+    assert host_config["Binds"][1:] == ["/host/cache:/cache"]
+    # max_uses=1：归还时在容器内清空工作区后删除容器
+    exec_config = json.loads(fake.bodies("POST", "/containers/pool1/exec")[0])
+    assert exec_config["Cmd"] == ["sh", "-c", "rm -rf /workspace/*"]
+    assert fake.bodies("DELETE", "/containers/pool1")
+
+
+async def test_build_by_commit_runs_with_mounts_and_commits(dockerd):
+    fake, api = dockerd
+    fake.route("POST", "/containers/create", (201, {"Id": "b1"}))
+    fake.route("POST", "/containers/b1/start", (204, b""))
+    fake.route("POST", "/containers/b1/wait", (200, {"StatusCode": 0}))
+    fake.route("POST", "/commit", (201, {"Id": "sha256:snap"}))
+    fake.route("DELETE", "/containers/b1", (204, b""))
+
+    result = await docker_backend.build_by_commit(
+        "python:3.10-slim",
+        "pip install -r requirements.txt",
+        "skillfactory-deps:python-abc",
+        name="skillfactory-snapshot-abc",
+        binds=["/host/cache/wheelhouse:/cache/wheelhouse"],
+        env={"PIP_NO_INDEX": "1"},
+        labels={"skillfactory.kind": "snapshot"},
+        timeout=60,
+        network="none",
+        changes=["LABEL skillfactory.snapshot=1"],
+        api=api,
+    )
+
+    assert result == (0, "sha256:snap")
+    config = json.loads(fake.bodies("POST", "/containers/create")[0])
+    assert config["HostConfig"] == {
+        "Binds": ["/host/cache/wheelhouse:/cache/wheelhouse"],
+        "NetworkMode": "none",
+    }
+    assert config["Env"] == ["PIP_NO_INDEX=1"]
+    _, _, query, _ = next(request for request in fake.requests if request[1] == API + "/commit")
+    assert query == {
+        "container": "b1",
+        "repo": "skillfactory-deps",
+        "tag": "python-abc",
+        "changes": "LABEL skillfactory.snapshot=1",
+    }
+    assert fake.bodies("DELETE", "/containers/b1")
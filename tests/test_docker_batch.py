@@ -0,0 +1,89 @@
+"""批量驱动脚本测试 - 超时杀死整个进程组、记录退出码，并在容器内清理运行目录"""
+
+import os
+import shutil
+import subprocess
+import time
+
+import pytest
+
+from src.utils.docker_batch import BATCH_ROOT, BATCH_WORKDIR, batch_script
+
+pytestmark = pytest.mark.skipif(shutil.which("setsid") is None, reason="需要 setsid")
+
+
+def run_batch(tmp_path, projects: dict[str, str], timeout: int = 1) -> float:
+    """在宿主机上用 sh 运行驱动脚本（把容器内的挂载点替换为临时目录），返回耗时"""
+    for name, script in projects.items():
+        run_dir = tmp_path / name / BATCH_WORKDIR
+        run_dir.mkdir(parents=True)
+        (run_dir / "run.sh").write_text(script)
+    script = batch_script([(name, timeout) for name in projects])
+    (tmp_path / "batch.sh").write_text(script.replace(f"{BATCH_ROOT}/", f"{tmp_path}/"))
+
+    start = time.monotonic()
+    subprocess.run(["sh", str(tmp_path / "batch.sh")], capture_output=True, timeout=30)
+    return time.monotonic() - start
+
+
+def alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    # 已退出但尚未被回收的进程
+    try:
+        with open(f"/proc/{pid}/stat") as f:
+            return f.read().split(") ", 1)[1][0] != "Z"
+    except FileNotFoundError:
+        return False
+
+
+def test_results_and_workdir_cleanup(tmp_path):
+    run_batch(
+        tmp_path,
+        {
+            "p0": "mkdir -p .pydeps/pkg node_modules/x && echo ok",
+            "p1": "echo boom >&2; exit 3",
+        },
+        timeout=5,
+    )
+
+    assert (tmp_path / "p0" / "stdout.log").read_text() == "ok\n"
+    assert (tmp_path / "p0" / "exit_code").read_text().strip() == "0"
+    assert (tmp_path / "p1" / "stderr.log").read_text() == "boom\n"
+    assert (tmp_path / "p1" / "exit_code").read_text().strip() == "3"
+    # 依赖目录随运行目录在"容器内"删除，只留下结果文件
+    for name in ("p0", "p1"):
+        assert sorted(os.listdir(tmp_path / name)) == [
+            "elapsed",
+            "exit_code",
+            "stderr.log",
+            "stdout.log",
+        ]
+
+
+@pytest.mark.skipif(not os.path.isdir("/proc"), reason="需要 /proc")
+def test_timeout_kills_whole_process_group(tmp_path):
+    elapsed = run_batch(
+        tmp_path,
+        {
+            # 后台子进程（如 node 启动的 worker）在 sh 被杀死后不应继续运行
+            "p0": "sh -c 'echo $$ > ../child.pid; exec sleep 30' &\nsleep 30\n",
+            "p1": "echo next",
+        },
+        timeout=1,
+    )
+
+    assert elapsed < 10
+    assert (tmp_path / "p0" / "exit_code").read_text().strip() != "0"
+    assert int((tmp_path / "p0" / "elapsed").read_text()) >= 1
+    # 超时的项目不影响后续项目
+    assert (tmp_path / "p1" / "stdout.log").read_text() == "next\n"
+
+    child = int((tmp_path / "p0" / "child.pid").read_text())
+    for _ in range(50):
+        if not alive(child):
+            break
+        time.sleep(0.05)
+    assert not alive(child)
@@ -0,0 +1,125 @@
+"""工具链镜像测试 - 镜像解析与构建、失败回退、manifest 记录，以及预装工具链后的运行命令"""
+
+import pytest
+
+from src.utils import docker_images
+from src.utils.docker_images import TOOLCHAIN_REPOSITORY, ToolchainImageBuilder
+from src.utils.docker_multilang import MultiLangDockerRunner
+
+PYTHON = MultiLangDockerRunner.LANGUAGE_CONFIG["python"]
+TYPESCRIPT = MultiLangDockerRunner.LANGUAGE_CONFIG["typescript"]
+
+
+@pytest.fixture
+def docker(monkeypatch):
+    """替换镜像查询和构建，记录构建时的 Dockerfile"""
+    state = {"images": {}, "builds": [], "build_exit": 0}
+
+    async def inspect_image(image, api=None):
+        return state["images"].get(image)
+
+    async def build_image(context_dir, tag, timeout, api=None):
+        state["builds"].append((tag, (context_dir / "Dockerfile").read_text()))
+        if state["build_exit"] != 0:
+            return state["build_exit"], "npm ERR! network"
+        state["images"][tag] = {"Id": f"sha256:{len(state['builds'])}"}
+        return 0, ""
+
+    monkeypatch.setattr(docker_images, "inspect_image", inspect_image)
+    monkeypatch.setattr(docker_images, "build_image", build_image)
+    return state
+
+
+async def test_language_without_toolchain_uses_base_image(docker, tmp_path):
+    builder = ToolchainImageBuilder(tmp_path / "toolchains.json")
+
+    assert await builder.resolve("python", "python:3.10-slim", PYTHON) == (
+        "python:3.10-slim",
+        False,
+    )
+    assert docker["builds"] == []
+
+
+async def test_builds_once_and_records_manifest(docker, tmp_path):
+    builder = ToolchainImageBuilder(tmp_path / "toolchains.json")
+
+    image, prebaked = await builder.resolve("typescript", "node:20-alpine", TYPESCRIPT)
+    again = await builder.resolve("typescript", "node:20-alpine", TYPESCRIPT)
+
+    assert prebaked
+    assert image.startswith(f"{TOOLCHAIN_REPOSITORY}:typescript-")
+    assert again == (image, True)
+    [(tag, dockerfile)] = docker["builds"]
+    assert tag == image
+    assert "FROM node:20-alpine" in dockerfile
+    assert f"RUN {TYPESCRIPT['toolchain_cmd']}" in dockerfile
+    # 工具链装在根目录，运行目录仍是 /app
+    assert dockerfile.index("WORKDIR /\n") < dockerfile.index("RUN ")
+    assert dockerfile.rstrip().endswith("WORKDIR /app")
+
+    manifest = builder.load_manifest()["typescript"]
+    assert manifest["tag"] == image
+    assert manifest["image_id"] == "sha256:1"
+    assert manifest["config_hash"] == builder.config_hash("node:20-alpine", TYPESCRIPT)
+
+
+def test_tag_changes_with_toolchain_config(tmp_path):
+    builder = ToolchainImageBuilder(tmp_path / "toolchains.json")
+    changed = {**TYPESCRIPT, "toolchain_cmd": "npm install --silent ts-node@10 typescript"}
+
+    assert builder.image_tag("typescript", "node:20-alpine", TYPESCRIPT) != builder.image_tag(
+        "typescript", "node:20-alpine", changed
+    )
+    assert builder.image_tag("typescript", "node:20-alpine", TYPESCRIPT) != builder.image_tag(
+        "typescript", "mirror/node:20-alpine", TYPESCRIPT
+    )
+
+
+async def test_failed_build_falls_back_without_retry(docker, tmp_path):
+    builder = ToolchainImageBuilder(tmp_path / "toolchains.json")
+    docker["build_exit"] = 1
+
+    first = await builder.resolve("typescript", "node:20-alpine", TYPESCRIPT)
+    second = await builder.resolve("typescript", "node:20-alpine", TYPESCRIPT)
+
+    # 构建失败时退回原始镜像（每次运行安装工具链），本进程内不再重试
+    assert first == second == ("node:20-alpine", False)
+    assert len(docker["builds"]) == 1
+    assert builder.load_manifest() == {}
+
+
+async def test_resolve_without_build(docker, tmp_path):
+    builder = ToolchainImageBuilder(tmp_path / "toolchains.json")
+
+    assert await builder.resolve("typescript", "node:20-alpine", TYPESCRIPT, build=False) == (
+        "node:20-alpine",
+        False,
+    )
+    assert docker["builds"] == []
+
+
+async def test_build_all_skips_existing_unless_forced(docker, tmp_path):
+    builder = ToolchainImageBuilder(tmp_path / "toolchains.json")
+    languages = {"python": PYTHON, "typescript": TYPESCRIPT}
+
+    results = await builder.build_all(languages, lambda image: image)
+    assert results["python"] == "python:3.10-slim"
+    assert results["typescript"].startswith(f"{TOOLCHAIN_REPOSITORY}:typescript-")
+    assert len(docker["builds"]) == 1
+
+    await builder.build_all(languages, lambda image: image)
+    assert len(docker["builds"]) == 1
+    await builder.build_all(languages, lambda image: image, force=True)
+    assert len(docker["builds"]) == 2
+
+
+def test_commands_with_prebaked_toolchain():
+    runner = MultiLangDockerRunner
+
+    assert runner._install_command(TYPESCRIPT, prebaked=False) == (
+        f"{TYPESCRIPT['install_cmd']} && {TYPESCRIPT['toolchain_cmd']}"
+    )
+    assert runner._install_command(TYPESCRIPT, prebaked=True) == TYPESCRIPT["install_cmd"]
+    # npx 在 /app 下找不到预装在 /node_modules 的 ts-node，直接调用镜像中的可执行文件
+    assert runner._run_command(TYPESCRIPT, prebaked=True) == TYPESCRIPT["prebaked_run_cmd"]
+    assert runner._run_command(TYPESCRIPT, prebaked=False) == TYPESCRIPT["run_cmd"]
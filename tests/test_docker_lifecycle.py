@@ -0,0 +1,147 @@
+"""容器生命周期测试 - 命名与标签、遗留容器回收，以及任务取消时停止容器"""
+
+import asyncio
+import json
+import os
+import time
+
+import pytest
+
+from src.config import Config
+from src.utils import docker_lifecycle
+from src.utils.docker_lifecycle import (
+    INSTANCE_ID,
+    LABEL_CREATED,
+    LABEL_KIND,
+    LABEL_MANAGED,
+    LABEL_OWNER,
+    ContainerReaper,
+    container_labels,
+    container_name,
+    label_args,
+    owner_id,
+)
+from src.utils.docker_multilang import MultiLangDockerRunner
+
+
+def test_container_name_is_stable_per_process():
+    name = container_name("skill/with spaces", attempt=2)
+
+    assert name == container_name("skill/with spaces", attempt=2)
+    assert name == f"skillfactory-skill-with-spaces-a2-{INSTANCE_ID}"
+    assert container_name("skill", 0) != container_name("skill", 1)
+    # 未指定技能时每次随机
+    assert container_name(None) != container_name(None)
+
+
+def test_container_labels():
+    labels = container_labels("run", "skill-a", attempt=1)
+
+    assert labels[LABEL_MANAGED] == "true"
+    assert labels[LABEL_KIND] == "run"
+    assert labels[LABEL_OWNER] == owner_id()
+    assert labels["skillfactory.skill"] == "skill-a"
+    assert labels["skillfactory.attempt"] == "1"
+    assert label_args({"a": "1"}) == ["--label", "a=1"]
+
+
+def dead_pid() -> int:
+    """一个已经退出的本机进程号"""
+    pid = os.fork()
+    if pid == 0:
+        os._exit(0)
+    os.waitpid(pid, 0)
+    return pid
+
+
+class FakeAPI:
+    def __init__(self, containers):
+        self.containers = containers
+        self.removed = []
+        self.filters = None
+
+    async def list_containers(self, all=False, filters=None):
+        self.filters = filters
+        return self.containers
+
+    async def remove(self, container_id, force=False):
+        self.removed.append(container_id)
+
+
+def managed(container_id: str, kind: str, owner: str, age: float) -> dict:
+    return {
+        "Id": container_id,
+        "Labels": {
+            LABEL_MANAGED: "true",
+            LABEL_KIND: kind,
+            LABEL_OWNER: owner,
+            LABEL_CREATED: str(int(time.time() - age)),
+        },
+    }
+
+
+@pytest.mark.skipif(not hasattr(os, "fork"), reason="需要 fork")
+async def test_reaper_removes_orphans_and_overdue_runs():
+    host = docker_lifecycle.HOSTNAME
+    api = FakeAPI(
+        [
+            managed("alive-run", "run", owner_id(), age=10),
+            managed("orphan-pool", "pool", f"{host}:{dead_pid()}", age=10),
+            managed("overdue-run", "run", owner_id(), age=1000),
+            # 长期存在的池容器由所属进程管理，不按存活时间回收
+            managed("old-pool", "pool", owner_id(), age=1000),
+            # 无法判断其他主机上的进程，视为存活
+            managed("remote-run", "run", "other-host:1", age=10),
+        ]
+    )
+    reaper = ContainerReaper(max_age=600, api=api)
+
+    assert await reaper.reap_once() == 2
+    assert api.removed == ["orphan-pool", "overdue-run"]
+    assert api.filters == {"label": [f"{LABEL_MANAGED}=true"]}
+
+
+async def test_reaper_lists_through_cli(monkeypatch):
+    calls = []
+    labels = {LABEL_MANAGED: "true", LABEL_KIND: "run", LABEL_OWNER: owner_id()}
+
+    async def run_docker(args, timeout):
+        calls.append(args)
+        if args[0] == "ps":
+            return 0, "abc\n", ""
+        if args[0] == "inspect":
+            return 0, f"abc\t{json.dumps({**labels, LABEL_CREATED: '0'})}\n", ""
+        return 0, "", ""
+
+    monkeypatch.setattr(docker_lifecycle, "run_docker", run_docker)
+
+    assert await ContainerReaper(max_age=600).reap_once() == 1
+    assert calls[-1] == ["rm", "-f", "abc"]
+
+
+async def test_reaper_survives_listing_error(monkeypatch):
+    async def run_docker(args, timeout):
+        return 1, "", "Cannot connect to the Docker daemon"
+
+    monkeypatch.setattr(docker_lifecycle, "run_docker", run_docker)
+
+    assert await ContainerReaper(max_age=600).reap_once() == 0
+
+
+async def test_cancelled_run_kills_process_and_container(monkeypatch):
+    monkeypatch.setattr(Config, "DOCKER_PACKAGE_CACHE", False)
+    runner = MultiLangDockerRunner()
+    cleaned = asyncio.Event()
+
+    async def cleanup() -> None:
+        cleaned.set()
+
+    # 用长时间运行的进程代替 docker run
+    command = ["sh", "-c", "echo started; exec sleep 30"]
+    task = asyncio.create_task(runner._run_process(command, cleanup=cleanup, timeout=60))
+    await asyncio.sleep(0.2)
+    task.cancel()
+
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(task, timeout=5)
+    assert cleaned.is_set()
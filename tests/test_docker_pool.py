@@ -0,0 +1,169 @@
+"""容器池测试 - 复用与容量上限、按复用次数/健康检查/异常回收，以及关闭"""
+
+import asyncio
+
+import pytest
+
+from src.utils import docker_pool
+from src.utils.docker_pool import POOL_WORKSPACE, DockerContainerPool
+
+
+class FakeDocker:
+    """替换容器池用到的 Docker 操作，记录容器的创建、exec 和删除"""
+
+    def __init__(self):
+        self.started: list[str] = []
+        self.removed: list[str] = []
+        self.execs: list[tuple[str, list[str]]] = []
+        self.health_exit = 0
+        self.start_error = False
+
+    async def start_detached(self, image, command, binds, labels, **kwargs):
+        if self.start_error:
+            raise RuntimeError("no such image")
+        container_id = f"c{len(self.started)}"
+        self.started.append(container_id)
+        return container_id
+
+    async def exec_command(self, container_id, cmd, timeout, api=None):
+        self.execs.append((container_id, cmd))
+        return self.health_exit if cmd == ["true"] else 0
+
+    async def remove_container(self, container_id, api=None):
+        self.removed.append(container_id)
+
+
+@pytest.fixture
+def docker(monkeypatch):
+    fake = FakeDocker()
+    monkeypatch.setattr(docker_pool, "start_detached", fake.start_detached)
+    monkeypatch.setattr(docker_pool, "exec_command", fake.exec_command)
+    monkeypatch.setattr(docker_pool, "remove_container", fake.remove_container)
+    return fake
+
+
+def make_pool(**kwargs) -> DockerContainerPool:
+    options = dict(size=1, max_uses=10, memory_limit="512m", cpu_limit="1")
+    options.update(kwargs)
+    return DockerContainerPool(**options)
+
+
+async def test_container_reused_across_leases(docker):
+    pool = make_pool()
+
+    async with pool.lease("python", "python:3.10-slim") as first:
+        host_path, container_path = first.new_run_dir()
+        assert host_path.parent == first.host_dir
+        assert container_path.startswith(f"{POOL_WORKSPACE}/")
+    async with pool.lease("python", "python:3.10-slim") as second:
+        pass
+
+    assert second is first
+    assert docker.started == ["c0"]
+    await pool.close()
+    assert docker.removed == ["c0"]
+    assert not first.host_dir.exists()
+
+
+async def test_lease_waits_when_language_at_capacity(docker):
+    pool = make_pool(size=1)
+    order = []
+
+    async def use(tag: str) -> None:
+        async with pool.lease("python", "python:3.10-slim"):
+            order.append(f"{tag}+")
+            await asyncio.sleep(0.02)
+            order.append(f"{tag}-")
+
+    await asyncio.gather(use("a"), use("b"))
+
+    # 同一语言最多 size 个容器，第二个借用等待归还后复用同一容器
+    assert order == ["a+", "a-", "b+", "b-"]
+    assert docker.started == ["c0"]
+    await pool.close()
+
+
+async def test_languages_have_separate_containers(docker):
+    pool = make_pool(size=1)
+
+    async with pool.lease("python", "python:3.10-slim") as python:
+        async with pool.lease("javascript", "node:20-alpine") as node:
+            assert python is not node
+
+    assert docker.started == ["c0", "c1"]
+    await pool.close()
+
+
+async def test_recycled_after_max_uses(docker):
+    pool = make_pool(max_uses=2)
+
+    for _ in range(3):
+        async with pool.lease("python", "python:3.10-slim"):
+            pass
+
+    assert docker.started == ["c0", "c1"]
+    assert docker.removed == ["c0"]
+    # 销毁前先在容器内清空工作区（文件属于容器内的 root）
+    assert ("c0", ["sh", "-c", f"rm -rf {POOL_WORKSPACE}/*"]) in docker.execs
+    await pool.close()
+
+
+async def test_destroyed_after_error_in_lease(docker):
+    pool = make_pool()
+
+    with pytest.raises(ValueError):
+        async with pool.lease("python", "python:3.10-slim"):
+            raise ValueError("exec failed")
+    async with pool.lease("python", "python:3.10-slim") as container:
+        assert container.container_id == "c1"
+
+    assert docker.removed == ["c0"]
+    await pool.close()
+
+
+async def test_unhealthy_container_replaced(docker):
+    pool = make_pool(healthcheck_interval=0)
+
+    async with pool.lease("python", "python:3.10-slim"):
+        pass
+    docker.health_exit = 1
+    async with pool.lease("python", "python:3.10-slim") as container:
+        assert container.container_id == "c1"
+
+    assert docker.removed == ["c0"]
+    await pool.close()
+
+
+async def test_image_change_replaces_container(docker):
+    pool = make_pool()
+
+    async with pool.lease("python", "python:3.10-slim"):
+        pass
+    async with pool.lease("python", "python:3.11-slim") as container:
+        assert container.image == "python:3.11-slim"
+
+    assert docker.removed == ["c0"]
+    await pool.close()
+
+
+async def test_failed_start_frees_slot(docker):
+    pool = make_pool(size=1)
+    docker.start_error = True
+
+    with pytest.raises(RuntimeError, match="Failed to start pooled container"):
+        async with pool.lease("python", "python:3.10-slim"):
+            pass
+
+    docker.start_error = False
+    async with pool.lease("python", "python:3.10-slim") as container:
+        assert container.container_id == "c0"
+    await pool.close()
+
+
+async def test_closed_pool_rejects_leases(docker):
+    pool = make_pool()
+    await pool.close()
+
+    with pytest.raises(RuntimeError, match="closed"):
+        async with pool.lease("python", "python:3.10-slim"):
+            pass
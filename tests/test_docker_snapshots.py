@@ -0,0 +1,91 @@
+"""依赖快照测试 - 依赖规范化、快照标签，以及构建时沿用运行时的挂载/环境变量/网络"""
+
+import pytest
+
+from src.utils import docker_snapshots
+from src.utils.docker_snapshots import DependencySnapshotManager, normalize_dependencies
+
+
+def test_normalize_requirements():
+    a = "requests==2.31\n# comment\nflask   >= 2\n\nrequests==2.31\n"
+    b = "flask >= 2  # web\nrequests==2.31"
+    assert normalize_dependencies(a, "requirements.txt") == normalize_dependencies(
+        b, "requirements.txt"
+    )
+
+
+def test_normalize_package_json():
+    a = '{"dependencies": {"b": "1", "a": "2"}, "type": "module"}'
+    b = '{\n  "type": "module",\n  "dependencies": {"a": "2", "b": "1"}\n}'
+    assert normalize_dependencies(a, "package.json") == normalize_dependencies(b, "package.json")
+
+
+@pytest.fixture
+def docker(monkeypatch):
+    """替换快照管理器用到的 Docker 操作，记录构建参数"""
+    images = {"python:3.10-slim": {"Id": "sha256:base", "Size": 100}}
+    builds = []
+
+    async def inspect_image(image, api=None):
+        return images.get(image)
+
+    async def build_by_commit(image, command, tag, name, binds, env, labels, timeout, **kwargs):
+        builds.append({"command": command, "tag": tag, "binds": binds, "env": env, **kwargs})
+        images[tag] = {"Id": f"sha256:{tag}", "Size": 150}
+        return 0, "sha256:new"
+
+    monkeypatch.setattr(docker_snapshots, "inspect_image", inspect_image)
+    monkeypatch.setattr(docker_snapshots, "build_by_commit", build_by_commit)
+    return builds
+
+
+async def test_snapshot_built_with_runtime_mounts_env_and_network(docker, tmp_path):
+    manager = DependencySnapshotManager(tmp_path / "snapshots.json", budget_mb=1024)
+    env = {"PIP_FIND_LINKS": "/cache/wheelhouse", "PIP_NO_INDEX": "1"}
+
+    build = await manager.ensure(
+        "python",
+        "python:3.10-slim",
+        "requirements.txt",
+        "pip install -q -r requirements.txt",
+        "requests\n",
+        env=env,
+        binds=["/host/cache/wheelhouse:/cache/wheelhouse"],
+        network="none",
+    )
+
+    assert build.ok and not build.cached
+    [call] = docker
+    assert call["command"] == "cp /src/requirements.txt ./ && pip install -q -r requirements.txt"
+    assert call["env"] == env
+    assert call["network"] == "none"
+    # 依赖文件通过只读挂载传入，共享包缓存按运行时的挂载提供
+    assert call["binds"][0].endswith(":/src:ro")
+    assert call["binds"][1:] == ["/host/cache/wheelhouse:/cache/wheelhouse"]
+    assert manager._load_index()[build.tag]["size"] == 50
+
+    # 相同依赖再次请求时直接命中
+    again = await manager.ensure(
+        "python",
+        "python:3.10-slim",
+        "requirements.txt",
+        "pip install -q -r requirements.txt",
+        "requests",
+        env=env,
+        binds=["/host/cache/wheelhouse:/cache/wheelhouse"],
+        network="none",
+    )
+    assert again.cached and again.tag == build.tag
+    assert len(docker) == 1
+
+
+async def test_network_mode_changes_snapshot_tag(docker, tmp_path):
+    manager = DependencySnapshotManager(tmp_path / "snapshots.json", budget_mb=1024)
+    args = ("python", "python:3.10-slim", "requirements.txt", "pip install -r requirements.txt")
+
+    online = await manager.ensure(*args, "requests")
+    offline = await manager.ensure(*args, "requests", network="none")
+
+    # 联网构建的快照不能被离线运行复用
+    assert online.tag != offline.tag
+    assert len(docker) == 2
@@ -0,0 +1,113 @@
+"""DurationPredictor 测试 - 特征组合回退、超时下限和超时样本（删失数据）"""
+
+import pytest
+
+from src.config import Config
+from src.durations import DurationHistory, DurationPredictor, longest_first
+from src.models import SkillResult, SkillSpec
+
+
+@pytest.fixture(autouse=True)
+def timeouts(monkeypatch):
+    monkeypatch.setattr(Config, "WORKER_TIMEOUT", 900)
+    monkeypatch.setattr(Config, "DURATION_TIMEOUT_FACTOR", 2.0)
+    monkeypatch.setattr(Config, "DURATION_TIMEOUT_MIN", 300)
+    monkeypatch.setattr(Config, "DURATION_TIMEOUT_MAX", 0)
+
+
+def spec(name: str, language: str = "python", **kwargs) -> SkillSpec:
+    return SkillSpec(name=name, keyword=name, description="", language=language, **kwargs)
+
+
+def test_no_prediction_uses_worker_timeout():
+    predictor = DurationPredictor()
+    assert predictor.predict(spec("a")) is None
+    assert predictor.timeout_for(spec("a")) == 900
+
+
+def test_same_skill_needs_one_sample():
+    predictor = DurationPredictor(min_samples=3)
+    predictor.observe(spec("a"), 100)
+    assert predictor.predict(spec("a")) == 100
+    # 预测 100s x 2 低于下限，取 DURATION_TIMEOUT_MIN
+    assert predictor.timeout_for(spec("a")) == 300
+
+
+def test_full_key_needs_min_samples():
+    predictor = DurationPredictor(min_samples=3)
+    for index, total in enumerate([200, 400]):
+        predictor.observe(spec(f"s{index}"), total)
+    assert predictor.predict(spec("new")) is None
+
+    predictor.observe(spec("s2"), 300)
+    assert predictor.predict(spec("new")) == 300
+    assert predictor.timeout_for(spec("new")) == 600
+
+
+def test_coarse_key_keeps_worker_timeout_floor():
+    predictor = DurationPredictor(min_samples=3, coarse_min_samples=5)
+    for index in range(3):
+        predictor.observe(spec(f"s{index}", min_context_tokens=50000), 100)
+    # 只能匹配到 language+strategy 这样的笼统组合，样本不够时不缩短超时
+    other = spec("new", min_context_tokens=0)
+    assert predictor.predict(other) == 100
+    assert predictor.timeout_for(other) == 900
+
+    for index in range(3, 5):
+        predictor.observe(spec(f"s{index}", min_context_tokens=50000), 100)
+    assert predictor.timeout_for(other) == 300
+
+
+def test_timeout_is_capped():
+    predictor = DurationPredictor()
+    predictor.observe(spec("slow"), 5000)
+    assert predictor.timeout_for(spec("slow")) == 900 * 3
+
+
+def test_median_with_censored_samples():
+    median = DurationPredictor._median
+    assert median([(100, False), (300, False), (200, False)]) == 200
+    assert median([(100, False), (200, False), (300, False), (400, False)]) == 250
+    # 超时样本排在所有完成的样本之后，不按超时时间参与中位数
+    assert median([(100, False), (200, False), (50, True)]) == 200
+    assert median([(100, False), (900, True), (600, True)]) == 900
+
+
+def test_history_round_trip(tmp_path):
+    history = DurationHistory(tmp_path / "durations.jsonl")
+    full = {"research": 10.0, "distill": 5.0, "total": 120.0}
+    assert history.append(
+        spec("a"),
+        SkillResult("a", "success", "", "", durations=full),
+    )
+    # 续跑的部分耗时和跳过的技能不记录
+    assert not history.append(
+        spec("b"), SkillResult("b", "success", "", "", durations={"total": 5.0})
+    )
+    assert not history.append(
+        spec("c"), SkillResult("c", "skipped", "", "", durations=full)
+    )
+    assert history.append(
+        spec("d"), SkillResult("d", "timeout", "", "", durations={"total": 900.0})
+    )
+
+    predictor = history.load_predictor()
+    assert predictor.predict(spec("a")) == 120
+    assert predictor.predict(spec("d")) == 900
+    assert predictor.sample_count() == 2
+
+
+def test_longest_first_within_window():
+    predictor = DurationPredictor(min_samples=10)
+    for name, total in [("short", 10), ("long", 100), ("mid", 50)]:
+        predictor.observe(spec(name), total)
+    todos = [spec("short"), spec("long"), spec("unknown", language="go"), spec("mid")]
+
+    ordered = [item.name for item in longest_first(todos, predictor, window=10)]
+    assert ordered == ["unknown", "long", "mid", "short"]
+    assert [item.name for item in longest_first(todos, predictor, window=1)] == [
+        "short",
+        "long",
+        "unknown",
+        "mid",
+    ]
@@ -0,0 +1,104 @@
+"""FileLock 测试 - 互斥、释放，以及 async with 等待期间被取消时不泄漏锁"""
+
+import asyncio
+import os
+
+import pytest
+
+from src.utils.file_lock import FileLock, fcntl
+
+pytestmark = pytest.mark.skipif(fcntl is None, reason="flock 只在 Unix 上可用")
+
+
+def is_locked(path) -> bool:
+    """用非阻塞 flock 探测锁文件当前是否被持有"""
+    fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return True
+    else:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        return False
+    finally:
+        os.close(fd)
+
+
+def test_sync_lock_and_release(tmp_path):
+    path = tmp_path / "nested" / "a.lock"
+    with FileLock(path):
+        assert is_locked(path)
+    assert not is_locked(path)
+
+
+async def test_async_lock_waits_for_holder(tmp_path):
+    path = tmp_path / "a.lock"
+    holder = FileLock(path)
+    holder.acquire()
+    entered = asyncio.Event()
+
+    async def waiter():
+        async with FileLock(path):
+            entered.set()
+
+    task = asyncio.create_task(waiter())
+    await asyncio.sleep(0.05)
+    assert not entered.is_set()
+
+    holder.release()
+    await asyncio.wait_for(task, timeout=2)
+    assert entered.is_set()
+    assert not is_locked(path)
+
+
+async def test_cancel_while_waiting_does_not_leak_lock(tmp_path):
+    path = tmp_path / "a.lock"
+    holder = FileLock(path)
+    holder.acquire()
+    lock = FileLock(path)
+    entered = False
+
+    async def waiter():
+        nonlocal entered
+        async with lock:
+            entered = True
+
+    task = asyncio.create_task(waiter())
+    await asyncio.sleep(0.05)
+    task.cancel()
+    # 取消后 acquire 线程仍在等待，持有方释放后它会拿到锁
+    asyncio.get_running_loop().call_later(0.05, holder.release)
+
+    with pytest.raises(asyncio.CancelledError):
+        await asyncio.wait_for(task, timeout=2)
+    assert not entered
+    # 线程拿到的锁在抛出取消之前已经释放
+    assert lock._fd is None
+    assert not is_locked(path)
+
+
+async def test_cancel_twice_releases_in_callback(tmp_path):
+    path = tmp_path / "a.lock"
+    holder = FileLock(path)
+    holder.acquire()
+    lock = FileLock(path)
+
+    async def waiter():
+        async with lock:
+            pass
+
+    task = asyncio.create_task(waiter())
+    await asyncio.sleep(0.05)
+    task.cancel()
+    await asyncio.sleep(0.05)
+    task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await task
+
+    holder.release()
+    for _ in range(100):
+        await asyncio.sleep(0.01)
+        if lock._fd is None and not is_locked(path):
+            break
+    assert lock._fd is None
+    assert not is_locked(path)
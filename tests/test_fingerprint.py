@@ -0,0 +1,79 @@
+"""规范指纹测试 - 指纹的组成、已有产物是否过期，以及未变化技能的跳过与重新验证"""
+
+from dataclasses import replace
+
+from conftest import failure
+from src.config import Config
+from src.models import SkillSpec
+from src.worker import PROMPT_TEMPLATE_VERSION, ROUND_DISTILL
+
+SPEC = SkillSpec(
+    name="skill-demo",
+    keyword="requests",
+    description="HTTP client",
+    research_strategy="local_first",
+)
+
+
+def test_fingerprint_covers_spec_and_extra_factors():
+    base = SPEC.fingerprint("model-a", "1")
+
+    assert base == replace(SPEC).fingerprint("model-a", "1")
+    assert base != replace(SPEC, description="HTTP client v2").fingerprint("model-a", "1")
+    assert base != replace(SPEC, references=["https://docs"]).fingerprint("model-a", "1")
+    assert base != SPEC.fingerprint("model-b", "1")
+    assert base != SPEC.fingerprint("model-a", "2")
+
+
+async def test_up_to_date_after_complete_run(fake_worker):
+    assert not fake_worker.make(SPEC).is_up_to_date()
+
+    await fake_worker.make(SPEC).run()
+
+    worker = fake_worker.make(SPEC)
+    assert worker.is_up_to_date()
+    assert worker.fingerprint == SPEC.fingerprint(Config.CLAUDE_MODEL, PROMPT_TEMPLATE_VERSION)
+
+
+async def test_changed_spec_or_model_is_stale(fake_worker, monkeypatch):
+    await fake_worker.make(SPEC).run()
+
+    assert not fake_worker.make(replace(SPEC, keyword="httpx")).is_up_to_date()
+    monkeypatch.setattr(Config, "CLAUDE_MODEL", "another-model")
+    assert not fake_worker.make(SPEC).is_up_to_date()
+
+
+async def test_missing_skill_md_is_stale(fake_worker):
+    await fake_worker.make(SPEC).run()
+    (Config.SKILLS_DIR / SPEC.name / "SKILL.md").unlink()
+
+    assert not fake_worker.make(SPEC).is_up_to_date()
+
+
+async def test_skipped_result(fake_worker):
+    await fake_worker.make(SPEC).run()
+    fake_worker.rounds = []
+
+    result = fake_worker.make(SPEC).skipped_result()
+
+    assert result.status == "skipped"
+    assert fake_worker.rounds == []
+
+
+async def test_revalidate_runs_code_without_llm_rounds(fake_worker):
+    await fake_worker.make(SPEC).run()
+    fake_worker.rounds = []
+    fake_worker.attempts = []
+    fake_worker.results = [failure("ImportError: requests")]
+
+    worker = fake_worker.make(SPEC)
+    result = await worker.revalidate()
+
+    assert fake_worker.rounds == []
+    assert fake_worker.attempts == [2]
+    assert result.status == "partial_success"
+    assert "ImportError" in result.error_log
+    # 重新验证的结果写回断点，产物仍然是最新的
+    assert worker.checkpoint.status == "partial_success"
+    assert ROUND_DISTILL in worker.checkpoint.completed_rounds
+    assert fake_worker.make(SPEC).is_up_to_date()
@@ -0,0 +1,92 @@
+"""JobStore 测试 - 领取、续租、过期回收和重试"""
+
+import time
+
+from src.job_store import JobStore
+from src.models import SkillResult, SkillSpec
+
+
+def spec(name: str) -> SkillSpec:
+    return SkillSpec(name=name, keyword=name, description="")
+
+
+def result(name: str, status: str) -> SkillResult:
+    return SkillResult(skill_name=name, status=status, skill_dir="", skill_file="")
+
+
+def expire(store: JobStore) -> None:
+    with store._connect() as conn:
+        conn.execute("UPDATE jobs SET lease_expires_at = ?", (time.time() - 1,))
+
+
+async def test_claim_in_order_until_empty(tmp_path):
+    store = JobStore(tmp_path / "jobs.db")
+    store.enqueue([spec("a"), spec("b")])
+
+    first = await store.claim("host:1", 60)
+    second = await store.claim("host:1", 60)
+    assert (first.spec.name, second.spec.name) == ("a", "b")
+    assert await store.claim("host:1", 60) is None
+    # 同一 Worker 的两次领取持有不同的租约令牌
+    assert first.owner != second.owner
+    assert first.owner.startswith("host:1/")
+
+
+async def test_enqueue_is_idempotent_for_unchanged_spec(tmp_path):
+    store = JobStore(tmp_path / "jobs.db")
+    store.enqueue([spec("a")])
+    job = await store.claim("host:1", 60)
+    await store.complete(job, result("a", "success"))
+
+    store.enqueue([spec("a")])
+    assert store.counts_sync() == {"done": 1}
+
+    store.enqueue([SkillSpec(name="a", keyword="changed", description="")])
+    assert store.counts_sync() == {"pending": 1}
+
+
+async def test_expired_lease_is_reclaimed(tmp_path):
+    store = JobStore(tmp_path / "jobs.db", max_attempts=3)
+    store.enqueue([spec("a")])
+    stale = await store.claim("host:1", 60)
+    expire(store)
+
+    fresh = await store.claim("host:2", 60)
+    assert fresh.id == stale.id
+    assert fresh.attempts == 2
+    # 旧的执行已经失去租约，不能续租也不能写回结果
+    assert not await store.heartbeat(stale, 60)
+    assert not await store.complete(stale, result("a", "success"))
+    assert await store.heartbeat(fresh, 60)
+    assert await store.complete(fresh, result("a", "success"))
+    assert store.counts_sync() == {"done": 1}
+
+
+async def test_expired_lease_fails_after_max_attempts(tmp_path):
+    store = JobStore(tmp_path / "jobs.db", max_attempts=1)
+    store.enqueue([spec("a")])
+    await store.claim("host:1", 60)
+    expire(store)
+
+    assert await store.claim("host:2", 60) is None
+    assert store.counts_sync() == {"failed": 1}
+    name, attempts, error = store.failed_jobs()[0]
+    assert (name, attempts) == ("a", 1)
+    assert "lease expired" in error
+
+
+async def test_failed_result_is_requeued_until_max_attempts(tmp_path):
+    store = JobStore(tmp_path / "jobs.db", max_attempts=2)
+    store.enqueue([spec("a")])
+
+    job = await store.claim("host:1", 60)
+    assert await store.complete(job, result("a", "timeout"))
+    assert store.counts_sync() == {"pending": 1}
+
+    job = await store.claim("host:1", 60)
+    assert await store.complete(job, result("a", "failed"))
+    assert store.counts_sync() == {"failed": 1}
+
+    assert store.retry_failed() == 1
+    job = await store.claim("host:1", 60)
+    assert job.attempts == 1
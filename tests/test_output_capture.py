@@ -0,0 +1,151 @@
+"""OutputCapture 测试 - 头尾截断、致命错误匹配，以及命中后按输出是否继续决定是否终止"""
+
+import asyncio
+
+import pytest
+
+from src.config import Config
+from src.utils.docker_multilang import MultiLangDockerRunner
+from src.utils.output_capture import BoundedOutput, OutputCapture
+
+PATTERN = r"Traceback \(most recent call last\)|npm ERR!"
+TRACEBACK = b'Traceback (most recent call last):\n  File "demo.py", line 1\nValueError: boom\n'
+
+
+def test_bounded_output_keeps_head_and_tail():
+    output = BoundedOutput(16)  # 头 4 字节，尾 12 字节
+    data = bytes(range(48, 58)) * 3  # "0123456789" x 3
+    for start in range(0, len(data), 7):
+        output.append(data[start : start + 7])
+
+    assert output.total_bytes == 30
+    assert output.truncated_bytes == 14
+    assert output.text() == "0123\n... [14 bytes truncated] ...\n" + data[-12:].decode()
+
+
+def test_bounded_output_untruncated():
+    output = BoundedOutput(16)
+    output.append(b"hello ")
+    output.append(b"world")
+
+    assert output.truncated_bytes == 0
+    assert output.text() == "hello world"
+
+
+def test_fatal_pattern_matched_across_chunks():
+    capture = OutputCapture(1024, PATTERN)
+    capture.feed("stderr", b"Trace")
+    capture.feed("stderr", b"back (most recent")
+    # 行还没结束，不匹配半行
+    assert not capture.fatal.is_set()
+
+    capture.feed("stderr", b" call last):\n")
+    assert capture.fatal.is_set()
+    assert capture.fatal_line == "Traceback (most recent call last):"
+
+
+def test_streams_are_matched_separately():
+    capture = OutputCapture(1024, PATTERN)
+    capture.feed("stdout", b"npm ")
+    capture.feed("stderr", b"ERR! code E404\n")
+    assert not capture.fatal.is_set()
+    capture.feed("stdout", b"ERR! code E404\n")
+    assert capture.fatal.is_set()
+
+
+def test_no_pattern_never_fatal():
+    capture = OutputCapture(1024, None)
+    capture.feed("stderr", TRACEBACK)
+    assert not capture.fatal.is_set()
+    assert capture.stderr.text() == TRACEBACK.decode()
+
+
+async def test_wait_fatal_after_silence():
+    capture = OutputCapture(1024, PATTERN)
+    capture.feed("stderr", TRACEBACK)
+
+    await asyncio.wait_for(capture.wait_fatal(0.05), timeout=1)
+
+
+async def test_wait_fatal_rearms_when_output_continues():
+    capture = OutputCapture(1024, PATTERN)
+    waiter = asyncio.create_task(capture.wait_fatal(0.05))
+    capture.feed("stderr", TRACEBACK)
+    # 记录了已处理的异常后继续正常输出
+    for _ in range(10):
+        await asyncio.sleep(0.02)
+        capture.feed("stdout", b"still working\n")
+    assert not waiter.done()
+    assert not capture.fatal.is_set()
+
+    # 之后再次出错并卡住
+    capture.feed("stderr", TRACEBACK)
+    await asyncio.wait_for(waiter, timeout=1)
+
+
+@pytest.fixture
+def runner(monkeypatch):
+    monkeypatch.setattr(Config, "DOCKER_PACKAGE_CACHE", False)
+    monkeypatch.setattr(Config, "DOCKER_OFFLINE", False)
+    monkeypatch.setattr(Config, "DOCKER_FAIL_FAST_PATTERN", PATTERN)
+    monkeypatch.setattr(Config, "DOCKER_FAIL_FAST_GRACE", 0.05)
+    return MultiLangDockerRunner()
+
+
+async def test_supervise_kills_silent_process_after_traceback(runner):
+    capture = runner._new_capture()
+    aborted = asyncio.Event()
+
+    async def finished() -> int:
+        capture.feed("stderr", TRACEBACK)
+        await asyncio.sleep(10)  # 出错后卡住（例如非守护线程未退出）
+        return 1
+
+    async def abort() -> None:
+        aborted.set()
+
+    result = await runner._supervise(capture, finished(), abort, timeout=5)
+
+    assert aborted.is_set()
+    assert not result.timeout
+    assert result.exit_code == 1
+    assert "[fail-fast]" in result.stderr
+    assert "ValueError: boom" in result.stderr
+
+
+async def test_supervise_keeps_process_that_handles_exception(runner):
+    capture = runner._new_capture()
+
+    async def finished() -> int:
+        capture.feed("stderr", TRACEBACK)  # logging.exception 记录后继续运行
+        for _ in range(10):
+            await asyncio.sleep(0.02)
+            capture.feed("stdout", b"retrying\n")
+        return 0
+
+    async def abort() -> None:
+        raise AssertionError("should not abort")
+
+    result = await runner._supervise(capture, finished(), abort, timeout=5)
+
+    assert result.success
+    assert "[fail-fast]" not in result.stderr
+
+
+async def test_supervise_timeout(runner):
+    capture = runner._new_capture()
+    aborted = asyncio.Event()
+
+    async def finished() -> int:
+        capture.feed("stdout", b"working\n")
+        await asyncio.sleep(10)
+        return 0
+
+    async def abort() -> None:
+        aborted.set()
+
+    result = await runner._supervise(capture, finished(), abort, timeout=0.1)
+
+    assert aborted.is_set()
+    assert result.timeout
+    assert "Execution timeout" in result.stderr
@@ -0,0 +1,178 @@
+"""共享包缓存测试 - 预取下载不持 wheelhouse 锁、只在移入时加锁，以及任务清单依赖的选取"""
+
+import hashlib
+import json
+import os
+from dataclasses import asdict
+
+import pytest
+
+from src import cli
+from src.config import Config
+from src.models import SkillSpec
+from src.utils import package_cache
+from src.utils.docker_multilang import MultiLangDockerRunner
+from src.utils.file_lock import fcntl
+from src.utils.package_cache import PackageCache
+
+PYTHON = MultiLangDockerRunner.LANGUAGE_CONFIG["python"]
+JAVASCRIPT = MultiLangDockerRunner.LANGUAGE_CONFIG["javascript"]
+TYPESCRIPT = MultiLangDockerRunner.LANGUAGE_CONFIG["typescript"]
+
+pytestmark = pytest.mark.skipif(fcntl is None, reason="flock 只在 Unix 上可用")
+
+
+def wheelhouse_locked(root) -> bool:
+    """用非阻塞 flock 探测 wheelhouse 锁当前是否被持有"""
+    fd = os.open(root / ".wheelhouse.lock", os.O_RDWR | os.O_CREAT, 0o644)
+    try:
+        fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        return True
+    else:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+        return False
+    finally:
+        os.close(fd)
+
+
+def host_path(binds: list[str], container_path: str) -> str:
+    for bind in binds:
+        host, _, target = bind.partition(":")
+        if target == container_path:
+            return host
+    raise AssertionError(f"{container_path} not mounted")
+
+
+@pytest.fixture
+def docker(monkeypatch, tmp_path):
+    """替换预取容器：把 wheels 中的文件名写入 /out，并记录运行时 wheelhouse 锁是否被持有"""
+    calls = []
+    state = {"wheels": ["requests-2.31.0-py3-none-any.whl"], "exit_code": 0}
+
+    async def run_container(image, command, binds, env, timeout, api=None):
+        locked = wheelhouse_locked(tmp_path / "cache")
+        calls.append({"command": command, "binds": binds, "env": env, "locked": locked})
+        out = host_path(binds, "/out")
+        for name in state["wheels"]:
+            with open(f"{out}/{name}", "w") as f:
+                f.write(f"new {name}")
+        return state["exit_code"], "", "pip failed" if state["exit_code"] else ""
+
+    monkeypatch.setattr(package_cache, "run_container", run_container)
+    state["calls"] = calls
+    return state
+
+
+async def test_prefetch_downloads_without_lock_then_publishes(docker, tmp_path):
+    cache = PackageCache(tmp_path / "cache")
+    wheelhouse = tmp_path / "cache" / "wheelhouse"
+    (wheelhouse / "six-1.16.0-py2.py3-none-any.whl").write_text("old")
+    docker["wheels"].append("six-1.16.0-py2.py3-none-any.whl")
+    publish = cache._publish_wheels
+    published = []
+
+    def publish_locked(out_dir):
+        published.append(wheelhouse_locked(tmp_path / "cache"))
+        return publish(out_dir)
+
+    cache._publish_wheels = publish_locked
+
+    ok, _ = await cache.prefetch(
+        "python:3.10-slim", PYTHON, "requests==2.31.0\n", PYTHON["install_cmd"], timeout=60
+    )
+
+    assert ok
+    [call] = docker["calls"]
+    # 下载期间不持锁，只在移入 wheelhouse 时持锁
+    assert not call["locked"]
+    assert published == [True]
+    assert call["command"] == "pip wheel -q -w /out -r /src/requirements.txt"
+    # 下载期间仍能从 wheelhouse 复用已有的 wheel
+    assert call["env"]["PIP_FIND_LINKS"] == "/cache/wheelhouse"
+    assert (wheelhouse / "requests-2.31.0-py3-none-any.whl").read_text().startswith("new")
+    # 已存在的同名 wheel 保留
+    assert (wheelhouse / "six-1.16.0-py2.py3-none-any.whl").read_text() == "old"
+    # 本次预取的临时目录已清理
+    assert list((tmp_path / "cache" / ".tmp").iterdir()) == []
+
+
+async def test_failed_prefetch_publishes_nothing(docker, tmp_path):
+    cache = PackageCache(tmp_path / "cache")
+    docker["exit_code"] = 1
+
+    ok, log = await cache.prefetch(
+        "python:3.10-slim", PYTHON, "requests\n", PYTHON["install_cmd"], timeout=60
+    )
+
+    assert not ok
+    assert log == "pip failed"
+    assert list((tmp_path / "cache" / "wheelhouse").iterdir()) == []
+    assert list((tmp_path / "cache" / ".tmp").iterdir()) == []
+
+
+async def test_node_prefetch_installs_into_npm_cache(docker, tmp_path):
+    cache = PackageCache(tmp_path / "cache")
+    docker["wheels"] = []
+
+    ok, _ = await cache.prefetch(
+        "node:20-alpine", JAVASCRIPT, '{"dependencies": {}}', "npm install --silent", timeout=60
+    )
+
+    assert ok
+    [call] = docker["calls"]
+    assert call["command"].endswith("cd /tmp/prefetch && npm install --silent")
+    assert call["env"]["npm_config_cache"] == "/cache/npm"
+    assert "npm_config_offline" not in call["env"]
+
+
+def skill(language: str, dependencies=None) -> SkillSpec:
+    return SkillSpec(
+        name=f"skill-{language}",
+        keyword="demo",
+        description="",
+        language=language,
+        dependencies=dependencies or [],
+    )
+
+
+def test_todo_dependencies_prefers_generated_file(monkeypatch, tmp_path):
+    monkeypatch.setattr(Config, "SKILLS_DIR", tmp_path)
+    scripts = tmp_path / "skill-python" / "scripts"
+    scripts.mkdir(parents=True)
+    (scripts / "requirements.txt").write_text("httpx==0.27.0\n")
+
+    assert cli._todo_dependencies(skill("python", ["requests"]), PYTHON) == "httpx==0.27.0\n"
+
+
+def test_todo_dependencies_from_declared(monkeypatch, tmp_path):
+    monkeypatch.setattr(Config, "SKILLS_DIR", tmp_path)
+
+    assert cli._todo_dependencies(skill("python", ["requests==2.31.0", "rich"]), PYTHON) == (
+        "requests==2.31.0\nrich\n"
+    )
+    package = json.loads(
+        cli._todo_dependencies(skill("javascript", ["axios@^1.6.0", "@types/node"]), JAVASCRIPT)
+    )
+    assert package["dependencies"] == {"axios": "^1.6.0", "@types/node": "*"}
+
+
+def test_todo_dependencies_without_declaration(monkeypatch, tmp_path):
+    monkeypatch.setattr(Config, "SKILLS_DIR", tmp_path)
+
+    assert cli._todo_dependencies(skill("python"), PYTHON) is None
+    # TypeScript 仍需要把工具链预取到缓存
+    package = json.loads(cli._todo_dependencies(skill("typescript"), TYPESCRIPT))
+    assert package["dependencies"] == {}
+
+
+def test_declared_dependencies_keep_existing_fingerprint():
+    spec = SkillSpec.from_dict({"name": "s", "keyword": "k", "description": "d"})
+    declared = SkillSpec(name="s", keyword="k", description="d", dependencies=["requests"])
+
+    # 未声明依赖时与新增 dependencies 字段之前的指纹一致
+    fields = asdict(spec)
+    del fields["dependencies"]
+    payload = json.dumps([fields, "m"], sort_keys=True, ensure_ascii=False)
+    assert spec.fingerprint("m") == hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+    assert declared.fingerprint("m") != spec.fingerprint("m")
@@ -0,0 +1,52 @@
+"""会话模式测试 - phased 每个阶段新建会话并附带研究笔记和当前代码，continuous 延续同一对话"""
+
+from conftest import NOTES, FakeClient, failure
+from src.config import Config
+from src.worker import ROUND_DISTILL, ROUND_DRAFTING, ROUND_FIX, ROUND_RESEARCH
+
+
+async def test_phased_new_session_per_phase(fake_worker, monkeypatch):
+    monkeypatch.setattr(Config, "SESSION_MODE", "phased")
+    fake_worker.results = [failure("ImportError: requests")]
+
+    result = await fake_worker.make().run()
+
+    assert result.status == "success"
+    assert fake_worker.kinds == [ROUND_RESEARCH, ROUND_DRAFTING, ROUND_FIX, ROUND_DISTILL]
+    clients = [client for _, _, client in fake_worker.rounds]
+    assert len(set(map(id, clients))) == 4
+    assert len(FakeClient.created) == 4
+
+
+async def test_phased_prompts_seeded_with_notes_and_code(fake_worker, monkeypatch):
+    monkeypatch.setattr(Config, "SESSION_MODE", "phased")
+    fake_worker.results = [failure("ImportError: requests")]
+
+    await fake_worker.make().run()
+
+    assert NOTES not in fake_worker.prompt(ROUND_RESEARCH)
+    assert NOTES in fake_worker.prompt(ROUND_DRAFTING)
+    # 起草前还没有代码；修复和蒸馏阶段附上当前代码和依赖文件
+    assert "print('ok')" not in fake_worker.prompt(ROUND_DRAFTING)
+    for kind in (ROUND_FIX, ROUND_DISTILL):
+        prompt = fake_worker.prompt(kind)
+        assert NOTES in prompt
+        assert "print('ok')" in prompt
+        assert "requests\n" in prompt
+
+
+async def test_continuous_resumes_one_conversation(fake_worker):
+    fake_worker.results = [failure("ImportError: requests")]
+    worker = fake_worker.make()
+    worker._conversation_id = "conv-1"
+
+    await worker.run()
+
+    clients = {kind: client for kind, _, client in fake_worker.rounds}
+    # 研究和起草共用一个会话；验证后的阶段新建会话恢复同一对话，不再附带笔记
+    assert clients[ROUND_RESEARCH] is clients[ROUND_DRAFTING]
+    for kind in (ROUND_FIX, ROUND_DISTILL):
+        assert clients[kind] is not clients[ROUND_RESEARCH]
+        assert clients[kind].options.resume == "conv-1"
+        assert NOTES not in fake_worker.prompt(kind)
+    assert NOTES not in fake_worker.prompt(ROUND_DRAFTING)
@@ -0,0 +1,165 @@
+"""阶段化流水线测试 - LLM 与沙箱阶段重叠、排队时间不计入超时预算、阶段容量推算"""
+
+import asyncio
+import time
+
+import pytest
+
+from src import pipeline
+from src.config import Config
+from src.orchestrator import SkillFactoryOrchestrator
+from src.pipeline import SkillBudget, StagePool, StagePools
+
+
+async def test_llm_and_sandbox_stages_overlap():
+    """两个技能依次经过 LLM 和沙箱阶段：一个在 Docker 中验证时另一个可以做 LLM 轮次"""
+    stages = StagePools(llm=1, sandbox=1, packaging=1)
+    overlap = []
+    step = 0.1
+
+    async def skill():
+        async with stages.llm.slot():
+            await asyncio.sleep(step)  # API 轮次
+        async with stages.sandbox.slot():
+            await asyncio.sleep(step / 2)  # 容器验证
+            overlap.append(stages.llm.active)
+            await asyncio.sleep(step / 2)
+
+    started = time.monotonic()
+    await asyncio.gather(skill(), skill())
+    elapsed = time.monotonic() - started
+
+    # 第一个技能在沙箱中验证时，第二个技能正占用 LLM 名额
+    assert overlap[0] == 1
+    # 串行需要 4 个 step，流水线只需要 3 个
+    assert elapsed < 3.8 * step
+    assert stages.llm.acquired == stages.sandbox.acquired == 2
+    assert stages.llm.stats()["avg_wait"] > 0
+
+
+async def test_stage_capacity_limits_concurrency():
+    pool = StagePool("sandbox", 2)
+    peak = 0
+
+    async def run():
+        nonlocal peak
+        async with pool.slot():
+            peak = max(peak, pool.active)
+            await asyncio.sleep(0.02)
+
+    await asyncio.gather(*(run() for _ in range(5)))
+    assert peak == 2
+    assert pool.active == 0 and pool.waiting == 0
+
+
+async def test_budget_paused_while_queued():
+    pool = StagePool("llm", 1)
+    budget = SkillBudget(timeout=10)
+    deadline = budget.deadline
+    release = asyncio.Event()
+
+    async def holder():
+        async with pool.slot():
+            await release.wait()
+
+    task = asyncio.create_task(holder())
+    await asyncio.sleep(0)
+
+    async def waiter():
+        async with pool.slot(budget):
+            pass
+
+    waiting = asyncio.create_task(waiter())
+    await asyncio.sleep(0.01)
+    frozen = budget.remaining()
+    await asyncio.sleep(0.05)
+    # 排队期间剩余预算不变
+    assert budget.remaining() == frozen
+
+    release.set()
+    await asyncio.gather(task, waiting)
+    assert budget.queued >= 0.05
+    assert budget.deadline == pytest.approx(deadline + budget.queued)
+
+
+async def test_wait_with_budget_excludes_queue_time():
+    pool = StagePool("sandbox", 1)
+    budget = SkillBudget(timeout=0.1)
+
+    async def occupy():
+        async with pool.slot():
+            await asyncio.sleep(0.2)
+
+    async def work():
+        async with pool.slot(budget):
+            await asyncio.sleep(0.05)
+        return "done"
+
+    blocker = asyncio.create_task(occupy())
+    await asyncio.sleep(0)
+    # 排队 0.2 秒 + 工作 0.05 秒，总耗时超过 0.1 秒的预算，但工作本身没有超时
+    result = await SkillFactoryOrchestrator._wait_with_budget(work(), budget)
+    await blocker
+    assert result == "done"
+    assert budget.queued >= 0.15
+
+
+async def test_wait_with_budget_times_out_on_work():
+    budget = SkillBudget(timeout=0.05)
+    cancelled = asyncio.Event()
+
+    async def work():
+        try:
+            await asyncio.sleep(1)
+        except asyncio.CancelledError:
+            cancelled.set()
+            raise
+
+    with pytest.raises(asyncio.TimeoutError):
+        await SkillFactoryOrchestrator._wait_with_budget(work(), budget)
+    assert cancelled.is_set()
+
+
+@pytest.fixture
+def stage_config(monkeypatch):
+    for name in ("LLM_CONCURRENCY", "SANDBOX_CONCURRENCY", "PACKAGING_CONCURRENCY", "API_RPM", "API_TPM"):
+        monkeypatch.setattr(Config, name, 0)
+    monkeypatch.setattr(Config, "MAX_CONCURRENT_WORKERS", 8)
+    monkeypatch.setattr(Config, "RATE_LIMIT_ROUND_TOKENS", 20000)
+    monkeypatch.setattr(Config, "DOCKER_CPU_LIMIT", "2")
+    monkeypatch.setattr(Config, "DOCKER_MEMORY_LIMIT", "1g")
+    monkeypatch.setattr(pipeline.os, "cpu_count", lambda: 8)
+    monkeypatch.setattr(pipeline, "read_meminfo", lambda field: 3 * 1024**3)
+    return monkeypatch
+
+
+def test_stage_caps_derived_from_resources(stage_config):
+    stage_config.setattr(Config, "API_RPM", 18)
+    stage_config.setattr(Config, "API_TPM", 100000)
+
+    stages = StagePools.from_config()
+
+    # 18 rpm / 6 = 3，100000 tpm / 20000 = 5
+    assert stages.llm.capacity == 3
+    # 8 核 / 2 = 4，3g / 1g = 3
+    assert stages.sandbox.capacity == 3
+    assert stages.packaging.capacity == 8
+
+
+def test_stage_caps_bounded_by_in_flight(stage_config):
+    stages = StagePools.from_config(in_flight=2)
+
+    # 未配置限流时 LLM 跟随在途技能数
+    assert stages.llm.capacity == 2
+    assert stages.sandbox.capacity == 2
+    assert stages.packaging.capacity == 2
+
+
+def test_explicit_stage_caps_win(stage_config):
+    stage_config.setattr(Config, "LLM_CONCURRENCY", 5)
+    stage_config.setattr(Config, "SANDBOX_CONCURRENCY", 6)
+
+    stages = StagePools.from_config()
+
+    assert stages.llm.capacity == 5
+    assert stages.sandbox.capacity == 6
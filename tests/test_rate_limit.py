@@ -0,0 +1,108 @@
+"""RateLimiter 测试 - 请求桶、token 桶、实际用量修正和退避"""
+
+import asyncio
+import json
+import types
+
+import pytest
+
+from src import rate_limit
+from src.rate_limit import RateLimiter, _BucketState
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    """可控的时钟：只替换 rate_limit 模块看到的 time，等待直接推进时间"""
+    now = [1000.0]
+
+    async def sleep(seconds):
+        now[0] += seconds
+
+    fake_time = types.SimpleNamespace(time=lambda: now[0], monotonic=lambda: now[0])
+    fake_asyncio = types.SimpleNamespace(
+        Lock=asyncio.Lock, sleep=sleep, to_thread=asyncio.to_thread
+    )
+    monkeypatch.setattr(rate_limit, "time", fake_time)
+    monkeypatch.setattr(rate_limit, "asyncio", fake_asyncio)
+    return now
+
+
+def test_request_bucket_waits_for_refill():
+    limiter = RateLimiter(rpm=60)
+    state = _BucketState(requests=1.0, tokens=0.0)
+    state.updated_at = 0.0
+
+    assert limiter._take(state, 0.0, tokens=0) == 0
+    assert state.requests == 0
+    # 60 rpm：每秒补充 1 个请求
+    assert limiter._take(state, 0.5, tokens=0) == pytest.approx(0.5)
+    assert limiter._take(state, 1.0, tokens=0) == 0
+
+
+def test_token_bucket_caps_estimate_at_capacity():
+    limiter = RateLimiter(tpm=600)
+    state = _BucketState(requests=0.0, tokens=600.0)
+    state.updated_at = 0.0
+
+    # 超过桶容量的估算按满桶计，否则永远等不到
+    assert limiter._take(state, 0.0, tokens=10_000) == 0
+    assert state.tokens == 0
+    # 600 tpm：每秒补充 10 个 token
+    assert limiter._take(state, 0.0, tokens=100) == pytest.approx(10)
+
+
+def test_refill_never_exceeds_capacity():
+    limiter = RateLimiter(rpm=10, tpm=1000)
+    state = _BucketState(requests=0.0, tokens=0.0)
+    state.updated_at = 0.0
+    limiter._refill(state, 3600.0)
+    assert (state.requests, state.tokens) == (10, 1000)
+
+
+async def test_acquire_waits_and_records_stats(clock):
+    limiter = RateLimiter(rpm=60)
+    assert await limiter.acquire(0) == 0
+    limiter._state.requests = 0
+    waited = await limiter.acquire(0)
+    assert waited == pytest.approx(1.0)
+    assert limiter.admitted == 2
+    assert limiter.throttled == 1
+
+
+async def test_settle_charges_actual_usage(clock):
+    limiter = RateLimiter(tpm=1000)
+    await limiter.acquire(100)
+    assert limiter._state.tokens == 900
+    await limiter.settle(100, 400)
+    assert limiter._state.tokens == 600
+    await limiter.settle(100, 0)
+    assert limiter._state.tokens == 700
+    # 实际用量远超估算时桶最多透支一个容量
+    await limiter.settle(100, 10_000)
+    assert limiter._state.tokens == -1000
+
+
+async def test_backoff_blocks_all_admissions(clock, monkeypatch):
+    monkeypatch.setattr(rate_limit.random, "uniform", lambda low, high: high)
+    limiter = RateLimiter(backoff_base=5.0, backoff_max=30.0)
+
+    assert await limiter.backoff(0) == 5.0
+    assert await limiter.backoff(3) == 30.0
+    waited = await limiter.acquire(0)
+    assert waited == pytest.approx(30.0)
+    assert limiter.rate_limited == 2
+
+
+async def test_shared_state_file(clock, tmp_path):
+    state_file = tmp_path / "rate.json"
+    first = RateLimiter(rpm=60, state_file=state_file)
+    second = RateLimiter(rpm=60, state_file=state_file)
+    # 请求桶已经用完，60 rpm 每秒补充 1 个请求
+    state_file.write_text(
+        json.dumps({"requests": 0, "tokens": 0, "updated_at": clock[0], "blocked_until": 0})
+    )
+
+    assert await first.acquire(0) == pytest.approx(1.0)
+    # 两个进程共享同一额度，另一个限流器看到的也是已用完的桶
+    assert await second.acquire(0) == pytest.approx(1.0)
+    assert json.loads(state_file.read_text())["requests"] == 0
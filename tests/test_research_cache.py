@@ -0,0 +1,158 @@
+"""研究资料缓存测试 - 来源规范化、TTL 过期、文档预取的缓存与合并请求，以及爬取结果在技能之间复用"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.config import Config
+from src.docs_prefetch import DocsPrefetcher
+from src.models import SkillSpec
+from src.research_cache import ResearchCache, normalize_source
+from src.utils import disk_cache
+from src.utils.disk_cache import DiskCache
+
+
+@pytest.fixture
+def cache(tmp_path) -> ResearchCache:
+    return ResearchCache(DiskCache(tmp_path / "research_cache", ttl=0, max_bytes=1024 * 1024))
+
+
+def test_normalize_source():
+    assert normalize_source("HTTPS://Docs.Example.com:443/guide/#intro") == (
+        "https://docs.example.com/guide"
+    )
+    assert normalize_source("http://example.com:8080") == "http://example.com:8080/"
+    assert normalize_source("/Psf/Requests/") == "psf/requests"
+
+
+def test_crawl_key_ignores_order_duplicates_and_spelling():
+    key = ResearchCache.crawl_key(["https://a.dev/docs", "https://b.dev"], "Requests  HTTP")
+
+    assert key == ResearchCache.crawl_key(
+        ["https://B.dev/", "https://a.dev/docs/", "https://a.dev/docs", " "], "requests http"
+    )
+    assert key != ResearchCache.crawl_key(["https://a.dev/docs"], "requests http")
+
+
+def test_library_id_miss_cached_separately_from_unknown(cache):
+    assert cache.get_library_id("requests") is None
+
+    cache.put_library_id("leftpad", None)
+    cache.put_library_id("Requests", "/psf/requests")
+
+    assert cache.get_library_id("leftpad") == ""
+    assert cache.get_library_id("requests") == "/psf/requests"
+
+
+def test_entries_expire(tmp_path, monkeypatch):
+    now = [1000.0]
+    monkeypatch.setattr(disk_cache, "time", SimpleNamespace(time=lambda: now[0]))
+    cache = ResearchCache(DiskCache(tmp_path, ttl=3600, max_bytes=1024 * 1024))
+    cache.put_docs("/psf/requests", "requests", "docs")
+
+    now[0] += 3000
+    assert cache.get_docs("/psf/requests", "requests") == "docs"
+    now[0] += 1000
+    assert cache.get_docs("/psf/requests", "requests") is None
+
+
+class FakeContext7:
+    """代替 Context7Client，记录请求次数"""
+
+    def __init__(self):
+        self.resolved = 0
+        self.queried = 0
+        self.gate = asyncio.Event()
+        self.gate.set()
+
+    async def resolve_library_id(self, name, description):
+        self.resolved += 1
+        await self.gate.wait()
+        return "/psf/requests"
+
+    async def query_docs(self, library_id, query, tokens=None):
+        self.queried += 1
+        return f"docs for {library_id}"
+
+    async def close(self):
+        pass
+
+
+def spec(name: str) -> SkillSpec:
+    return SkillSpec(
+        name=name,
+        keyword="requests",
+        description="HTTP client",
+        research_strategy="context7_first",
+    )
+
+
+async def test_prefetch_uses_cache(cache, monkeypatch, tmp_path):
+    monkeypatch.setattr(Config, "SKILLS_DIR", tmp_path / "skills")
+    client = FakeContext7()
+
+    first = await DocsPrefetcher(client, cache=cache).get(spec("skill-a"))
+    second = await DocsPrefetcher(client, cache=cache).get(spec("skill-b"))
+
+    assert (client.resolved, client.queried) == (1, 1)
+    assert second.library_id == first.library_id == "/psf/requests"
+    assert "docs for /psf/requests" in second.path.read_text(encoding="utf-8")
+
+
+async def test_concurrent_prefetch_requests_once(monkeypatch, tmp_path):
+    monkeypatch.setattr(Config, "SKILLS_DIR", tmp_path / "skills")
+    client = FakeContext7()
+    client.gate.clear()
+    prefetcher = DocsPrefetcher(client)
+    prefetcher.schedule(spec("skill-a"))
+    prefetcher.schedule(spec("skill-b"))
+    await asyncio.sleep(0.01)
+
+    client.gate.set()
+    docs = await asyncio.gather(prefetcher.get(spec("skill-a")), prefetcher.get(spec("skill-b")))
+
+    assert all(d is not None for d in docs)
+    assert (client.resolved, client.queried) == (1, 1)
+    await prefetcher.close()
+
+
+def crawl_spec(name: str) -> SkillSpec:
+    return SkillSpec(
+        name=name,
+        keyword="requests",
+        description="HTTP client",
+        references=["https://requests.readthedocs.io/"],
+        research_strategy="local_first",
+    )
+
+
+def test_crawl_shared_between_skills(fake_worker, cache):
+    first = fake_worker.make(crawl_spec("skill-a"))
+    first.research_cache = cache
+    assert not first._restore_crawl()
+    (first.crawl_dir / "api").mkdir(parents=True)
+    (first.crawl_dir / "api" / "sessions.md").write_text("# Sessions", encoding="utf-8")
+    (first.crawl_dir / "page.html").write_text("<html>", encoding="utf-8")
+    first._store_crawl()
+
+    second = fake_worker.make(crawl_spec("skill-b"))
+    second.research_cache = cache
+
+    assert second._restore_crawl()
+    assert (second.crawl_dir / "api" / "sessions.md").read_text(encoding="utf-8") == "# Sessions"
+    assert not (second.crawl_dir / "page.html").exists()
+
+
+def test_restore_skips_paths_outside_crawl_dir(fake_worker, cache):
+    worker = fake_worker.make(crawl_spec("skill-a"))
+    worker.research_cache = cache
+    cache.put_crawl(
+        worker.skill_spec.references,
+        "requests",
+        {"../escape.md": "x", "/abs.md": "x", "ok.md": "ok"},
+    )
+
+    assert worker._restore_crawl()
+    assert [p.name for p in worker.crawl_dir.iterdir()] == ["ok.md"]
+    assert not (worker.crawl_dir.parent / "escape.md").exists()
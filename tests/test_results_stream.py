@@ -0,0 +1,119 @@
+"""结果流测试 - 逐条追加与读取、崩溃后的半行、最后一次运行的进度，以及 status 命令"""
+
+import argparse
+import threading
+
+from src import cli
+from src.models import SkillResult
+from src.results_stream import (
+    EVENT_RESULT,
+    EVENT_RUN_END,
+    EVENT_RUN_START,
+    ResultsStream,
+    follow_records,
+    last_run,
+    read_records,
+    summarize,
+)
+
+
+def result(name: str, status: str = "success", error: str = "") -> SkillResult:
+    return SkillResult(skill_name=name, status=status, skill_dir="", skill_file="", error_log=error)
+
+
+def test_records_written_as_each_skill_finishes(tmp_path):
+    path = tmp_path / "results.jsonl"
+    stream = ResultsStream(path)
+    stream.open(total=2)
+    stream.append(result("a"))
+
+    # 每条记录写入后立即可读，不等整次运行结束
+    records = read_records(path)
+    assert [r["event"] for r in records] == [EVENT_RUN_START, EVENT_RESULT]
+    assert records[0]["total"] == 2
+    assert records[1]["skill_name"] == "a"
+    assert {r["run_id"] for r in records} == {stream.run_id}
+
+    stream.append(result("b", "failed"))
+    stream.close()
+    assert read_records(path)[-1]["event"] == EVENT_RUN_END
+
+
+def test_partial_last_line_ignored(tmp_path):
+    path = tmp_path / "results.jsonl"
+    stream = ResultsStream(path)
+    stream.open(total=1)
+    stream.append(result("a"))
+    stream.close(completed=False)
+    with path.open("a", encoding="utf-8") as f:
+        f.write('{"event": "result", "skill_name": "b"')  # 崩溃时写了一半
+
+    records = read_records(path)
+    assert [r.get("skill_name") for r in records] == [None, "a"]
+    assert not summarize(last_run(records))["finished"]
+
+
+def test_last_run_and_summary(tmp_path):
+    path = tmp_path / "results.jsonl"
+    first = ResultsStream(path)
+    first.open(total=1)
+    first.append(result("old"))
+    first.close()
+    second = ResultsStream(path)
+    second.open(total=3)
+    second.append(result("a"))
+    second.append(result("b", "failed"))
+    second.append(result("c"))
+    second.close()
+
+    run = last_run(read_records(path))
+    summary = summarize(run)
+
+    assert summary["run_id"] == second.run_id
+    assert summary["total"] == 3
+    assert summary["done"] == 3
+    assert summary["counts"] == {"success": 2, "failed": 1}
+    assert summary["finished"]
+    assert last_run([]) == []
+
+
+def test_follow_records_yields_appended_lines(tmp_path):
+    path = tmp_path / "results.jsonl"
+    stream = ResultsStream(path)
+    stream.open(total=1)
+    follower = follow_records(path, poll_interval=0.01, from_start=False)
+    # 从当前末尾开始读，之前的记录不再输出
+    appended = threading.Timer(0.05, lambda: stream.append(result("a")))
+    appended.start()
+
+    record = next(follower)
+    appended.join()
+
+    assert record["skill_name"] == "a"
+    stream.close()
+    assert next(follower)["event"] == EVENT_RUN_END
+
+
+def test_status_prints_results_and_progress(tmp_path, monkeypatch, capsys):
+    path = tmp_path / "results.jsonl"
+    monkeypatch.setattr(cli, "results_stream_path", lambda: path)
+    stream = ResultsStream(path)
+    stream.open(total=2)
+    stream.append(result("skill-a"))
+    stream.append(result("skill-b", "failed", "Traceback\nValueError: boom"))
+
+    code = cli._show_status(argparse.Namespace(follow=False, interval=0.01))
+
+    lines = capsys.readouterr().out.splitlines()
+    assert code == 0
+    assert "skill-a" in lines[0]
+    assert lines[1].endswith("| ValueError: boom")
+    assert lines[2].startswith(f"run {stream.run_id} (running, started ")
+    assert lines[2].endswith("2/2 done failed=1 success=1")
+
+
+def test_status_without_runs(tmp_path, monkeypatch, capsys):
+    monkeypatch.setattr(cli, "results_stream_path", lambda: tmp_path / "missing.jsonl")
+
+    assert cli._show_status(argparse.Namespace(follow=False, interval=0.01)) == 1
+    assert "No runs recorded" in capsys.readouterr().out
@@ -0,0 +1,158 @@
+"""会话池测试 - 复用与 /clear 重置、容量上限、回收与丢弃、空闲后的健康检查"""
+
+import asyncio
+from types import SimpleNamespace
+from typing import Optional
+
+import pytest
+
+from src import session_pool
+from src.session_pool import SessionPool
+
+
+class FakeSDKClient:
+    """代替 ClaudeSDKClient 的已连接会话"""
+
+    created: list = []
+
+    def __init__(self, options=None):
+        self.options = options
+        self.queries: list[str] = []
+        self.reconnected: list[str] = []
+        self.connected = False
+        self.reset_error: Optional[Exception] = None
+        self.mcp_servers: list[dict] = []
+        FakeSDKClient.created.append(self)
+
+    async def connect(self):
+        self.connected = True
+
+    async def disconnect(self):
+        self.connected = False
+
+    async def query(self, prompt):
+        if self.reset_error is not None:
+            raise self.reset_error
+        self.queries.append(prompt)
+
+    async def receive_response(self):
+        yield "cleared"
+
+    async def get_mcp_status(self):
+        if self.mcp_servers is None:
+            raise ConnectionError("CLI exited")
+        return {"mcpServers": self.mcp_servers}
+
+    async def reconnect_mcp_server(self, name):
+        self.reconnected.append(name)
+
+
+@pytest.fixture
+def now(monkeypatch):
+    clock = [1000.0]
+    monkeypatch.setattr(session_pool, "time", SimpleNamespace(monotonic=lambda: clock[0]))
+    monkeypatch.setattr(session_pool, "ClaudeSDKClient", FakeSDKClient)
+    FakeSDKClient.created = []
+    return clock
+
+
+async def test_released_session_cleared_and_reused(now):
+    pool = SessionPool(options=None, size=2)
+
+    first = await pool.acquire()
+    await pool.release(first)
+    second = await pool.acquire()
+
+    assert second is first
+    assert first.client.queries == ["/clear"]
+    assert (pool.created, pool.reused) == (1, 1)
+
+
+async def test_acquire_waits_when_pool_full(now):
+    pool = SessionPool(options=None, size=1)
+    session = await pool.acquire()
+
+    waiting = asyncio.create_task(pool.acquire())
+    await asyncio.sleep(0.01)
+    assert not waiting.done()
+
+    await pool.release(session)
+    assert await asyncio.wait_for(waiting, timeout=1) is session
+    assert len(FakeSDKClient.created) == 1
+
+
+async def test_unreusable_session_discarded(now):
+    pool = SessionPool(options=None, size=1)
+    session = await pool.acquire()
+
+    await pool.release(session, reusable=False)
+    replacement = await pool.acquire()
+
+    assert not session.client.connected
+    assert replacement is not session
+    assert pool.discarded == 1
+
+
+async def test_recycled_after_max_uses(now):
+    pool = SessionPool(options=None, size=1, max_uses=2)
+    session = await pool.acquire()
+    await pool.release(session)
+    assert await pool.acquire() is session
+
+    await pool.release(session)
+
+    assert not session.client.connected
+    assert await pool.acquire() is not session
+
+
+async def test_failed_reset_discards_session(now):
+    pool = SessionPool(options=None, size=1)
+    session = await pool.acquire()
+    session.client.reset_error = ConnectionError("broken pipe")
+
+    await pool.release(session)
+
+    assert not session.client.connected
+    assert await pool.acquire() is not session
+
+
+async def test_idle_session_health_checked(now):
+    pool = SessionPool(options=None, size=1, healthcheck_interval=60)
+    session = await pool.acquire()
+    await pool.release(session)
+    session.client.mcp_servers = [
+        {"name": "docs", "status": "failed"},
+        {"name": "search", "status": "connected"},
+    ]
+
+    # 间隔内不检查
+    now[0] += 30
+    assert await pool.acquire() is session
+    assert session.client.reconnected == []
+    await pool.release(session)
+
+    # 空闲超过间隔：检查并重连失败的 MCP 服务
+    now[0] += 61
+    assert await pool.acquire() is session
+    assert session.client.reconnected == ["docs"]
+    await pool.release(session)
+
+    # 检查失败：断开并新建
+    session.client.mcp_servers = None
+    now[0] += 61
+    replacement = await pool.acquire()
+    assert replacement is not session
+    assert not session.client.connected
+
+
+async def test_warm_and_close(now):
+    pool = SessionPool(options=None, size=3)
+
+    await pool.warm(count=2)
+    assert pool.created == 2
+    assert all(client.connected for client in FakeSDKClient.created)
+
+    await pool.close()
+    assert not any(client.connected for client in FakeSDKClient.created)
+    with pytest.raises(RuntimeError, match="closed"):
+        await pool.acquire()
@@ -0,0 +1,117 @@
+"""多进程分片测试 - 任务分发、结果汇总，以及分片异常退出时未完成任务记为失败"""
+
+import asyncio
+import queue
+from types import SimpleNamespace
+
+import pytest
+
+from src.config import Config
+from src.models import SkillResult, SkillSpec
+from src.orchestrator import SkillFactoryOrchestrator
+
+
+class FakeShard:
+    """代替 multiprocessing.Process 的分片进程状态"""
+
+    def __init__(self, index: int, alive: bool = True, exitcode=None):
+        self.name = f"skillfactory-shard-{index}"
+        self.alive = alive
+        self.exitcode = exitcode
+
+    def is_alive(self) -> bool:
+        return self.alive
+
+
+def spec(name: str) -> SkillSpec:
+    return SkillSpec(name=name, keyword=name, description=f"{name} skill")
+
+
+def result(name: str) -> SkillResult:
+    return SkillResult(skill_name=name, status="success", skill_dir="", skill_file="")
+
+
+@pytest.fixture
+def orchestrator(monkeypatch, tmp_path):
+    monkeypatch.setattr(Config, "DATA_DIR", tmp_path)
+    monkeypatch.setattr(Config, "SKILLS_DIR", tmp_path / "skills")
+    orchestrator = SkillFactoryOrchestrator(max_concurrent=2)
+    orchestrator.docs_prefetcher = None
+    orchestrator.recorded = []
+    orchestrator.results_stream = SimpleNamespace(append=orchestrator.recorded.append)
+    return orchestrator
+
+
+def test_dispatch_prefers_least_loaded_live_shard(orchestrator):
+    shards = [FakeShard(0), FakeShard(1), FakeShard(2, alive=False)]
+    task_queues = [queue.Queue(maxsize=1) for _ in shards]
+    outstanding = [{"x": spec("x")}, {}, {}]
+
+    assert orchestrator._dispatch(spec("a"), task_queues, shards, outstanding)
+    assert list(outstanding[1]) == ["a"]
+    # 分片 1 的队列已满，退到分片 0；已退出的分片 2 不会收到任务
+    assert orchestrator._dispatch(spec("b"), task_queues, shards, outstanding)
+    assert list(outstanding[0]) == ["x", "b"]
+    assert not orchestrator._dispatch(spec("c"), task_queues, shards, outstanding)
+    assert task_queues[2].empty()
+
+
+async def test_feed_fails_when_all_shards_exited(orchestrator):
+    shards = [FakeShard(0, alive=False)]
+
+    with pytest.raises(RuntimeError, match="all shard processes exited"):
+        await orchestrator._feed_shards([queue.Queue()], iter([spec("a")]), shards, [{}])
+
+
+async def test_collect_records_results_and_end_markers(orchestrator):
+    shards = [FakeShard(0), FakeShard(1)]
+    outstanding = [{"a": spec("a")}, {"b": spec("b"), "c": spec("c")}]
+    results = queue.Queue()
+    for item in (result("a"), 0, result("b"), 1):
+        results.put(item)
+
+    await orchestrator._collect_shards(results, shards, outstanding)
+
+    # c 在分片 1 结束时仍未返回结果，记为失败而不是从结果流中消失
+    assert [(r.skill_name, r.status) for r in orchestrator.recorded] == [
+        ("a", "success"),
+        ("b", "success"),
+        ("c", "failed"),
+    ]
+    assert "shard stopped" in orchestrator.recorded[-1].error_log
+    assert outstanding == [{}, {}]
+
+
+async def test_killed_shard_tasks_recorded_as_failed(orchestrator):
+    # 被强制终止的分片不会发送结束标记，只能从退出码发现
+    shards = [FakeShard(0, alive=False, exitcode=-9)]
+    outstanding = [{"a": spec("a"), "b": spec("b")}]
+
+    await asyncio.wait_for(
+        orchestrator._collect_shards(queue.Queue(), shards, outstanding), timeout=5
+    )
+
+    assert [(r.skill_name, r.status) for r in orchestrator.recorded] == [
+        ("a", "failed"),
+        ("b", "failed"),
+    ]
+    assert "exit code -9" in orchestrator.recorded[0].error_log
+    assert orchestrator.status_counts["failed"] == 2
+
+
+async def test_shard_runs_tasks_until_end_marker(orchestrator):
+    task_queue = queue.Queue()
+    for name in ("a", "b", "c"):
+        task_queue.put(spec(name))
+    task_queue.put(None)
+    task_queue.put(spec("after-end"))
+    ran = []
+
+    async def run_and_record(skill_spec):
+        ran.append(skill_spec.name)
+
+    orchestrator._run_and_record = run_and_record
+    await asyncio.wait_for(orchestrator._run_shard(task_queue), timeout=5)
+
+    assert sorted(ran) == ["a", "b", "c"]
+    assert task_queue.get_nowait().name == "after-end"
@@ -0,0 +1,102 @@
+"""静态预检测试 - 语法错误是 error，未声明的依赖只是 warning"""
+
+from src.utils.static_check import check_javascript, check_python, static_check
+
+
+def test_python_syntax_error():
+    result = check_python("def main(:\n    pass\n", "")
+    assert result.error is not None
+    assert 'File "demo.py", line 1' in result.error
+    assert "SyntaxError" in result.error
+
+
+def test_python_compile_time_error():
+    # 能解析为 AST、但编译阶段才报错的代码
+    result = check_python("def main():\n    return\nreturn 1\n", "")
+    assert result.error is not None
+
+
+def test_python_declared_imports():
+    code = "\n".join(
+        [
+            "import os",
+            "import yaml",
+            "from dateutil import parser",
+            "import google.cloud.storage",
+            "from . import sibling",
+            "try:",
+            "    import ujson",
+            "except ImportError:",
+            "    ujson = None",
+        ]
+    )
+    requirements = "PyYAML>=6\npython-dateutil  # 日期解析\ngoogle-cloud-storage==2.*\n"
+    result = check_python(code, requirements)
+    assert result.error is None
+    assert result.warnings == []
+
+
+def test_python_undeclared_import_is_warning():
+    result = check_python("import requests\nimport httpx\n", "httpx\n")
+    assert result.error is None
+    assert len(result.warnings) == 1
+    assert "'requests'" in result.warnings[0]
+    assert "line 1" in result.warnings[0]
+
+
+def test_python_unparseable_requirements_skip_dependency_check():
+    result = check_python("import mypkg\n", "git+https://example.com/mypkg.git\n")
+    assert result.error is None
+    assert result.warnings == []
+
+    result = check_python("import mypkg\n", "git+https://example.com/x.git#egg=mypkg\n")
+    assert result.warnings == []
+
+
+def test_javascript_invalid_package_json():
+    assert "invalid JSON" in check_javascript("", "{").error
+    assert "must be an object" in check_javascript("", "[]").error
+    assert '"dependencies"' in check_javascript("", '{"dependencies": ["express"]}').error
+
+
+def test_javascript_imports():
+    code = "\n".join(
+        [
+            "const fs = require('fs');",
+            "const express = require('express');",
+            "import { z } from 'zod';",
+            "import chalk from 'node:process';",
+            "import '@scope/pkg/register';",
+            "import local from './local';",
+            "// const hidden = require('commented-out');",
+            "const lazy = await import('lodash');",
+        ]
+    )
+    manifest = '{"dependencies": {"express": "^4", "@scope/pkg": "1"}, "devDependencies": {"zod": "3"}}'
+    result = check_javascript(code, manifest)
+    assert result.error is None
+    assert result.warnings == [
+        "'lodash' is imported in demo.js but not declared in package.json"
+    ]
+
+
+def test_typescript_type_only_imports_are_ignored():
+    code = "\n".join(
+        [
+            "import type { Request } from 'express';",
+            "import { type Schema, type Infer } from 'schema-lib';",
+            "export type { Options } from 'options-lib';",
+            "import { type Config, load } from 'config-lib';",
+        ]
+    )
+    result = static_check(code, '{"dependencies": {}}', "typescript", "demo.ts")
+    assert result.error is None
+    assert result.warnings == [
+        "'config-lib' is imported in demo.ts but not declared in package.json"
+    ]
+
+
+def test_unknown_language_has_no_checks():
+    result = static_check("this is not code", "", "go", "main.go")
+    assert result.error is None
+    assert result.warnings == []
@@ -0,0 +1,107 @@
+"""流式任务清单测试 - 按行惰性读取、有界队列背压，以及结果流压缩为 JSON 汇总"""
+
+import asyncio
+import json
+import logging
+
+import pytest
+
+from src.config import Config
+from src.models import SkillResult, SkillSpec
+from src.orchestrator import SkillFactoryOrchestrator, iter_skills_todo
+from src.results_stream import ResultsStream, compact_run, iter_run_results
+
+
+def todo_line(name: str) -> str:
+    return json.dumps({"name": name, "keyword": name, "description": f"{name} skill"})
+
+
+def result(name: str) -> SkillResult:
+    return SkillResult(skill_name=name, status="success", skill_dir="", skill_file="")
+
+
+def test_jsonl_read_lazily(tmp_path, caplog):
+    path = tmp_path / "skills_todo.jsonl"
+    lines = ["# comment", "", todo_line("a"), "{broken", todo_line("b")]
+    path.write_text("\n".join(lines) + "\n", encoding="utf-8")
+
+    with caplog.at_level(logging.WARNING, logger="skillfactory"):
+        todos = iter_skills_todo(path)
+        assert next(todos).name == "a"
+        # 格式错误的行还没有被读到
+        assert not caplog.records
+        assert [spec.name for spec in todos] == ["b"]
+
+    assert "skills_todo.jsonl:4" in caplog.records[0].getMessage()
+
+
+def test_legacy_json_and_missing_file(tmp_path):
+    path = tmp_path / "skills_todo.json"
+    path.write_text(json.dumps({"skills": [json.loads(todo_line("a"))]}), encoding="utf-8")
+
+    assert [spec.name for spec in iter_skills_todo(path)] == ["a"]
+    assert list(iter_skills_todo(tmp_path / "missing.jsonl")) == []
+
+
+@pytest.fixture
+def orchestrator(monkeypatch, tmp_path):
+    monkeypatch.setattr(Config, "DATA_DIR", tmp_path)
+    orchestrator = SkillFactoryOrchestrator(max_concurrent=2)
+    orchestrator.docs_prefetcher = None
+    return orchestrator
+
+
+async def test_producer_bounded_by_queue(orchestrator):
+    pulled = []
+    started = []
+    gate = asyncio.Event()
+
+    def todos():
+        for i in range(100):
+            pulled.append(i)
+            yield SkillSpec(name=f"skill-{i}", keyword="k", description="d")
+
+    async def run_and_record(spec):
+        started.append(spec.name)
+        await gate.wait()
+
+    orchestrator._run_and_record = run_and_record
+    slots = orchestrator.worker_slots
+    queue = asyncio.Queue(maxsize=slots)
+    tasks = [
+        asyncio.create_task(orchestrator._produce(queue, todos(), slots)),
+        *[asyncio.create_task(orchestrator._consume(queue)) for _ in range(slots)],
+    ]
+    await asyncio.sleep(0.05)
+
+    # 执行中 slots 个、队列中 slots 个、生产者手上等待放入的 1 个
+    assert len(started) == slots
+    assert len(pulled) == slots * 2 + 1
+
+    gate.set()
+    await asyncio.wait_for(asyncio.gather(*tasks), timeout=5)
+    assert len(started) == 100
+
+
+def test_compact_run_streams_one_run(tmp_path):
+    path = tmp_path / "results_stream.jsonl"
+    old = ResultsStream(path)
+    old.open(total=1)
+    old.append(result("old"))
+    old.close()
+    stream = ResultsStream(path)
+    stream.open(total=2)
+    stream.append(result("a"))
+    stream.append(result("b"))
+    stream.close()
+    out_path = tmp_path / "results_log.json"
+
+    count = compact_run(path, stream.run_id, out_path, "2026-01-01T00:00:00")
+
+    data = json.loads(out_path.read_text(encoding="utf-8"))
+    assert count == 2
+    assert data["generated_at"] == "2026-01-01T00:00:00"
+    assert [r["skill_name"] for r in data["results"]] == ["a", "b"]
+    assert "run_id" not in data["results"][0]
+    assert list(iter_run_results(tmp_path / "missing.jsonl", stream.run_id)) == []
+    assert not list(tmp_path.glob(".results_log.json.*"))
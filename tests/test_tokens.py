@@ -0,0 +1,52 @@
+"""TokenEstimator 测试 - 估算和按预算截断"""
+
+from src.utils.tokens import TokenEstimator, get_estimator, heuristic_count
+
+
+def word_estimator() -> TokenEstimator:
+    """按空白分词计数，便于精确断言截断结果"""
+    return TokenEstimator(lambda text: len(text.split()))
+
+
+def test_heuristic_count():
+    assert heuristic_count("") == 0
+    assert heuristic_count("hi there") == 2
+    assert heuristic_count("你好世界") == 4
+    # 长单词按 6 字符/token 拆分
+    assert heuristic_count("a" * 13) == 3
+
+
+def test_truncate_returns_text_within_budget():
+    estimator = word_estimator()
+    assert estimator.truncate("one two three", 3, marker="[cut]") == "one two three"
+
+
+def test_truncate_keeps_head_on_line_boundaries():
+    estimator = word_estimator()
+    text = "a b\nc d\ne f\n"
+    assert estimator.truncate(text, 5, marker="[cut]") == "a b\nc d\n\n[cut]"
+    assert estimator.count(estimator.truncate(text, 5, marker="[cut]")) <= 5
+
+
+def test_truncate_keeps_tail():
+    estimator = word_estimator()
+    text = "first line\nsecond line\nTraceback: error\n"
+    result = estimator.truncate(text, 3, marker="...", keep="tail")
+    assert result == "...\nTraceback: error\n"
+
+
+def test_truncate_cuts_single_long_line():
+    estimator = TokenEstimator(len)
+    assert estimator.truncate("abcdefghij", 4) == "abcd"
+    assert estimator.truncate("abcdefghij", 4, keep="tail") == "ghij"
+
+
+def test_truncate_with_budget_smaller_than_marker():
+    estimator = word_estimator()
+    assert estimator.truncate("a b c", 1, marker="[truncated output]") == "\n\n[truncated output]"
+
+
+def test_get_estimator_falls_back_on_bad_plugin():
+    estimator = get_estimator("no_such_module_for_tests:count")
+    assert estimator.name == "heuristic"
+    assert estimator.count("hi there") == 2
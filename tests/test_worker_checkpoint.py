@@ -0,0 +1,146 @@
+"""断点续跑测试 - 每轮结束后持久化，--resume 时跳过已完成的轮次并带上研究笔记"""
+
+import json
+
+import pytest
+
+from conftest import NOTES, failure
+from src.config import Config
+from src.worker import (
+    CHECKPOINT_FILE,
+    RESEARCH_NOTES_FILE,
+    ROUND_DISTILL,
+    ROUND_DRAFTING,
+    ROUND_FIX,
+    ROUND_RESEARCH,
+    ROUND_TEST,
+)
+
+
+def load_checkpoint() -> dict:
+    path = Config.SKILLS_DIR / "skill-demo" / CHECKPOINT_FILE
+    return json.loads(path.read_text(encoding="utf-8"))
+
+
+async def test_checkpoint_written_after_each_round(fake_worker):
+    fake_worker.crash = {ROUND_DRAFTING}
+
+    with pytest.raises(RuntimeError):
+        await fake_worker.make().run()
+
+    checkpoint = load_checkpoint()
+    assert checkpoint["completed_rounds"] == [ROUND_RESEARCH]
+    notes_file = Config.SKILLS_DIR / "skill-demo" / RESEARCH_NOTES_FILE
+    assert checkpoint["research_notes"] == str(notes_file)
+    assert notes_file.read_text(encoding="utf-8") == NOTES
+
+
+async def test_resume_skips_completed_rounds_and_seeds_notes(fake_worker):
+    fake_worker.crash = {ROUND_DRAFTING}
+    with pytest.raises(RuntimeError):
+        await fake_worker.make().run()
+
+    fake_worker.crash = set()
+    fake_worker.rounds = []
+    result = await fake_worker.make(resume=True).run()
+
+    assert result.status == "success"
+    assert fake_worker.kinds == [ROUND_DRAFTING, ROUND_DISTILL]
+    # 续跑是新的会话，不含之前的对话，研究笔记附在 Prompt 中
+    assert NOTES in fake_worker.prompt(ROUND_DRAFTING)
+    checkpoint = load_checkpoint()
+    assert checkpoint["completed_rounds"] == [
+        ROUND_RESEARCH,
+        ROUND_DRAFTING,
+        ROUND_TEST,
+        ROUND_DISTILL,
+    ]
+    assert checkpoint["status"] == "success"
+
+
+async def test_without_resume_starts_over(fake_worker):
+    fake_worker.crash = {ROUND_DRAFTING}
+    with pytest.raises(RuntimeError):
+        await fake_worker.make().run()
+
+    fake_worker.crash = set()
+    fake_worker.rounds = []
+    await fake_worker.make().run()
+
+    assert fake_worker.kinds[0] == ROUND_RESEARCH
+
+
+async def test_resume_continues_from_last_recorded_attempt(fake_worker):
+    # 第 1 次验证失败并修复，第 2 次验证时中断
+    fake_worker.results = [failure(), RuntimeError("interrupted")]
+    with pytest.raises(RuntimeError):
+        await fake_worker.make().run()
+
+    checkpoint = load_checkpoint()
+    assert checkpoint["attempts"] == 1
+    assert checkpoint["last_result"]["exit_code"] == 1
+    assert checkpoint["last_error"] == "AssertionError"
+
+    fake_worker.rounds = []
+    fake_worker.attempts = []
+    result = await fake_worker.make(resume=True).run()
+
+    assert fake_worker.attempts == [2]
+    assert fake_worker.kinds == [ROUND_DISTILL]
+    assert result.status == "success"
+    assert load_checkpoint()["attempts"] == 2
+
+
+async def test_interrupted_fix_is_retested(fake_worker):
+    # 修复轮次中断时不记录本次尝试，续跑时重新测试并修复
+    fake_worker.results = [failure()]
+    fake_worker.crash = {ROUND_FIX}
+    with pytest.raises(RuntimeError):
+        await fake_worker.make().run()
+    assert load_checkpoint()["attempts"] == 0
+
+    fake_worker.crash = set()
+    fake_worker.attempts = []
+    await fake_worker.make(resume=True).run()
+
+    assert fake_worker.attempts == [1]
+
+
+async def test_timed_out_round_not_marked_complete(fake_worker):
+    fake_worker.fail = {ROUND_RESEARCH}
+    fake_worker.crash = {ROUND_DRAFTING}
+    with pytest.raises(RuntimeError):
+        await fake_worker.make().run()
+
+    assert load_checkpoint()["completed_rounds"] == []
+
+    fake_worker.fail = set()
+    fake_worker.crash = set()
+    fake_worker.rounds = []
+    await fake_worker.make(resume=True).run()
+
+    assert fake_worker.kinds[0] == ROUND_RESEARCH
+
+
+async def test_completed_skill_not_rerun(fake_worker):
+    await fake_worker.make().run()
+
+    fake_worker.rounds = []
+    fake_worker.attempts = []
+    result = await fake_worker.make(resume=True).run()
+
+    assert fake_worker.rounds == []
+    assert fake_worker.attempts == []
+    assert result.status == "success"
+    assert (Config.SKILLS_DIR / "skill-demo.skill").exists()
+
+
+async def test_unreadable_checkpoint_ignored(fake_worker):
+    skill_dir = Config.SKILLS_DIR / "skill-demo"
+    skill_dir.mkdir(parents=True)
+    (skill_dir / CHECKPOINT_FILE).write_text("{not json", encoding="utf-8")
+
+    result = await fake_worker.make(resume=True).run()
+
+    assert fake_worker.kinds[0] == ROUND_RESEARCH
+    assert result.status == "success"